@@ -13,7 +13,6 @@ import os
 import sys
 
 import joblib
-import numpy as np
 import torch
 from ssl_feature_utils import (
     ESPnetHubertFeatureReader,
@@ -24,6 +23,7 @@ from ssl_feature_utils import (
     format_feature_conf_str,
 )
 
+from espnet2.hubert.kmeans import assign_labels
 from espnet2.utils.types import str2bool
 from espnet.utils.cli_readers import file_reader_helper
 from espnet.utils.cli_writers import file_writer_helper
@@ -111,12 +111,8 @@ class ApplyKmeans(object):
             )
             return dist.argmin(dim=1).cpu().numpy()
         else:
-            dist = (
-                (x**2).sum(1, keepdims=True)
-                - 2 * np.matmul(x, self.C_np)
-                + self.Cnorm_np
-            )
-            return np.argmin(dist, axis=1)
+            # Blocked over frames to bound the (frames, clusters) distance matrix
+            return assign_labels(x, self.C_np.T, self.Cnorm_np[0])[0]
 
 
 def dump_label(
@@ -0,0 +1,157 @@
+# Learn the k-means model on features extracted on the fly, so that the
+# features of the training subset do not have to be dumped on disk.
+
+import argparse
+import logging
+import os
+import sys
+
+import joblib
+from ssl_feature_utils import (
+    ESPnetHubertFeatureReader,
+    HubertFeatureReader,
+    MfccFeatureReader,
+    S3PRLFeatureReader,
+    build_data_iterator,
+    format_feature_conf_str,
+)
+
+from espnet2.hubert.kmeans import StreamingKMeans, iterate_minibatches
+from espnet2.utils.types import str2bool
+
+logging.basicConfig(
+    format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+    level=os.environ.get("LOGLEVEL", "INFO").upper(),
+    stream=sys.stdout,
+)
+logger = logging.getLogger("learn_kmeans_online")
+
+
+feature_reader_choice = dict(
+    mfcc=MfccFeatureReader,
+    fairseq_hubert=HubertFeatureReader,
+    espnet_hubert=ESPnetHubertFeatureReader,
+    s3prl=S3PRLFeatureReader,
+)
+
+
+def get_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--km_path", type=str, required=True)
+    parser.add_argument("--n_clusters", type=int, required=True)
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument("--batch_size", default=10000, type=int)
+    parser.add_argument("--n_init", default=20, type=int)
+    parser.add_argument(
+        "--num_epochs",
+        default=1,
+        type=int,
+        help="Number of passes over the data, the features are extracted each pass",
+    )
+    parser.add_argument(
+        "--buffer_size",
+        default=100000,
+        type=int,
+        help="Number of frames shuffled together",
+    )
+    parser.add_argument("--use_gpu", type=str2bool, default=False)
+    parser.add_argument("--feature_conf", type=str, required=True)
+    parser.add_argument("--batch_bins", type=int, default=1)
+    parser.add_argument(
+        "--utt2num_samples",
+        type=str,
+        required=True,
+        help="Specify the utt2num_samples file.",
+    )
+    parser.add_argument(
+        "--in_filetype",
+        type=str,
+        default="sound",
+        choices=["sound", "kaldi_ark"],
+        help="Specify the file format for the rspecifier.",
+    )
+    parser.add_argument(
+        "--audio_sample_rate",
+        type=int,
+        default=16000,
+        help="input audio sampling rate (could be different from fs used in SSL)",
+    )
+    parser.add_argument(
+        "rspecifier", type=str, help="Read specifier for audio. e.g. scp:wav.scp"
+    )
+
+    return parser
+
+
+def extract_features(reader, iterator):
+    for utt_ids, data in iterator:
+        feats, feats_lens = reader.get_feats(data["speech"], data["speech_lengths"])
+        for idx in range(len(utt_ids)):
+            yield feats[idx][: feats_lens[idx]].cpu().numpy()
+
+
+def learn_kmeans_online(
+    rspecifier,
+    in_filetype,
+    audio_sample_rate,
+    km_path,
+    n_clusters,
+    seed,
+    batch_size,
+    n_init,
+    num_epochs,
+    buffer_size,
+    use_gpu,
+    feature_conf,
+    batch_bins,
+    utt2num_samples,
+):
+    # need to wrap arguments with double-quotes for json string
+    feature_conf = format_feature_conf_str(feature_conf)
+    assert feature_conf["type"] in feature_reader_choice
+    reader_class = feature_reader_choice[feature_conf["type"]]
+    reader_conf = feature_conf.get("conf", dict())
+
+    if reader_conf.get("multilayer_feature", None):
+        reader_conf["multilayer_feature"] = str2bool(reader_conf["multilayer_feature"])
+    if reader_conf.get("layer", None):
+        reader_conf["layer"] = int(reader_conf["layer"])
+    reader_conf["audio_sample_rate"] = audio_sample_rate
+    reader = reader_class(use_gpu=use_gpu, **reader_conf)
+
+    km_model = StreamingKMeans(
+        n_clusters=n_clusters,
+        init_size=max(3 * n_clusters, batch_size),
+        n_init=n_init,
+        seed=seed,
+    )
+
+    for epoch in range(num_epochs):
+        iterator = build_data_iterator(
+            rspecifier,
+            in_filetype,
+            utt2num_samples=utt2num_samples,
+            batch_bins=batch_bins,
+        )
+        feats = extract_features(reader, iterator)
+        for batch in iterate_minibatches(
+            feats, batch_size, buffer_size, seed=seed + epoch
+        ):
+            km_model.partial_fit(batch)
+        km_model.finalize()
+        logger.info(
+            f"epoch {epoch + 1}: {km_model.n_steps_} steps, "
+            f"{km_model.counts_.sum()} frames"
+        )
+
+    joblib.dump(km_model, km_path)
+    logger.info("finished successfully")
+
+
+if __name__ == "__main__":
+    parser = get_parser()
+    args = parser.parse_args()
+    logging.info(str(args))
+
+    learn_kmeans_online(**vars(args))
@@ -16,6 +16,12 @@ import joblib
 import numpy as np
 from sklearn.cluster import MiniBatchKMeans
 
+from espnet2.hubert.kmeans import (
+    StreamingKMeans,
+    iterate_minibatches,
+    read_feature_shards,
+)
+from espnet2.utils.types import str2bool
 from espnet.utils.cli_readers import file_reader_helper
 
 logging.basicConfig(
@@ -42,14 +48,34 @@ def get_parser():
     parser.add_argument("--max_no_improvement", default=100, type=int)
     parser.add_argument("--n_init", default=20, type=int)
     parser.add_argument("--reassignment_ratio", default=0.0, type=float)
+    parser.add_argument(
+        "--streaming",
+        default=False,
+        type=str2bool,
+        help="Fit the k-means incrementally on streamed minibatches, "
+        "instead of loading all the features in memory",
+    )
+    parser.add_argument(
+        "--num_epochs",
+        default=1,
+        type=int,
+        help="Number of passes over the features in the streaming mode",
+    )
+    parser.add_argument(
+        "--buffer_size",
+        default=100000,
+        type=int,
+        help="Number of frames shuffled together in the streaming mode",
+    )
 
     parser.add_argument(
         "--in_filetype",
         type=str,
         default="sound",
-        choices=["mat", "hdf5", "sound.hdf5", "sound"],
+        choices=["mat", "hdf5", "sound.hdf5", "sound", "npy"],
         help="Specify the file format for the rspecifier. "
-        '"mat" is the matrix format in kaldi',
+        '"mat" is the matrix format in kaldi, '
+        '"npy" is a (frames, dim) array memory-mapped in the streaming mode',
     )
     parser.add_argument(
         "rspecifier",
@@ -124,6 +150,48 @@ def load_feature(rspecifiers, in_filetype, percent):
     return feat
 
 
+def learn_kmeans_streaming(
+    rspecifier,
+    in_filetype,
+    km_path,
+    n_clusters,
+    seed,
+    percent,
+    batch_size,
+    n_init,
+    num_epochs,
+    buffer_size,
+):
+    km_model = StreamingKMeans(
+        n_clusters=n_clusters,
+        init_size=max(3 * n_clusters, batch_size),
+        n_init=n_init,
+        seed=seed,
+    )
+
+    for epoch in range(num_epochs):
+        # Only one minibatch (or shuffle buffer) is held in memory at a time
+        feats = read_feature_shards(rspecifier, in_filetype, percent, seed=seed)
+        for batch in iterate_minibatches(
+            feats, batch_size, buffer_size, seed=seed + epoch
+        ):
+            km_model.partial_fit(batch)
+        km_model.finalize()
+        logger.info(
+            f"epoch {epoch + 1}: {km_model.n_steps_} steps, "
+            f"{km_model.counts_.sum()} frames"
+        )
+
+    joblib.dump(km_model, km_path)
+
+    score, num_frames = 0.0, 0
+    for feat in read_feature_shards(rspecifier, in_filetype, percent, seed=seed):
+        score += km_model.score(feat)
+        num_frames += len(feat)
+    logger.info("total intertia: %.5f", -score / num_frames)
+    logger.info("finished successfully")
+
+
 def learn_kmeans(
     rspecifier,
     in_filetype,
@@ -138,8 +206,25 @@ def learn_kmeans(
     n_init,
     reassignment_ratio,
     max_no_improvement,
+    streaming,
+    num_epochs,
+    buffer_size,
 ):
     np.random.seed(seed)
+    if streaming:
+        return learn_kmeans_streaming(
+            rspecifier,
+            in_filetype,
+            km_path,
+            n_clusters,
+            seed,
+            percent,
+            batch_size,
+            n_init,
+            num_epochs,
+            buffer_size,
+        )
+
     feat = load_feature(rspecifier, in_filetype, percent)
     km_model = get_km_model(
         n_clusters,
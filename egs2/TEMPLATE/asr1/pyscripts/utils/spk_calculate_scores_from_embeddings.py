@@ -5,6 +5,8 @@ from collections import OrderedDict
 import numpy as np
 import torch
 
+from espnet2.spk.scoring import build_trial_index, score_trials
+
 
 def load_embeddings(embd_dir: str) -> dict:
     embd_dic = OrderedDict(np.load(embd_dir))
@@ -30,20 +32,12 @@ def main(args):
     trial_ids = [line.strip().split(" ")[0] for line in lines]
     labels = [int(line.strip().split(" ")[1]) for line in lines]
 
-    enrolls = [trial.split("*")[0] for trial in trial_ids]
-    tests = [trial.split("*")[1] for trial in trial_ids]
-    assert len(enrolls) == len(tests) == len(labels)
-
-    scores = []
-    for e, t in zip(enrolls, tests):
-        enroll = torch.from_numpy(embd_dic[e])
-        test = torch.from_numpy(embd_dic[t])
-        if len(enroll.size()) == 1:
-            enroll = enroll.unsqueeze(0)
-            test = enroll.unsqueeze(0)
-        score = torch.cdist(enroll, test)
-        score = -1.0 * torch.mean(score)
-        scores.append(score.item())
+    # Stack the embeddings into a matrix to score the trials in batches
+    utt2idx = {k: i for i, k in enumerate(embd_dic)}
+    embds = torch.from_numpy(np.stack(list(embd_dic.values())))
+    enroll_index, test_index = build_trial_index(trial_ids, utt2idx)
+    assert len(enroll_index) == len(test_index) == len(labels)
+    scores = score_trials(embds, enroll_index, test_index).tolist()
 
     if not os.path.exists(os.path.dirname(out_dir)):
         os.makedirs(os.path.dirname(out_dir))
@@ -38,6 +38,8 @@ nclusters=100       # Number of clusters of kmeans model
 portion=0.1         # Portion of data from training set used to train kmeans model
 storage_save_mode=false     # Save storage on SSL feature extraction
                             # If true, feature extraction and kmeans clustering on the fly
+streaming_kmeans=false      # Fit kmeans incrementally on streamed minibatches to bound the memory
+                            # With storage_save_mode, the training features are not dumped either
 
 feature_conf=       # feature configuration in json string format
 feature_type=mfcc   # mfcc / fairseq_hubert / espnet_hubert
@@ -118,6 +120,11 @@ if [ ${stage} -le 1 ] && [ ${stop_stage} -ge 1 ] && ! [[ " ${skip_stages} " =~ [
         utils/filter_scp.pl ${datadir}/${_dsets}/utt2spk \
             <${datadir}/${train_set}/utt2num_samples >${datadir}/${_dsets}/utt2num_samples
         log "Subsampling ${portion_nutt} utterances for feature dumping."
+
+        if ${streaming_kmeans}; then
+            # The features are extracted on the fly while learning kmeans
+            _dsets=
+        fi
     else
         _dsets="${train_set} ${other_sets} ${dev_set}"
     fi
@@ -190,27 +197,54 @@ if [ ${stage} -le 2 ] && [ ${stop_stage} -ge 2 ] && ! [[ " ${skip_stages} " =~ [
         _dset="${train_set}"
     fi
 
-    # select portion of data
-    if (( $(echo "${_portion} >= 1.0" | bc -l) )); then
-        cp "${featdir}/${feature_type}/${suffix}${_dset}"/feats.scp "${km_dir}/train.scp"
+    if ${streaming_kmeans} && ${storage_save_mode}; then
+        if ${use_gpu}; then
+            _cmd="${cuda_cmd} --gpu 1"
+        else
+            _cmd="${cpu_cmd} --num_threads ${num_threads}"
+        fi
+        if [[ "${audio_format}" == *ark* ]]; then
+            _in_filetype="kaldi_ark"
+        else
+            _in_filetype="sound"
+        fi
+
+        # Extract the features and fit kmeans in one pass, without dumping them.
+        ${_cmd} ${_logdir}/learn_kmeans.log \
+            ${python} pyscripts/feats/learn_kmeans_online.py \
+                --km_path ${km_dir}/km_${nclusters}.mdl \
+                --n_clusters ${nclusters} \
+                --feature_conf "'${feature_conf}'" \
+                --audio_sample_rate "${audio_sample_rate}" \
+                --use_gpu ${use_gpu} \
+                --in_filetype "${_in_filetype}" \
+                --utt2num_samples "${datadir}/${_dset}/utt2num_samples" \
+                ${batch_bins:+--batch_bins ${batch_bins}} \
+                "scp:${datadir}/${_dset}/wav.scp" || exit 1;
     else
-        nutt=$(<"${featdir}/${feature_type}/${suffix}${_dset}"/feats.scp wc -l)
-        portion_nutt=$(echo ${nutt} ${_portion} | awk '{print(int($1 * $2)+1)}')
+        # select portion of data
+        if (( $(echo "${_portion} >= 1.0" | bc -l) )); then
+            cp "${featdir}/${feature_type}/${suffix}${_dset}"/feats.scp "${km_dir}/train.scp"
+        else
+            nutt=$(<"${featdir}/${feature_type}/${suffix}${_dset}"/feats.scp wc -l)
+            portion_nutt=$(echo ${nutt} ${_portion} | awk '{print(int($1 * $2)+1)}')
 
-        subset_scp.pl \
-            ${portion_nutt} ${featdir}/${feature_type}/${suffix}${_dset}/feats.scp \
-            > "${km_dir}/train.scp" || exit 1;
-        log "Subsampling ${portion_nutt} utterances for Kmeans training."
-    fi
+            subset_scp.pl \
+                ${portion_nutt} ${featdir}/${feature_type}/${suffix}${_dset}/feats.scp \
+                > "${km_dir}/train.scp" || exit 1;
+            log "Subsampling ${portion_nutt} utterances for Kmeans training."
+        fi
 
-    # It typically requires 120GB RAM to run kmeans steps.
-    ${cpu_cmd} --num_threads ${num_threads} ${_logdir}/learn_kmeans.log \
-        ${python} pyscripts/utils/learn_kmeans.py \
-            --km_path ${km_dir}/km_${nclusters}.mdl \
-            --n_clusters ${nclusters} \
-            --percent -1 \
-            --in_filetype mat \
-            "scp:${km_dir}/train.scp" || exit 1;
+        # It typically requires 120GB RAM to run kmeans steps without streaming_kmeans.
+        ${cpu_cmd} --num_threads ${num_threads} ${_logdir}/learn_kmeans.log \
+            ${python} pyscripts/utils/learn_kmeans.py \
+                --km_path ${km_dir}/km_${nclusters}.mdl \
+                --n_clusters ${nclusters} \
+                --percent -1 \
+                --streaming ${streaming_kmeans} \
+                --in_filetype mat \
+                "scp:${km_dir}/train.scp" || exit 1;
+    fi
 fi
 
 
@@ -411,9 +411,14 @@ class BatchBeamSearch(BeamSearch):
                 ),
                 1,
             )
+            # NOTE: The hyps which have just selected <eos> already end with it
+            ended = (
+                running_hyps.yseq[torch.arange(n_batch), running_hyps.length - 1]
+                == self.eos
+            )
             running_hyps.yseq.resize_as_(yseq_eos)
             running_hyps.yseq[:] = yseq_eos
-            running_hyps.length[:] = yseq_eos.shape[1]
+            running_hyps.length[~ended] = yseq_eos.shape[1]
 
         # add ended hypotheses to a final list, and removed them from current hypotheses
         # (this will be a probmlem, number of hyps < beam)
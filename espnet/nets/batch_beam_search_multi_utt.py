@@ -0,0 +1,362 @@
+"""Parallel beam search module for multiple utterances."""
+
+import inspect
+import logging
+from typing import List, Optional
+
+import torch
+
+from espnet.nets.batch_beam_search import (
+    BatchBeamSearch,
+    BatchHypothesis,
+    is_torch_1_9_plus,
+)
+from espnet.nets.beam_search import Hypothesis
+from espnet.nets.e2e_asr_common import end_detect
+from espnet.nets.pytorch_backend.nets_utils import make_pad_mask
+from espnet.nets.scorers.ctc import CTCPrefixScorer
+
+logger = logging.getLogger(__name__)
+
+
+class BatchBeamSearchMultiUtt(BatchBeamSearch):
+    """Batch beam search implementation decoding several utterances at once.
+
+    The running hypotheses of all the utterances are kept in a single
+    `(n_utt * beam_size)` batch, where each utterance owns `beam_size`
+    consecutive slots. Hence every scorer is called once per output step
+    for the whole mini-batch. Slots that are not in use (e.g. at the first
+    step, after a hypothesis reached <eos>, or after an utterance finished)
+    hold a `-inf` score so that they never win the top-k selection, which
+    keeps the search of each utterance equivalent to `BatchBeamSearch`.
+
+    Full scorers whose `batch_score()` accepts an `xs_mask` keyword argument
+    receive the padding mask of the encoder output. The other ones see the
+    padded frames, so decode length-sorted mini-batches to keep them close.
+
+    """
+
+    def init_hyp(self, x: torch.Tensor, x_lens: torch.Tensor) -> BatchHypothesis:
+        """Get initial hypotheses for the mini-batch.
+
+        Args:
+            x (torch.Tensor): The padded encoder output (n_utt, T, D)
+            x_lens (torch.Tensor): The encoder output lengths (n_utt,)
+
+        Returns:
+            BatchHypothesis: The initial hypotheses with `beam_size` slots
+                per utterance, where only the first slot is active.
+
+        """
+        n_bh = x.size(0) * self.beam_size
+        init_states = dict()
+        for k, d in self.scorers.items():
+            if isinstance(d, CTCPrefixScorer):
+                init_states[k] = d.batch_init_state(x, x_lens)
+            else:
+                init_states[k] = d.batch_init_state(x)
+
+        # NOTE (Shih-Lun): added for OpenAI Whisper ASR
+        primer = [self.sos] if self.hyp_primer is None else self.hyp_primer
+
+        score = torch.zeros(n_bh, dtype=x.dtype, device=x.device)
+        score.view(-1, self.beam_size)[:, 1:] = float("-inf")
+        return BatchHypothesis(
+            yseq=torch.tensor(primer, device=x.device).repeat(n_bh, 1),
+            score=score,
+            length=torch.full((n_bh,), len(primer), dtype=torch.int64),
+            scores={
+                k: torch.zeros(n_bh, dtype=x.dtype, device=x.device)
+                for k in self.scorers
+            },
+            states={k: [init_states[k]] * n_bh for k in self.scorers},
+            hs=[],
+        )
+
+    def search(
+        self,
+        running_hyps: BatchHypothesis,
+        xs: torch.Tensor,
+        xs_mask: torch.Tensor,
+    ) -> BatchHypothesis:
+        """Search new tokens for the running hypotheses of all the utterances.
+
+        Args:
+            running_hyps (BatchHypothesis): Running hypotheses (n_utt * beam,)
+            xs (torch.Tensor): Encoder output repeated for each slot
+                (n_utt * beam, T, D)
+            xs_mask (torch.Tensor): Encoder output mask (n_utt * beam, 1, T)
+
+        Returns:
+            BatchHypothesis: `beam_size` best hypotheses per utterance
+
+        """
+        n_bh = len(running_hyps)
+        n_utt = n_bh // self.beam_size
+        part_ids = None  # no pre-beam
+        weighted_scores = torch.zeros(
+            n_bh, self.n_vocab, dtype=xs.dtype, device=xs.device
+        )
+
+        # full scoring
+        scores = dict()
+        states = dict()
+        for k, d in self.full_scorers.items():
+            if k in self._mask_aware_scorers:
+                scores[k], states[k] = d.batch_score(
+                    running_hyps.yseq, running_hyps.states[k], xs, xs_mask=xs_mask
+                )
+            else:
+                scores[k], states[k] = d.batch_score(
+                    running_hyps.yseq, running_hyps.states[k], xs
+                )
+            weighted_scores += self.weights[k] * scores[k]
+
+        # partial scoring
+        if self.do_pre_beam:
+            pre_beam_scores = (
+                weighted_scores
+                if self.pre_beam_score_key == "full"
+                else scores[self.pre_beam_score_key]
+            )
+            part_ids = torch.topk(pre_beam_scores, self.pre_beam_size, dim=-1)[1]
+        part_scores, part_states = self.score_partial(running_hyps, part_ids, xs)
+        for k in self.part_scorers:
+            weighted_scores += self.weights[k] * part_scores[k]
+        # add previous hyp scores
+        weighted_scores += running_hyps.score.unsqueeze(1)
+
+        # top-k over the (beam * vocab) candidates of each utterance
+        top_scores, top_ids = weighted_scores.view(n_utt, -1).topk(
+            self.beam_size, dim=-1
+        )
+        if is_torch_1_9_plus:
+            prev_hyp_ids = torch.div(top_ids, self.n_vocab, rounding_mode="trunc")
+        else:
+            prev_hyp_ids = top_ids // self.n_vocab
+        offsets = torch.arange(n_utt, device=top_ids.device) * self.beam_size
+        prev_hyp_ids = (prev_hyp_ids + offsets.unsqueeze(1)).view(-1)
+        new_token_ids = (top_ids % self.n_vocab).view(-1)
+
+        new_scores = {
+            k: running_hyps.scores[k][prev_hyp_ids] + v[prev_hyp_ids, new_token_ids]
+            for k, v in scores.items()
+        }
+        for k, v in part_scores.items():
+            new_scores[k] = (
+                running_hyps.scores[k][prev_hyp_ids] + v[prev_hyp_ids, new_token_ids]
+            )
+
+        prev_list = prev_hyp_ids.tolist()
+        token_list = new_token_ids.tolist()
+        new_states = {
+            k: [self.full_scorers[k].select_state(v, p) for p in prev_list]
+            for k, v in states.items()
+        }
+        for k, v in part_states.items():
+            new_states[k] = [
+                self.part_scorers[k].select_state(v, p, t)
+                for p, t in zip(prev_list, token_list)
+            ]
+
+        yseq = torch.cat(
+            (
+                running_hyps.yseq[prev_hyp_ids],
+                new_token_ids.to(running_hyps.yseq).unsqueeze(1),
+            ),
+            dim=1,
+        )
+        return BatchHypothesis(
+            yseq=yseq,
+            score=top_scores.view(-1),
+            length=running_hyps.length[prev_hyp_ids.cpu()] + 1,
+            scores=new_scores,
+            states=new_states,
+            hs=[],
+        )
+
+    def post_process(
+        self,
+        i: int,
+        maxlens: List[int],
+        minlens: List[int],
+        maxlenratio: float,
+        running_hyps: BatchHypothesis,
+        ended_hyps: List[List[Hypothesis]],
+        finished: List[bool],
+    ) -> BatchHypothesis:
+        """Perform post-processing of beam search iterations.
+
+        Hypotheses ending with <eos> are moved to `ended_hyps` and their slots
+        are deactivated. Utterances reaching their maximum length, running out
+        of hypotheses, or detected as ended are marked in `finished`.
+
+        Args:
+            i (int): The length of hypothesis tokens.
+            maxlens (List[int]): The maximum output length of each utterance.
+            minlens (List[int]): The minimum output length of each utterance.
+            maxlenratio (float): The maximum length ratio in beam search.
+            running_hyps (BatchHypothesis): The running hypotheses in beam search.
+            ended_hyps (List[List[Hypothesis]]): The ended hypotheses
+                of each utterance.
+            finished (List[bool]): Whether each utterance is finished.
+
+        Returns:
+            BatchHypothesis: The new running hypotheses.
+
+        """
+        active = torch.isfinite(running_hyps.score).tolist()
+        is_eos = (running_hyps.yseq[:, -1] == self.eos).tolist()
+        inactive_ids = []
+        for b in range(len(finished)):
+            slots = range(b * self.beam_size, (b + 1) * self.beam_size)
+            if finished[b]:
+                inactive_ids.extend(slots)
+                continue
+
+            # add eos in the final loop to avoid that there are no ended hyps
+            force_end = i == maxlens[b] - 1
+            n_running = 0
+            for j in slots:
+                if not active[j]:
+                    continue
+                if is_eos[j] or force_end:
+                    hyp = self._select(running_hyps, j)
+                    if not is_eos[j]:
+                        hyp = hyp._replace(yseq=self.append_token(hyp.yseq, self.eos))
+                    if i >= minlens[b]:
+                        ended_hyps[b].append(hyp)
+                    inactive_ids.append(j)
+                else:
+                    n_running += 1
+
+            if (
+                force_end
+                or n_running == 0
+                or (
+                    maxlenratio == 0.0
+                    and end_detect([h.asdict() for h in ended_hyps[b]], i)
+                )
+            ):
+                logger.debug(f"utterance {b} finished at {i}")
+                finished[b] = True
+                inactive_ids.extend(slots)
+
+        if len(inactive_ids) > 0:
+            # NOTE: clone since the ended hyps hold views of the scores
+            score = running_hyps.score.clone()
+            score[inactive_ids] = float("-inf")
+            running_hyps = BatchHypothesis(
+                yseq=running_hyps.yseq,
+                score=score,
+                length=running_hyps.length,
+                scores=running_hyps.scores,
+                states=running_hyps.states,
+                hs=running_hyps.hs,
+            )
+        return running_hyps
+
+    def forward(
+        self,
+        x: torch.Tensor,
+        x_lens: Optional[torch.Tensor] = None,
+        maxlenratio: float = 0.0,
+        minlenratio: float = 0.0,
+    ) -> List[List[Hypothesis]]:
+        """Perform beam search for a mini-batch of utterances.
+
+        Args:
+            x (torch.Tensor): Padded encoded speech feature (n_utt, T, D).
+                A single utterance (T, D) is also accepted; then `x_lens` is
+                ignored and its N-best list is returned directly.
+            x_lens (torch.Tensor): Lengths of the encoded features (n_utt,)
+            maxlenratio (float): Input length ratio to obtain max output length.
+                If maxlenratio=0.0 (default), it uses a end-detect function
+                to automatically find maximum hypothesis lengths
+                If maxlenratio<0.0, its absolute value is interpreted
+                as a constant max output length.
+            minlenratio (float): Input length ratio to obtain min output length.
+                If minlenratio<0.0, its absolute value is interpreted
+                as a constant min output length.
+
+        Returns:
+            list[list[Hypothesis]]: N-best decoding results of each utterance
+
+        """
+        if x.dim() == 2:
+            x_lens = torch.tensor([x.size(0)])
+            return self.forward(x.unsqueeze(0), x_lens, maxlenratio, minlenratio)[0]
+        assert not self.return_hs, "return_hs is not supported"
+        assert x_lens is not None and len(x_lens) == x.size(0), "x_lens is required"
+
+        n_utt = x.size(0)
+        lens = [int(length) for length in x_lens]
+        if maxlenratio == 0:
+            maxlens = lens
+        elif maxlenratio < 0:
+            maxlens = [-1 * int(maxlenratio)] * n_utt
+        else:
+            maxlens = [max(1, int(maxlenratio * length)) for length in lens]
+        if minlenratio < 0:
+            minlens = [-1 * int(minlenratio)] * n_utt
+        else:
+            minlens = [int(minlenratio * length) for length in lens]
+        logger.info("decoder input lengths: " + str(lens))
+        logger.info("max output lengths: " + str(maxlens))
+        logger.info("min output lengths: " + str(minlens))
+
+        self._mask_aware_scorers = {
+            k
+            for k, d in self.full_scorers.items()
+            if "xs_mask" in inspect.signature(d.batch_score).parameters
+        }
+        xs = x.repeat_interleave(self.beam_size, dim=0)
+        xs_mask = (~make_pad_mask(x_lens, maxlen=x.size(1)))[:, None, :].to(x.device)
+        xs_mask = xs_mask.repeat_interleave(self.beam_size, dim=0)
+
+        # main loop of prefix search
+        running_hyps = self.init_hyp(x, x_lens)
+        ended_hyps = [[] for _ in range(n_utt)]
+        finished = [False] * n_utt
+        for i in range(max(maxlens)):
+            logger.debug("position " + str(i))
+            best = self.search(running_hyps, xs, xs_mask)
+            running_hyps = self.post_process(
+                i, maxlens, minlens, maxlenratio, best, ended_hyps, finished
+            )
+            if all(finished):
+                logger.info(f"all utterances finished at {i}")
+                break
+
+        results = []
+        for b in range(n_utt):
+            if self.normalize_length:
+                # Note (Jinchuan): -1 since hyp starts with <sos> and
+                # initially has score of 0.0
+                nbest_hyps = sorted(
+                    ended_hyps[b],
+                    key=lambda x: x.score / (len(x.yseq) - 1),
+                    reverse=True,
+                )
+            else:
+                nbest_hyps = sorted(ended_hyps[b], key=lambda x: x.score, reverse=True)
+
+            # check the number of hypotheses reaching to eos
+            if len(nbest_hyps) == 0:
+                logger.warning(
+                    f"there is no N-best results for utterance {b}, perform "
+                    "recognition again with smaller minlenratio."
+                )
+                if minlenratio >= 0.1:
+                    nbest_hyps = self.forward(
+                        x[b, : lens[b]], None, maxlenratio, max(0.0, minlenratio - 0.1)
+                    )
+            else:
+                best = nbest_hyps[0]
+                logger.info(f"[{b}] total log probability: {best.score:.2f}")
+                logger.info(
+                    f"[{b}] normalized log probability: "
+                    f"{best.score / len(best.yseq):.2f}"
+                )
+            results.append(nbest_hyps)
+        return results
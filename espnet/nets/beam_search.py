@@ -529,7 +529,11 @@ class BeamSearch(torch.nn.Module):
         if i == maxlen - 1:
             logger.info("adding <eos> in the last position in the loop")
             running_hyps = [
-                h._replace(yseq=self.append_token(h.yseq, self.eos))
+                (
+                    h
+                    if h.yseq[-1] == self.eos
+                    else h._replace(yseq=self.append_token(h.yseq, self.eos))
+                )
                 for h in running_hyps
             ]
 
@@ -250,17 +250,23 @@ class Postnet(torch.nn.Module):
                 )
             ]
 
-    def forward(self, xs):
+    def forward(self, xs, masks=None):
         """Calculate forward propagation.
 
         Args:
             xs (Tensor): Batch of the sequences of padded input tensors (B, idim, Tmax).
+            masks (ByteTensor, optional):
+                Batch of masks indicating padded part (B, Tmax).
 
         Returns:
             Tensor: Batch of padded output tensor. (B, odim, Tmax).
 
         """
         for i in range(len(self.postnet)):
+            if masks is not None:
+                # NOTE: Zero the padded part before each convolution so that the
+                #   outputs do not depend on the padding of the batch
+                xs = xs.masked_fill(masks.unsqueeze(1), 0.0)
             xs = self.postnet[i](xs)
         return xs
 
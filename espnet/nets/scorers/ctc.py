@@ -84,18 +84,23 @@ class CTCPrefixScorer(BatchPartialScorerInterface):
         )
         return tscore, (presub_score, new_st)
 
-    def batch_init_state(self, x: torch.Tensor):
+    def batch_init_state(self, x: torch.Tensor, xlens: torch.Tensor = None):
         """Get an initial state for decoding.
 
         Args:
-            x (torch.Tensor): The encoded feature tensor
+            x (torch.Tensor): The encoded feature tensor (T, D),
+                or the padded batch of them (B, T, D) if `xlens` is given
+            xlens (torch.Tensor): The lengths of the encoded features (B,)
 
         Returns: initial state
 
         """
-        logp = self.ctc.log_softmax(x.unsqueeze(0))  # assuming batch_size = 1
-        xlen = torch.tensor([logp.size(1)])
-        self.impl = CTCPrefixScoreTH(logp, xlen, 0, self.eos)
+        if xlens is None:
+            logp = self.ctc.log_softmax(x.unsqueeze(0))  # assuming batch_size = 1
+            xlens = torch.tensor([logp.size(1)])
+        else:
+            logp = self.ctc.log_softmax(x)
+        self.impl = CTCPrefixScoreTH(logp, xlens, 0, self.eos)
         return None
 
     def batch_score_partial(self, y, ids, state, x):
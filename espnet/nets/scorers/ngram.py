@@ -1,22 +1,29 @@
 """Ngram lm implement."""
 
 from abc import ABC
+from collections import OrderedDict
 
 import kenlm
+import numpy as np
 import torch
 
-from espnet.nets.scorer_interface import BatchScorerInterface, PartialScorerInterface
+from espnet.nets.scorer_interface import (
+    BatchPartialScorerInterface,
+    BatchScorerInterface,
+)
 
 
 class Ngrambase(ABC):
     """Ngram base implemented through ScorerInterface."""
 
-    def __init__(self, ngram_model, token_list):
+    def __init__(self, ngram_model, token_list, cache_size=1024):
         """Initialize Ngrambase.
 
         Args:
             ngram_model: ngram model path
             token_list: token list from dict or model.json
+            cache_size: the maximum number of the lm states whose scores of
+                the next tokens are cached
 
         """
         self.chardict = [x if x != "<eos>" else "</s>" for x in token_list]
@@ -24,12 +31,66 @@ class Ngrambase(ABC):
         self.lm = kenlm.LanguageModel(ngram_model)
         self.tmpkenlmstate = kenlm.State()
 
+        # NOTE: The hypotheses in a beam often share the same lm state,
+        # e.g. the prefixes ending with the same (n-1) tokens,
+        # so the scores of the next tokens are cached for each state.
+        # {kenlm.State: (n_vocab,) float32 array, NaN for the unscored tokens}
+        self.cache_size = cache_size
+        self.score_cache = OrderedDict()
+
     def init_state(self, x):
         """Initialize tmp state."""
         state = kenlm.State()
         self.lm.NullContextWrite(state)
         return state
 
+    def next_state(self, y, state):
+        """Feed the last token of the prefix to the lm.
+
+        Args:
+            y: prefix tokens
+            state: previous state
+
+        Returns:
+            kenlm.State: the state after the last token of y
+
+        """
+        out_state = kenlm.State()
+        ys = self.chardict[int(y[-1])] if y.shape[0] > 1 else "<s>"
+        self.lm.BaseScore(state, ys, out_state)
+        return out_state
+
+    def score_tokens(self, state, next_token=None):
+        """Score the next tokens following the state with the cache.
+
+        Args:
+            state: lm state
+            next_token: np.ndarray of the token ids to be scored.
+                If None, all tokens are scored.
+
+        Returns:
+            np.ndarray: (n_vocab,) float32 array of the scores.
+                The tokens which are not scored yet are NaN.
+
+        """
+        row = self.score_cache.get(state)
+        if row is None:
+            row = np.full(self.charlen, np.nan, dtype=np.float32)
+            self.score_cache[state] = row
+            if len(self.score_cache) > self.cache_size:
+                self.score_cache.popitem(last=False)
+        else:
+            self.score_cache.move_to_end(state)
+
+        if next_token is None:
+            missing = np.flatnonzero(np.isnan(row))
+        else:
+            missing = next_token[np.isnan(row[next_token])]
+        if len(missing) > 0:
+            score, chardict, tmp = self.lm.BaseScore, self.chardict, self.tmpkenlmstate
+            row[missing] = [score(state, chardict[j], tmp) for j in missing.tolist()]
+        return row
+
     def score_partial_(self, y, next_token, state, x):
         """Score interface for both full and partial scorer.
 
@@ -45,15 +106,10 @@ class Ngrambase(ABC):
                 and next state list for ys.
 
         """
-        out_state = kenlm.State()
-        ys = self.chardict[y[-1]] if y.shape[0] > 1 else "<s>"
-        self.lm.BaseScore(state, ys, out_state)
-        scores = torch.empty_like(next_token, dtype=x.dtype, device=y.device)
-        for i, j in enumerate(next_token):
-            scores[i] = self.lm.BaseScore(
-                out_state, self.chardict[j], self.tmpkenlmstate
-            )
-        return scores, out_state
+        out_state = self.next_state(y, state)
+        ids = next_token.cpu().numpy()
+        scores = self.score_tokens(out_state, ids)[ids]
+        return torch.from_numpy(scores).to(device=y.device, dtype=x.dtype), out_state
 
 
 class NgramFullScorer(Ngrambase, BatchScorerInterface):
@@ -73,12 +129,36 @@ class NgramFullScorer(Ngrambase, BatchScorerInterface):
                 and next state list for ys.
 
         """
-        return self.score_partial_(y, torch.tensor(range(self.charlen)), state, x)
+        out_state = self.next_state(y, state)
+        # NOTE: Copy not to share the memory with the cache
+        scores = self.score_tokens(out_state).copy()
+        return torch.from_numpy(scores).to(device=y.device, dtype=x.dtype), out_state
 
+    def batch_score(self, ys, states, xs):
+        """Score new token batch.
 
-class NgramPartScorer(Ngrambase, PartialScorerInterface):
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores for next token with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+
+        """
+        out_states = [self.next_state(y, s) for y, s in zip(ys, states)]
+        scores = np.stack([self.score_tokens(s) for s in out_states])
+        return torch.from_numpy(scores).to(device=xs.device, dtype=xs.dtype), out_states
+
+
+class NgramPartScorer(Ngrambase, BatchPartialScorerInterface):
     """Partialscorer for ngram."""
 
+    logzero = -10000000000.0
+
     def score_partial(self, y, next_token, state, x):
         """Score interface for both full and partial scorer.
 
@@ -96,6 +176,43 @@ class NgramPartScorer(Ngrambase, PartialScorerInterface):
         """
         return self.score_partial_(y, next_token, state, x)
 
-    def select_state(self, state, i):
-        """Empty select state for scorer interface."""
+    def batch_score_partial(self, ys, next_tokens, states, xs):
+        """Score new token batch.
+
+        Args:
+            ys (torch.Tensor): torch.int64 prefix tokens (n_batch, ylen).
+            next_tokens (torch.Tensor): torch.int64 tokens to score (n_batch, n_token).
+                If None, all tokens are scored.
+            states (List[Any]): Scorer states for prefix tokens.
+            xs (torch.Tensor):
+                The encoder feature that generates ys (n_batch, xlen, n_feat).
+
+        Returns:
+            tuple[torch.Tensor, List[Any]]: Tuple of
+                batchfied scores with shape of `(n_batch, n_vocab)`
+                and next state list for ys.
+                The tokens except for next_tokens are scored as logzero
+                like CTCPrefixScorer, so they are never selected by the beam.
+
+        """
+        out_states = [self.next_state(y, s) for y, s in zip(ys, states)]
+        scores = np.full((len(out_states), self.charlen), self.logzero, np.float32)
+        if next_tokens is None:
+            for i, s in enumerate(out_states):
+                scores[i] = self.score_tokens(s)
+        else:
+            next_tokens = next_tokens.cpu().numpy()
+            for i, (s, ids) in enumerate(zip(out_states, next_tokens)):
+                scores[i, ids] = self.score_tokens(s, ids)[ids]
+        return torch.from_numpy(scores).to(device=xs.device, dtype=xs.dtype), out_states
+
+    def select_state(self, state, i, new_id=None):
+        """Select state with relative ids in the main beam search.
+
+        The state is shared by all tokens following the same prefix, so only
+        the prefix is selected for the batched states.
+
+        """
+        if isinstance(state, list):
+            return state[i]
         return state
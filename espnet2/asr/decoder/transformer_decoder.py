@@ -243,6 +243,7 @@ class BaseTransformerDecoder(
         states: List[Any],
         xs: torch.Tensor,
         return_hs: bool = False,
+        xs_mask: torch.Tensor = None,
     ) -> Tuple[torch.Tensor, List[Any]]:
         """Score new token batch.
 
@@ -251,7 +252,8 @@ class BaseTransformerDecoder(
             states (List[Any]): Scorer states for prefix tokens.
             xs (torch.Tensor):
                 The encoder feature that generates ys (n_batch, xlen, n_feat).
-
+            xs_mask (torch.Tensor): The encoder feature mask (n_batch, 1, xlen).
+                Required when `xs` is padded, e.g. for multi-utterance decoding.
 
         Returns:
             tuple[torch.Tensor, List[Any]]: Tuple of
@@ -275,11 +277,11 @@ class BaseTransformerDecoder(
         ys_mask = subsequent_mask(ys.size(-1), device=xs.device).unsqueeze(0)
         if return_hs:
             (logp, hs), states = self.forward_one_step(
-                ys, ys_mask, xs, cache=batch_state, return_hs=return_hs
+                ys, ys_mask, xs, xs_mask, cache=batch_state, return_hs=return_hs
             )
         else:
             logp, states = self.forward_one_step(
-                ys, ys_mask, xs, cache=batch_state, return_hs=return_hs
+                ys, ys_mask, xs, xs_mask, cache=batch_state, return_hs=return_hs
             )
 
         # transpose state of [layer, batch] into [batch, layer]
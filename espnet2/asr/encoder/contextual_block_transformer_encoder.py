@@ -376,6 +376,38 @@ class ContextualBlockTransformerEncoder(AbsEncoder):
         Returns:
             position embedded tensor and mask
         """
+        output, blocks = self.prepare_infer_blocks(xs_pad, ilens, prev_states, is_final)
+        if output is not None:
+            return output
+        ys_chunk, past_encoder_ctx = self.forward_infer_blocks(
+            blocks["xs_chunk"], blocks["past_encoder_ctx"]
+        )
+        return self.assemble_infer_blocks(blocks, ys_chunk, past_encoder_ctx, is_final)
+
+    def prepare_infer_blocks(
+        self,
+        xs_pad: torch.Tensor,
+        ilens: torch.Tensor,
+        prev_states: Optional[dict] = None,
+        is_final: bool = True,
+    ) -> Tuple[Optional[tuple], Optional[dict]]:
+        """Buffer the input and split it into the blocks for forward_infer.
+
+        The blocks are given to forward_infer_blocks() and its output is
+        given to assemble_infer_blocks() with the returned blocks.
+        The blocks of different streams can be forwarded together
+        one by one, since a block depends on the previous block
+        only through the context vectors.
+
+        Args:
+            xs_pad: input tensor (1, L, D)
+            ilens: input length (1)
+            prev_states: The states of the stream
+            is_final: Whether the input is the last one of the stream
+        Returns:
+            The output of forward_infer if no block is ready, otherwise None
+            The blocks (1, n_blocks, block_size + 2, D) and the stream states
+        """
         if prev_states is None:
             prev_addin = None
             buffer_before_downsampling = None
@@ -410,11 +442,12 @@ class ContextualBlockTransformerEncoder(AbsEncoder):
                     "n_processed_blocks": n_processed_blocks,
                     "past_encoder_ctx": past_encoder_ctx,
                 }
-                return (
+                output = (
                     xs_pad.new_zeros(bsize, 0, self._output_size),
                     xs_pad.new_zeros(bsize),
                     next_states,
                 )
+                return output, None
 
             n_res_samples = xs_pad.size(1) % self.subsample + self.subsample * 2
             buffer_before_downsampling = xs_pad.narrow(
@@ -457,11 +490,12 @@ class ContextualBlockTransformerEncoder(AbsEncoder):
                     "n_processed_blocks": n_processed_blocks,
                     "past_encoder_ctx": past_encoder_ctx,
                 }
-                return (
+                output = (
                     xs_pad.new_zeros(bsize, 0, self._output_size),
                     xs_pad.new_zeros(bsize),
                     next_states,
                 )
+                return output, None
 
             overlap_size = self.block_size - self.hop_size
             block_num = max(0, xs_pad.size(1) - overlap_size) // self.hop_size
@@ -482,7 +516,7 @@ class ContextualBlockTransformerEncoder(AbsEncoder):
             xs_pad = xs_pad.squeeze(0)
             if self.normalize_before:
                 xs_pad = self.after_norm(xs_pad)
-            return xs_pad, None, None
+            return (xs_pad, None, None), None
 
         # start block processing
         xs_chunk = xs_pad.new_zeros(
@@ -514,9 +548,39 @@ class ContextualBlockTransformerEncoder(AbsEncoder):
 
             prev_addin = addin
 
+        blocks = {
+            "xs_pad": xs_pad,
+            "xs_chunk": xs_chunk,
+            "block_num": block_num,
+            "prev_addin": prev_addin,
+            "buffer_before_downsampling": buffer_before_downsampling,
+            "ilens_buffer": ilens_buffer,
+            "buffer_after_downsampling": buffer_after_downsampling,
+            "n_processed_blocks": n_processed_blocks,
+            "past_encoder_ctx": past_encoder_ctx,
+        }
+        return None, blocks
+
+    def forward_infer_blocks(
+        self, xs_chunk: torch.Tensor, past_encoder_ctx: Optional[torch.Tensor]
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Forward the blocks.
+
+        Args:
+            xs_chunk: The blocks (B, n_blocks, block_size + 2, D)
+            past_encoder_ctx: The context vectors of the previous blocks
+                (B, num_blocks, D) for each layer, or None for the first blocks
+                of the streams
+        Returns:
+            The output blocks (B, n_blocks, block_size + 2, D)
+            The context vectors of the last blocks (B, num_blocks, D)
+        """
         # mask setup, it should be the same to that of forward_train
-        mask_online = xs_pad.new_zeros(
-            xs_pad.size(0), block_num, self.block_size + 2, self.block_size + 2
+        mask_online = xs_chunk.new_zeros(
+            xs_chunk.size(0),
+            xs_chunk.size(1),
+            self.block_size + 2,
+            self.block_size + 2,
         )
         mask_online.narrow(2, 1, self.block_size + 1).narrow(
             3, 0, self.block_size + 1
@@ -525,6 +589,28 @@ class ContextualBlockTransformerEncoder(AbsEncoder):
         ys_chunk, _, _, _, past_encoder_ctx, _, _ = self.encoders(
             xs_chunk, mask_online, True, past_encoder_ctx
         )
+        return ys_chunk, past_encoder_ctx
+
+    def assemble_infer_blocks(
+        self,
+        blocks: dict,
+        ys_chunk: torch.Tensor,
+        past_encoder_ctx: torch.Tensor,
+        is_final: bool = True,
+    ) -> Tuple[torch.Tensor, torch.Tensor, Optional[torch.Tensor]]:
+        """Assemble the output blocks into the output of forward_infer.
+
+        Args:
+            blocks: The blocks given by prepare_infer_blocks
+            ys_chunk: The output blocks (1, n_blocks, block_size + 2, D)
+            past_encoder_ctx: The context vectors of the last block
+            is_final: Whether the input is the last one of the stream
+        Returns:
+            The output of forward_infer
+        """
+        xs_pad = blocks["xs_pad"]
+        block_num = blocks["block_num"]
+        n_processed_blocks = blocks["n_processed_blocks"]
 
         # remove addin
         ys_chunk = ys_chunk.narrow(2, 1, self.block_size)
@@ -560,10 +646,10 @@ class ContextualBlockTransformerEncoder(AbsEncoder):
             next_states = None
         else:
             next_states = {
-                "prev_addin": prev_addin,
-                "buffer_before_downsampling": buffer_before_downsampling,
-                "ilens_buffer": ilens_buffer,
-                "buffer_after_downsampling": buffer_after_downsampling,
+                "prev_addin": blocks["prev_addin"],
+                "buffer_before_downsampling": blocks["buffer_before_downsampling"],
+                "ilens_buffer": blocks["ilens_buffer"],
+                "buffer_after_downsampling": blocks["buffer_after_downsampling"],
                 "n_processed_blocks": n_processed_blocks + block_num,
                 "past_encoder_ctx": past_encoder_ctx,
             }
@@ -27,6 +27,8 @@
 # limitations under the License.
 
 import multiprocessing
+import threading
+from typing import Optional
 
 import torch
 from numba import cuda
@@ -35,6 +37,23 @@ from espnet2.asr.transducer.rnnt_multi_blank.utils import global_constants, rnnt
 from espnet2.asr.transducer.rnnt_multi_blank.utils.cpu_utils import cpu_rnnt
 from espnet2.asr.transducer.rnnt_multi_blank.utils.cuda_utils import gpu_rnnt
 
+# NOTE: The working space memory is kept per thread so that the concurrent calls
+#   of the loss from several threads don't share it
+_thread_local = threading.local()
+
+
+def get_cpu_workspace() -> cpu_rnnt.CpuRNNT_workspace:
+    """Return the CPU working space memory of the current thread.
+
+    It is used by rnnt_loss_cpu() if no workspace is given, and its memory can
+    be released by get_cpu_workspace().clear().
+    """
+    workspace = getattr(_thread_local, "cpu_workspace", None)
+    if workspace is None:
+        workspace = cpu_rnnt.CpuRNNT_workspace()
+        _thread_local.cpu_workspace = workspace
+    return workspace
+
 
 def rnnt_loss_cpu(
     acts: torch.Tensor,
@@ -47,6 +66,7 @@ def rnnt_loss_cpu(
     fastemit_lambda: float,
     clamp: float,
     num_threads: int,
+    workspace: Optional[cpu_rnnt.CpuRNNT_workspace] = None,
 ):
     """Wrapper method for accessing CPU RNNT loss.
 
@@ -66,81 +86,54 @@ def rnnt_loss_cpu(
             Emission Regularization.
         clamp: Float value. When set to value >= 0.0, will clamp the
             gradient to [-clamp, clamp].
-        num_threads: Number of threads for OpenMP.
+        num_threads: Number of threads for OpenMP. Not used by the CPU loss,
+            which runs on the intra-op threads of torch.
+        workspace: Working space memory reused between the calls.
+            The one of the current thread is used if not given.
     """
 
-    # aliases
-    log_probs = acts
-    flat_labels = labels
-
-    minibatch_size = log_probs.shape[0]
-    maxT = log_probs.shape[1]
-    maxU = log_probs.shape[2]
-    alphabet_size = log_probs.shape[3]
-
-    if num_threads < 0:
-        num_threads = multiprocessing.cpu_count()
-
-    num_threads = max(1, num_threads)  # have to use at least 1 thread
-
-    gpu_size, status = rnnt_helper.get_workspace_size(
-        maxT, maxU, minibatch_size, gpu=False
+    _, status = rnnt_helper.get_workspace_size(
+        acts.shape[1], acts.shape[2], acts.shape[0], gpu=False
     )
     if status != global_constants.RNNTStatus.RNNT_STATUS_SUCCESS:
         raise RuntimeError(
             "Invalid parameter passed when calculating working space memory"
         )
 
-    cpu_workspace = torch.zeros(
-        gpu_size, device=log_probs.device, dtype=log_probs.dtype, requires_grad=False
-    )
-
-    # VIEW TENSORS AS VECTORS FOR POINTER INDEXING
-    log_probs, acts_shape = rnnt_helper.flatten_tensor(log_probs)
-    flat_labels, labels_shape = rnnt_helper.flatten_tensor(flat_labels)
-
-    wrapper = cpu_rnnt.CPURNNT(
-        minibatch=minibatch_size,
-        maxT=maxT,
-        maxU=maxU,
-        alphabet_size=alphabet_size,
-        workspace=cpu_workspace,
+    # NOTE: The anti-diagonals of the lattices of the whole minibatch are
+    #   computed at once, and the working space memory is reused between the calls.
+    wrapper = cpu_rnnt.CPURNNTWavefront(
         blank=blank_label,
         fastemit_lambda=fastemit_lambda,
-        clamp=clamp,
-        num_threads=num_threads,
-        batch_first=True,
+        workspace=get_cpu_workspace() if workspace is None else workspace,
     )
 
-    if grads is None:
-        status = wrapper.score_forward(
-            log_probs=log_probs.data,
-            costs=costs,
-            flat_labels=flat_labels.data,
-            label_lengths=label_lengths.data,
-            input_lengths=input_lengths.data,
-        )
-
-        if status != global_constants.RNNTStatus.RNNT_STATUS_SUCCESS:
-            raise RuntimeError("Could not calculate forward scores")
-
-    else:
-        # FLATTEN GRAD TENSOR
-        grads, grads_shape = rnnt_helper.flatten_tensor(grads)
-
-        status = wrapper.cost_and_grad(
-            log_probs=log_probs.data,
-            grads=grads.data,
-            costs=costs,
-            flat_labels=flat_labels.data,
-            label_lengths=label_lengths.data,
-            input_lengths=input_lengths.data,
-        )
-
-        if status != global_constants.RNNTStatus.RNNT_STATUS_SUCCESS:
-            raise RuntimeError("Could not calculate forward scores")
+    with torch.no_grad():
+        if grads is None:
+            status = wrapper.score_forward(
+                log_probs=acts,
+                costs=costs,
+                labels=labels,
+                label_lengths=label_lengths,
+                input_lengths=input_lengths,
+            )
+
+            if status != global_constants.RNNTStatus.RNNT_STATUS_SUCCESS:
+                raise RuntimeError("Could not calculate forward scores")
+
+        else:
+            status = wrapper.cost_and_grad(
+                log_probs=acts,
+                grads=grads,
+                costs=costs,
+                labels=labels,
+                label_lengths=label_lengths,
+                input_lengths=input_lengths,
+            )
+
+            if status != global_constants.RNNTStatus.RNNT_STATUS_SUCCESS:
+                raise RuntimeError("Could not calculate forward scores")
 
-    del cpu_workspace, wrapper
     return True
 
 
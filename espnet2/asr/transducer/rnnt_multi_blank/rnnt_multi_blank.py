@@ -26,6 +26,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import functools
+
 import torch
 from torch.autograd import Function
 from torch.nn import Module
@@ -48,6 +50,7 @@ class _RNNTNumba(Function):
         reduction,
         fastemit_lambda,
         clamp,
+        workspace=None,
     ):
         """RNNTNumba Forward.
 
@@ -61,6 +64,7 @@ class _RNNTNumba(Function):
         fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
             FastEmit: Low-latency Streaming ASR with Sequence-level
             Emission Regularization.
+        workspace: Working space memory of the CPU loss.
         """
 
         is_cuda = acts.is_cuda
@@ -69,7 +73,10 @@ class _RNNTNumba(Function):
         if clamp < 0:
             raise ValueError("`clamp` must be 0.0 or positive float value.")
 
-        loss_func = rnnt.rnnt_loss_gpu if is_cuda else rnnt.rnnt_loss_cpu
+        if is_cuda:
+            loss_func = rnnt.rnnt_loss_gpu
+        else:
+            loss_func = functools.partial(rnnt.rnnt_loss_cpu, workspace=workspace)
         grads = torch.zeros_like(acts) if acts.requires_grad else None
         minibatch_size = acts.size(0)
         costs = torch.zeros(minibatch_size, device=acts.device, dtype=acts.dtype)
@@ -103,7 +110,7 @@ class _RNNTNumba(Function):
     def backward(ctx, grad_output):
         if grad_output is not None and ctx.grads is not None:
             grad_output = grad_output.view(-1, 1, 1, 1).to(ctx.grads)
-            return ctx.grads.mul_(grad_output), None, None, None, None, None, None, None
+            return (ctx.grads.mul_(grad_output),) + (None,) * 8
 
 
 class _MultiblankRNNTNumba(Function):
@@ -333,6 +340,12 @@ class RNNTLossNumba(Module):
         self.clamp = float(clamp) if clamp > 0 else 0.0
         self.reduction = reduction
         self.loss = _RNNTNumba.apply
+        # The working space memory of the CPU loss is kept by each instance
+        self.cpu_workspace = cpu_rnnt.CpuRNNT_workspace()
+
+    def release_workspace(self):
+        """Release the working space memory of the CPU loss."""
+        self.cpu_workspace.clear()
 
     def forward(self, acts, labels, act_lens, label_lens):
         """Forward RNNTLossNumba.
@@ -370,6 +383,7 @@ class RNNTLossNumba(Module):
             self.reduction,
             self.fastemit_lambda,
             self.clamp,
+            self.cpu_workspace,
         )
 
 
@@ -28,7 +28,7 @@
 
 import math
 import multiprocessing
-from typing import Optional
+from typing import List, Optional, Tuple
 
 import numba
 import torch
@@ -458,3 +458,272 @@ class CPURNNT:
             costs[mb] = -self.compute_alphas(rnntm.log_probs2, T, U, rnntm.alphas)
 
         return global_constants.RNNTStatus.RNNT_STATUS_SUCCESS
+
+
+class CpuRNNT_workspace:
+    def __init__(self):
+        """Working space memory of CPURNNTWavefront reused between the calls.
+
+        A flat buffer is kept per dtype and grown when a larger batch comes,
+        so that the loss doesn't allocate the lattices at every training step.
+        """
+
+        super(CpuRNNT_workspace, self).__init__()
+        self.buffers = {}
+
+    def get(self, dtype: torch.dtype, *shapes: Tuple[int, ...]) -> List[torch.Tensor]:
+        """Slice the buffer into the tensors of the given shapes.
+
+        The contents of the returned tensors are undefined.
+        """
+        numel = sum(math.prod(shape) for shape in shapes)
+        buffer = self.buffers.get(dtype)
+        if buffer is None or buffer.numel() < numel:
+            buffer = torch.empty(numel, dtype=dtype)
+            self.buffers[dtype] = buffer
+
+        views = []
+        offset = 0
+        for shape in shapes:
+            size = math.prod(shape)
+            views.append(buffer[offset : offset + size].view(shape))
+            offset += size
+        return views
+
+    def clear(self):
+        """Release the buffers, which are allocated again by the next call."""
+        self.buffers = {}
+
+
+class CPURNNTWavefront:
+    def __init__(
+        self,
+        blank: int,
+        fastemit_lambda: float,
+        workspace: Optional[CpuRNNT_workspace] = None,
+    ):
+        """Compute the Transducer Loss on CPU along the anti-diagonals of the lattice.
+
+        All the nodes (t, u) with t + u = n depend only on the nodes of the
+        anti-diagonal n - 1 (alphas) or n + 1 (betas), so each anti-diagonal is
+        computed at once as vector operations across U and the minibatch.
+        The lattices are stored in the skewed layout [B, T + U - 1, U],
+        where lattice[b, n, u] holds the node (n - u, u), to make each
+        anti-diagonal a contiguous slice. This gives the same result as CPURNNT
+        with T + U - 1 tensor operations instead of T * U scalar operations
+        per sample.
+
+        Args:
+            blank: Index of the RNNT blank token in the vocabulary.
+            fastemit_lambda: Float scaling factor for FastEmit regularization. Refer to
+                FastEmit: Low-latency Streaming ASR with Sequence-level
+                Emission Regularization.
+            workspace: Working space memory reused between the calls.
+                A new one is allocated if not given.
+        """
+
+        self.blank_ = blank
+        self.fastemit_lambda_ = fastemit_lambda
+        self.workspace = CpuRNNT_workspace() if workspace is None else workspace
+
+    def setup_probs(
+        self,
+        log_probs: torch.Tensor,
+        labels: torch.Tensor,
+        input_lengths: torch.Tensor,
+        label_lengths: torch.Tensor,
+    ):
+        """Gather the log probs of blank and label tokens into the skewed layout.
+
+        Args:
+            log_probs: Log probs tensor of shape [B, T, U, V+1].
+            labels: Ground truth padded labels of shape [B, U-1].
+            input_lengths: Lengths of the acoustic sequence [B].
+            label_lengths: Lengths of the target sequence [B].
+
+        Returns:
+            blank: Log probs of blank [B, N, U] (N = T + U - 1)
+            label: Log probs of the next label [B, N, U]
+            alphas: Working space memory for alpha [B, N, U]
+            betas: Working space memory for beta [B, N + 1, U + 1]
+            valid: Mask of the nodes within the lattice of each sample [B, N, U]
+            final: Mask of the final node (T-1, U-1) of each sample [B, N, U]
+        """
+        B, maxT, maxU, _ = log_probs.shape
+        N = maxT + maxU - 1
+        label_probs, blank, label, alphas, betas = self.workspace.get(
+            log_probs.dtype,
+            (B, maxT, maxU),
+            (B, N, maxU),
+            (B, N, maxU),
+            (B, N, maxU),
+            (B, N + 1, maxU + 1),
+        )
+
+        n = torch.arange(N).unsqueeze(1)
+        u = torch.arange(maxU)
+        t = n - u
+        # Nodes outside the padded lattice are never reached
+        outside = (t < 0) | (t >= maxT)
+        t_index = t.clamp(0, maxT - 1).unsqueeze(0).expand(B, N, maxU)
+        u_index = u.expand(B, N, maxU)
+
+        torch.gather(log_probs[..., self.blank_], 1, t_index, out=blank)
+        blank.masked_fill_(outside, -math.inf)
+
+        # labels do not have first blank
+        label_index = labels.long().view(B, 1, maxU - 1, 1).expand(B, maxT, -1, 1)
+        label_probs[:, :, -1] = -math.inf
+        label_probs[:, :, :-1] = log_probs[:, :, :-1].gather(3, label_index).squeeze(3)
+        torch.gather(label_probs, 1, t_index, out=label)
+        label.masked_fill_(outside, -math.inf)
+
+        T = input_lengths.view(B, 1, 1).long()
+        U = label_lengths.view(B, 1, 1).long() + 1
+        valid = (t >= 0) & (t < T) & (u_index < U)
+        final = (t == T - 1) & (u_index == U - 1)
+        return blank, label, alphas, betas, valid, final
+
+    def compute_alphas(
+        self, blank: torch.Tensor, label: torch.Tensor, alphas: torch.Tensor
+    ):
+        """Compute the forward variable alpha along the anti-diagonals.
+
+        Args:
+            blank: Log probs of blank in the skewed layout [B, N, U].
+            label: Log probs of the next label in the skewed layout [B, N, U].
+            alphas: Working space memory for alpha of shape [B, N, U].
+        """
+        alphas[:, 0] = -math.inf
+        alphas[:, 0, 0] = 0
+        for n in range(1, alphas.size(1)):
+            # no emit: (t - 1, u) -> (t, u)
+            torch.add(alphas[:, n - 1], blank[:, n - 1], out=alphas[:, n])
+            # emit: (t, u - 1) -> (t, u)
+            torch.logaddexp(
+                alphas[:, n, 1:],
+                alphas[:, n - 1, :-1] + label[:, n - 1, :-1],
+                out=alphas[:, n, 1:],
+            )
+
+    def compute_betas(
+        self,
+        blank: torch.Tensor,
+        label: torch.Tensor,
+        betas: torch.Tensor,
+        valid: torch.Tensor,
+        final: torch.Tensor,
+    ):
+        """Compute the backward variable beta along the anti-diagonals.
+
+        Args:
+            blank: Log probs of blank in the skewed layout [B, N, U].
+            label: Log probs of the next label in the skewed layout [B, N, U].
+            betas: Working space memory for beta of shape [B, N + 1, U + 1].
+                The last row and column are the padding of -inf.
+            valid: Mask of the nodes within the lattice of each sample [B, N, U].
+            final: Mask of the final node (T-1, U-1) of each sample [B, N, U].
+        """
+        maxU = blank.size(2)
+        betas[:, -1] = -math.inf
+        betas[:, :, -1] = -math.inf
+        for n in range(blank.size(1) - 1, -1, -1):
+            # no emit: (t, u) -> (t + 1, u), emit: (t, u) -> (t, u + 1)
+            beta = torch.logaddexp(
+                betas[:, n + 1, :maxU] + blank[:, n],
+                betas[:, n + 1, 1:] + label[:, n],
+            )
+            beta = torch.where(final[:, n], blank[:, n], beta)
+            beta.masked_fill_(~valid[:, n], -math.inf)
+            betas[:, n, :maxU] = beta
+
+    def cost_and_grad(
+        self,
+        log_probs: torch.Tensor,
+        grads: torch.Tensor,
+        costs: torch.Tensor,
+        labels: torch.Tensor,
+        label_lengths: torch.Tensor,
+        input_lengths: torch.Tensor,
+    ) -> global_constants.RNNTStatus:
+        """Compute the costs and the gradients of the log probs.
+
+        Args:
+            log_probs: Log probs tensor of shape [B, T, U, V+1].
+            grads: Tensor of shape [B, T, U, V+1] where the gradient will be set.
+            costs: Vector of length [B] in which costs will be set.
+            labels: Ground truth padded labels of shape [B, U-1].
+            label_lengths: Lengths of the target sequence [B].
+            input_lengths: Lengths of the acoustic sequence [B].
+        """
+        B, maxT, maxU, _ = log_probs.shape
+        blank, label, alphas, betas, valid, final = self.setup_probs(
+            log_probs, labels, input_lengths, label_lengths
+        )
+        self.compute_alphas(blank, label, alphas)
+        self.compute_betas(blank, label, betas, valid, final)
+
+        llForward = (alphas + blank)[final].view(B)
+        llBackward = betas[:, 0, 0]
+        loglike = llBackward.view(B, 1, 1)
+
+        # // Gradients w.r.t. log probabilities in the skewed layout
+        # The final blank transition leaves the lattice with beta = 0
+        next_betas = betas[:, 1:, :maxU].masked_fill(final, 0.0)
+        grad_blank = -torch.exp(blank + alphas + next_betas - loglike)
+        grad_blank.masked_fill_(~valid, 0.0)
+        grad_label = -torch.exp(
+            math.log1p(self.fastemit_lambda_)
+            + label
+            + alphas
+            + betas[:, 1:, 1:]
+            - loglike
+        )
+        grad_label.masked_fill_(~valid, 0.0)
+
+        # Unskew: node (t, u) is at n = t + u
+        n_index = (
+            torch.arange(maxT).view(1, maxT, 1) + torch.arange(maxU).view(1, 1, maxU)
+        ).expand(B, maxT, maxU)
+        grads.zero_()
+        grads[..., self.blank_] = grad_blank.gather(1, n_index)
+        label_index = labels.long().view(B, 1, maxU - 1, 1).expand(B, maxT, -1, 1)
+        grads[:, :, :-1].scatter_add_(
+            3, label_index, grad_label.gather(1, n_index)[:, :, :-1, None]
+        )
+
+        # Scale llForward by FastEmit lambda
+        llForward = llForward * (1.0 + self.fastemit_lambda_)
+        llBackward = llBackward * (1.0 + self.fastemit_lambda_)
+
+        diff = (llForward - llBackward).abs().max()
+        if diff > 0.1:
+            print(f"WARNING: Forward backward likelihood mismatch : {diff}")
+
+        costs.copy_(-llForward)
+        return global_constants.RNNTStatus.RNNT_STATUS_SUCCESS
+
+    def score_forward(
+        self,
+        log_probs: torch.Tensor,
+        costs: torch.Tensor,
+        labels: torch.Tensor,
+        label_lengths: torch.Tensor,
+        input_lengths: torch.Tensor,
+    ) -> global_constants.RNNTStatus:
+        """Compute the costs only with the forward variable.
+
+        Args:
+            log_probs: Log probs tensor of shape [B, T, U, V+1].
+            costs: Vector of length [B] in which costs will be set.
+            labels: Ground truth padded labels of shape [B, U-1].
+            label_lengths: Lengths of the target sequence [B].
+            input_lengths: Lengths of the acoustic sequence [B].
+        """
+        B = log_probs.size(0)
+        blank, label, alphas, _, _, final = self.setup_probs(
+            log_probs, labels, input_lengths, label_lengths
+        )
+        self.compute_alphas(blank, label, alphas)
+        costs.copy_(-(alphas + blank)[final].view(B))
+        return global_constants.RNNTStatus.RNNT_STATUS_SUCCESS
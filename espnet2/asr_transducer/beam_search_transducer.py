@@ -1,5 +1,6 @@
 """Search algorithms for Transducer models."""
 
+import logging
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple, Union
 
@@ -7,6 +8,7 @@ import numpy as np
 import torch
 
 from espnet2.asr_transducer.decoder.abs_decoder import AbsDecoder
+from espnet2.asr_transducer.decoder.score_cache import ScoreCache
 from espnet2.asr_transducer.joint_network import JointNetwork
 
 
@@ -62,6 +64,8 @@ class BeamSearchTransducer:
         score_norm: Normalize final scores by length.
         nbest: Number of final hypothesis.
         streaming: Whether to perform chunk-by-chunk beam search.
+        score_cache_size: Maximum number of decoder outputs kept in the score cache.
+            (0 for unbounded)
 
     """
 
@@ -81,6 +85,7 @@ class BeamSearchTransducer:
         score_norm: bool = False,
         nbest: int = 1,
         streaming: bool = False,
+        score_cache_size: int = 4096,
     ) -> None:
         """Construct a BeamSearchTransducer object."""
         super().__init__()
@@ -145,6 +150,7 @@ class BeamSearchTransducer:
         self.score_norm = score_norm
         self.nbest = nbest
 
+        self.score_cache_size = score_cache_size
         self.reset_cache()
 
     def __call__(
@@ -175,9 +181,139 @@ class BeamSearchTransducer:
 
         return hyps
 
+    def batch_decode(
+        self,
+        enc_out: torch.Tensor,
+        enc_out_lens: torch.Tensor,
+    ) -> List[List[ExtendedHypothesis]]:
+        """Perform frame-synchronous beam search on a batch of utterances.
+
+        Modified beam search (https://arxiv.org/abs/2211.00484): at each frame,
+        each hypothesis is expanded with at most one label, and the beam_size best
+        expansions of each utterance are kept. The joint network is computed once
+        per frame for all the hypotheses of all the utterances, and the decoder
+        for all the expanded hypotheses. With beam_size=1, it is the greedy search.
+        The search_type and the LM are not used.
+
+        Args:
+            enc_out: Encoder output sequences. (B, T, D_enc)
+            enc_out_lens: Encoder output sequences lengths. (B,)
+
+        Returns:
+            nbest_hyps: N-best hypotheses of each utterance.
+
+        """
+        self.decoder.set_device(enc_out.device)
+
+        batch_size = enc_out.size(0)
+        enc_out_lens = enc_out_lens.tolist()
+
+        init_hyps = [
+            ExtendedHypothesis(
+                yseq=[0], score=0.0, dec_state=self.decoder.init_state(1)
+            )
+            for _ in range(batch_size)
+        ]
+        self.batch_update_dec_out(init_hyps)
+        batch_hyps = [[hyp] for hyp in init_hyps]
+
+        # The encoder outputs are projected once for all the frames.
+        enc_proj = self.joint_network.lin_enc(enc_out)
+
+        for t in range(max(enc_out_lens)):
+            active = [b for b in range(batch_size) if t < enc_out_lens[b]]
+            hyps = [hyp for b in active for hyp in batch_hyps[b]]
+
+            utt_idx = [i for i, b in enumerate(active) for _ in batch_hyps[b]]
+            hyp_idx = [j for b in active for j in range(len(batch_hyps[b]))]
+
+            beam_enc_out = enc_proj[[active[i] for i in utt_idx], t]
+            beam_dec_out = self.joint_network.lin_dec(
+                torch.stack([hyp.dec_out for hyp in hyps])
+            )
+            beam_logp = torch.log_softmax(
+                self.joint_network(beam_enc_out, beam_dec_out, no_projection=True),
+                dim=-1,
+            )
+            beam_logp += beam_logp.new_tensor([hyp.score for hyp in hyps]).unsqueeze(1)
+
+            # (B_active, beam, vocab) with -inf for the missing hypotheses
+            scores = beam_logp.new_full(
+                (len(active), self.beam_size, self.vocab_size), float("-inf")
+            )
+            scores[utt_idx, hyp_idx] = beam_logp
+
+            topk_logp, topk_idx = scores.view(len(active), -1).topk(
+                self.beam_size, dim=-1
+            )
+            topk_logp, topk_idx = topk_logp.tolist(), topk_idx.tolist()
+
+            expanded = []
+            for i, b in enumerate(active):
+                new_hyps = {}
+
+                for logp, idx in zip(topk_logp[i], topk_idx[i]):
+                    hyp = batch_hyps[b][idx // self.vocab_size]
+                    k = idx % self.vocab_size
+
+                    if k == 0:
+                        new_hyp = ExtendedHypothesis(
+                            yseq=hyp.yseq,
+                            score=logp,
+                            dec_state=hyp.dec_state,
+                            dec_out=hyp.dec_out,
+                        )
+                    else:
+                        new_hyp = ExtendedHypothesis(
+                            yseq=hyp.yseq + [k],
+                            score=logp,
+                            dec_state=hyp.dec_state,
+                        )
+
+                    key = tuple(new_hyp.yseq)
+
+                    if key in new_hyps:
+                        prev_hyp = new_hyps[key]
+                        new_hyp.score = float(np.logaddexp(prev_hyp.score, logp))
+
+                        if new_hyp.dec_out is None:
+                            prev_hyp.score = new_hyp.score
+                            continue
+
+                    new_hyps[key] = new_hyp
+
+                batch_hyps[b] = [*new_hyps.values()]
+                expanded += [hyp for hyp in batch_hyps[b] if hyp.dec_out is None]
+
+            if expanded:
+                self.batch_update_dec_out(expanded)
+
+        self.reset_cache()
+
+        return [self.sort_nbest(hyps) for hyps in batch_hyps]
+
+    def batch_update_dec_out(self, hyps: List[ExtendedHypothesis]) -> None:
+        """Compute in-place the decoder outputs and states of the hypotheses.
+
+        Args:
+            hyps: Hypotheses, whose dec_state is the decoder state before the
+                last label.
+
+        """
+        beam_dec_out, beam_state = self.decoder.batch_score(hyps)
+
+        for i, hyp in enumerate(hyps):
+            hyp.dec_out = beam_dec_out[i]
+            hyp.dec_state = self.decoder.select_state(beam_state, i)
+
     def reset_cache(self) -> None:
         """Reset cache for streaming decoding."""
-        self.decoder.score_cache = {}
+        score_cache = getattr(self.decoder, "score_cache", None)
+
+        if isinstance(score_cache, ScoreCache) and len(score_cache) > 0:
+            logging.debug(f"Decoder score cache: {score_cache.stats()}")
+
+        self.decoder.score_cache = ScoreCache(max_size=self.score_cache_size)
         self.search_cache = None
 
     def sort_nbest(self, hyps: List[Hypothesis]) -> List[Hypothesis]:
@@ -13,6 +13,7 @@ from espnet2.asr_transducer.decoder.blocks.mega import MEGA
 from espnet2.asr_transducer.decoder.modules.mega.feed_forward import (
     NormalizedPositionwiseFeedForward,
 )
+from espnet2.asr_transducer.decoder.score_cache import ScoreCache
 from espnet2.asr_transducer.normalization import get_normalization
 
 
@@ -129,7 +130,7 @@ class MEGADecoder(AbsDecoder):
         self.pad_idx = embed_pad
         self.num_blocks = num_blocks
 
-        self.score_cache = {}
+        self.score_cache = ScoreCache()
 
         self.device = next(self.parameters()).device
 
@@ -235,10 +236,10 @@ class MEGADecoder(AbsDecoder):
             states: Decoder hidden states. (??)
 
         """
-        str_labels = "_".join(map(str, label_sequence))
+        cached = self.score_cache.get(label_sequence)
 
-        if str_labels in self.score_cache:
-            out, states = self.score_cache[str_labels]
+        if cached is not None:
+            out, states = cached
         else:
             label = torch.full(
                 (1, 1), label_sequence[-1], dtype=torch.long, device=self.device
@@ -246,7 +247,7 @@ class MEGADecoder(AbsDecoder):
 
             out, states = self.inference(label, states=states)
 
-            self.score_cache[str_labels] = (out, states)
+            self.score_cache.set(label_sequence, (out, states))
 
         return out[0], states
 
@@ -7,6 +7,7 @@ from typeguard import typechecked
 
 from espnet2.asr_transducer.beam_search_transducer import Hypothesis
 from espnet2.asr_transducer.decoder.abs_decoder import AbsDecoder
+from espnet2.asr_transducer.decoder.score_cache import ScoreCache
 
 
 class RNNDecoder(AbsDecoder):
@@ -65,7 +66,7 @@ class RNNDecoder(AbsDecoder):
         self.vocab_size = vocab_size
 
         self.device = next(self.parameters()).device
-        self.score_cache = {}
+        self.score_cache = ScoreCache()
 
     def forward(self, labels: torch.Tensor) -> torch.Tensor:
         """Encode source label sequences.
@@ -136,10 +137,10 @@ class RNNDecoder(AbsDecoder):
                       ((N, 1, D_dec), (N, 1, D_dec) or None)
 
         """
-        str_labels = "_".join(map(str, label_sequence))
+        cached = self.score_cache.get(label_sequence)
 
-        if str_labels in self.score_cache:
-            out, states = self.score_cache[str_labels]
+        if cached is not None:
+            out, states = cached
         else:
             label = torch.full(
                 (1, 1),
@@ -151,7 +152,7 @@ class RNNDecoder(AbsDecoder):
             embed = self.embed(label)
             out, states = self.rnn_forward(embed, states)
 
-            self.score_cache[str_labels] = (out, states)
+            self.score_cache.set(label_sequence, (out, states))
 
         return out[0], states
 
@@ -161,6 +162,9 @@ class RNNDecoder(AbsDecoder):
     ) -> Tuple[torch.Tensor, Tuple[torch.Tensor, Optional[torch.Tensor]]]:
         """One-step forward hypotheses.
 
+        The outputs of the hypotheses already in the score cache are not computed
+        again, only the remaining ones are forwarded as a batch.
+
         Args:
             hyps: Hypotheses.
 
@@ -169,13 +173,29 @@ class RNNDecoder(AbsDecoder):
             states: Decoder hidden states. ((N, B, D_dec), (N, B, D_dec) or None)
 
         """
-        labels = torch.tensor(
-            [[h.yseq[-1]] for h in hyps], dtype=torch.long, device=self.device
-        )
-        embed = self.embed(labels)
+        cached = self.score_cache.batch_get([h.yseq for h in hyps])
+        missed = [i for i, c in enumerate(cached) if c is None]
+
+        if missed:
+            labels = torch.tensor(
+                [[hyps[i].yseq[-1]] for i in missed],
+                dtype=torch.long,
+                device=self.device,
+            )
+            embed = self.embed(labels)
+
+            states = self.create_batch_states([hyps[i].dec_state for i in missed])
+            out, states = self.rnn_forward(embed, states)
+
+            for j, i in enumerate(missed):
+                cached[i] = (out[j : j + 1], self.select_state(states, j))
+                self.score_cache.set(hyps[i].yseq, cached[i])
+
+            if len(missed) == len(hyps):
+                return out.squeeze(1), states
 
-        states = self.create_batch_states([h.dec_state for h in hyps])
-        out, states = self.rnn_forward(embed, states)
+        out = torch.cat([c[0] for c in cached], dim=0)
+        states = self.create_batch_states([c[1] for c in cached])
 
         return out.squeeze(1), states
 
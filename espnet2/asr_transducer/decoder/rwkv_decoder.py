@@ -8,6 +8,7 @@ from typeguard import typechecked
 from espnet2.asr_transducer.beam_search_transducer import Hypothesis
 from espnet2.asr_transducer.decoder.abs_decoder import AbsDecoder
 from espnet2.asr_transducer.decoder.blocks.rwkv import RWKV
+from espnet2.asr_transducer.decoder.score_cache import ScoreCache
 from espnet2.asr_transducer.normalization import get_normalization
 
 
@@ -96,7 +97,7 @@ class RWKVDecoder(AbsDecoder):
         self.pad_idx = embed_pad
         self.num_blocks = num_blocks
 
-        self.score_cache = {}
+        self.score_cache = ScoreCache()
 
         self.device = next(self.parameters()).device
 
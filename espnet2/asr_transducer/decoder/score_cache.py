@@ -0,0 +1,166 @@
+"""Decoder score cache definition for Transducer search algorithms."""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+class _TrieNode:
+    """Node of the label sequence trie.
+
+    Args:
+        parent: Parent node. (None for the root)
+        label: Label ID of the edge from the parent node.
+
+    """
+
+    __slots__ = ("parent", "label", "children", "value")
+
+    def __init__(self, parent: Optional["_TrieNode"] = None, label: int = -1) -> None:
+        """Construct a _TrieNode object."""
+        self.parent = parent
+        self.label = label
+        self.children = {}
+        self.value = None
+
+
+class ScoreCache:
+    """Bounded cache of decoder outputs keyed by label sequence.
+
+    The label sequences are stored in a prefix trie walked label by label,
+    so the hypotheses sharing a prefix share the trie nodes and no key string is
+    built. The least recently used entries are evicted once max_size entries
+    are cached, and the trie branches left empty are pruned.
+
+    Args:
+        max_size: Maximum number of cached entries. (0 for unbounded)
+
+    """
+
+    def __init__(self, max_size: int = 4096) -> None:
+        """Construct a ScoreCache object."""
+        assert max_size >= 0, "max_size should be a non-negative integer."
+        self.max_size = max_size
+
+        self.root = _TrieNode()
+        self.lru = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        """Return the number of cached entries."""
+        return len(self.lru)
+
+    def _find(self, label_sequence: List[int]) -> Optional[_TrieNode]:
+        """Find the trie node of a label sequence.
+
+        Args:
+            label_sequence: Label ID sequence.
+
+        Returns:
+            node: Trie node, or None if not in the trie.
+
+        """
+        node = self.root
+
+        for label in label_sequence:
+            node = node.children.get(label)
+
+            if node is None:
+                return None
+
+        return node
+
+    def get(self, label_sequence: List[int]) -> Optional[Any]:
+        """Get the cached value of a label sequence.
+
+        Args:
+            label_sequence: Label ID sequence.
+
+        Returns:
+            : Cached value, or None if not cached.
+
+        """
+        node = self._find(label_sequence)
+
+        if node is None or node.value is None:
+            self.misses += 1
+
+            return None
+
+        self.hits += 1
+        self.lru.move_to_end(node)
+
+        return node.value
+
+    def batch_get(self, label_sequences: List[List[int]]) -> List[Optional[Any]]:
+        """Get the cached values of a batch of label sequences.
+
+        Args:
+            label_sequences: Label ID sequences.
+
+        Returns:
+            : Cached values, or None for the sequences not cached.
+
+        """
+        return [self.get(label_sequence) for label_sequence in label_sequences]
+
+    def set(self, label_sequence: List[int], value: Any) -> None:
+        """Cache the value of a label sequence.
+
+        Args:
+            label_sequence: Label ID sequence.
+            value: Value to cache.
+
+        """
+        node = self.root
+
+        for label in label_sequence:
+            child = node.children.get(label)
+
+            if child is None:
+                child = _TrieNode(parent=node, label=label)
+                node.children[label] = child
+
+            node = child
+
+        node.value = value
+        self.lru[node] = None
+        self.lru.move_to_end(node)
+
+        while self.max_size > 0 and len(self.lru) > self.max_size:
+            self._evict()
+
+    def _evict(self) -> None:
+        """Evict the least recently used entry and prune its empty branch."""
+        node, _ = self.lru.popitem(last=False)
+        node.value = None
+        self.evictions += 1
+
+        while node.parent is not None and node.value is None and not node.children:
+            del node.parent.children[node.label]
+            node = node.parent
+
+    def reset(self) -> None:
+        """Remove all the cached entries and the statistics."""
+        self.root = _TrieNode()
+        self.lru = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return the cache statistics.
+
+        Returns:
+            : Number of entries, hits, misses and evictions.
+
+        """
+        return {
+            "size": len(self.lru),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -7,6 +7,7 @@ from typeguard import typechecked
 
 from espnet2.asr_transducer.beam_search_transducer import Hypothesis
 from espnet2.asr_transducer.decoder.abs_decoder import AbsDecoder
+from espnet2.asr_transducer.decoder.score_cache import ScoreCache
 
 
 class StatelessDecoder(AbsDecoder):
@@ -38,7 +39,7 @@ class StatelessDecoder(AbsDecoder):
         self.vocab_size = vocab_size
 
         self.device = next(self.parameters()).device
-        self.score_cache = {}
+        self.score_cache = ScoreCache()
 
     def forward(
         self,
@@ -75,11 +76,9 @@ class StatelessDecoder(AbsDecoder):
             state: Decoder hidden states. None
 
         """
-        str_labels = "_".join(map(str, label_sequence))
+        embed = self.score_cache.get(label_sequence)
 
-        if str_labels in self.score_cache:
-            embed = self.score_cache[str_labels]
-        else:
+        if embed is None:
             label = torch.full(
                 (1, 1),
                 label_sequence[-1],
@@ -89,7 +88,7 @@ class StatelessDecoder(AbsDecoder):
 
             embed = self.embed(label)
 
-            self.score_cache[str_labels] = embed
+            self.score_cache.set(label_sequence, embed)
 
         return embed[0], None
 
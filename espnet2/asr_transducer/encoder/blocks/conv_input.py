@@ -3,6 +3,7 @@
 from typing import Optional, Tuple, Union
 
 import torch
+from torch.nn.modules.utils import _pair
 
 from espnet2.asr_transducer.utils import get_convinput_module_parameters
 
@@ -103,6 +104,43 @@ class ConvInput(torch.nn.Module):
             x = self.output(x)
 
         if mask is not None:
-            mask = mask[:, : x.size(1)]
+            mask = self.create_new_mask(mask, x.size(1))
 
         return x, mask
+
+    def create_new_mask(self, mask: torch.Tensor, size: int) -> torch.Tensor:
+        """Create the mask of the subsampled sequences.
+
+        The lengths are propagated through the time axis of the convolution and
+        pooling layers, so the padded frames of the shorter sequences of a batch
+        are also masked after subsampling.
+
+        Args:
+            mask: Mask of input sequences. (B, T)
+            size: Length of the subsampled sequences. sub(T)
+
+        Returns:
+            mask: Mask of output sequences. (B, sub(T))
+
+        """
+        lengths = mask.eq(0).sum(1)
+
+        for module in self.conv:
+            if not isinstance(module, (torch.nn.Conv2d, torch.nn.MaxPool2d)):
+                continue
+
+            kernel_size = _pair(module.kernel_size)[0]
+            stride = _pair(module.stride)[0]
+            padding = _pair(module.padding)[0]
+            dilation = _pair(module.dilation)[0]
+
+            lengths = lengths + 2 * padding - dilation * (kernel_size - 1) - 1
+
+            if getattr(module, "ceil_mode", False):
+                lengths = -torch.div(-lengths, stride, rounding_mode="floor") + 1
+            else:
+                lengths = torch.div(lengths, stride, rounding_mode="floor") + 1
+
+        positions = torch.arange(size, device=mask.device).unsqueeze(0)
+
+        return positions >= lengths.clamp(min=0).unsqueeze(1)
@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import functools
 import logging
 import sys
 from distutils.version import LooseVersion
@@ -35,13 +36,18 @@ from espnet2.torch_utils.device_funcs import to_device
 from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
 from espnet2.utils import config_argparse
 from espnet2.utils.nested_dict_action import NestedDictAction
+from espnet2.utils.parallel_decode import parallel_decode
 from espnet2.utils.types import str2bool, str2triple_str, str_or_none
 from espnet.nets.batch_beam_search import BatchBeamSearch
+from espnet.nets.batch_beam_search_multi_utt import BatchBeamSearchMultiUtt
 from espnet.nets.batch_beam_search_online_sim import BatchBeamSearchOnlineSim
 from espnet.nets.beam_search import BeamSearch, Hypothesis
 from espnet.nets.beam_search_timesync import BeamSearchTimeSync
 from espnet.nets.pytorch_backend.transformer.subsampling import TooShortUttError
-from espnet.nets.scorer_interface import BatchScorerInterface
+from espnet.nets.scorer_interface import (
+    BatchPartialScorerInterface,
+    BatchScorerInterface,
+)
 from espnet.nets.scorers.ctc import CTCPrefixScorer
 from espnet.nets.scorers.length_bonus import LengthBonus
 from espnet.utils.cli_utils import get_commandline_args
@@ -354,12 +360,12 @@ class Speech2Text:
                 )
 
                 # TODO(karita): make all scorers batchfied
+                non_batch = [
+                    k
+                    for k, v in beam_search.full_scorers.items()
+                    if not isinstance(v, BatchScorerInterface)
+                ]
                 if batch_size == 1:
-                    non_batch = [
-                        k
-                        for k, v in beam_search.full_scorers.items()
-                        if not isinstance(v, BatchScorerInterface)
-                    ]
                     if len(non_batch) == 0:
                         if streaming:
                             beam_search.__class__ = BatchBeamSearchOnlineSim
@@ -375,6 +381,23 @@ class Speech2Text:
                             f"As non-batch scorers {non_batch} are found, "
                             f"fall back to non-batch implementation."
                         )
+                else:
+                    non_batch += [
+                        k
+                        for k, v in beam_search.part_scorers.items()
+                        if not isinstance(v, BatchPartialScorerInterface)
+                    ]
+                    if len(non_batch) == 0 and not streaming:
+                        beam_search.__class__ = BatchBeamSearchMultiUtt
+                        logging.info(
+                            "BatchBeamSearchMultiUtt implementation is selected."
+                        )
+                    else:
+                        logging.warning(
+                            f"As non-batch scorers {non_batch} are found "
+                            f"or streaming is enabled, the utterances of a batch "
+                            f"are encoded together but decoded one by one."
+                        )
 
             beam_search.to(device=device, dtype=getattr(torch, dtype)).eval()
             for scorer in scorers.values():
@@ -552,6 +575,88 @@ class Speech2Text:
 
         return results
 
+    @torch.no_grad()
+    @typechecked
+    def decode_batch(
+        self,
+        speech: Union[torch.Tensor, np.ndarray],
+        speech_lengths: Union[torch.Tensor, np.ndarray],
+    ) -> List[
+        Union[
+            ListOfHypothesis,
+            Tuple[
+                ListOfHypothesis,
+                Union[Dict[int, List[str]], None],
+            ],
+        ]
+    ]:
+        """Inference for a mini-batch of utterances
+
+        The utterances are encoded by a single forward pass of the encoder.
+        They are also decoded together if `BatchBeamSearchMultiUtt` is selected
+        (i.e. `batch_size > 1` and all the scorers support batch scoring),
+        otherwise one by one.
+
+        Args:
+            speech: Padded input speech data (B, Nsamples)
+            speech_lengths: Lengths of the input speech data (B,)
+        Returns:
+            The results of each utterance, in the format of `__call__()`
+
+        """
+        if self.enh_s2t_task or self.multi_asr:
+            raise NotImplementedError(
+                "batch decoding is not implemented for enh_s2t_task and multi_asr"
+            )
+
+        # Input as audio signal
+        if isinstance(speech, np.ndarray):
+            speech = torch.tensor(speech)
+        if isinstance(speech_lengths, np.ndarray):
+            speech_lengths = torch.tensor(speech_lengths)
+
+        speech = speech.to(getattr(torch, self.dtype))
+        lengths = speech_lengths.to(dtype=torch.long)
+        batch = {"speech": speech, "speech_lengths": lengths}
+        logging.info("speech lengths: " + str(lengths.tolist()))
+
+        # a. To device
+        batch = to_device(batch, device=self.device)
+
+        # b. Forward Encoder
+        enc, enc_olens = self.asr_model.encode(**batch)
+        intermediate_outs = None
+        if isinstance(enc, tuple):
+            intermediate_outs = enc[1]
+            enc = enc[0]
+        assert len(enc) == len(lengths), (len(enc), len(lengths))
+
+        # c. Passed the encoder result and the beam search
+        if isinstance(self.beam_search, BatchBeamSearchMultiUtt):
+            self._setup_s4_decoder()
+            batch_nbest_hyps = self.beam_search(
+                x=enc,
+                x_lens=enc_olens,
+                maxlenratio=self.maxlenratio,
+                minlenratio=self.minlenratio,
+            )
+            results = [self._nbest_to_results(hyps) for hyps in batch_nbest_hyps]
+        else:
+            results = [
+                self._decode_single_sample(enc[i, :olen])
+                for i, olen in enumerate(enc_olens.tolist())
+            ]
+
+        # Encoder intermediate CTC predictions
+        if intermediate_outs is not None:
+            for i, olen in enumerate(enc_olens.tolist()):
+                encoder_interctc_res = self._decode_interctc(
+                    [(idx, out[i : i + 1, :olen]) for idx, out in intermediate_outs]
+                )
+                results[i] = (results[i], encoder_interctc_res)
+
+        return results
+
     @typechecked
     def _decode_interctc(
         self, intermediate_outs: List[Tuple[int, torch.Tensor]]
@@ -630,16 +735,25 @@ class Speech2Text:
                 + "\n"
             )
         else:
-            if hasattr(self.beam_search.nn_dict, "decoder"):
-                if isinstance(self.beam_search.nn_dict.decoder, S4Decoder):
-                    # Setup: required for S4 autoregressive generation
-                    for module in self.beam_search.nn_dict.decoder.modules():
-                        if hasattr(module, "setup_step"):
-                            module.setup_step()
+            self._setup_s4_decoder()
             nbest_hyps = self.beam_search(
                 x=enc, maxlenratio=self.maxlenratio, minlenratio=self.minlenratio
             )
 
+        return self._nbest_to_results(nbest_hyps)
+
+    def _setup_s4_decoder(self):
+        if hasattr(self.beam_search.nn_dict, "decoder"):
+            if isinstance(self.beam_search.nn_dict.decoder, S4Decoder):
+                # Setup: required for S4 autoregressive generation
+                for module in self.beam_search.nn_dict.decoder.modules():
+                    if hasattr(module, "setup_step"):
+                        module.setup_step()
+
+    @typechecked
+    def _nbest_to_results(
+        self, nbest_hyps: List[Union[Hypothesis, TransHypothesis]]
+    ) -> ListOfHypothesis:
         nbest_hyps = nbest_hyps[: self.nbest]
 
         results = []
@@ -747,13 +861,18 @@ def inference(
     threshold_probability: float,
     max_seq_len: int,
     max_mask_parallel: int,
+    num_decode_workers: int = 1,
 ):
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
+    if batch_size > 1 and (enh_s2t_task or multi_asr):
+        raise NotImplementedError(
+            "batch decoding is not implemented for enh_s2t_task and multi_asr"
+        )
     if word_lm_train_config is not None:
         raise NotImplementedError("Word LM is not implemented")
     if ngpu > 1:
         raise NotImplementedError("only single GPU decoding is supported")
+    if num_decode_workers > 1 and ngpu > 0:
+        raise NotImplementedError("num_decode_workers > 1 is only supported on CPU")
 
     logging.basicConfig(
         level=log_level,
@@ -781,6 +900,7 @@ def inference(
         device=device,
         maxlenratio=maxlenratio,
         minlenratio=minlenratio,
+        batch_size=batch_size,
         dtype=dtype,
         beam_size=beam_size,
         ctc_weight=ctc_weight,
@@ -827,74 +947,125 @@ def inference(
 
     # 7 .Start for-loop
     # FIXME(kamo): The output format should be discussed about
+    decode_fn = functools.partial(
+        _decode_batch,
+        speech2text,
+        nbest=nbest,
+        enh_s2t_task=enh_s2t_task,
+        multi_asr=multi_asr,
+    )
     with DatadirWriter(output_dir) as writer:
-        for keys, batch in loader:
-            assert isinstance(batch, dict), type(batch)
-            assert all(isinstance(s, str) for s in keys), keys
-            _bs = len(next(iter(batch.values())))
-            assert len(keys) == _bs, f"{len(keys)} != {_bs}"
-            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
-
-            # N-best list of (text, token, token_int, hyp_object)
-            try:
-                results = speech2text(**batch)
-            except TooShortUttError as e:
-                logging.warning(f"Utterance {keys} {e}")
-                hyp = Hypothesis(score=0.0, scores={}, states={}, yseq=[])
-                results = [[" ", ["<space>"], [2], hyp]] * nbest
-                if enh_s2t_task:
-                    num_spk = getattr(speech2text.asr_model.enh_model, "num_spk", 1)
-                    results = [results for _ in range(num_spk)]
-
-            # Only supporting batch_size==1
-            key = keys[0]
-            if enh_s2t_task or multi_asr:
-                # Enh+ASR joint task
-                for spk, ret in enumerate(results, 1):
-                    for n, (text, token, token_int, hyp) in zip(
-                        range(1, nbest + 1), ret
-                    ):
-                        # Create a directory: outdir/{n}best_recog_spk?
-                        ibest_writer = writer[f"{n}best_recog"]
-
-                        # Write the result to each file
-                        ibest_writer[f"token_spk{spk}"][key] = " ".join(token)
-                        ibest_writer[f"token_int_spk{spk}"][key] = " ".join(
-                            map(str, token_int)
-                        )
-                        ibest_writer[f"score_spk{spk}"][key] = str(hyp.score)
+        if num_decode_workers > 1:
+            parallel_decode(decode_fn, loader, writer, num_decode_workers)
+        else:
+            for keys, batch in loader:
+                decode_fn(writer, keys, batch)
 
-                        if text is not None:
-                            ibest_writer[f"text_spk{spk}"][key] = text
 
-            else:
-                # Normal ASR
-                encoder_interctc_res = None
-                if isinstance(results, tuple):
-                    results, encoder_interctc_res = results
-
-                for n, (text, token, token_int, hyp) in zip(
-                    range(1, nbest + 1), results
-                ):
-                    # Create a directory: outdir/{n}best_recog
-                    ibest_writer = writer[f"{n}best_recog"]
-
-                    # Write the result to each file
-                    ibest_writer["token"][key] = " ".join(token)
-                    ibest_writer["token_int"][key] = " ".join(map(str, token_int))
-                    ibest_writer["score"][key] = str(hyp.score)
-
-                    if text is not None:
-                        ibest_writer["text"][key] = text
-
-                # Write intermediate predictions to
-                # encoder_interctc_layer<layer_idx>.txt
-                ibest_writer = writer["1best_recog"]
-                if encoder_interctc_res is not None:
-                    for idx, text in encoder_interctc_res.items():
-                        ibest_writer[f"encoder_interctc_layer{idx}.txt"][key] = (
-                            " ".join(text)
-                        )
+def _decode_batch(
+    speech2text: Speech2Text,
+    writer: DatadirWriter,
+    keys: List[str],
+    batch: Dict[str, torch.Tensor],
+    nbest: int,
+    enh_s2t_task: bool,
+    multi_asr: bool,
+):
+    assert isinstance(batch, dict), type(batch)
+    assert all(isinstance(s, str) for s in keys), keys
+    _bs = len(next(iter(batch.values())))
+    assert len(keys) == _bs, f"{len(keys)} != {_bs}"
+
+    if _bs > 1:
+        # N-best lists of (text, token, token_int, hyp_object) per key
+        try:
+            batch_results = speech2text.decode_batch(**batch)
+        except TooShortUttError as e:
+            logging.warning(f"Batch {keys} {e}: decode one by one")
+            batch_results = [
+                _decode_one(
+                    speech2text,
+                    {
+                        k: v[i, : batch[f"{k}_lengths"][i]]
+                        for k, v in batch.items()
+                        if not k.endswith("_lengths")
+                    },
+                    key,
+                    nbest,
+                    enh_s2t_task,
+                )
+                for i, key in enumerate(keys)
+            ]
+    else:
+        batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
+        batch_results = [_decode_one(speech2text, batch, keys[0], nbest, enh_s2t_task)]
+
+    for key, results in zip(keys, batch_results):
+        _write_results(writer, key, results, nbest, enh_s2t_task or multi_asr)
+
+
+def _decode_one(
+    speech2text: Speech2Text,
+    batch: Dict[str, torch.Tensor],
+    key: str,
+    nbest: int,
+    enh_s2t_task: bool,
+):
+    # N-best list of (text, token, token_int, hyp_object)
+    try:
+        results = speech2text(**batch)
+    except TooShortUttError as e:
+        logging.warning(f"Utterance {key} {e}")
+        hyp = Hypothesis(score=0.0, scores={}, states={}, yseq=[])
+        results = [[" ", ["<space>"], [2], hyp]] * nbest
+        if enh_s2t_task:
+            num_spk = getattr(speech2text.asr_model.enh_model, "num_spk", 1)
+            results = [results for _ in range(num_spk)]
+    return results
+
+
+def _write_results(
+    writer: DatadirWriter, key: str, results, nbest: int, multi_spk: bool
+):
+    if multi_spk:
+        # Enh+ASR joint task
+        for spk, ret in enumerate(results, 1):
+            for n, (text, token, token_int, hyp) in zip(range(1, nbest + 1), ret):
+                # Create a directory: outdir/{n}best_recog_spk?
+                ibest_writer = writer[f"{n}best_recog"]
+
+                # Write the result to each file
+                ibest_writer[f"token_spk{spk}"][key] = " ".join(token)
+                ibest_writer[f"token_int_spk{spk}"][key] = " ".join(map(str, token_int))
+                ibest_writer[f"score_spk{spk}"][key] = str(hyp.score)
+
+                if text is not None:
+                    ibest_writer[f"text_spk{spk}"][key] = text
+
+    else:
+        # Normal ASR
+        encoder_interctc_res = None
+        if isinstance(results, tuple):
+            results, encoder_interctc_res = results
+
+        for n, (text, token, token_int, hyp) in zip(range(1, nbest + 1), results):
+            # Create a directory: outdir/{n}best_recog
+            ibest_writer = writer[f"{n}best_recog"]
+
+            # Write the result to each file
+            ibest_writer["token"][key] = " ".join(token)
+            ibest_writer["token_int"][key] = " ".join(map(str, token_int))
+            ibest_writer["score"][key] = str(hyp.score)
+
+            if text is not None:
+                ibest_writer["text"][key] = text
+
+        # Write intermediate predictions to
+        # encoder_interctc_layer<layer_idx>.txt
+        ibest_writer = writer["1best_recog"]
+        if encoder_interctc_res is not None:
+            for idx, text in encoder_interctc_res.items():
+                ibest_writer[f"encoder_interctc_layer{idx}.txt"][key] = " ".join(text)
 
 
 def get_parser():
@@ -933,6 +1104,13 @@ def get_parser():
         default=1,
         help="The number of workers used for DataLoader",
     )
+    parser.add_argument(
+        "--num_decode_workers",
+        type=int,
+        default=1,
+        help="The number of processes to decode in parallel on CPU. "
+        "The model is loaded once and shared by the processes.",
+    )
 
     group = parser.add_argument_group("Input data related")
     group.add_argument(
@@ -0,0 +1,550 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import struct
+import sys
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import torch
+from typeguard import typechecked
+
+from espnet2.bin.asr_inference_streaming import Speech2TextStreaming
+from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
+from espnet2.utils import config_argparse
+from espnet2.utils.types import str2bool, str_or_none
+from espnet.nets.batch_beam_search_online import BatchBeamSearchOnline
+from espnet.utils.cli_utils import get_commandline_args
+
+# The header of a chunk sent by a client: (is_final, the number of samples)
+CHUNK_HEADER = struct.Struct("<?I")
+
+
+@dataclass
+class _Session:
+    beam_search: BatchBeamSearchOnline
+    frontend_states: Optional[dict] = None
+    encoder_states: Optional[dict] = None
+
+
+class StreamingASREngine:
+    """Streaming ASR engine decoding many audio streams at once.
+
+    Speech2TextStreaming keeps the states of a single stream on itself.
+    This engine keeps the states of each stream (session) separately and
+    shares the model of a Speech2TextStreaming among the sessions.
+    In each step, the blocks of the contextual block encoder of all the sessions
+    having a new chunk are forwarded together as a batch. As the blocks depend
+    on the previous blocks of the stream only through the context vectors,
+    the sessions are batched block by block, e.g. a session having 3 new blocks
+    joins the first 3 of the forwards.
+
+    The beam search is run for each session with its own BatchBeamSearchOnline,
+    which batches the hypotheses of the session.
+
+    Examples:
+        >>> speech2text = Speech2TextStreaming("asr_config.yml", "asr.pth")
+        >>> engine = StreamingASREngine(speech2text)
+        >>> engine.open("call_a")
+        >>> engine.open("call_b")
+        >>> results = engine.step(
+        ...     {"call_a": (chunk_a, False), "call_b": (chunk_b, True)}
+        ... )
+        >>> results["call_b"]
+        [(text, token, token_int, hypothesis object), ...]
+
+    Args:
+        speech2text: The streaming ASR model
+        max_batch_size: The maximum number of the blocks forwarded at once
+    """
+
+    @typechecked
+    def __init__(self, speech2text: Speech2TextStreaming, max_batch_size: int = 64):
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be positive: {max_batch_size}")
+        self.speech2text = speech2text
+        self.max_batch_size = max_batch_size
+        self.sessions: Dict[str, _Session] = {}
+
+    def open(self, session_id: str):
+        if session_id in self.sessions:
+            raise RuntimeError(f"{session_id} is already opened")
+        template = self.speech2text.beam_search
+        beam_search = copy.copy(template)
+        # NOTE: The scorers which are not modules keep the states of the stream,
+        #   e.g. CTCPrefixScorer, so they are copied for each session.
+        scorers = {
+            k: v if isinstance(v, torch.nn.Module) else copy.copy(v)
+            for k, v in template.scorers.items()
+        }
+        beam_search.scorers = scorers
+        beam_search.full_scorers = {k: scorers[k] for k in template.full_scorers}
+        beam_search.part_scorers = {k: scorers[k] for k in template.part_scorers}
+        beam_search.reset()
+        self.sessions[session_id] = _Session(beam_search=beam_search)
+
+    def close(self, session_id: str):
+        self.sessions.pop(session_id)
+
+    def reset(self, session_id: str):
+        """Reset the states of the session to start a new stream."""
+        session = self.sessions[session_id]
+        session.frontend_states = None
+        session.encoder_states = None
+        session.beam_search.reset()
+
+    @torch.no_grad()
+    def step(
+        self, chunks: Dict[str, Tuple[Union[torch.Tensor, np.ndarray], bool]]
+    ) -> Dict[str, List[Tuple[Optional[str], List[str], List[int], Any]]]:
+        """Decode a new chunk of each session.
+
+        Args:
+            chunks: The chunk of the audio (Nsamples,) and whether it is
+                the last chunk of the stream, for each session. The session is
+                reset after the last chunk, as Speech2TextStreaming.
+        Returns:
+            The N-best results of each session as Speech2TextStreaming
+        """
+        speech2text = self.speech2text
+        encoder = speech2text.asr_model.encoder
+
+        # 1. Extract the features and split them into the blocks
+        outputs = {}
+        blocks = {}
+        for session_id, (speech, is_final) in chunks.items():
+            session = self.sessions[session_id]
+            if isinstance(speech, np.ndarray):
+                speech = torch.tensor(speech)
+            feats, feats_lengths, session.frontend_states = speech2text.apply_frontend(
+                speech, session.frontend_states, is_final=is_final
+            )
+            if feats is None:
+                continue
+            output, blocks_ = encoder.prepare_infer_blocks(
+                feats, feats_lengths, session.encoder_states, is_final=is_final
+            )
+            if output is not None:
+                outputs[session_id] = output
+            else:
+                blocks[session_id] = blocks_
+
+        # 2. Forward the blocks of all the sessions
+        for session_id, (ys_chunk, past_encoder_ctx) in self._forward_blocks(
+            blocks
+        ).items():
+            outputs[session_id] = encoder.assemble_infer_blocks(
+                blocks[session_id],
+                ys_chunk,
+                past_encoder_ctx,
+                is_final=chunks[session_id][1],
+            )
+
+        # 3. Search the new tokens of each session
+        results = {}
+        for session_id, (_, is_final) in chunks.items():
+            session = self.sessions[session_id]
+            if session_id in outputs:
+                enc, _, session.encoder_states = outputs[session_id]
+                nbest_hyps = session.beam_search(
+                    x=enc[0],
+                    maxlenratio=speech2text.maxlenratio,
+                    minlenratio=speech2text.minlenratio,
+                    is_final=is_final,
+                )
+                results[session_id] = speech2text.assemble_hyps(nbest_hyps)
+            else:
+                results[session_id] = []
+
+            if is_final:
+                self.reset(session_id)
+        return results
+
+    def _forward_blocks(
+        self, blocks: Dict[str, dict]
+    ) -> Dict[str, Tuple[torch.Tensor, torch.Tensor]]:
+        """Forward the blocks of the sessions block by block."""
+        encoder = self.speech2text.asr_model.encoder
+        ys_chunks = {session_id: [] for session_id in blocks}
+        past_ctx = {k: v["past_encoder_ctx"] for k, v in blocks.items()}
+        for session_id, v in blocks.items():
+            if v["block_num"] == 0:
+                # Keep the output of no block as it is
+                ys_chunks[session_id].append(
+                    encoder.forward_infer_blocks(v["xs_chunk"], past_ctx[session_id])[0]
+                )
+
+        max_block_num = max((v["block_num"] for v in blocks.values()), default=0)
+        for i in range(max_block_num):
+            session_ids = [k for k, v in blocks.items() if v["block_num"] > i]
+            # NOTE: The first block of a stream takes the context vector from
+            #   itself instead of past_encoder_ctx, so it is forwarded separately.
+            first = [k for k in session_ids if past_ctx[k] is None]
+            rest = [k for k in session_ids if past_ctx[k] is not None]
+            for group in (first, rest):
+                for start in range(0, len(group), self.max_batch_size):
+                    batch = group[start : start + self.max_batch_size]
+                    ys_chunk, next_ctx = encoder.forward_infer_blocks(
+                        torch.cat([blocks[k]["xs_chunk"][:, i : i + 1] for k in batch]),
+                        (
+                            None
+                            if group is first
+                            else torch.cat([past_ctx[k] for k in batch])
+                        ),
+                    )
+                    for j, k in enumerate(batch):
+                        ys_chunks[k].append(ys_chunk[j : j + 1])
+                        past_ctx[k] = next_ctx[j : j + 1]
+
+        return {k: (torch.cat(v, dim=1), past_ctx[k]) for k, v in ys_chunks.items()}
+
+
+class StreamingASRServer:
+    """Asyncio server to decode the streams of many clients with an engine.
+
+    The chunks received from the sessions within max_delay are decoded
+    together by a step of StreamingASREngine, which runs in a thread
+    so as not to block the event loop.
+
+    The chunks are given by recognize() in the same process or
+    sent by the TCP clients. A TCP client sends the chunks of a stream,
+    each of which is CHUNK_HEADER (is_final, the number of samples) followed by
+    the float32 samples, and receives a JSON line
+    {"text": str, "token": List[str], "is_final": bool}
+    of the best hypothesis for each chunk.
+
+    Examples:
+        >>> server = StreamingASRServer(engine)
+        >>> async with server:
+        ...     results = await server.recognize("call_a", chunk, is_final=False)
+        >>> # or serve the TCP clients
+        >>> asyncio.run(server.serve("127.0.0.1", 8765))
+
+    Args:
+        engine: The streaming ASR engine
+        max_delay: The time in seconds to wait for the chunks of the other sessions
+    """
+
+    @typechecked
+    def __init__(self, engine: StreamingASREngine, max_delay: float = 0.01):
+        self.engine = engine
+        self.max_delay = max_delay
+        self.pending: Dict[str, Tuple[Any, bool, asyncio.Future]] = {}
+        self.closing = set()
+        self._wakeup = None
+        self._task = None
+
+    async def __aenter__(self):
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.ensure_future(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def recognize(
+        self,
+        session_id: str,
+        speech: Union[torch.Tensor, np.ndarray],
+        is_final: bool = False,
+    ) -> List[Tuple[Optional[str], List[str], List[int], Any]]:
+        """Decode a chunk of the session, which is opened at its first chunk.
+
+        Returns:
+            The N-best results for the chunk as Speech2TextStreaming
+        """
+        if session_id in self.pending:
+            raise RuntimeError(f"The previous chunk of {session_id} is in process")
+        future = asyncio.get_running_loop().create_future()
+        self.pending[session_id] = (speech, is_final, future)
+        self._wakeup.set()
+        return await future
+
+    def close_session(self, session_id: str):
+        """Close the session after the current step."""
+        self.closing.add(session_id)
+        self._wakeup.set()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wakeup.wait()
+            # Wait for the chunks of the other sessions
+            await asyncio.sleep(self.max_delay)
+            self._wakeup.clear()
+
+            pending, self.pending = self.pending, {}
+            for session_id in pending:
+                if session_id not in self.engine.sessions:
+                    self.engine.open(session_id)
+            if len(pending) > 0:
+                chunks = {k: (v[0], v[1]) for k, v in pending.items()}
+                try:
+                    results = await loop.run_in_executor(None, self.engine.step, chunks)
+                except Exception as e:
+                    logging.exception("Failed to decode the chunks")
+                    for session_id, (_, _, future) in pending.items():
+                        self.closing.add(session_id)
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for session_id, (_, _, future) in pending.items():
+                        if not future.done():
+                            future.set_result(results[session_id])
+
+            # Close the sessions between the steps
+            closing, self.closing = self.closing, set()
+            for session_id in closing:
+                if session_id in self.pending:
+                    self.closing.add(session_id)
+                elif session_id in self.engine.sessions:
+                    self.engine.close(session_id)
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        """Decode the stream of a TCP client."""
+        session_id = uuid.uuid4().hex
+        try:
+            while True:
+                is_final, n_samples = CHUNK_HEADER.unpack(
+                    await reader.readexactly(CHUNK_HEADER.size)
+                )
+                data = await reader.readexactly(4 * n_samples)
+                speech = np.frombuffer(data, dtype="<f4").astype(np.float32)
+                results = await self.recognize(session_id, speech, is_final)
+                if len(results) > 0:
+                    text, token, _, _ = results[0]
+                else:
+                    text, token = None, []
+                message = {"text": text, "token": token, "is_final": is_final}
+                writer.write((json.dumps(message) + "\n").encode())
+                await writer.drain()
+                if is_final:
+                    break
+        except asyncio.IncompleteReadError:
+            logging.warning(f"{session_id} is disconnected")
+        finally:
+            self.close_session(session_id)
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765):
+        async with self:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            logging.info(f"Serving on {host}:{port}")
+            async with server:
+                await server.serve_forever()
+
+
+@typechecked
+def serve(
+    host: str,
+    port: int,
+    max_batch_size: int,
+    max_delay: float,
+    maxlenratio: float,
+    minlenratio: float,
+    dtype: str,
+    beam_size: int,
+    ngpu: int,
+    seed: int,
+    ctc_weight: float,
+    lm_weight: float,
+    penalty: float,
+    nbest: int,
+    normalize_length: bool,
+    log_level: Union[int, str],
+    asr_train_config: str,
+    asr_model_file: str,
+    lm_train_config: Optional[str],
+    lm_file: Optional[str],
+    token_type: Optional[str],
+    bpemodel: Optional[str],
+    disable_repetition_detection: bool,
+    encoded_feat_length_limit: int,
+    decoder_text_length_limit: int,
+):
+    if ngpu > 1:
+        raise NotImplementedError("only single GPU decoding is supported")
+
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s (%(module)s:%(lineno)d) %(levelname)s: %(message)s",
+    )
+
+    if ngpu >= 1:
+        device = "cuda"
+    else:
+        device = "cpu"
+
+    # 1. Set random-seed
+    set_all_random_seed(seed)
+
+    # 2. Build speech2text
+    speech2text = Speech2TextStreaming(
+        asr_train_config=asr_train_config,
+        asr_model_file=asr_model_file,
+        lm_train_config=lm_train_config,
+        lm_file=lm_file,
+        token_type=token_type,
+        bpemodel=bpemodel,
+        device=device,
+        maxlenratio=maxlenratio,
+        minlenratio=minlenratio,
+        dtype=dtype,
+        beam_size=beam_size,
+        ctc_weight=ctc_weight,
+        lm_weight=lm_weight,
+        penalty=penalty,
+        nbest=nbest,
+        normalize_length=normalize_length,
+        disable_repetition_detection=disable_repetition_detection,
+        decoder_text_length_limit=decoder_text_length_limit,
+        encoded_feat_length_limit=encoded_feat_length_limit,
+    )
+
+    # 3. Serve the clients
+    engine = StreamingASREngine(speech2text, max_batch_size=max_batch_size)
+    server = StreamingASRServer(engine, max_delay=max_delay)
+    asyncio.run(server.serve(host, port))
+
+
+def get_parser():
+    parser = config_argparse.ArgumentParser(
+        description="Streaming ASR server decoding many streams at once",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+
+    # Note(kamo): Use '_' instead of '-' as separator.
+    # '-' is confusing if written in yaml.
+    parser.add_argument(
+        "--log_level",
+        type=lambda x: x.upper(),
+        default="INFO",
+        choices=("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"),
+        help="The verbose level of logging",
+    )
+
+    parser.add_argument(
+        "--ngpu",
+        type=int,
+        default=0,
+        help="The number of gpus. 0 indicates CPU mode",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument(
+        "--dtype",
+        default="float32",
+        choices=["float16", "float32", "float64"],
+        help="Data type",
+    )
+
+    group = parser.add_argument_group("Server related")
+    group.add_argument("--host", type=str, default="127.0.0.1")
+    group.add_argument("--port", type=int, default=8765)
+    group.add_argument(
+        "--max_batch_size",
+        type=int,
+        default=64,
+        help="The maximum number of the encoder blocks forwarded at once",
+    )
+    group.add_argument(
+        "--max_delay",
+        type=float,
+        default=0.01,
+        help="The time in seconds to wait for the chunks of the other streams "
+        "to decode them together",
+    )
+
+    group = parser.add_argument_group("The model configuration related")
+    group.add_argument("--asr_train_config", type=str, required=True)
+    group.add_argument("--asr_model_file", type=str, required=True)
+    group.add_argument("--lm_train_config", type=str)
+    group.add_argument("--lm_file", type=str)
+
+    group = parser.add_argument_group("Beam-search related")
+    group.add_argument("--nbest", type=int, default=1, help="Output N-best hypotheses")
+    group.add_argument("--beam_size", type=int, default=20, help="Beam size")
+    group.add_argument("--penalty", type=float, default=0.0, help="Insertion penalty")
+    group.add_argument(
+        "--maxlenratio",
+        type=float,
+        default=0.0,
+        help="Input length ratio to obtain max output length. "
+        "If maxlenratio=0.0 (default), it uses a end-detect "
+        "function "
+        "to automatically find maximum hypothesis lengths",
+    )
+    group.add_argument(
+        "--minlenratio",
+        type=float,
+        default=0.0,
+        help="Input length ratio to obtain min output length",
+    )
+    group.add_argument(
+        "--ctc_weight",
+        type=float,
+        default=0.5,
+        help="CTC weight in joint decoding",
+    )
+    group.add_argument("--lm_weight", type=float, default=1.0, help="RNNLM weight")
+    group.add_argument("--disable_repetition_detection", type=str2bool, default=False)
+    group.add_argument(
+        "--encoded_feat_length_limit",
+        type=int,
+        default=0,
+        help="Limit the lengths of the encoded feature to input to the decoder.",
+    )
+    group.add_argument(
+        "--decoder_text_length_limit",
+        type=int,
+        default=0,
+        help="Limit the lengths of the text to input to the decoder.",
+    )
+
+    group = parser.add_argument_group("Text converter related")
+    group.add_argument(
+        "--token_type",
+        type=str_or_none,
+        default=None,
+        choices=["char", "bpe", None],
+        help="The token type for ASR model. "
+        "If not given, refers from the training args",
+    )
+    group.add_argument(
+        "--bpemodel",
+        type=str_or_none,
+        default=None,
+        help="The model path of sentencepiece. "
+        "If not given, refers from the training args",
+    )
+    group.add_argument(
+        "--normalize_length",
+        type=str2bool,
+        default=False,
+        help="If true, best hypothesis is selected by length-normalized scores",
+    )
+
+    return parser
+
+
+def main(cmd=None):
+    print(get_commandline_args(), file=sys.stderr)
+    parser = get_parser()
+    args = parser.parse_args(cmd)
+    kwargs = vars(args)
+    kwargs.pop("config", None)
+    serve(**kwargs)
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,7 @@ from espnet2.asr_transducer.beam_search_transducer import (
     Hypothesis,
 )
 from espnet2.asr_transducer.frontend.online_audio_processor import OnlineAudioProcessor
-from espnet2.asr_transducer.utils import TooShortUttError
+from espnet2.asr_transducer.utils import TooShortUttError, check_short_utt
 from espnet2.fileio.datadir_writer import DatadirWriter
 from espnet2.tasks.asr_transducer import ASRTransducerTask
 from espnet2.tasks.lm import LMTask
@@ -279,6 +279,51 @@ class Speech2Text:
 
         return nbest_hyps
 
+    @torch.no_grad()
+    @typechecked
+    def batch_decode(
+        self,
+        speech: torch.Tensor,
+        speech_lengths: torch.Tensor,
+    ) -> List[List[Hypothesis]]:
+        """Speech2Text call on a batch of utterances.
+
+        The utterances are decoded together with the frame-synchronous
+        modified beam search of BeamSearchTransducer.batch_decode.
+
+        Args:
+            speech: Padded speech data. (B, S)
+            speech_lengths: Speech data lengths. (B,)
+
+        Returns:
+            nbest_hypothesis: N-best hypothesis of each utterance.
+
+        """
+        speech = speech.to(dtype=getattr(torch, self.dtype), device=self.device)
+        lengths = speech_lengths.to(device=self.device)
+
+        feats, feats_length = self.asr_model._extract_feats(speech, lengths)
+
+        if self.asr_model.normalize is not None:
+            feats, feats_length = self.asr_model.normalize(feats, feats_length)
+
+        # NOTE: The encoder only checks the padded length of the batch.
+        short_status, limit_size = check_short_utt(
+            self.asr_model.encoder.embed.subsampling_factor, int(feats_length.min())
+        )
+
+        if short_status:
+            raise TooShortUttError(
+                f"has {int(feats_length.min())} frames and is too short for "
+                + f"subsampling (it needs more than {limit_size} frames)",
+                int(feats_length.min()),
+                limit_size,
+            )
+
+        enc_out, enc_out_lens = self.asr_model.encoder(feats, feats_length)
+
+        return self.beam_search.batch_decode(enc_out, enc_out_lens)
+
     def hypotheses_to_results(self, nbest_hyps: List[Hypothesis]) -> List[Any]:
         """Build partial or final results from the hypotheses.
 
@@ -334,6 +379,36 @@ class Speech2Text:
         return Speech2Text(**kwargs)
 
 
+def _decode_one(
+    speech2text: Speech2Text, key: str, speech: torch.Tensor
+) -> List[Hypothesis]:
+    """Decode an utterance, returning no hypothesis if it is too short."""
+    try:
+        return speech2text(speech)
+    except TooShortUttError as e:
+        logging.warning(f"Utterance {key} {e}")
+        return []
+
+
+def _write_results(
+    writer: DatadirWriter, key: str, results: List[Any], nbest: int
+) -> None:
+    """Write the N-best results of an utterance, or dummy ones if it has none."""
+    if len(results) == 0:
+        hyp = Hypothesis(score=0.0, yseq=[], dec_state=None)
+        results = [[" ", ["<space>"], [2], hyp]] * nbest
+
+    for n, (text, token, token_int, hyp) in zip(range(1, nbest + 1), results):
+        ibest_writer = writer[f"{n}best_recog"]
+
+        ibest_writer["token"][key] = " ".join(token)
+        ibest_writer["token_int"][key] = " ".join(map(str, token_int))
+        ibest_writer["score"][key] = str(hyp.score)
+
+        if text is not None:
+            ibest_writer["text"][key] = text
+
+
 @typechecked
 def inference(
     output_dir: str,
@@ -369,7 +444,8 @@ def inference(
 
     Args:
         output_dir: Output directory path.
-        batch_size: Batch decoding size.
+        batch_size: Batch decoding size. If greater than one, the utterances of
+            a batch are decoded together with the modified beam search.
         dtype: Data type.
         beam_size: Beam size.
         ngpu: Number of GPUs.
@@ -400,8 +476,10 @@ def inference(
 
     """
 
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
+    if batch_size > 1 and streaming:
+        raise NotImplementedError("batch decoding is not implemented for streaming")
+    if batch_size > 1 and lm_train_config is not None:
+        raise NotImplementedError("batch decoding is not implemented with LM")
     if ngpu > 1:
         raise NotImplementedError("only single GPU decoding is supported")
 
@@ -472,6 +550,30 @@ def inference(
 
             _bs = len(next(iter(batch.values())))
             assert len(keys) == _bs, f"{len(keys)} != {_bs}"
+
+            if batch_size > 1:
+                try:
+                    batch_hyps = speech2text.batch_decode(
+                        batch["speech"], batch["speech_lengths"]
+                    )
+                except TooShortUttError:
+                    # Fall back to the decoding one by one to find the short ones.
+                    batch_hyps = [
+                        _decode_one(speech2text, key, speech[:length])
+                        for key, speech, length in zip(
+                            keys, batch["speech"], batch["speech_lengths"]
+                        )
+                    ]
+
+                for key, nbest_hyps in zip(keys, batch_hyps):
+                    _write_results(
+                        writer,
+                        key,
+                        speech2text.hypotheses_to_results(nbest_hyps),
+                        nbest,
+                    )
+                continue
+
             batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
             assert len(batch.keys()) == 1
 
@@ -514,19 +616,9 @@ def inference(
                     logging.info(f"Final best hypothesis: {keys}: {results[0][0]}")
             except TooShortUttError as e:
                 logging.warning(f"Utterance {keys} {e}")
-                hyp = Hypothesis(score=0.0, yseq=[], dec_state=None)
-                results = [[" ", ["<space>"], [2], hyp]] * nbest
-
-            key = keys[0]
-            for n, (text, token, token_int, hyp) in zip(range(1, nbest + 1), results):
-                ibest_writer = writer[f"{n}best_recog"]
-
-                ibest_writer["token"][key] = " ".join(token)
-                ibest_writer["token_int"][key] = " ".join(map(str, token_int))
-                ibest_writer["score"][key] = str(hyp.score)
+                results = []
 
-                if text is not None:
-                    ibest_writer["text"][key] = text
+            _write_results(writer, keys[0], results, nbest)
 
 
 def get_parser():
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+import argparse
+import logging
+import sys
+from pathlib import Path
+from typing import Union
+
+from espnet2.fileio.manifest import NUMERIC_TYPES, TEXT_TYPES, convert_to_manifest
+from espnet.utils.cli_utils import get_commandline_args
+
+
+def convert_manifest(
+    input: Union[str, Path],
+    output: Union[str, Path],
+    data_type: str,
+    log_level: str,
+):
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s (%(module)s:%(lineno)d) %(levelname)s: %(message)s",
+    )
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    convert_to_manifest(input, output, data_type)
+    logging.info(f"Converted {input} to {output} as {data_type}")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Convert a text file, e.g. wav.scp, text, token_int or "
+        "shape file, to a binary manifest, which can be loaded with "
+        "the 'manifest' data type. A shape file converted as csv_int can be "
+        "given to --train_shape_file and --valid_shape_file as is",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--log_level",
+        type=lambda x: x.upper(),
+        default="INFO",
+        choices=("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"),
+        help="The verbose level of logging",
+    )
+    parser.add_argument("--input", required=True, help="Input text file")
+    parser.add_argument("--output", required=True, help="Output binary manifest")
+    parser.add_argument(
+        "--data_type",
+        required=True,
+        choices=list(TEXT_TYPES) + list(NUMERIC_TYPES),
+        help="The data type of the input file. "
+        "The numbers of int types are stored as int32 and "
+        "the ones of float types as float32",
+    )
+    return parser
+
+
+def main(cmd=None):
+    print(get_commandline_args(), file=sys.stderr)
+    parser = get_parser()
+    args = parser.parse_args(cmd)
+    kwargs = vars(args)
+    convert_manifest(**kwargs)
+
+
+if __name__ == "__main__":
+    main()
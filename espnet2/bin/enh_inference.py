@@ -114,6 +114,7 @@ class SeparateSpeech:
         device: str = "cpu",
         dtype: str = "float32",
         enh_s2t_task: bool = False,
+        segment_batch_size: int = 1,
     ):
 
         task = EnhancementTask if not enh_s2t_task else EnhS2TTask
@@ -172,6 +173,11 @@ class SeparateSpeech:
         self.normalize_segment_scale = normalize_segment_scale
         self.normalize_output_wav = normalize_output_wav
         self.show_progressbar = show_progressbar
+        if segment_batch_size < 1:
+            raise ValueError(
+                f"segment_batch_size must be positive: {segment_batch_size}"
+            )
+        self.segment_batch_size = segment_batch_size
 
         self.num_spk = enh_model.num_spk
         task = "enhancement" if self.num_spk == 1 else "separation"
@@ -277,7 +283,14 @@ class SeparateSpeech:
             else:
                 additional["mode"] = "no_dereverb"
 
-        if self.segmenting and lengths[0] > self.segment_size * fs:
+        if (
+            self.segmenting
+            and lengths[0] > self.segment_size * fs
+            and self.segment_batch_size > 1
+        ):
+            # Segment-wise speech enhancement/separation in mini-batches
+            waves = self._batch_segment_forward(speech_mix, fs, fs_, additional)
+        elif self.segmenting and lengths[0] > self.segment_size * fs:
             # Segment-wise speech enhancement/separation
             overlap_length = int(np.round(fs * (self.segment_size - self.hop_size)))
             num_segments = int(
@@ -304,14 +317,7 @@ class SeparateSpeech:
                     [batch_size], dtype=torch.long, fill_value=T
                 )
                 # b. Enhancement/Separation Forward
-                feats, f_lens = self.enh_model.encoder(speech_seg, lengths_seg, fs=fs_)
-                if isinstance(self.enh_model, ESPnetDiffusionModel):
-                    feats = [self.enh_model.enhance(feats)]
-                else:
-                    feats, _, _ = self.enh_model.separator(feats, f_lens, additional)
-                processed_wav = [
-                    self.enh_model.decoder(f, lengths_seg, fs=fs_)[0] for f in feats
-                ]
+                processed_wav = self._forward(speech_seg, lengths_seg, fs_, additional)
                 if speech_seg.dim() > 2:
                     # multi-channel speech
                     speech_seg_ = speech_seg[:, self.ref_channel]
@@ -364,12 +370,7 @@ class SeparateSpeech:
             waves = torch.unbind(waves, dim=0)
         else:
             # b. Enhancement/Separation Forward
-            feats, f_lens = self.enh_model.encoder(speech_mix, lengths, fs=fs_)
-            if isinstance(self.enh_model, ESPnetDiffusionModel):
-                feats = [self.enh_model.enhance(feats)]
-            else:
-                feats, _, _ = self.enh_model.separator(feats, f_lens, additional)
-            waves = [self.enh_model.decoder(f, lengths, fs=fs_)[0] for f in feats]
+            waves = self._forward(speech_mix, lengths, fs_, additional)
 
         ###################################
         # De-normalize the signal variance
@@ -400,6 +401,145 @@ class SeparateSpeech:
 
         return waves
 
+    def _forward(
+        self,
+        speech: torch.Tensor,
+        lengths: torch.Tensor,
+        fs: Optional[int],
+        additional: dict,
+    ) -> List[torch.Tensor]:
+        """Enhancement/Separation forward.
+
+        Args:
+            speech: (Batch, Nsamples [, Channels])
+            lengths: (Batch,)
+            fs: sample rate for the SFI models, otherwise None
+            additional: additional arguments for the separator
+        Returns:
+            [(Batch, Nsamples), ...]
+        """
+        feats, f_lens = self.enh_model.encoder(speech, lengths, fs=fs)
+        if isinstance(self.enh_model, ESPnetDiffusionModel):
+            feats = [self.enh_model.enhance(feats)]
+        else:
+            feats, _, _ = self.enh_model.separator(feats, f_lens, additional)
+        return [self.enh_model.decoder(f, lengths, fs=fs)[0] for f in feats]
+
+    def _batch_segment_forward(
+        self,
+        speech_mix: torch.Tensor,
+        fs: int,
+        fs_: Optional[int],
+        additional: dict,
+    ) -> Tuple[torch.Tensor, ...]:
+        """Segment-wise enhancement/separation with batched segments.
+
+        The overlapping segments are gathered "segment_batch_size" at a time
+        and stacked along the batch axis, so that a single forward pass
+        processes them. The outputs are stitched by overlap-add, averaging
+        all the segments covering each sample. This is identical to the
+        sequential stitching when hop_size >= segment_size / 2.
+
+        Args:
+            speech_mix: (Batch, Nsamples [, Channels])
+            fs: sample rate
+            fs_: sample rate for the SFI models, otherwise None
+            additional: additional arguments for the separator
+        Returns:
+            ((Batch, Nsamples), ...)
+        """
+        batch_size, nsamples = speech_mix.shape[:2]
+        device = speech_mix.device
+        T = int(self.segment_size * fs)
+        overlap_length = int(np.round(fs * (self.segment_size - self.hop_size)))
+        num_segments = int(np.ceil((nsamples - overlap_length) / (self.hop_size * fs)))
+        starts = torch.tensor(
+            [int(i * self.hop_size * fs) for i in range(num_segments)], device=device
+        )
+        # index: (num_segments, T)
+        index = starts[:, None] + torch.arange(T, device=device)
+        # The number of the valid samples in each segment: (num_segments,)
+        valid = (nsamples - starts).clamp(max=T)
+        padded_len = int(index[-1, -1]) + 1
+        if padded_len > nsamples:
+            # Zero-padding for the last segment
+            speech_mix = torch.cat(
+                [
+                    speech_mix,
+                    speech_mix.new_zeros(
+                        batch_size, padded_len - nsamples, *speech_mix.shape[2:]
+                    ),
+                ],
+                dim=1,
+            )
+
+        enh_waves = []
+        range_ = trange if self.show_progressbar else range
+        for st in range_(0, num_segments, self.segment_batch_size):
+            idx = index[st : st + self.segment_batch_size]
+            num = idx.size(0)
+            # (B, num, T [, C]) -> (num * B, T [, C])
+            speech_seg = speech_mix[:, idx].transpose(0, 1)
+            speech_seg = speech_seg.reshape(num * batch_size, *speech_seg.shape[2:])
+            lengths_seg = speech_mix.new_full(
+                [num * batch_size], dtype=torch.long, fill_value=T
+            )
+            processed_wav = self._forward(speech_seg, lengths_seg, fs_, additional)
+            # (num_spk, num * B, T)
+            processed_wav = torch.stack(processed_wav, dim=0)
+
+            if self.normalize_segment_scale:
+                if speech_seg.dim() > 2:
+                    # multi-channel speech
+                    speech_seg = speech_seg[..., self.ref_channel]
+                # Exclude the zero-padded region of the last segment
+                lens = valid[st : st + num].repeat_interleave(batch_size)
+                mask = (torch.arange(T, device=device) < lens[:, None]).to(
+                    processed_wav.dtype
+                )
+                mix_energy = torch.sqrt(
+                    (speech_seg.pow(2) * mask).sum(dim=1, keepdim=True) / lens[:, None]
+                )
+                enh_energy = torch.sqrt(
+                    (processed_wav.sum(dim=0).pow(2) * mask).sum(dim=1, keepdim=True)
+                    / lens[:, None]
+                )
+                processed_wav = processed_wav * (mix_energy / enh_energy)
+            enh_waves.append(processed_wav.view(-1, num, batch_size, T))
+        # (num_spk, num_segments, B, T)
+        enh_waves = torch.cat(enh_waves, dim=1)
+        num_spk = enh_waves.size(0)
+
+        if num_spk > 1 and num_segments > 1 and overlap_length > 0:
+            # Permutations between the adjacent segments: (num_segments - 1, B, num_spk)
+            perm = self.cal_permumation(
+                enh_waves[:, :-1, :, T - overlap_length :].reshape(
+                    num_spk, -1, overlap_length
+                ),
+                enh_waves[:, 1:, :, :overlap_length].reshape(
+                    num_spk, -1, overlap_length
+                ),
+                criterion="si_snr",
+            ).view(num_segments - 1, batch_size, num_spk)
+            # Accumulate the permutations from the first segment
+            perms = [torch.arange(num_spk, device=perm.device).expand(batch_size, -1)]
+            for p in perm:
+                perms.append(torch.gather(p, 1, perms[-1]))
+            # (num_spk, num_segments, B, 1)
+            perms = torch.stack(perms).permute(2, 0, 1)[..., None].to(device)
+            enh_waves = torch.gather(enh_waves, 0, perms.expand_as(enh_waves))
+
+        # Overlap-add and average over the number of the overlapping segments
+        index = index.flatten()
+        waves = enh_waves.new_zeros(num_spk, batch_size, padded_len)
+        waves.index_add_(
+            2, index, enh_waves.permute(0, 2, 1, 3).reshape(num_spk, batch_size, -1)
+        )
+        count = enh_waves.new_zeros(padded_len)
+        count.index_add_(0, index, count.new_ones(index.size(0)))
+        waves = waves[..., :nsamples] / count[:nsamples]
+        return torch.unbind(waves, dim=0)
+
     @torch.no_grad()
     def cal_permumation(self, ref_wavs, enh_wavs, criterion="si_snr"):
         """Calculate the permutation between seaprated streams in two adjacent segments.
@@ -478,6 +618,7 @@ def inference(
     hop_size: Optional[float],
     normalize_segment_scale: bool,
     show_progressbar: bool,
+    segment_batch_size: int,
     ref_channel: Optional[int],
     output_format: str,
     normalize_output_wav: bool,
@@ -510,6 +651,7 @@ def inference(
         hop_size=hop_size,
         normalize_segment_scale=normalize_segment_scale,
         show_progressbar=show_progressbar,
+        segment_batch_size=segment_batch_size,
         ref_channel=ref_channel,
         normalize_output_wav=normalize_output_wav,
         device=device,
@@ -705,6 +847,15 @@ def get_parser():
         help="Whether to show a progress bar when performing segment-wise speech "
         "enhancement/separation",
     )
+    group.add_argument(
+        "--segment_batch_size",
+        type=int,
+        default=1,
+        help="The number of segments processed in a single forward pass when "
+        "performing segment-wise speech enhancement/separation. "
+        "The memory usage grows linearly with it. If > 1, the overlapped "
+        "segments are averaged uniformly in overlap-add",
+    )
     group.add_argument(
         "--ref_channel",
         type=int,
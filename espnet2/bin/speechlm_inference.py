@@ -8,7 +8,7 @@ import json
 import logging
 import sys
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import torch
 import torchaudio
@@ -18,6 +18,7 @@ from typeguard import typechecked
 
 from espnet2.speechlm.core_lm.abs_core_lm import SpeechLMInferenceOptions
 from espnet2.speechlm.definitions import tasks as speechlm_tasks
+from espnet2.speechlm.generation_engine import SpeechLMGenerationEngine
 from espnet2.tasks.speechlm import SpeechLMTask
 
 # utilities
@@ -50,6 +51,7 @@ class SpeechLM:
         minlenratio: float = 10.0,
         modality: str = "codec",
         post_processor_conf: dict = {},
+        kv_cache_type: str = "static",
     ):
         """Initialize SpeechLM module."""
 
@@ -98,6 +100,7 @@ class SpeechLM:
             start=train_args.token_list.index(f"<{modality}_start/end>"),
             masks=masks,
             nq=inference_nq if inference_nq is not None else model.corelm.nq,
+            kv_cache_type=kv_cache_type,
         )
 
         # post_processor: transform tokens to the target modality. E.g., speech, text.
@@ -136,13 +139,47 @@ class SpeechLM:
         if gen_tokens is None and gen_scores is None:
             return None, None, None
 
-        # post-processing
+        return self._post_process(gen_tokens), gen_tokens, gen_scores
+
+    @torch.no_grad()
+    def batch_generate(
+        self,
+        examples: Iterable[Tuple[str, Dict[str, torch.Tensor]]],
+        max_batch_size: int,
+    ) -> Iterator[Tuple[str, List[Any], List[torch.Tensor], List[torch.Tensor]]]:
+        """Run SpeechLM inference on many examples with continuous batching.
+
+        Args:
+            examples: Iterable of the key and the inputs of __call__
+            max_batch_size: The maximum number of the sequences decoded at once
+        Yields:
+            The key and the outputs of __call__, in the order of completion
+        """
+
+        def prompts():
+            for key, batch in examples:
+                if "enc_seq" in batch or "enc_seq_lengths" in batch:
+                    raise NotImplementedError("encoder-decoder is not supported yet.")
+                # Note(Jinchuan): discard the start token dec_seq[prefix_len]
+                # as in __call__
+                prefix_len = batch["prefix_len"].squeeze(1)
+                yield key, batch["dec_seq"][:, :prefix_len]
+
+        engine = SpeechLMGenerationEngine(
+            self.model.corelm, self.inference_opts, max_batch_size=max_batch_size
+        )
+        for key, gen_tokens, gen_scores in engine.generate(prompts()):
+            if len(gen_tokens) == 0:
+                yield key, None, None, None
+            else:
+                yield key, self._post_process(gen_tokens), gen_tokens, gen_scores
+
+    def _post_process(self, gen_tokens: List[torch.Tensor]) -> List[Any]:
         generated = []
         for gen_token in gen_tokens:
             gen_token = gen_token - self.bias
             generated.append(self.post_processor(gen_token))
-
-        return generated, gen_tokens, gen_scores
+        return generated
 
     @staticmethod
     def from_pretrained(
@@ -180,13 +217,12 @@ def inference(
     minlenratio: float = 0.0,
     maxlenratio: float = 10.0,
     inference_nj: Optional[int] = 1,
+    kv_cache_type: str = "static",
     # post_processor related
     postprocessor: str = None,
     postprocessor_conf: dict = {},
 ):
     """Run SpeechLM inference."""
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
     if ngpu > 1:
         raise NotImplementedError("only single GPU decoding is supported")
     logging.basicConfig(
@@ -226,15 +262,17 @@ def inference(
         minlenratio=minlenratio,
         modality=output_modality,
         post_processor_conf=postprocessor_conf,
+        kv_cache_type=kv_cache_type,
     )
 
     speechlm = SpeechLM.from_pretrained(model_tag=model_tag, **speechlm_kwargs)
 
     # 4. Build data-iterator
+    # NOTE: The examples are batched by the generation engine if batch_size > 1
     loader = SpeechLMTask.build_streaming_iterator(
         data_path_and_name_and_type,
         dtype=dtype,
-        batch_size=batch_size,
+        batch_size=1,
         key_file=key_file,
         num_workers=num_workers,
         preprocess_fn=SpeechLMTask.build_preprocess_fn(speechlm.train_args, False),
@@ -254,17 +292,22 @@ def inference(
     token_writer = WriteHelper(f'ark:{str(output_dir / "token" / "token")}.ark')
     score_writer = WriteHelper(f'ark:{str(output_dir / "score" / "score")}.ark')
 
-    for _, (keys, batch) in enumerate(loader, 1):
-        assert isinstance(batch, dict), type(batch)
-        assert all(isinstance(s, str) for s in keys), keys
-        _bs = len(next(iter(batch.values())))
-        assert _bs == 1, _bs
+    def examples():
+        for keys, batch in loader:
+            assert isinstance(batch, dict), type(batch)
+            assert all(isinstance(s, str) for s in keys), keys
+            _bs = len(next(iter(batch.values())))
+            assert _bs == 1, _bs
 
-        batch = to_device(batch, device=device)
-        key = keys[0]
-        logging.info(f"Inference on example: {key}")
+            logging.info(f"Inference on example: {keys[0]}")
+            yield keys[0], to_device(batch, device=device)
 
-        contents, tokens, scores = speechlm(**batch)
+    if batch_size > 1:
+        results = speechlm.batch_generate(examples(), max_batch_size=batch_size)
+    else:
+        results = ((key, *speechlm(**batch)) for key, batch in examples())
+
+    for key, contents, tokens, scores in results:
         if contents is None:
             logging.info(f"fail on example: {key}")
             continue
@@ -348,7 +391,9 @@ def get_parser():
         "--batch_size",
         type=int,
         default=1,
-        help="The batch size for inference",
+        help="The batch size for inference. If > 1, the examples are decoded "
+        "with continuous batching, where the batch size is the maximum number "
+        "of the sequences decoded at once, including the nbest hypotheses",
     )
 
     group = parser.add_argument_group("Input data related")
@@ -425,6 +470,14 @@ def get_parser():
         default=None,
         help="nj used in inference, should be the same/smaller than the nq in train",
     )
+    group.add_argument(
+        "--kv_cache_type",
+        type=str,
+        default="static",
+        choices=["static", "concat"],
+        help="The type of the KV cache. 'static' preallocates the cache and "
+        "writes it in place, while 'concat' concatenates the cache at every step",
+    )
 
     group = parser.add_argument_group("Postprocessor related")
 
@@ -4,12 +4,14 @@ import logging
 import os
 import sys
 from glob import glob
+from pathlib import Path
 
 import humanfriendly
 import numpy as np
 import torch
 from torch.multiprocessing.spawn import ProcessContext
 
+from espnet2.fileio.embedding_store import EmbeddingStore, EmbeddingStoreWriter
 from espnet2.samplers.build_batch_sampler import BATCH_TYPES
 from espnet2.tasks.spk import SpeakerTask
 from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
@@ -97,6 +99,10 @@ def extract_embed(args):
     merged_args.update(args)
     args = argparse.Namespace(**merged_args)
 
+    if args.embedding_store is not None:
+        extract_embed_to_store(args, spk_model, distributed_option)
+        return
+
     # 4. Build data-iterator
     # NOTE(jeeweon): Temporarily disable distributed to let loader include all trials
     org_distributed = distributed_option.distributed
@@ -146,6 +152,135 @@ def extract_embed(args):
             os.remove(npz)
 
 
+def build_unique_utt_data(args, store: EmbeddingStore, rank: int, world_size: int):
+    """Write the data files of the unique utterances which are not in the store.
+
+    The trial ids are "<utt_id1>*<utt_id2>", and "speech" and "speech2"
+    are the first and the second utterances of the trials. The other
+    per-trial data, e.g. "task_tokens", are taken from the first trial
+    of each utterance. The utterances are split among the ranks.
+
+    Returns:
+        The list of (path, name, type) for the rank,
+        or None if the rank has no utterance to extract.
+    """
+    utt2trial = {}
+    speech_type = None
+    for path, name, _type in args.data_path_and_name_and_type:
+        if name not in ("speech", "speech2"):
+            continue
+        speech_type = _type
+        pos = 0 if name == "speech" else 1
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                trial, value = line.rstrip().split(maxsplit=1)
+                utt_ids = trial.split("*")
+                utt_id = utt_ids[min(pos, len(utt_ids) - 1)]
+                if utt_id not in utt2trial:
+                    utt2trial[utt_id] = (trial, path, value)
+
+    utt_ids = store.missing_keys(list(utt2trial))
+    logging.info(
+        f"{len(utt2trial)} unique utterances, "
+        f"{len(utt2trial) - len(utt_ids)} of them are already in the store"
+    )
+    utt_ids = utt_ids[rank::world_size]
+    if len(utt_ids) == 0:
+        return None
+
+    outdir = Path(args.output_dir) / "unique_utts"
+    outdir.mkdir(parents=True, exist_ok=True)
+    data_path_and_name_and_type = []
+    p = outdir / f"speech.{rank}.scp"
+    with p.open("w", encoding="utf-8") as f:
+        for utt_id in utt_ids:
+            f.write(f"{utt_id} {utt2trial[utt_id][2]}\n")
+    data_path_and_name_and_type.append((str(p), "speech", speech_type))
+
+    for path, name, _type in args.data_path_and_name_and_type:
+        if name in ("speech", "speech2", "spk_labels"):
+            continue
+        with open(path, encoding="utf-8") as f:
+            trial2value = dict(line.rstrip().split(maxsplit=1) for line in f)
+        p = outdir / f"{name}.{rank}"
+        with p.open("w", encoding="utf-8") as f:
+            for utt_id in utt_ids:
+                f.write(f"{utt_id} {trial2value[utt2trial[utt_id][0]]}\n")
+        data_path_and_name_and_type.append((str(p), name, _type))
+    return data_path_and_name_and_type
+
+
+def extract_embed_to_store(args, spk_model, distributed_option):
+    """Extract the embeddings of the unique utterances into the embedding store.
+
+    The utterances already in the store are not extracted again, so the store
+    can be shared among the trial lists. "<set_name>_embeddings.npz" of the
+    utterances in the trials is also written for the scoring scripts.
+    """
+    if distributed_option.distributed:
+        rank = torch.distributed.get_rank()
+        world_size = torch.distributed.get_world_size()
+    else:
+        rank = 0
+        world_size = 1
+
+    store = EmbeddingStore(args.embedding_store)
+    data_path_and_name_and_type = build_unique_utt_data(args, store, rank, world_size)
+    if distributed_option.distributed:
+        # Wait for all the ranks to decide the utterances before writing to the store
+        torch.distributed.barrier()
+
+    if data_path_and_name_and_type is not None:
+        loader = SpeakerTask.build_streaming_iterator(
+            data_path_and_name_and_type=data_path_and_name_and_type,
+            preprocess_fn=SpeakerTask.build_preprocess_fn(args, train=False),
+            collate_fn=SpeakerTask.build_collate_fn(args, train=False),
+            batch_size=(
+                args.valid_batch_size // args.ngpu
+                if distributed_option.distributed
+                else args.valid_batch_size
+            ),
+            dtype=args.dtype,
+            num_workers=args.num_workers,
+            allow_variable_data_keys=args.allow_variable_data_keys,
+            ngpu=args.ngpu,
+        )
+        with EmbeddingStoreWriter(
+            args.embedding_store,
+            dtype=args.embedding_store_dtype,
+            prefix=f"rank{rank}",
+        ) as writer:
+            SpeakerTask.trainer.extract_embed_to_store(
+                model=spk_model,
+                iterator=loader,
+                options=SpeakerTask.trainer.build_options(args),
+                writer=writer,
+                average=args.average_embd,
+            )
+
+    if distributed_option.distributed:
+        torch.distributed.barrier()
+    if not distributed_option.distributed or distributed_option.dist_rank == 0:
+        # Export the embeddings of the trials
+        utt_ids = {}
+        for path, name, _ in args.data_path_and_name_and_type:
+            if name not in ("speech", "speech2"):
+                continue
+            pos = 0 if name == "speech" else 1
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    trial_utt_ids = line.split(maxsplit=1)[0].split("*")
+                    utt_ids[trial_utt_ids[min(pos, len(trial_utt_ids) - 1)]] = None
+        utt_ids = list(utt_ids)
+        store = EmbeddingStore(args.embedding_store)
+        matrix = store.get_matrix(utt_ids, dtype=np.float32)
+        set_name = args.data_path_and_name_and_type[0][0].split("/")[-2]
+        np.savez(
+            args.output_dir + f"/{set_name}_embeddings",
+            **dict(zip(utt_ids, matrix)),
+        )
+
+
 def get_parser():
     parser = config_argparse.ArgumentParser(
         description="speaker embedding extraction",
@@ -294,6 +429,21 @@ def get_parser():
     )
     group.add_argument("--allow_variable_data_keys", type=str2bool, default=False)
     group.add_argument("--average_embd", type=str2bool, default=False)
+    group.add_argument(
+        "--embedding_store",
+        type=str_or_none,
+        default=None,
+        help="The directory of the embedding store. If given, the embeddings of "
+        "the unique utterances in the trials are extracted into the store, "
+        "skipping the utterances already in it",
+    )
+    group.add_argument(
+        "--embedding_store_dtype",
+        type=str,
+        default="float32",
+        choices=["float16", "float32"],
+        help="The data type of the embeddings in the embedding store",
+    )
     group.add_argument(
         "--train_dtype",
         default="float32",
@@ -313,6 +463,34 @@ def get_parser():
         help="Just only iterating data loading without "
         "model forwarding and training",
     )
+    group.add_argument(
+        "--profile",
+        type=str2bool,
+        default=False,
+        help="Profile the stages of the training loop, e.g. data loading, "
+        "preprocessing, collation, host-to-device copy, forward and backward, "
+        "including the time spent in the DataLoader workers",
+    )
+    group.add_argument(
+        "--profile_trace_start",
+        type=int,
+        default=10,
+        help="The iteration to start recording the Chrome trace of the profile",
+    )
+    group.add_argument(
+        "--profile_trace_steps",
+        type=int,
+        default=0,
+        help="The number of iterations recorded as the Chrome trace, "
+        "which is written to <output_dir>/profile/trace_rank<rank>.json. "
+        "0 disables the trace.",
+    )
+    group.add_argument(
+        "--prefetch_batches",
+        type=int,
+        default=0,
+        help="The number of mini-batches transferred to the device in advance",
+    )
     group.add_argument(
         "--sort_in_batch",
         type=str,
@@ -430,6 +608,13 @@ def get_parser():
         type=str2bool,
         help="Enable sharded training provided by fairscale",
     )
+    group.add_argument(
+        "--dist_stop_check_interval",
+        type=int,
+        default=1,
+        help="Check whether the iterators of all processes are finished "
+        "every the number of iterations instead of every iteration",
+    )
 
     group = parser.add_argument_group("trainer initialization related")
     group.add_argument(
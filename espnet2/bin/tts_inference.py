@@ -3,12 +3,13 @@
 """Script to run the inference of text-to-speeech model."""
 
 import argparse
+import itertools
 import logging
 import shutil
 import sys
 import time
 from pathlib import Path
-from typing import Any, Dict, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import soundfile as sf
@@ -28,6 +29,7 @@ from espnet2.tts.transformer import Transformer
 from espnet2.tts.utils import DurationCalculator
 from espnet2.utils import config_argparse
 from espnet2.utils.types import str2bool, str2triple_str, str_or_none
+from espnet.nets.pytorch_backend.nets_utils import pad_list
 from espnet.utils.cli_utils import get_commandline_args
 
 
@@ -214,6 +216,121 @@ class Text2Speech:
 
         return output_dict
 
+    @torch.no_grad()
+    @typechecked
+    def synthesize_batch(
+        self,
+        text: Union[torch.Tensor, np.ndarray],
+        text_lengths: Union[torch.Tensor, np.ndarray],
+        spembs: Union[torch.Tensor, np.ndarray, None] = None,
+        sids: Union[torch.Tensor, np.ndarray, None] = None,
+        lids: Union[torch.Tensor, np.ndarray, None] = None,
+        decode_conf: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, torch.Tensor]]:
+        """Run text-to-speech for a mini-batch of texts.
+
+        The texts are synthesized by a single forward pass of the model and
+        the vocoder, and then the padded outputs are trimmed to the predicted
+        lengths. Only the non-autoregressive models supporting the batch
+        inference, e.g. FastSpeech2, JETS, and VITS, are available.
+
+        Args:
+            text: Padded token ids (B, T_text)
+            text_lengths: Lengths of the texts (B,)
+            spembs: Speaker embeddings (B, spk_embed_dim)
+            sids: Speaker IDs (B, 1)
+            lids: Language IDs (B, 1)
+            decode_conf: The decoding configs overwriting the default ones
+        Returns:
+            The outputs of each text, in the format of `__call__()`
+
+        """
+        if not self.tts.support_batch_inference:
+            raise NotImplementedError(
+                f"{self.tts.__class__.__name__} does not support the batch inference"
+            )
+        if self.use_speech:
+            raise NotImplementedError(
+                "batch inference is not supported if 'speech' is required"
+            )
+        if self.use_sids and sids is None:
+            raise RuntimeError("Missing required argument: 'sids'")
+        if self.use_lids and lids is None:
+            raise RuntimeError("Missing required argument: 'lids'")
+        if self.use_spembs and spembs is None:
+            raise RuntimeError("Missing required argument: 'spembs'")
+
+        # prepare batch
+        batch = dict(text=text, text_lengths=text_lengths)
+        if spembs is not None:
+            batch.update(spembs=spembs)
+        if sids is not None:
+            batch.update(sids=sids)
+        if lids is not None:
+            batch.update(lids=lids)
+        batch = {k: torch.as_tensor(v) for k, v in batch.items()}
+        batch = to_device(batch, self.device)
+
+        # overwrite the decode configs if provided
+        cfg = self.decode_conf
+        if decode_conf is not None:
+            cfg = self.decode_conf.copy()
+            cfg.update(decode_conf)
+
+        # inference
+        if self.always_fix_seed:
+            set_all_random_seed(self.seed)
+        output_dict = self.model.batch_inference(**batch, **cfg)
+
+        # apply vocoder (mel-to-wav)
+        if self.vocoder is not None:
+            if (
+                self.prefer_normalized_feats
+                or output_dict.get("feat_gen_denorm") is None
+            ):
+                name = "feat_gen"
+            else:
+                name = "feat_gen_denorm"
+            wav, wav_lengths = self._batch_vocode(
+                output_dict[name], output_dict[f"{name}_lengths"]
+            )
+            output_dict.update(wav=wav, wav_lengths=wav_lengths)
+
+        # trim the padded outputs
+        results = []
+        for i, text_length in enumerate(batch["text_lengths"]):
+            result = {}
+            for k, v in output_dict.items():
+                if k.endswith("_lengths"):
+                    continue
+                if f"{k}_lengths" in output_dict:
+                    v = v[i, : output_dict[f"{k}_lengths"][i]]
+                else:
+                    v = v[i]
+                if k == "att_w":
+                    # (T_feats, T_text)
+                    v = v[..., :text_length]
+                result[k] = v
+
+            # calculate additional metrics
+            if result.get("att_w") is not None:
+                duration, focus_rate = self.duration_calculator(result["att_w"])
+                result.update(duration=duration, focus_rate=focus_rate)
+            results.append(result)
+
+        return results
+
+    def _batch_vocode(
+        self, feats: torch.Tensor, feats_lengths: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        if hasattr(self.vocoder, "batch_forward"):
+            return self.vocoder.batch_forward(feats, feats_lengths)
+
+        # e.g. Griffin-Lim
+        wavs = [self.vocoder(f[:l]) for f, l in zip(feats, feats_lengths)]
+        wav_lengths = torch.tensor([len(w) for w in wavs], device=feats.device)
+        return pad_list(wavs, 0.0), wav_lengths
+
     @property
     def fs(self) -> Optional[int]:
         """Return sampling rate."""
@@ -337,8 +454,6 @@ def inference(
     vocoder_tag: Optional[str],
 ):
     """Run text-to-speech inference."""
-    if batch_size > 1:
-        raise NotImplementedError("batch decoding is not implemented")
     if ngpu > 1:
         raise NotImplementedError("only single GPU decoding is supported")
     logging.basicConfig(
@@ -381,6 +496,12 @@ def inference(
         **text2speech_kwargs,
     )
 
+    if batch_size > 1 and not text2speech.tts.support_batch_inference:
+        raise NotImplementedError(
+            f"batch decoding is not implemented for "
+            f"{text2speech.tts.__class__.__name__}"
+        )
+
     # 3. Build data-iterator
     if not text2speech.use_speech:
         data_path_and_name_and_type = list(
@@ -389,7 +510,7 @@ def inference(
     loader = TTSTask.build_streaming_iterator(
         data_path_and_name_and_type,
         dtype=dtype,
-        batch_size=batch_size,
+        batch_size=1,
         key_file=key_file,
         num_workers=num_workers,
         preprocess_fn=TTSTask.build_preprocess_fn(text2speech.train_args, False),
@@ -397,6 +518,9 @@ def inference(
         allow_variable_data_keys=allow_variable_data_keys,
         inference=True,
     )
+    if batch_size > 1:
+        # NOTE: The mini-batches are made after sorting by the text lengths
+        loader = _sorted_batches(loader, batch_size, sort_window=batch_size * 16)
 
     # 4. Start for-loop
     output_dir = Path(output_dir)
@@ -428,119 +552,133 @@ def inference(
     ) as duration_writer, open(
         output_dir / "focus_rates/focus_rates", "w"
     ) as focus_rate_writer:
-        for idx, (keys, batch) in enumerate(loader, 1):
+        for keys, batch in loader:
             assert isinstance(batch, dict), type(batch)
             assert all(isinstance(s, str) for s in keys), keys
             _bs = len(next(iter(batch.values())))
-            assert _bs == 1, _bs
-
-            # Change to single sequence and remove *_length
-            # because inference() requires 1-seq, not mini-batch.
-            batch = {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")}
+            assert len(keys) == _bs, f"{len(keys)} != {_bs}"
 
             start_time = time.perf_counter()
-            output_dict = text2speech(**batch)
-
-            key = keys[0]
-            insize = next(iter(batch.values())).size(0) + 1
-            if output_dict.get("feat_gen") is not None:
-                # standard text2mel model case
-                feat_gen = output_dict["feat_gen"]
-                logging.info(
-                    "inference speed = {:.1f} frames / sec.".format(
-                        int(feat_gen.size(0)) / (time.perf_counter() - start_time)
-                    )
-                )
-                logging.info(f"{key} (size:{insize}->{feat_gen.size(0)})")
-                if feat_gen.size(0) == insize * maxlenratio:
-                    logging.warning(f"output length reaches maximum length ({key}).")
-
-                norm_writer[key] = output_dict["feat_gen"].cpu().numpy()
-                shape_writer.write(
-                    f"{key} " + ",".join(map(str, output_dict["feat_gen"].shape)) + "\n"
-                )
-                if output_dict.get("feat_gen_denorm") is not None:
-                    denorm_writer[key] = output_dict["feat_gen_denorm"].cpu().numpy()
+            if batch_size > 1:
+                output_dicts = text2speech.synthesize_batch(**batch)
+                insizes = (batch["text_lengths"] + 1).tolist()
             else:
-                # end-to-end text2wav model case
-                wav = output_dict["wav"]
-                logging.info(
-                    "inference speed = {:.1f} points / sec.".format(
-                        int(wav.size(0)) / (time.perf_counter() - start_time)
-                    )
-                )
-                logging.info(f"{key} (size:{insize}->{wav.size(0)})")
-
-            if output_dict.get("duration") is not None:
-                # Save duration and fucus rates
-                duration_writer.write(
-                    f"{key} "
-                    + " ".join(map(str, output_dict["duration"].long().cpu().numpy()))
-                    + "\n"
-                )
-
-            if output_dict.get("focus_rate") is not None:
-                focus_rate_writer.write(
-                    f"{key} {float(output_dict['focus_rate']):.5f}\n"
+                # Change to single sequence and remove *_length
+                # because inference() requires 1-seq, not mini-batch.
+                batch = {
+                    k: v[0] for k, v in batch.items() if not k.endswith("_lengths")
+                }
+                output_dicts = [text2speech(**batch)]
+                insizes = [next(iter(batch.values())).size(0) + 1]
+            elapsed = time.perf_counter() - start_time
+
+            if output_dicts[0].get("feat_gen") is not None:
+                name, unit = "feat_gen", "frames"
+            else:
+                name, unit = "wav", "points"
+            logging.info(
+                "inference speed = {:.1f} {} / sec.".format(
+                    sum(int(d[name].size(0)) for d in output_dicts) / elapsed, unit
                 )
+            )
 
-            if output_dict.get("att_w") is not None:
-                # Plot attention weight
-                att_w = output_dict["att_w"].cpu().numpy()
+            for key, insize, output_dict in zip(keys, insizes, output_dicts):
+                if output_dict.get("feat_gen") is not None:
+                    # standard text2mel model case
+                    feat_gen = output_dict["feat_gen"]
+                    logging.info(f"{key} (size:{insize}->{feat_gen.size(0)})")
+                    if feat_gen.size(0) == insize * maxlenratio:
+                        logging.warning(
+                            f"output length reaches maximum length ({key})."
+                        )
+
+                    norm_writer[key] = output_dict["feat_gen"].cpu().numpy()
+                    shape_writer.write(
+                        f"{key} "
+                        + ",".join(map(str, output_dict["feat_gen"].shape))
+                        + "\n"
+                    )
+                    if output_dict.get("feat_gen_denorm") is not None:
+                        denorm_writer[key] = (
+                            output_dict["feat_gen_denorm"].cpu().numpy()
+                        )
+                else:
+                    # end-to-end text2wav model case
+                    wav = output_dict["wav"]
+                    logging.info(f"{key} (size:{insize}->{wav.size(0)})")
+
+                if output_dict.get("duration") is not None:
+                    # Save duration and fucus rates
+                    duration_writer.write(
+                        f"{key} "
+                        + " ".join(
+                            map(str, output_dict["duration"].long().cpu().numpy())
+                        )
+                        + "\n"
+                    )
 
-                if att_w.ndim == 2:
-                    att_w = att_w[None][None]
-                elif att_w.ndim != 4:
-                    raise RuntimeError(f"Must be 2 or 4 dimension: {att_w.ndim}")
+                if output_dict.get("focus_rate") is not None:
+                    focus_rate_writer.write(
+                        f"{key} {float(output_dict['focus_rate']):.5f}\n"
+                    )
 
-                w, h = plt.figaspect(att_w.shape[0] / att_w.shape[1])
-                fig = plt.Figure(
-                    figsize=(
-                        w * 1.3 * min(att_w.shape[0], 2.5),
-                        h * 1.3 * min(att_w.shape[1], 2.5),
+                if output_dict.get("att_w") is not None:
+                    # Plot attention weight
+                    att_w = output_dict["att_w"].cpu().numpy()
+
+                    if att_w.ndim == 2:
+                        att_w = att_w[None][None]
+                    elif att_w.ndim != 4:
+                        raise RuntimeError(f"Must be 2 or 4 dimension: {att_w.ndim}")
+
+                    w, h = plt.figaspect(att_w.shape[0] / att_w.shape[1])
+                    fig = plt.Figure(
+                        figsize=(
+                            w * 1.3 * min(att_w.shape[0], 2.5),
+                            h * 1.3 * min(att_w.shape[1], 2.5),
+                        )
+                    )
+                    fig.suptitle(f"{key}")
+                    axes = fig.subplots(att_w.shape[0], att_w.shape[1])
+                    if len(att_w) == 1:
+                        axes = [[axes]]
+                    for ax, att_w in zip(axes, att_w):
+                        for ax_, att_w_ in zip(ax, att_w):
+                            ax_.imshow(att_w_.astype(np.float32), aspect="auto")
+                            ax_.set_xlabel("Input")
+                            ax_.set_ylabel("Output")
+                            ax_.xaxis.set_major_locator(MaxNLocator(integer=True))
+                            ax_.yaxis.set_major_locator(MaxNLocator(integer=True))
+
+                    fig.set_tight_layout({"rect": [0, 0.03, 1, 0.95]})
+                    fig.savefig(output_dir / f"att_ws/{key}.png")
+                    fig.clf()
+
+                if output_dict.get("prob") is not None:
+                    # Plot stop token prediction
+                    prob = output_dict["prob"].cpu().numpy()
+
+                    fig = plt.Figure()
+                    ax = fig.add_subplot(1, 1, 1)
+                    ax.plot(prob)
+                    ax.set_title(f"{key}")
+                    ax.set_xlabel("Output")
+                    ax.set_ylabel("Stop probability")
+                    ax.set_ylim(0, 1)
+                    ax.grid(which="both")
+
+                    fig.set_tight_layout(True)
+                    fig.savefig(output_dir / f"probs/{key}.png")
+                    fig.clf()
+
+                if output_dict.get("wav") is not None:
+                    # TODO(kamo): Write scp
+                    sf.write(
+                        f"{output_dir}/wav/{key}.wav",
+                        output_dict["wav"].cpu().numpy(),
+                        text2speech.fs,
+                        "PCM_16",
                     )
-                )
-                fig.suptitle(f"{key}")
-                axes = fig.subplots(att_w.shape[0], att_w.shape[1])
-                if len(att_w) == 1:
-                    axes = [[axes]]
-                for ax, att_w in zip(axes, att_w):
-                    for ax_, att_w_ in zip(ax, att_w):
-                        ax_.imshow(att_w_.astype(np.float32), aspect="auto")
-                        ax_.set_xlabel("Input")
-                        ax_.set_ylabel("Output")
-                        ax_.xaxis.set_major_locator(MaxNLocator(integer=True))
-                        ax_.yaxis.set_major_locator(MaxNLocator(integer=True))
-
-                fig.set_tight_layout({"rect": [0, 0.03, 1, 0.95]})
-                fig.savefig(output_dir / f"att_ws/{key}.png")
-                fig.clf()
-
-            if output_dict.get("prob") is not None:
-                # Plot stop token prediction
-                prob = output_dict["prob"].cpu().numpy()
-
-                fig = plt.Figure()
-                ax = fig.add_subplot(1, 1, 1)
-                ax.plot(prob)
-                ax.set_title(f"{key}")
-                ax.set_xlabel("Output")
-                ax.set_ylabel("Stop probability")
-                ax.set_ylim(0, 1)
-                ax.grid(which="both")
-
-                fig.set_tight_layout(True)
-                fig.savefig(output_dir / f"probs/{key}.png")
-                fig.clf()
-
-            if output_dict.get("wav") is not None:
-                # TODO(kamo): Write scp
-                sf.write(
-                    f"{output_dir}/wav/{key}.wav",
-                    output_dict["wav"].cpu().numpy(),
-                    text2speech.fs,
-                    "PCM_16",
-                )
 
     # remove files if those are not included in output dict
     if output_dict.get("feat_gen") is None:
@@ -559,6 +697,49 @@ def inference(
         shutil.rmtree(output_dir / "wav")
 
 
+def _sorted_batches(
+    loader: Iterable[Tuple[List[str], Dict[str, torch.Tensor]]],
+    batch_size: int,
+    sort_window: int,
+) -> Iterator[Tuple[List[str], Dict[str, torch.Tensor]]]:
+    """Make mini-batches of the texts with similar lengths.
+
+    Every `sort_window` utterances given by the loader are sorted by
+    the text lengths and then split into mini-batches to reduce the padding.
+
+    Args:
+        loader: The iterator of single utterances (batch_size=1)
+        batch_size: The number of utterances in a mini-batch
+        sort_window: The number of utterances sorted at once
+    Returns:
+        The iterator of the keys and the padded mini-batches with "text_lengths"
+
+    """
+    window = []
+    for keys, batch in itertools.chain(loader, [(None, None)]):
+        if keys is not None:
+            window.append(
+                (
+                    keys[0],
+                    {k: v[0] for k, v in batch.items() if not k.endswith("_lengths")},
+                )
+            )
+            if len(window) < sort_window:
+                continue
+
+        window.sort(key=lambda x: len(x[1]["text"]), reverse=True)
+        for i in range(0, len(window), batch_size):
+            items = window[i : i + batch_size]
+            batch = {
+                k: pad_list([item[k] for _, item in items], 0) for k in items[0][1]
+            }
+            batch["text_lengths"] = torch.tensor(
+                [len(item["text"]) for _, item in items]
+            )
+            yield [key for key, _ in items], batch
+        window = []
+
+
 def get_parser():
     """Get argument parser."""
     parser = config_argparse.ArgumentParser(
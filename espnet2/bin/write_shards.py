@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+import argparse
+import io
+import logging
+import sys
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import humanfriendly
+import kaldiio
+import numpy as np
+import soundfile
+
+from espnet2.fileio.read_text import read_2columns_text_compact
+from espnet2.fileio.shard import AUDIO_EXTS, ShardWriter, encode_array, encode_audio
+from espnet2.train.iterable_dataset import DATA_TYPES
+from espnet2.utils.types import str2bool, str2triple_str, str_or_none
+from espnet.utils.cli_utils import get_commandline_args
+
+NUMERIC_TYPES = ("text_int", "csv_int", "text_float", "csv_float")
+SUPPORTED_TYPES = ("sound", "npy", "kaldi_ark", "text") + NUMERIC_TYPES
+
+
+def encode_value(value: str, _type: str) -> Tuple[str, bytes]:
+    """Encode the value of a line of the data file as (ext, bytes)."""
+    if _type == "sound":
+        path = Path(value)
+        ext = path.suffix[1:].lower()
+        if ext in AUDIO_EXTS and path.is_file():
+            # Keep the original bytes, e.g. compressed by flac
+            return ext, path.read_bytes()
+        array, rate = soundfile.read(value, dtype="float32")
+        return "wav", encode_audio(array, rate)
+    elif _type == "npy":
+        return "npy", Path(value).read_bytes()
+    elif _type == "kaldi_ark":
+        retval = kaldiio.load_mat(value)
+        if isinstance(retval, tuple):
+            if isinstance(retval[0], int):
+                rate, array = retval
+            else:
+                array, rate = retval
+            return "wav", encode_audio(array, rate)
+        return "npy", encode_array(retval)
+    elif _type in NUMERIC_TYPES:
+        return "npy", encode_array(DATA_TYPES[_type](value))
+    elif _type == "text":
+        return "txt", value.encode("utf-8")
+    else:
+        raise ValueError(f"Not supported type: {_type}")
+
+
+def get_shape(ext: str, buf: bytes) -> Optional[Tuple[int, ...]]:
+    """Return the shape of the encoded member or None for text."""
+    if ext in AUDIO_EXTS:
+        info = soundfile.info(io.BytesIO(buf))
+        if info.channels == 1:
+            return (info.frames,)
+        return (info.frames, info.channels)
+    elif ext == "npy":
+        return np.load(io.BytesIO(buf), allow_pickle=False).shape
+    return None
+
+
+def write_shards(
+    data_path_and_name_and_type: Sequence[Tuple[str, str, str]],
+    output_dir: str,
+    key_file: Optional[str],
+    max_samples_per_shard: int,
+    max_shard_size: str,
+    shuffle: bool,
+    seed: int,
+    log_level: str,
+):
+    logging.basicConfig(
+        level=log_level,
+        format="%(asctime)s (%(module)s:%(lineno)d) %(levelname)s: %(message)s",
+    )
+    for path, name, _type in data_path_and_name_and_type:
+        if _type not in SUPPORTED_TYPES:
+            raise ValueError(f"Not supported type: {path},{name},{_type}")
+    loaders = [
+        read_2columns_text_compact(path) for path, _, _ in data_path_and_name_and_type
+    ]
+
+    if key_file is not None:
+        keys = list(read_2columns_text_compact(key_file))
+    else:
+        keys = list(loaders[0])
+    if shuffle:
+        # NOTE: The shuffle buffer of the dataset only shuffles the neighbors,
+        # so it's better to shuffle the samples when packing them
+        np.random.RandomState(seed).shuffle(keys)
+
+    output_dir = Path(output_dir)
+    shape_files = {}
+    with ShardWriter(
+        output_dir,
+        max_samples=max_samples_per_shard,
+        max_bytes=humanfriendly.parse_size(max_shard_size),
+    ) as writer:
+        for i, uid in enumerate(keys):
+            members = {}
+            for loader, (path, name, _type) in zip(
+                loaders, data_path_and_name_and_type
+            ):
+                if uid not in loader:
+                    raise RuntimeError(f"{uid} is not found in {path}")
+                members[name] = encode_value(loader[uid], _type)
+
+                shape = get_shape(*members[name])
+                if shape is not None:
+                    if name not in shape_files:
+                        shape_files[name] = (output_dir / f"{name}_shape").open(
+                            "w", encoding="utf-8"
+                        )
+                    shape_files[name].write(f"{uid} {','.join(map(str, shape))}\n")
+            writer.write(uid, members)
+
+            if (i + 1) % 10000 == 0:
+                logging.info(f"Processed {i + 1}/{len(keys)} samples")
+    for f in shape_files.values():
+        f.close()
+    logging.info(f"Wrote {len(keys)} samples to {len(writer.shards)} shards")
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Pack the training data into the shards, which can be read "
+        "sequentially by ShardIterableESPnetDataset",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--log_level",
+        type=lambda x: x.upper(),
+        default="INFO",
+        choices=("CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"),
+        help="The verbose level of logging",
+    )
+    parser.add_argument(
+        "--data_path_and_name_and_type",
+        type=str2triple_str,
+        required=True,
+        action="append",
+        help="e.g. dump/raw/train/wav.scp,speech,sound. "
+        f"The supported types are {', '.join(SUPPORTED_TYPES)}",
+    )
+    parser.add_argument("--output_dir", type=str, required=True)
+    parser.add_argument(
+        "--key_file",
+        type=str_or_none,
+        default=None,
+        help="The keys of the samples to pack. "
+        "If not given, the keys of the first data file are used",
+    )
+    parser.add_argument(
+        "--max_samples_per_shard",
+        type=int,
+        default=1000,
+        help="The maximum number of samples in a shard",
+    )
+    parser.add_argument(
+        "--max_shard_size",
+        type=str,
+        default="1GB",
+        help="The maximum size of a shard. "
+        "A new shard is started when the size exceeds this value",
+    )
+    parser.add_argument(
+        "--shuffle",
+        type=str2bool,
+        default=True,
+        help="Shuffle the order of the samples before packing them",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    return parser
+
+
+def main(cmd=None):
+    print(get_commandline_args(), file=sys.stderr)
+    parser = get_parser()
+    args = parser.parse_args(cmd)
+    kwargs = vars(args)
+    write_shards(**kwargs)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 import warnings
 from pathlib import Path
-from typing import Union
+from typing import Sequence, Union
 
 from typeguard import typechecked
 
@@ -56,6 +56,28 @@ class DatadirWriter:
         self.keys.add(key)
         self.fd.write(f"{key} {value}\n")
 
+    def write_lines(self, keys: Sequence[str], values: Sequence[str]):
+        """Write the pairs of keys and values at once.
+
+        Equivalent to "writer[key] = value" for each pair,
+        but the lines are written by a single call.
+        """
+        if self.has_children:
+            raise RuntimeError("This writer points out a directory")
+        if len(keys) != len(values):
+            raise ValueError(
+                f"Mismatched length: keys={len(keys)} values={len(values)}"
+            )
+        for key in self.keys.intersection(keys):
+            warnings.warn(f"Duplicated: {key}")
+
+        if self.fd is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.fd = self.path.open("w", encoding="utf-8")
+
+        self.keys.update(keys)
+        self.fd.write("".join(f"{k} {v}\n" for k, v in zip(keys, values)))
+
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
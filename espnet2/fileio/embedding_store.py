@@ -0,0 +1,186 @@
+import collections.abc
+import os
+import uuid
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from typeguard import typechecked
+
+from espnet2.fileio.key_index import KeyIndex
+
+
+class EmbeddingStoreWriter:
+    """Writer class to append embeddings to an embedding store.
+
+    The store is a directory of chunks. A chunk consists of a matrix
+    "<name>.npy" whose i-th row is the embedding of the i-th key, and its
+    key index "<name>.index.npz". Each writer appends its own chunks,
+    so the processes can write to the same store concurrently.
+
+    Examples:
+        >>> with EmbeddingStoreWriter("exp/embeddings", dtype="float16") as writer:
+        ...     writer["utt_a"] = np.random.randn(192)
+        ...     writer.write_batch(["utt_b", "utt_c"], np.random.randn(2, 192))
+
+    Args:
+        store_dir: The directory of the store
+        dtype: The data type of the stored embeddings
+        chunk_size: The number of the embeddings buffered before writing a chunk
+        prefix: The prefix of the chunk names, e.g. the rank of the process
+    """
+
+    @typechecked
+    def __init__(
+        self,
+        store_dir: Union[Path, str],
+        dtype: str = "float32",
+        chunk_size: int = 100000,
+        prefix: str = "chunk",
+    ):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive: {chunk_size}")
+        self.dir = Path(store_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+
+        self.keys = []
+        self.values = []
+        self.written = set()
+
+    def __setitem__(self, key: str, value: np.ndarray):
+        self.write_batch([key], np.asarray(value)[None])
+
+    def write_batch(self, keys: Sequence[str], values: np.ndarray):
+        """Append the embeddings (len(keys), ...) of the keys."""
+        values = np.asarray(values)
+        if len(keys) != len(values):
+            raise ValueError(
+                f"Mismatched length: keys={len(keys)} values={len(values)}"
+            )
+        for key, value in zip(keys, values):
+            if key in self.written:
+                raise RuntimeError(f"{key} is duplicated")
+            self.written.add(key)
+            self.keys.append(key)
+            self.values.append(value.astype(self.dtype))
+        if len(self.keys) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered embeddings as a chunk."""
+        if len(self.keys) == 0:
+            return
+        name = f"{self.prefix}-{uuid.uuid4().hex}"
+        matrix = np.stack(self.values)
+        index = KeyIndex(self.keys)
+
+        # NOTE: The index is renamed at last, so the readers never see
+        #   the chunks being written.
+        for suffix, save in [
+            (".npy", lambda f: np.save(f, matrix)),
+            (".index.npz", lambda f: np.savez(f, **index.to_arrays())),
+        ]:
+            tmp = self.dir / f"{name}{suffix}.tmp"
+            with tmp.open("wb") as f:
+                save(f)
+            os.replace(tmp, self.dir / f"{name}{suffix}")
+
+        self.keys = []
+        self.values = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        self.flush()
+
+
+class EmbeddingStore(collections.abc.Mapping):
+    """Reader class for an embedding store written by EmbeddingStoreWriter.
+
+    The matrices of the chunks are memory-mapped, so only the rows
+    of the requested keys are read from the disk.
+
+    Examples:
+        >>> store = EmbeddingStore("exp/embeddings")
+        >>> embedding = store["utt_a"]
+        >>> matrix = store.get_matrix(["utt_a", "utt_c"])
+
+    Args:
+        store_dir: The directory of the store
+    """
+
+    @typechecked
+    def __init__(self, store_dir: Union[Path, str]):
+        self.dir = Path(store_dir)
+        self.indices = []
+        self.matrices = []
+        if self.dir.exists():
+            for p in sorted(self.dir.glob("*.index.npz")):
+                name = p.name[: -len(".index.npz")]
+                with np.load(p) as f:
+                    index = KeyIndex.from_arrays(dict(f))
+                matrix = np.load(self.dir / f"{name}.npy", mmap_mode="r")
+                if len(index) != len(matrix):
+                    raise RuntimeError(
+                        f"Mismatched length: {p}: {len(index)} != {len(matrix)}"
+                    )
+                self.indices.append(index)
+                self.matrices.append(matrix)
+
+    def find(self, key: str) -> Optional[Tuple[int, int]]:
+        """Return (chunk, row) of the key or None if it is not found."""
+        for i, index in enumerate(self.indices):
+            row = index.find(key)
+            if row >= 0:
+                return i, row
+        return None
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        found = self.find(key)
+        if found is None:
+            raise KeyError(key)
+        chunk, row = found
+        return np.array(self.matrices[chunk][row])
+
+    def get_matrix(self, keys: Sequence[str], dtype=None) -> np.ndarray:
+        """Return the embeddings of the keys as a matrix (len(keys), ...)."""
+        rows = np.empty((len(keys), 2), dtype=np.int64)
+        for i, key in enumerate(keys):
+            found = self.find(key)
+            if found is None:
+                raise KeyError(key)
+            rows[i] = found
+
+        if len(self.matrices) == 0:
+            return np.empty((0,), dtype=dtype or np.float32)
+        matrix = np.empty(
+            (len(keys),) + self.matrices[0].shape[1:],
+            dtype=dtype or self.matrices[0].dtype,
+        )
+        for chunk in np.unique(rows[:, 0]):
+            (sel,) = np.nonzero(rows[:, 0] == chunk)
+            # Read the rows in the order of the file
+            order = np.argsort(rows[sel, 1])
+            matrix[sel[order]] = self.matrices[chunk][rows[sel[order], 1]]
+        return matrix
+
+    def missing_keys(self, keys: Sequence[str]) -> List[str]:
+        """Return the keys which are not stored yet."""
+        return [k for k in keys if self.find(k) is None]
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self.find(key) is not None
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self.indices)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in self.indices:
+            yield from index
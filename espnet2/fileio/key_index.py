@@ -0,0 +1,201 @@
+import collections.abc
+import zlib
+from typing import Dict, Iterable, Iterator, Sequence
+
+import numpy as np
+
+
+def _pack_strings(strings: Iterable[str]):
+    # -> (bytes of all strings as uint8 array, offsets of them (N + 1,))
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return blob, offsets, encoded
+
+
+def _hash(key: bytes) -> int:
+    # NOTE: hash() of str is randomized per process, so it can't be used here
+    return zlib.crc32(key)
+
+
+class KeyIndex:
+    """Compact and array-backed table of utterance ids.
+
+    The keys are stored as a single byte buffer and an array of offsets
+    instead of a list of Python str objects, and the key -> row lookup is
+    done with an array-backed hash table. Both int -> key and key -> row
+    lookups are O(1), and the arrays are shared with the forked DataLoader
+    workers without copying, since no reference counts are touched.
+
+    Examples:
+        >>> index = KeyIndex(["utt_a", "utt_b", "utt_c"])
+        >>> index[1]
+        'utt_b'
+        >>> index.index("utt_c")
+        2
+        >>> "utt_d" in index
+        False
+
+    Args:
+        keys: The utterance ids. They must be unique.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self._blob, self._offsets, encoded = _pack_strings(keys)
+        n = len(encoded)
+        itype = np.int32 if n < 2**31 else np.int64
+        self._hashes = np.fromiter(map(_hash, encoded), dtype=np.uint32, count=n)
+
+        # Hash table in CSR layout: The rows of the i-th bucket are
+        # self._rows[self._starts[i]:self._starts[i + 1]]
+        num_buckets = 1 << max(n - 1, 1).bit_length()
+        self._mask = num_buckets - 1
+        buckets = self._hashes & np.uint32(self._mask)
+        self._rows = np.argsort(buckets, kind="stable").astype(itype)
+        self._starts = np.searchsorted(
+            buckets[self._rows], np.arange(num_buckets + 1)
+        ).astype(itype)
+        self._check_duplicates(encoded)
+
+    @classmethod
+    def from_arrays(cls, arrays: Dict[str, np.ndarray]) -> "KeyIndex":
+        """Restore KeyIndex from the arrays given by to_arrays().
+
+        The arrays are used as they are, so they can be memory-mapped ones.
+        """
+        self = cls.__new__(cls)
+        self._blob = arrays["blob"]
+        self._offsets = arrays["offsets"]
+        self._hashes = arrays["hashes"]
+        self._rows = arrays["rows"]
+        self._starts = arrays["starts"]
+        self._mask = len(self._starts) - 2
+        return self
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Return the arrays which represent this index."""
+        return dict(
+            blob=self._blob,
+            offsets=self._offsets,
+            hashes=self._hashes,
+            rows=self._rows,
+            starts=self._starts,
+        )
+
+    def _check_duplicates(self, encoded):
+        # Only the keys with colliding hashes can be duplicated
+        order = np.argsort(self._hashes, kind="stable")
+        sorted_hashes = self._hashes[order]
+        collided = np.flatnonzero(sorted_hashes[1:] == sorted_hashes[:-1])
+        if len(collided) == 0:
+            return
+        seen = {}
+        for row in np.unique(np.concatenate([order[collided], order[collided + 1]])):
+            row = int(row)
+            key = encoded[row]
+            if key in seen:
+                raise RuntimeError(
+                    f"{key.decode('utf-8')} is duplicated (rows {seen[key]}, {row})"
+                )
+            seen[key] = row
+
+    def _key_bytes(self, row: int) -> bytes:
+        return self._blob[self._offsets[row] : self._offsets[row + 1]].tobytes()
+
+    def find(self, key: str) -> int:
+        """Return the row of the key or -1 if it is not found."""
+        kb = key.encode("utf-8")
+        h = _hash(kb)
+        b = h & self._mask
+        for row in self._rows[self._starts[b] : self._starts[b + 1]].tolist():
+            if self._hashes[row] == h and self._key_bytes(row) == kb:
+                return row
+        return -1
+
+    def index(self, key: str) -> int:
+        """Return the row of the key."""
+        row = self.find(key)
+        if row < 0:
+            raise KeyError(key)
+        return row
+
+    def __getitem__(self, i: int) -> str:
+        n = len(self)
+        if not -n <= i < n:
+            raise IndexError(f"index out of range: {i}")
+        return self._key_bytes(i % n).decode("utf-8")
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __contains__(self, key) -> bool:
+        return isinstance(key, str) and self.find(key) >= 0
+
+    @property
+    def nbytes(self) -> int:
+        """The number of bytes of the arrays."""
+        return sum(a.nbytes for a in self.to_arrays().values())
+
+
+class CompactTextDict(collections.abc.Mapping):
+    """Read-only str -> str mapping stored as offset arrays.
+
+    This is a memory efficient alternative to the dict returned by
+    read_2columns_text(). The keys are held by KeyIndex, which can be shared
+    by several mappings having the same keys, e.g. wav.scp and text.
+
+    Examples:
+        >>> d = CompactTextDict(KeyIndex(["utt_a", "utt_b"]), ["a.wav", "b.wav"])
+        >>> d["utt_b"]
+        'b.wav'
+
+    Args:
+        key_index: The keys
+        values: The values in the order of the rows of the key_index
+    """
+
+    def __init__(self, key_index: KeyIndex, values: Sequence[str]):
+        if len(key_index) != len(values):
+            raise ValueError(
+                f"The numbers of keys and values are mismatched: "
+                f"{len(key_index)} != {len(values)}"
+            )
+        self.key_index = key_index
+        self._blob, self._offsets, _ = _pack_strings(values)
+
+    @classmethod
+    def from_arrays(
+        cls, key_index: KeyIndex, blob: np.ndarray, offsets: np.ndarray
+    ) -> "CompactTextDict":
+        """Create CompactTextDict from the bytes and the offsets of the values."""
+        self = cls.__new__(cls)
+        self.key_index = key_index
+        self._blob = blob
+        self._offsets = offsets
+        return self
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Return the bytes and the offsets of the values."""
+        return dict(blob=self._blob, offsets=self._offsets)
+
+    def value(self, row: int) -> str:
+        """Return the value at the row of the key_index."""
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return self._blob[start:end].tobytes().decode("utf-8")
+
+    def __getitem__(self, key: str) -> str:
+        return self.value(self.key_index.index(key))
+
+    def __contains__(self, key) -> bool:
+        return key in self.key_index
+
+    def __len__(self) -> int:
+        return len(self.key_index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.key_index)
@@ -0,0 +1,285 @@
+import collections.abc
+import json
+import mmap
+import struct
+from pathlib import Path
+from typing import Iterator, Sequence, Tuple, Union
+
+import numpy as np
+from typeguard import typechecked
+
+from espnet2.fileio.key_index import CompactTextDict, KeyIndex
+
+MAGIC = b"ESPNETMF"
+VERSION = 1
+# Alignment of the arrays in the file
+_ALIGN = 64
+
+# data_type -> (delimiter, dtype) for the numeric sequences
+NUMERIC_TYPES = {
+    "text_int": (" ", np.int32),
+    "csv_int": (",", np.int32),
+    "text_float": (" ", np.float32),
+    "csv_float": (",", np.float32),
+}
+# The values of these types are stored as str
+TEXT_TYPES = ("sound", "npy", "text")
+
+
+def is_manifest(path: Union[Path, str]) -> bool:
+    """Return True if the file is a binary manifest."""
+    try:
+        with Path(path).open("rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (OSError, ValueError):
+        return False
+
+
+@typechecked
+def write_manifest(
+    path: Union[Path, str],
+    data_type: str,
+    keys: Sequence[str],
+    values: Union[Sequence[str], Sequence[np.ndarray]],
+):
+    """Write a binary manifest file.
+
+    The file consists of the magic bytes, the length of the header, the header
+    in JSON and the arrays aligned to 64 bytes:
+
+        - key_blob, key_offsets: The utterance ids as bytes and their offsets
+        - key_hashes, key_rows, key_starts: The hash table of KeyIndex
+        - value_data, value_offsets: The values, i.e. str as bytes
+            or numeric sequences as int32/float32, and their offsets
+
+    Args:
+        path: The output file path
+        data_type: One of "sound", "npy", "text", "text_int", "csv_int",
+            "text_float" and "csv_float"
+        keys: The utterance ids
+        values: The str values for TEXT_TYPES or
+            the 1-dim arrays for NUMERIC_TYPES
+    """
+    if len(keys) != len(values):
+        raise ValueError(
+            f"The numbers of keys and values are mismatched: "
+            f"{len(keys)} != {len(values)}"
+        )
+    key_index = KeyIndex(keys)
+    if data_type in TEXT_TYPES:
+        value_arrays = CompactTextDict(key_index, values).to_arrays()
+        _write_arrays(
+            path, data_type, key_index, value_arrays["blob"], value_arrays["offsets"]
+        )
+    elif data_type in NUMERIC_TYPES:
+        _, dtype = NUMERIC_TYPES[data_type]
+        lengths = np.array([len(v) for v in values], dtype=np.int64)
+        if len(values) > 0:
+            data = np.concatenate(values).astype(dtype, copy=False)
+        else:
+            data = np.zeros(0, dtype=dtype)
+        _write_arrays(path, data_type, key_index, data, _to_offsets(lengths))
+    else:
+        raise ValueError(f"Not supported data_type={data_type}")
+
+
+def _to_offsets(lengths: np.ndarray) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _write_arrays(
+    path: Union[Path, str],
+    data_type: str,
+    key_index: KeyIndex,
+    value_data: np.ndarray,
+    value_offsets: np.ndarray,
+):
+    arrays = {f"key_{k}": v for k, v in key_index.to_arrays().items()}
+    arrays["value_data"] = value_data
+    arrays["value_offsets"] = value_offsets
+
+    # Compute the offsets of the arrays in the file
+    specs = {}
+    offset = 0
+    for name, array in arrays.items():
+        specs[name] = dict(
+            dtype=array.dtype.str, shape=list(array.shape), offset=offset
+        )
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps(
+        dict(version=VERSION, data_type=data_type, arrays=specs)
+    ).encode("utf-8")
+    start = -(-(len(MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+    with Path(path).open("wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        f.write(b"\0" * (start - f.tell()))
+        for name, array in arrays.items():
+            assert f.tell() == start + specs[name]["offset"], name
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.write(b"\0" * (-array.nbytes % _ALIGN))
+
+
+@typechecked
+def convert_to_manifest(
+    input_path: Union[Path, str],
+    output_path: Union[Path, str],
+    data_type: str,
+    chunk_size: int = 100000,
+):
+    """Convert a text manifest, e.g. wav.scp, text or shape file, to binary.
+
+    Examples:
+        >>> convert_to_manifest("wav.scp", "wav.mf", "sound")
+        >>> convert_to_manifest("speech_shape", "speech_shape.mf", "csv_int")
+    """
+    if data_type not in TEXT_TYPES and data_type not in NUMERIC_TYPES:
+        raise ValueError(f"Not supported data_type={data_type}")
+
+    keys = []
+    values = []
+    if data_type in NUMERIC_TYPES:
+        delimiter, dtype = NUMERIC_TYPES[data_type]
+        # The numbers are packed by chunks instead of keeping a list per line
+        chunks = []
+        lengths = []
+
+    with Path(input_path).open("r", encoding="utf-8") as f:
+        for linenum, line in enumerate(f, 1):
+            sps = line.rstrip().split(maxsplit=1)
+            if len(sps) == 1:
+                k, v = sps[0], ""
+            else:
+                k, v = sps
+            keys.append(k)
+            if data_type in TEXT_TYPES:
+                values.append(v)
+                continue
+
+            try:
+                values.append([dtype(i) for i in v.split(delimiter)] if v else [])
+            except ValueError:
+                raise RuntimeError(
+                    f"Failed to parse as {data_type}: {input_path}:{linenum}: {line}"
+                )
+            if len(values) == chunk_size:
+                lengths.extend(len(v) for v in values)
+                chunks.append(np.array([x for v in values for x in v], dtype=dtype))
+                values = []
+
+    key_index = KeyIndex(keys)
+    if data_type in TEXT_TYPES:
+        value_arrays = CompactTextDict(key_index, values).to_arrays()
+        value_data, value_offsets = value_arrays["blob"], value_arrays["offsets"]
+    else:
+        lengths.extend(len(v) for v in values)
+        chunks.append(np.array([x for v in values for x in v], dtype=dtype))
+        value_data = np.concatenate(chunks)
+        value_offsets = _to_offsets(np.array(lengths, dtype=np.int64))
+    _write_arrays(output_path, data_type, key_index, value_data, value_offsets)
+
+
+class ManifestReader(collections.abc.Mapping):
+    """Reader class for a binary manifest made by convert_to_manifest().
+
+    The file is memory-mapped, so opening it takes constant time and the pages
+    are shared by all processes reading the same file.
+    The values are str for "sound", "npy" and "text", or 1-dim ndarray for the
+    numeric types like "text_int" and "csv_int".
+
+    Examples:
+        >>> reader = ManifestReader("token_int.mf")
+        >>> reader["utt1"]
+        array([12,  5,  3], dtype=int32)
+    """
+
+    @typechecked
+    def __init__(self, path: Union[Path, str]):
+        self.path = Path(path)
+        self._open()
+
+    def _open(self):
+        with self.path.open("rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise RuntimeError(f"{self.path} is not a binary manifest")
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (header_len,) = struct.unpack("<Q", self._mm[len(MAGIC) : len(MAGIC) + 8])
+        header_start = len(MAGIC) + 8
+        header = json.loads(self._mm[header_start : header_start + header_len])
+        if header["version"] > VERSION:
+            raise RuntimeError(
+                f"{self.path} has version {header['version']}, "
+                f"but only <= {VERSION} is supported"
+            )
+        self.data_type = header["data_type"]
+
+        start = -(-(header_start + header_len) // _ALIGN) * _ALIGN
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            dtype = np.dtype(spec["dtype"])
+            count = int(np.prod(spec["shape"], dtype=np.int64))
+            arrays[name] = np.frombuffer(
+                self._mm, dtype=dtype, count=count, offset=start + spec["offset"]
+            ).reshape(spec["shape"])
+
+        self.key_index = KeyIndex.from_arrays(
+            {k[len("key_") :]: v for k, v in arrays.items() if k.startswith("key_")}
+        )
+        self._value_data = arrays["value_data"]
+        self._value_offsets = arrays["value_offsets"]
+        if self.data_type in TEXT_TYPES:
+            self._text = CompactTextDict.from_arrays(
+                self.key_index, self._value_data, self._value_offsets
+            )
+        else:
+            self._text = None
+
+    def __getstate__(self):
+        # NOTE: mmap can't be pickled, so the file is opened again
+        return dict(path=self.path)
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def value(self, row: int) -> Union[str, np.ndarray]:
+        """Return the value at the row of the key_index."""
+        if self._text is not None:
+            return self._text.value(row)
+        start, end = self._value_offsets[row], self._value_offsets[row + 1]
+        # Copy to detach it from the read-only mmap
+        return self._value_data[start:end].copy()
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """The lengths of the values in the order of the rows, e.g. the number of
+        tokens for "text_int"."""
+        return np.diff(self._value_offsets)
+
+    def arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the values of a numeric manifest as a flattened array and
+        their offsets (N + 1,) in the order of the rows.
+
+        The arrays are read-only views of the mmap, so nothing is copied.
+        """
+        if self._text is not None:
+            raise RuntimeError(
+                f"{self.path} has str values (data_type={self.data_type})"
+            )
+        return self._value_data, self._value_offsets
+
+    def __getitem__(self, key: str) -> Union[str, np.ndarray]:
+        return self.value(self.key_index.index(key))
+
+    def __contains__(self, key) -> bool:
+        return key in self.key_index
+
+    def __len__(self) -> int:
+        return len(self.key_index)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.key_index)
@@ -1,11 +1,13 @@
 import collections.abc
 from pathlib import Path
-from typing import Union
+from typing import Optional, Union
 
 import numpy as np
 from typeguard import typechecked
 
-from espnet2.fileio.read_text import read_2columns_text
+from espnet2.fileio.key_index import KeyIndex
+from espnet2.fileio.manifest import ManifestReader, is_manifest
+from espnet2.fileio.read_text import read_2columns_text, read_2columns_text_compact
 
 
 class NpyScpWriter:
@@ -70,12 +72,29 @@ class NpyScpReader(collections.abc.Mapping):
         >>> reader = NpyScpReader('npy.scp')
         >>> array = reader['key1']
 
+        If compact=True is given, the paths are stored as offset arrays
+        instead of dict[str, str] object. A binary manifest made by
+        espnet2.bin.convert_manifest can also be given instead of the text file.
+
     """
 
     @typechecked
-    def __init__(self, fname: Union[Path, str]):
+    def __init__(
+        self,
+        fname: Union[Path, str],
+        compact: bool = False,
+        key_index: Optional[KeyIndex] = None,
+    ):
         self.fname = Path(fname)
-        self.data = read_2columns_text(fname)
+        if is_manifest(fname):
+            self.data = ManifestReader(fname)
+            self.key_index = self.data.key_index
+        elif compact:
+            self.data = read_2columns_text_compact(fname, key_index=key_index)
+            self.key_index = self.data.key_index
+        else:
+            self.data = read_2columns_text(fname)
+            self.key_index = None
 
     def get_path(self, key):
         return self.data[key]
@@ -5,8 +5,12 @@ from pathlib import Path
 from random import randint
 from typing import Dict, List, Optional, Tuple, Union
 
+import numpy as np
 from typeguard import typechecked
 
+from espnet2.fileio.key_index import CompactTextDict, KeyIndex
+from espnet2.fileio.manifest import ManifestReader, is_manifest
+
 
 @typechecked
 def read_2columns_text(path: Union[Path, str]) -> Dict[str, str]:
@@ -37,6 +41,56 @@ def read_2columns_text(path: Union[Path, str]) -> Dict[str, str]:
     return data
 
 
+@typechecked
+def read_2columns_text_compact(
+    path: Union[Path, str], key_index: Optional[KeyIndex] = None
+) -> CompactTextDict:
+    """Read a text file having 2 columns as CompactTextDict.
+
+    The returned mapping behaves like the dict of read_2columns_text(),
+    but the keys and the values are stored as offset arrays, which requires
+    much less memory for large scp files.
+
+    Examples:
+        >>> wav = read_2columns_text_compact('wav.scp')
+        >>> text = read_2columns_text_compact('text', key_index=wav.key_index)
+        >>> text.key_index is wav.key_index
+        True
+
+    Args:
+        path: The file path
+        key_index: If the file has the same keys as this index, the index is
+            shared instead of building a new one
+    """
+
+    keys = []
+    values = []
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            sps = line.rstrip().split(maxsplit=1)
+            if len(sps) == 1:
+                k, v = sps[0], ""
+            else:
+                k, v = sps
+            keys.append(k)
+            values.append(v)
+
+    if key_index is not None and len(key_index) == len(keys):
+        rows = np.fromiter(map(key_index.find, keys), dtype=np.int64, count=len(keys))
+        if rows.min(initial=0) >= 0 and np.all(np.bincount(rows) == 1):
+            # Reorder the values to the rows of the shared index
+            ordered = [None] * len(values)
+            for row, v in zip(rows.tolist(), values):
+                ordered[row] = v
+            return CompactTextDict(key_index, ordered)
+
+    try:
+        key_index = KeyIndex(keys)
+    except RuntimeError as e:
+        raise RuntimeError(f"{e} ({path})")
+    return CompactTextDict(key_index, values)
+
+
 @typechecked
 def read_multi_columns_text(
     path: Union[Path, str], return_unsplit: bool = False
@@ -88,6 +142,10 @@ def load_num_sequence_text(
 ) -> Dict[str, List[Union[float, int]]]:
     """Read a text file indicating sequences of number
 
+    The path can also be a binary manifest made by convert_to_manifest(),
+    e.g. "speech_shape" converted by espnet2.bin.convert_manifest,
+    then the numbers are read from the mmap instead of parsing the lines.
+
     Examples:
         key1 1 2 3
         key2 34 5 6
@@ -110,6 +168,13 @@ def load_num_sequence_text(
     else:
         raise ValueError(f"Not supported loader_type={loader_type}")
 
+    if is_manifest(path):
+        reader = ManifestReader(path)
+        flat, offsets = reader.arrays()
+        flat = flat.astype(np.int64 if dtype is int else np.float64).tolist()
+        offsets = offsets.tolist()
+        return {k: flat[offsets[i] : offsets[i + 1]] for i, k in enumerate(reader)}
+
     # path looks like:
     #   utta 1,0
     #   uttb 3,4,5
@@ -0,0 +1,253 @@
+import collections.abc
+import io
+import tarfile
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+import soundfile
+from typeguard import typechecked
+
+from espnet2.fileio.read_text import read_2columns_text_compact
+
+# The list of the shards: "<shard path> <the number of samples>" per line
+SHARD_LIST = "shards.list"
+# The index for each data name: "<uttid> <shard path>:<offset>:<size>:<ext>"
+INDEX_SUFFIX = ".idx"
+AUDIO_EXTS = ("wav", "flac", "ogg", "mp3", "sph")
+
+
+def encode_array(array: np.ndarray) -> bytes:
+    """Encode ndarray as the bytes of npy format."""
+    buf = io.BytesIO()
+    np.save(buf, array, allow_pickle=False)
+    return buf.getvalue()
+
+
+def encode_audio(array: np.ndarray, rate: int) -> bytes:
+    """Encode the audio (Time,) or (Time, Nmic) as wav bytes."""
+    buf = io.BytesIO()
+    subtype = "PCM_16" if array.dtype == np.int16 else "FLOAT"
+    soundfile.write(buf, array, rate, format="WAV", subtype=subtype)
+    return buf.getvalue()
+
+
+def decode_member(
+    ext: str, buf: bytes, dtype: Optional[str] = None
+) -> Union[str, np.ndarray, Tuple[int, np.ndarray]]:
+    """Decode the bytes of a member of a shard.
+
+    Returns:
+        (rate, array) for audios, ndarray for "npy" and str for "txt"
+    """
+    if ext in AUDIO_EXTS:
+        array, rate = soundfile.read(io.BytesIO(buf), dtype=dtype or "float64")
+        return rate, array
+    elif ext == "npy":
+        return np.load(io.BytesIO(buf), allow_pickle=False)
+    elif ext == "txt":
+        return buf.decode("utf-8")
+    else:
+        raise RuntimeError(f"Unknown extension: {ext}")
+
+
+def split_member_name(member_name: str) -> Tuple[str, str, str]:
+    """Split "<uttid>.<name>.<ext>" into (uttid, name, ext).
+
+    The uttid can include ".", but the name and the ext can't.
+    """
+    sps = member_name.rsplit(".", 2)
+    if len(sps) != 3:
+        raise RuntimeError(f"Invalid member name: {member_name}")
+    return sps[0], sps[1], sps[2]
+
+
+class ShardWriter:
+    """Writer class for the packed shards of the training data.
+
+    The samples are packed into tar files having at most max_samples samples
+    and max_bytes bytes. All members of a sample are stored contiguously as
+    "<uttid>.<name>.<ext>", so the shards can be read sequentially
+    e.g. from an object storage. The index of the members is written
+    for each name as "<name>.idx" for random access and the list of
+    the shards as "shards.list".
+
+    Examples:
+        >>> with ShardWriter("dump/shards/train") as writer:
+        ...     writer.write("utt1", {"speech": ("flac", flac_bytes),
+        ...                           "text": ("txt", b"hello")})
+        # dump/shards/train/shard-000000.tar, speech.idx, text.idx, shards.list
+
+    Args:
+        output_dir: The output directory
+        max_samples: The maximum number of samples in a shard
+        max_bytes: The maximum bytes of a shard
+    """
+
+    @typechecked
+    def __init__(
+        self,
+        output_dir: Union[Path, str],
+        max_samples: int = 1000,
+        max_bytes: int = 1 << 30,
+    ):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.max_samples = max_samples
+        self.max_bytes = max_bytes
+
+        self.shards: List[Tuple[str, int]] = []
+        self.index_files = {}
+        self.tar = None
+        self.num_samples = 0
+
+    def _open_shard(self):
+        self._close_shard()
+        path = self.output_dir / f"shard-{len(self.shards):06d}.tar"
+        self.tar = tarfile.open(path, "w", format=tarfile.GNU_FORMAT)
+        self.shards.append((str(path), 0))
+
+    def _close_shard(self):
+        if self.tar is not None:
+            self.tar.close()
+            self.shards[-1] = (self.shards[-1][0], self.num_samples)
+            self.tar = None
+            self.num_samples = 0
+
+    def write(self, uid: str, members: Dict[str, Tuple[str, bytes]]):
+        """Write a sample.
+
+        Args:
+            uid: The utterance id
+            members: {name: (ext, bytes)}. ext is one of "npy", "txt" or
+                the formats of audio, e.g. "wav" and "flac"
+        """
+        if (
+            self.tar is None
+            or self.num_samples >= self.max_samples
+            or self.tar.offset >= self.max_bytes
+        ):
+            self._open_shard()
+
+        shard_path = self.shards[-1][0]
+        for name, (ext, buf) in members.items():
+            if "." in name or "." in ext:
+                raise RuntimeError(f'"." is not allowed in name or ext: {name}.{ext}')
+            info = tarfile.TarInfo(f"{uid}.{name}.{ext}")
+            info.size = len(buf)
+            self.tar.addfile(info, io.BytesIO(buf))
+            # The data is padded to the blocks after the header
+            num_blocks = -(-len(buf) // tarfile.BLOCKSIZE)
+            offset = self.tar.offset - num_blocks * tarfile.BLOCKSIZE
+
+            if name not in self.index_files:
+                self.index_files[name] = (
+                    self.output_dir / f"{name}{INDEX_SUFFIX}"
+                ).open("w", encoding="utf-8")
+            self.index_files[name].write(
+                f"{uid} {shard_path}:{offset}:{len(buf)}:{ext}\n"
+            )
+        self.num_samples += 1
+
+    def close(self):
+        self._close_shard()
+        for f in self.index_files.values():
+            f.close()
+        with (self.output_dir / SHARD_LIST).open("w", encoding="utf-8") as f:
+            for path, num_samples in self.shards:
+                f.write(f"{path} {num_samples}\n")
+
+    def __enter__(self) -> "ShardWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def read_shard_list(path: Union[Path, str]) -> List[Tuple[str, int]]:
+    """Read "shards.list" as [(shard path, the number of samples), ...]."""
+    shards = []
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            shard_path, num_samples = line.rstrip().split()
+            shards.append((shard_path, int(num_samples)))
+    return shards
+
+
+def iter_shard(
+    path: Union[Path, str],
+) -> Iterator[Tuple[str, Dict[str, Tuple[str, bytes]]]]:
+    """Read a shard sequentially.
+
+    The tar file is read as a stream, i.e. without seeking.
+
+    Yields:
+        (uttid, {name: (ext, bytes)})
+    """
+    uid = None
+    members = {}
+    with tarfile.open(path, "r|") as tar:
+        for info in tar:
+            if not info.isfile():
+                continue
+            _uid, name, ext = split_member_name(info.name)
+            if _uid != uid:
+                if uid is not None:
+                    yield uid, members
+                uid = _uid
+                members = {}
+            members[name] = (ext, tar.extractfile(info).read())
+    if uid is not None:
+        yield uid, members
+
+
+def load_shard_member(value: str, dtype: Optional[str] = None):
+    """Load a member from the value of the index, "<path>:<offset>:<size>:<ext>".
+
+    Returns:
+        (rate, array) for audios, ndarray for "npy" and str for "txt"
+    """
+    path, offset, size, ext = value.rsplit(":", 3)
+    with open(path, "rb") as f:
+        f.seek(int(offset))
+        buf = f.read(int(size))
+    return decode_member(ext, buf, dtype)
+
+
+class ShardReader(collections.abc.Mapping):
+    """Reader class for random access to the shards.
+
+    Examples:
+        >>> reader = ShardReader("dump/shards/train/speech.idx")
+        >>> rate, array = reader["utt1"]
+
+    Args:
+        index: The index file, "<name>.idx", written by ShardWriter
+        dtype: The dtype of the audios
+    """
+
+    @typechecked
+    def __init__(self, index: Union[Path, str], dtype: Optional[str] = None):
+        self.index = index
+        self.dtype = dtype
+        self.data = read_2columns_text_compact(index)
+        self.key_index = self.data.key_index
+
+    @property
+    def is_audio(self) -> bool:
+        """Return True if the members are audios."""
+        if len(self.data) == 0:
+            return False
+        return self.data.value(0).rsplit(":", 1)[1] in AUDIO_EXTS
+
+    def __getitem__(self, key: str):
+        return load_shard_member(self.data[key], self.dtype)
+
+    def __contains__(self, key) -> bool:
+        return key in self.data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __iter__(self):
+        return iter(self.data)
@@ -6,7 +6,13 @@ import numpy as np
 import soundfile
 from typeguard import typechecked
 
-from espnet2.fileio.read_text import read_2columns_text, read_multi_columns_text
+from espnet2.fileio.key_index import KeyIndex
+from espnet2.fileio.manifest import ManifestReader, is_manifest
+from espnet2.fileio.read_text import (
+    read_2columns_text,
+    read_2columns_text_compact,
+    read_multi_columns_text,
+)
 
 
 def soundfile_read(
@@ -113,6 +119,20 @@ class SoundScpReader(collections.abc.Mapping):
         but this option is disable by default
         because dict[str, list[str]] object is needed to be kept,
         but it increases the required amount of memory.
+
+        If compact=True is given, the paths are stored as offset arrays
+        instead of dict[str, str] object, and the keys can be shared
+        with the other readers by giving key_index.
+
+        >>> reader = SoundScpReader('wav.scp', compact=True)
+        >>> reader2 = SoundScpReader(
+        ...     'wav2.scp', compact=True, key_index=reader.key_index
+        ... )
+
+        A binary manifest made by espnet2.bin.convert_manifest can also be given
+        instead of the text file.
+
+        >>> reader = SoundScpReader('wav.mf')
     """
 
     @typechecked
@@ -123,15 +143,25 @@ class SoundScpReader(collections.abc.Mapping):
         always_2d: bool = False,
         multi_columns: bool = False,
         concat_axis=1,
+        compact: bool = False,
+        key_index: Optional[KeyIndex] = None,
     ):
         self.fname = fname
         self.dtype = dtype
         self.always_2d = always_2d
 
-        if multi_columns:
+        if is_manifest(fname):
+            self.data = ManifestReader(fname)
+            compact = True
+        elif multi_columns:
+            if compact:
+                raise ValueError("compact=True is not supported with multi_columns")
             self.data, _ = read_multi_columns_text(fname)
+        elif compact:
+            self.data = read_2columns_text_compact(fname, key_index=key_index)
         else:
             self.data = read_2columns_text(fname)
+        self.key_index = self.data.key_index if compact else None
         self.multi_columns = multi_columns
         self.concat_axis = concat_axis
 
@@ -71,6 +71,7 @@ class HiFiGANGenerator(torch.nn.Module):
         # define modules
         self.upsample_factor = int(np.prod(upsample_scales) * out_channels)
         self.num_upsamples = len(upsample_kernel_sizes)
+        self.upsample_scales = list(upsample_scales)
         self.num_blocks = len(resblock_kernel_sizes)
         self.input_conv = torch.nn.Conv1d(
             in_channels,
@@ -134,27 +135,41 @@ class HiFiGANGenerator(torch.nn.Module):
         self.reset_parameters()
 
     def forward(
-        self, c: torch.Tensor, g: Optional[torch.Tensor] = None
+        self,
+        c: torch.Tensor,
+        g: Optional[torch.Tensor] = None,
+        c_mask: Optional[torch.Tensor] = None,
     ) -> torch.Tensor:
         """Calculate forward propagation.
 
         Args:
             c (Tensor): Input tensor (B, in_channels, T).
             g (Optional[Tensor]): Global conditioning tensor (B, global_channels, 1).
+            c_mask (Optional[Tensor]): Mask tensor of the valid frames (B, 1, T).
+                If given, the padded samples are zeroed before each convolution,
+                so that each output does not depend on the padding of the batch.
 
         Returns:
             Tensor: Output tensor (B, out_channels, T).
 
         """
+        if c_mask is not None:
+            c = c * c_mask
         c = self.input_conv(c)
         if g is not None:
             c = c + self.global_conv(g)
         for i in range(self.num_upsamples):
+            if c_mask is not None:
+                c = c * c_mask
             c = self.upsamples[i](c)
+            if c_mask is not None:
+                c_mask = c_mask.repeat_interleave(self.upsample_scales[i], dim=-1)
             cs = 0.0  # initialize
             for j in range(self.num_blocks):
-                cs += self.blocks[i * self.num_blocks + j](c)
+                cs += self.blocks[i * self.num_blocks + j](c, c_mask)
             c = cs / self.num_blocks
+        if c_mask is not None:
+            c = c * c_mask
         c = self.output_conv(c)
 
         return c
@@ -7,7 +7,7 @@ This code is modified from https://github.com/kan-bayashi/ParallelWaveGAN.
 
 """
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import torch
 
@@ -79,19 +79,27 @@ class ResidualBlock(torch.nn.Module):
                     )
                 ]
 
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
+    def forward(
+        self, x: torch.Tensor, x_mask: Optional[torch.Tensor] = None
+    ) -> torch.Tensor:
         """Calculate forward propagation.
 
         Args:
             x (Tensor): Input tensor (B, channels, T).
+            x_mask (Optional[Tensor]): Mask tensor of the valid frames (B, 1, T).
+                If given, the padded frames are zeroed before each convolution.
 
         Returns:
             Tensor: Output tensor (B, channels, T).
 
         """
         for idx in range(len(self.convs1)):
+            if x_mask is not None:
+                x = x * x_mask
             xt = self.convs1[idx](x)
             if self.use_additional_convs:
+                if x_mask is not None:
+                    xt = xt * x_mask
                 xt = self.convs2[idx](xt)
             x = xt + x
         return x
@@ -711,9 +711,12 @@ class JETSGenerator(torch.nn.Module):
             ).unsqueeze(-1)
         else:
             # forward duration predictor and variance predictors
-            p_outs = self.pitch_predictor(hs, h_masks.unsqueeze(-1))
-            e_outs = self.energy_predictor(hs, h_masks.unsqueeze(-1))
+            p_outs = self.pitch_predictor(hs, h_masks.unsqueeze(-1), is_inference=True)
+            e_outs = self.energy_predictor(hs, h_masks.unsqueeze(-1), is_inference=True)
             d_outs = self.duration_predictor.inference(hs, h_masks)
+            if text.size(0) > 1:
+                # mask the padded frames in the batch inference
+                feats_lengths = torch.clamp_min(d_outs.sum(dim=1), 1)
 
         p_embs = self.pitch_embed(p_outs.transpose(1, 2)).transpose(1, 2)
         e_embs = self.energy_embed(e_outs.transpose(1, 2)).transpose(1, 2)
@@ -735,7 +738,12 @@ class JETSGenerator(torch.nn.Module):
         zs, _ = self.decoder(hs, h_masks)  # (B, T_feats, adim)
 
         # forward generator
-        wav = self.generator(zs.transpose(1, 2))
+        if h_masks is not None:
+            # NOTE: The padded frames are masked in the generator so that the batch
+            #   inference gives the same outputs as the single sequence inference
+            wav = self.generator(zs.transpose(1, 2), c_mask=h_masks.to(zs.dtype))
+        else:
+            wav = self.generator(zs.transpose(1, 2))
 
         return wav.squeeze(1), d_outs
 
@@ -26,6 +26,8 @@ from espnet2.gan_tts.jets.generator import JETSGenerator
 from espnet2.gan_tts.jets.loss import ForwardSumLoss, VarianceLoss
 from espnet2.gan_tts.utils import get_segments
 from espnet2.torch_utils.device_funcs import force_gatherable
+from espnet2.tts.utils.padding import depends_on_padding
+from espnet.nets.pytorch_backend.nets_utils import pad_list
 
 AVAILABLE_GENERATERS = {
     "jets_generator": JETSGenerator,
@@ -677,3 +679,54 @@ class JETS(AbsGANTTS):
                 **kwargs,
             )
         return dict(wav=wav.view(-1), duration=dur[0])
+
+    def batch_inference(
+        self,
+        text: torch.Tensor,
+        text_lengths: torch.Tensor,
+        **kwargs,
+    ) -> Dict[str, torch.Tensor]:
+        """Run inference for a mini-batch.
+
+        Args:
+            text (Tensor): Padded text index tensor (B, T_text).
+            text_lengths (Tensor): Text length tensor (B,).
+
+        Returns:
+            Dict[str, Tensor]:
+                * wav (Tensor): Generated waveform tensor (B, T_wav).
+                * wav_lengths (Tensor): Waveform length tensor (B,).
+                * duration (Tensor): Predicted duration tensor (B, T_text).
+                * duration_lengths (Tensor): Text length tensor (B,).
+
+        """
+        if depends_on_padding(self.generator.encoder) or depends_on_padding(
+            self.generator.decoder
+        ):
+            # NOTE: The convolutions of the conformer (or conv1d feed-forward)
+            #   blocks are not masked, so decode one by one to get the same
+            #   outputs as the single sequence inference
+            wavs, durs = [], []
+            for i, text_length in enumerate(text_lengths):
+                wav, dur = self.generator.inference(
+                    text=text[i : i + 1, :text_length],
+                    text_lengths=text_lengths[i : i + 1],
+                    **{k: v[i : i + 1] for k, v in kwargs.items()},
+                )
+                wavs.append(wav.view(-1))
+                durs.append(dur[0])
+            wav, dur = pad_list(wavs, 0.0), pad_list(durs, 0)
+        else:
+            wav, dur = self.generator.inference(
+                text=text,
+                text_lengths=text_lengths,
+                **kwargs,
+            )
+        # NOTE: Same as the feature lengths in the generator
+        feats_lengths = torch.clamp_min(dur.sum(dim=1), 1)
+        return dict(
+            wav=wav,
+            wav_lengths=feats_lengths * self.generator.upsample_factor,
+            duration=dur,
+            duration_lengths=text_lengths,
+        )
@@ -0,0 +1,372 @@
+"""Out-of-core k-means for HuBERT pseudo-label learning."""
+
+import logging
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from espnet.utils.cli_readers import file_reader_helper
+
+
+def assign_labels(
+    feats: np.ndarray,
+    centers: np.ndarray,
+    centers_norm: Optional[np.ndarray] = None,
+    block_size: int = 16384,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Assign the nearest center to each frame.
+
+    The squared distances are computed as ||x||^2 - 2 x C^T + ||C||^2 for
+    block_size frames at a time, so the distance matrix never exceeds
+    (block_size, n_clusters) whatever the number of frames.
+
+    Args:
+        feats: Features. (N, D)
+        centers: Cluster centers. (K, D)
+        centers_norm: Squared norm of the centers, computed if not given. (K,)
+        block_size: Number of frames per distance computation.
+
+    Returns:
+        labels: Index of the nearest center. (N,)
+        distances: Squared distance to the nearest center. (N,)
+
+    """
+    if centers_norm is None:
+        centers_norm = (centers**2).sum(1)
+
+    labels = np.empty(len(feats), dtype=np.int64)
+    distances = np.empty(len(feats), dtype=centers.dtype)
+
+    for start in range(0, len(feats), block_size):
+        block = np.asarray(feats[start : start + block_size], dtype=centers.dtype)
+
+        dist = centers_norm - 2 * (block @ centers.T)
+        block_labels = dist.argmin(1)
+
+        labels[start : start + len(block)] = block_labels
+        distances[start : start + len(block)] = np.maximum(
+            dist[np.arange(len(block)), block_labels] + (block**2).sum(1), 0
+        )
+
+    return labels, distances
+
+
+class StreamingKMeans:
+    """Mini-batch k-means fitted incrementally on streamed features.
+
+    The centers are initialized with k-means++ on the first init_size frames,
+    then each call of partial_fit moves every center to the running mean of the
+    frames assigned to it so far (Sculley, "Web-scale k-means clustering"),
+    so only one minibatch is held in memory at a time. The fitted model has
+    the cluster_centers_ attribute as the scikit-learn models, so it can be
+    saved with joblib and used by the same labeling scripts.
+
+    Args:
+        n_clusters: Number of clusters.
+        init_size: Number of frames used for the initialization.
+            Defaults to 3 * n_clusters.
+        n_init: Number of k-means++ initializations, the one with the lowest
+            inertia on the initialization frames is kept.
+        block_size: Number of frames per distance computation.
+        seed: Random seed.
+
+    """
+
+    def __init__(
+        self,
+        n_clusters: int,
+        init_size: Optional[int] = None,
+        n_init: int = 3,
+        block_size: int = 16384,
+        seed: int = 0,
+    ):
+        if init_size is None:
+            init_size = 3 * n_clusters
+
+        assert init_size >= n_clusters, "init_size must be at least n_clusters."
+
+        self.n_clusters = n_clusters
+        self.init_size = init_size
+        self.n_init = n_init
+        self.block_size = block_size
+        self.random_state = np.random.RandomState(seed)
+
+        self.cluster_centers_ = None
+        self.counts_ = None
+        self.n_steps_ = 0
+
+        self._init_buffer = []
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # The initialization frames are not a part of the model.
+        state["_init_buffer"] = []
+        return state
+
+    def _kmeans_plusplus(self, feats: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Draw centers from the frames with the greedy k-means++ seeding.
+
+        At each step, 2 + log(K) candidates are sampled proportionally to
+        the squared distance to the closest center, and the one reducing the
+        inertia the most is kept.
+
+        Args:
+            feats: Initialization frames. (N, D)
+
+        Returns:
+            centers: Cluster centers. (K, D)
+            inertia: Sum of squared distances to the nearest centers.
+
+        """
+        n_trials = 2 + int(np.log(self.n_clusters))
+        feats_norm = (feats**2).sum(1)
+
+        centers = np.empty((self.n_clusters, feats.shape[1]), dtype=feats.dtype)
+        centers[0] = feats[self.random_state.randint(len(feats))]
+
+        closest = ((feats - centers[0]) ** 2).sum(1)
+
+        for k in range(1, self.n_clusters):
+            total = closest.sum()
+
+            if total > 0:
+                cumsum = np.cumsum(closest)
+                candidates = np.searchsorted(
+                    cumsum, self.random_state.rand(n_trials) * cumsum[-1]
+                )
+                candidates = np.minimum(candidates, len(feats) - 1)
+            else:
+                candidates = self.random_state.randint(len(feats), size=n_trials)
+
+            # (n_trials, N) distances of the candidates to the frames
+            dist = np.maximum(
+                feats_norm[candidates, None]
+                - 2 * (feats[candidates] @ feats.T)
+                + feats_norm,
+                0,
+            )
+            dist = np.minimum(closest, dist)
+            best = dist.sum(1).argmin()
+
+            centers[k] = feats[candidates[best]]
+            closest = dist[best]
+
+        return centers, float(closest.sum())
+
+    def _init_centers(self, feats: np.ndarray) -> None:
+        """Initialize the centers with the best of n_init k-means++ seedings.
+
+        Args:
+            feats: Initialization frames. (N, D)
+
+        """
+        best_inertia = np.inf
+
+        for _ in range(self.n_init):
+            centers, inertia = self._kmeans_plusplus(feats)
+
+            if inertia < best_inertia:
+                best_inertia = inertia
+                self.cluster_centers_ = centers
+
+        self.counts_ = np.zeros(self.n_clusters, dtype=np.int64)
+
+        logging.info(
+            f"Initialized {self.n_clusters} centers on {len(feats)} frames "
+            f"(inertia: {best_inertia / len(feats):.5f})"
+        )
+
+    def partial_fit(self, feats: np.ndarray) -> "StreamingKMeans":
+        """Update the centers with a minibatch.
+
+        Until init_size frames are given, the frames are buffered for the
+        initialization.
+
+        Args:
+            feats: Minibatch features. (N, D)
+
+        Returns:
+            self
+
+        """
+        feats = np.asarray(feats, dtype=np.float32)
+
+        if self.cluster_centers_ is None:
+            self._init_buffer.append(feats)
+
+            if sum(len(f) for f in self._init_buffer) < self.init_size:
+                return self
+
+            feats = np.concatenate(self._init_buffer, axis=0)
+            self._init_buffer = []
+
+            self._init_centers(feats[: self.init_size])
+
+        labels, _ = assign_labels(feats, self.cluster_centers_, None, self.block_size)
+
+        batch_counts = np.bincount(labels, minlength=self.n_clusters)
+        updated = np.nonzero(batch_counts)[0]
+
+        order = np.argsort(labels, kind="stable")
+        offsets = np.concatenate([[0], np.cumsum(batch_counts)[:-1]])
+        batch_sums = np.add.reduceat(feats[order], offsets[updated], axis=0)
+
+        self.counts_ += batch_counts
+
+        # Running mean: c += (sum(x) - n * c) / count
+        self.cluster_centers_[updated] += (
+            batch_sums - batch_counts[updated, None] * self.cluster_centers_[updated]
+        ) / self.counts_[updated, None]
+
+        self.n_steps_ += 1
+
+        return self
+
+    def finalize(self) -> "StreamingKMeans":
+        """Initialize the centers with the buffered frames if not done yet.
+
+        Returns:
+            self
+
+        """
+        if self.cluster_centers_ is None:
+            assert self._init_buffer, "No frame has been given."
+
+            feats = np.concatenate(self._init_buffer, axis=0)
+            self._init_buffer = []
+
+            assert (
+                len(feats) >= self.n_clusters
+            ), f"Only {len(feats)} frames are given for {self.n_clusters} clusters."
+
+            self._init_centers(feats)
+            self.partial_fit(feats)
+
+        return self
+
+    def predict(self, feats: np.ndarray) -> np.ndarray:
+        """Assign the nearest center to each frame.
+
+        Args:
+            feats: Features. (N, D)
+
+        Returns:
+            : Cluster labels. (N,)
+
+        """
+        return assign_labels(feats, self.cluster_centers_, None, self.block_size)[0]
+
+    def score(self, feats: np.ndarray) -> float:
+        """Return the opposite of the inertia of the frames.
+
+        Args:
+            feats: Features. (N, D)
+
+        Returns:
+            : Negative sum of squared distances to the nearest centers.
+
+        """
+        _, distances = assign_labels(
+            feats, self.cluster_centers_, None, self.block_size
+        )
+
+        return -float(distances.sum())
+
+
+def read_feature_shards(
+    rspecifiers: Union[str, List[str]],
+    in_filetype: str,
+    percent: float = -1,
+    chunk_size: int = 65536,
+    seed: int = 0,
+) -> Iterator[np.ndarray]:
+    """Stream the features of the shards without loading them all.
+
+    For in_filetype="npy", each rspecifier is the path of a (frames, dim)
+    array, which is memory-mapped and read chunk_size frames at a time.
+    Otherwise, the utterances are read one by one with file_reader_helper.
+
+    Args:
+        rspecifiers: Read specifiers or npy paths of the shards.
+        in_filetype: "npy" or a filetype of file_reader_helper.
+        percent: Portion of the frames (npy) or utterances to sample. -1 for all.
+        chunk_size: Number of frames read at a time from the npy shards.
+        seed: Random seed of the sampling.
+
+    Returns:
+        : Iterator of the features. (N, D)
+
+    """
+    assert percent <= 1.0
+
+    if not isinstance(rspecifiers, list):
+        rspecifiers = [rspecifiers]
+
+    rng = np.random.RandomState(seed)
+
+    for rspecifier in rspecifiers:
+        if in_filetype == "npy":
+            shard = np.load(rspecifier, mmap_mode="r")
+
+            for start in range(0, len(shard), chunk_size):
+                feats = shard[start : start + chunk_size]
+
+                if percent >= 0:
+                    feats = feats[rng.rand(len(feats)) < percent]
+
+                yield np.array(feats)
+        else:
+            for _, feats in file_reader_helper(rspecifier, in_filetype):
+                if percent < 0 or rng.rand() < percent:
+                    yield feats
+
+
+def iterate_minibatches(
+    feats_iter: Iterable[np.ndarray],
+    batch_size: int,
+    buffer_size: int = 0,
+    seed: int = 0,
+) -> Iterator[np.ndarray]:
+    """Regroup streamed features into minibatches of batch_size frames.
+
+    The frames of consecutive utterances are strongly correlated, so they are
+    shuffled within a buffer of buffer_size frames before being split.
+
+    Args:
+        feats_iter: Iterator of the features. (N, D)
+        batch_size: Number of frames per minibatch.
+        buffer_size: Number of frames shuffled together. 0 for no shuffle.
+        seed: Random seed of the shuffle.
+
+    Returns:
+        : Iterator of the minibatches. (batch_size, D)
+
+    """
+    rng = np.random.RandomState(seed)
+    buffer_size = max(buffer_size, batch_size)
+
+    buffer = []
+    size = 0
+
+    def flush(feats: np.ndarray) -> Iterator[np.ndarray]:
+        if buffer_size > batch_size:
+            feats = feats[rng.permutation(len(feats))]
+
+        for start in range(0, len(feats), batch_size):
+            yield feats[start : start + batch_size]
+
+    for feats in feats_iter:
+        buffer.append(feats)
+        size += len(feats)
+
+        if size >= buffer_size:
+            feats = np.concatenate(buffer, axis=0)
+            num_frames = len(feats) // batch_size * batch_size
+
+            yield from flush(feats[:num_frames])
+
+            buffer = [feats[num_frames:]]
+            size = len(buffer[0])
+
+    if size > 0:
+        yield from flush(np.concatenate(buffer, axis=0))
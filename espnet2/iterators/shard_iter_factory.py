@@ -0,0 +1,70 @@
+import itertools
+from functools import partial
+from typing import Iterator, Optional
+
+from torch.utils.data import DataLoader
+from typeguard import typechecked
+
+from espnet2.iterators.abs_iter_factory import AbsIterFactory
+from espnet2.iterators.sequence_iter_factory import worker_init_fn
+from espnet2.train.iterable_dataset import ShardIterableESPnetDataset
+
+
+class ShardIterFactory(AbsIterFactory):
+    """Build iterator reading the shards sequentially for each epoch.
+
+    Examples:
+        >>> dataset = ShardIterableESPnetDataset(
+        ...     [("dump/shards/train/speech.idx", "speech", "shard")], shuffle=True
+        ... )
+        >>> iter_factory = ShardIterFactory(dataset, batch_size=32)
+        >>> for ids, batch in iter_factory.build_iter(epoch):
+        ...     ...
+
+    - The order of the samples is decided by the shards and the shuffle buffer
+      of the dataset, so the mini-batches are made of the neighboring samples
+      instead of the sorted ones.
+    - Since the number of mini-batches isn't known in advance,
+      "num_iters_per_epoch" only limits the number of iterations.
+    """
+
+    @typechecked
+    def __init__(
+        self,
+        dataset: ShardIterableESPnetDataset,
+        batch_size: int,
+        num_iters_per_epoch: Optional[int] = None,
+        seed: int = 0,
+        num_workers: int = 0,
+        collate_fn=None,
+        pin_memory: bool = False,
+    ):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.num_iters_per_epoch = num_iters_per_epoch
+        self.seed = seed
+        self.num_workers = num_workers
+        self.collate_fn = collate_fn
+        self.pin_memory = pin_memory
+
+    def build_iter(self, epoch: int, shuffle: bool = None) -> Iterator:
+        # NOTE: The shuffling is configured in the dataset
+        self.dataset.set_epoch(epoch)
+
+        # For backward compatibility for pytorch DataLoader
+        if self.collate_fn is not None:
+            kwargs = dict(collate_fn=self.collate_fn)
+        else:
+            kwargs = {}
+
+        loader = DataLoader(
+            dataset=self.dataset,
+            batch_size=self.batch_size,
+            num_workers=self.num_workers,
+            pin_memory=self.pin_memory,
+            worker_init_fn=partial(worker_init_fn, base_seed=epoch + self.seed),
+            **kwargs,
+        )
+        if self.num_iters_per_epoch is not None:
+            return itertools.islice(loader, self.num_iters_per_epoch)
+        return loader
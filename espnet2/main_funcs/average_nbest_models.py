@@ -9,6 +9,34 @@ from typeguard import typechecked
 from espnet2.train.reporter import Reporter
 
 
+def _load_states(path: Path) -> dict:
+    try:
+        # The tensors are read lazily from the file
+        return torch.load(path, map_location="cpu", mmap=True)
+    except (RuntimeError, TypeError):
+        # mmap is not supported by the legacy format or the older pytorch
+        return torch.load(path, map_location="cpu")
+
+
+def _accumulator(v: torch.Tensor) -> torch.Tensor:
+    if v.is_floating_point() and torch.finfo(v.dtype).bits < 32:
+        # Accumulate the half precision values in float32
+        return v.float()
+    return v.clone()
+
+
+def _average(k: str, v: torch.Tensor, n: int, dtype: torch.dtype) -> torch.Tensor:
+    if not v.is_floating_point():
+        # For int type, not averaged, but only accumulated.
+        # e.g. BatchNorm.num_batches_tracked
+        # (If there are any cases that requires averaging
+        #  or the other reducing method, e.g. max/min, for integer type,
+        #  please report.)
+        logging.info(f"Accumulating {k} instead of averaging")
+        return v.clone()
+    return (v / n).to(dtype)
+
+
 @torch.no_grad()
 @typechecked
 def average_nbest_models(
@@ -47,62 +75,51 @@ def average_nbest_models(
         if reporter.has(ph, k)
     ]
 
-    _loaded = {}
     for ph, cr, epoch_and_values in nbest_epochs:
         _nbests = [i for i in nbests if i <= len(epoch_and_values)]
         if len(_nbests) == 0:
             _nbests = [1]
 
-        for n in _nbests:
-            if n == 0:
-                continue
-            elif n == 1:
-                # The averaged model is same as the best model
-                e, _ = epoch_and_values[0]
-                op = output_dir / f"{e}epoch.pth"
-                sym_op = output_dir / f"{ph}.{cr}.ave_1best.{suffix}pth"
-                if sym_op.is_symlink() or sym_op.exists():
-                    sym_op.unlink()
-                sym_op.symlink_to(op.name)
+        if 1 in _nbests:
+            # The averaged model is same as the best model
+            e, _ = epoch_and_values[0]
+            op = output_dir / f"{e}epoch.pth"
+            sym_op = output_dir / f"{ph}.{cr}.ave_1best.{suffix}pth"
+            if sym_op.is_symlink() or sym_op.exists():
+                sym_op.unlink()
+            sym_op.symlink_to(op.name)
+
+        # 2. Averaging models
+        # NOTE: The checkpoints are loaded one by one in the order of the ranking
+        #   and accumulated to the running sum, so that all the nbest values are
+        #   given by a single pass with the memory of only two models.
+        max_nbest = max(_nbests)
+        _nbests = sorted(set(n for n in _nbests if n > 1))
+        avg = None
+        for i, (e, _) in enumerate(epoch_and_values[: max(_nbests, default=0)], 1):
+            states = _load_states(output_dir / f"{e}epoch.pth")
+            if avg is None:
+                dtypes = {k: v.dtype for k, v in states.items()}
+                avg = {k: _accumulator(v) for k, v in states.items()}
             else:
-                op = output_dir / f"{ph}.{cr}.ave_{n}best.{suffix}pth"
+                # 2.a. Accumulate tensor by tensor
+                for k in avg:
+                    avg[k] += states[k]
+            del states
+
+            if i in _nbests:
+                op = output_dir / f"{ph}.{cr}.ave_{i}best.{suffix}pth"
                 logging.info(
-                    f"Averaging {n}best models: " f'criterion="{ph}.{cr}": {op}'
+                    f"Averaging {i}best models: " f'criterion="{ph}.{cr}": {op}'
                 )
-
-                avg = None
-                # 2.a. Averaging model
-                for e, _ in epoch_and_values[:n]:
-                    if e not in _loaded:
-                        _loaded[e] = torch.load(
-                            output_dir / f"{e}epoch.pth",
-                            map_location="cpu",
-                        )
-                    states = _loaded[e]
-
-                    if avg is None:
-                        avg = states
-                    else:
-                        # Accumulated
-                        for k in avg:
-                            avg[k] = avg[k] + states[k]
-                for k in avg:
-                    if str(avg[k].dtype).startswith("torch.int"):
-                        # For int type, not averaged, but only accumulated.
-                        # e.g. BatchNorm.num_batches_tracked
-                        # (If there are any cases that requires averaging
-                        #  or the other reducing method, e.g. max/min, for integer type,
-                        #  please report.)
-                        logging.info(f"Accumulating {k} instead of averaging")
-                        pass
-                    else:
-                        avg[k] = avg[k] / n
-
-                # 2.b. Save the ave model and create a symlink
-                torch.save(avg, op)
+                # 2.b. Save the ave model
+                torch.save(
+                    {k: _average(k, v, i, dtypes[k]) for k, v in avg.items()}, op
+                )
+        del avg
 
         # 3. *.*.ave.pth is a symlink to the max ave model
-        op = output_dir / f"{ph}.{cr}.ave_{max(_nbests)}best.{suffix}pth"
+        op = output_dir / f"{ph}.{cr}.ave_{max_nbest}best.{suffix}pth"
         sym_op = output_dir / f"{ph}.{cr}.ave.{suffix}pth"
         if sym_op.is_symlink() or sym_op.exists():
             sym_op.unlink()
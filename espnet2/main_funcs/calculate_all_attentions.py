@@ -3,7 +3,6 @@ from typing import Dict, List
 
 import torch
 
-from espnet2.gan_tts.jets.alignments import AlignmentModule
 from espnet2.train.abs_espnet_model import AbsESPnetModel
 from espnet.nets.pytorch_backend.rnn.attentions import (
     AttAdd,
@@ -38,6 +37,9 @@ def calculate_all_attentions(
         key_names x batch x (D1, D2, ...)
 
     """
+    # NOTE: Imported here since jets.alignments takes time to import scipy
+    from espnet2.gan_tts.jets.alignments import AlignmentModule
+
     bs = len(next(iter(batch.values())))
     assert all(len(v) == bs for v in batch.values()), {
         k: v.shape for k, v in batch.items()
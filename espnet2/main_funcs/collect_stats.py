@@ -1,7 +1,6 @@
 import logging
-from collections import defaultdict
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple, Union
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import torch
@@ -16,6 +15,123 @@ from espnet2.torch_utils.forward_adaptor import ForwardAdaptor
 from espnet2.train.abs_espnet_model import AbsESPnetModel
 
 
+def batch_moments(
+    x: torch.Tensor, lengths: Optional[torch.Tensor] = None
+) -> Tuple[int, torch.Tensor, torch.Tensor]:
+    """Compute the count, mean, and M2 of a padded batch along the frames.
+
+    Args:
+        x: (B, L, ...) if lengths is given, else (B, ...)
+        lengths: (B,)
+    Returns:
+        count, mean: (...), m2: (...)
+            M2 is the sum of the squared deviations from the mean.
+    """
+    if lengths is not None:
+        mask = (
+            torch.arange(x.size(1), device=x.device)[None, :]
+            < lengths.to(x.device)[:, None]
+        )
+        # x: (B, L, ...) -> (N, ...)
+        x = x[mask]
+    x = x.double()
+    count = x.size(0)
+    if count == 0:
+        zeros = x.new_zeros(x.shape[1:])
+        return 0, zeros, zeros.clone()
+    mean = x.mean(0)
+    m2 = ((x - mean) ** 2).sum(0)
+    return count, mean, m2
+
+
+def merge_moments(
+    a: Tuple[int, Union[np.ndarray, torch.Tensor], Union[np.ndarray, torch.Tensor]],
+    b: Tuple[int, Union[np.ndarray, torch.Tensor], Union[np.ndarray, torch.Tensor]],
+) -> Tuple[int, Union[np.ndarray, torch.Tensor], Union[np.ndarray, torch.Tensor]]:
+    """Merge two sets of (count, mean, M2) by the formula of Chan et al.
+
+    Unlike accumulating the sum of squares, the precision doesn't degrade
+    when the mean is large compared to the deviation.
+    """
+    count_a, mean_a, m2_a = a
+    count_b, mean_b, m2_b = b
+    if count_a == 0:
+        return b
+    if count_b == 0:
+        return a
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * (count_b / count)
+    m2 = m2_a + m2_b + delta**2 * (count_a * count_b / count)
+    return count, mean, m2
+
+
+def stats_to_moments(stats) -> Tuple[int, np.ndarray, np.ndarray]:
+    """Derive (count, mean, M2) from the npz stats.
+
+    The stats written by the older collect_stats have only
+    "count", "sum", and "sum_square".
+    """
+    count = int(stats["count"])
+    if "mean" in stats and "m2" in stats:
+        return count, stats["mean"], stats["m2"]
+    sum_v = stats["sum"].astype(np.float64)
+    mean = sum_v / max(count, 1)
+    m2 = np.maximum(stats["sum_square"].astype(np.float64) - sum_v * mean, 0.0)
+    return count, mean, m2
+
+
+def moments_to_stats(
+    count: int, mean: np.ndarray, m2: np.ndarray, dtype=np.float32
+) -> Dict[str, np.ndarray]:
+    """Convert (count, mean, M2) to the npz stats.
+
+    "sum" and "sum_square" are stored in the dtype of the features
+    for compatibility, e.g. with GlobalMVN. "mean" and "m2" are stored
+    in float64 to merge the stats without the loss of precision.
+    """
+    mean = np.asarray(mean, dtype=np.float64)
+    m2 = np.asarray(m2, dtype=np.float64)
+    sum_v = mean * count
+    sum_square = m2 + sum_v * mean
+    if np.issubdtype(dtype, np.integer):
+        sum_v = np.rint(sum_v)
+        sum_square = np.rint(sum_square)
+    return dict(
+        count=count,
+        sum=sum_v.astype(dtype),
+        sum_square=sum_square.astype(dtype),
+        mean=mean,
+        m2=m2,
+    )
+
+
+def merge_stats(stats_list: Iterable) -> Dict[str, np.ndarray]:
+    """Merge the npz stats of the split data."""
+    moments = None
+    dtype = None
+    for stats in stats_list:
+        if dtype is None:
+            dtype = stats["sum"].dtype
+        if moments is None:
+            moments = stats_to_moments(stats)
+        else:
+            moments = merge_moments(moments, stats_to_moments(stats))
+    if moments is None:
+        raise RuntimeError("No stats are given")
+    return moments_to_stats(*moments, dtype=dtype)
+
+
+def _shape_lines(
+    keys: Sequence[str], data: torch.Tensor, lengths: Optional[torch.Tensor]
+) -> List[str]:
+    if lengths is None:
+        shape = ",".join(map(str, data.shape[1:]))
+        return [shape] * len(keys)
+    suffix = "".join("," + str(s) for s in data.shape[2:])
+    return [f"{lg}{suffix}" for lg in lengths.tolist()]
+
+
 @torch.no_grad()
 @typechecked
 def collect_stats(
@@ -43,9 +159,9 @@ def collect_stats(
             except TypeError:
                 log_interval = 100
 
-        sum_dict = defaultdict(lambda: 0)
-        sq_dict = defaultdict(lambda: 0)
-        count_dict = defaultdict(lambda: 0)
+        # NOTE: The moments are accumulated per mini-batch on the device
+        moments_dict = {}
+        dtype_dict = {}
 
         with DatadirWriter(output_dir / mode) as datadir_writer:
             for iiter, (keys, batch) in enumerate(itr, 1):
@@ -55,13 +171,10 @@ def collect_stats(
                 for name in batch:
                     if name.endswith("_lengths"):
                         continue
-                    for i, (key, data) in enumerate(zip(keys, batch[name])):
-                        if f"{name}_lengths" in batch:
-                            lg = int(batch[f"{name}_lengths"][i])
-                            data = data[:lg]
-                        datadir_writer[f"{name}_shape"][key] = ",".join(
-                            map(str, data.shape)
-                        )
+                    datadir_writer[f"{name}_shape"].write_lines(
+                        keys,
+                        _shape_lines(keys, batch[name], batch.get(f"{name}_lengths")),
+                    )
 
                 if model is not None:
                     # 2. Extract feats
@@ -76,42 +189,47 @@ def collect_stats(
                             module_kwargs=batch,
                         )
 
-                    # 3. Calculate sum and square sum
+                    # 3. Accumulate count, mean, and M2
                     for key, v in data.items():
-                        for i, (uttid, seq) in enumerate(zip(keys, v.cpu().numpy())):
-                            # Truncate zero-padding region
-                            if f"{key}_lengths" in data:
-                                length = data[f"{key}_lengths"][i]
-                                # seq: (Length, Dim, ...)
-                                seq = seq[:length]
-                            else:
-                                # seq: (Dim, ...) -> (1, Dim, ...)
-                                seq = seq[None]
-                            # Accumulate value, its square, and count
-                            sum_dict[key] += seq.sum(0)
-                            sq_dict[key] += (seq**2).sum(0)
-                            count_dict[key] += len(seq)
-
-                            # 4. [Option] Write derived features as npy format file.
-                            if write_collected_feats:
-                                # Instantiate NpyScpWriter for the first iteration
-                                if (key, mode) not in npy_scp_writers:
-                                    p = output_dir / mode / "collect_feats"
-                                    npy_scp_writers[(key, mode)] = NpyScpWriter(
-                                        p / f"data_{key}", p / f"{key}.scp"
-                                    )
+                        lengths = data.get(f"{key}_lengths")
+                        moments = batch_moments(v, lengths)
+                        if key in moments_dict:
+                            moments = merge_moments(moments_dict[key], moments)
+                        else:
+                            dtype_dict[key] = v.new_empty(0).cpu().numpy().dtype
+                        moments_dict[key] = moments
+
+                        # 4. [Option] Write derived features as npy format file.
+                        if write_collected_feats:
+                            # Instantiate NpyScpWriter for the first iteration
+                            if (key, mode) not in npy_scp_writers:
+                                p = output_dir / mode / "collect_feats"
+                                npy_scp_writers[(key, mode)] = NpyScpWriter(
+                                    p / f"data_{key}", p / f"{key}.scp"
+                                )
+                            v = v.cpu().numpy()
+                            if lengths is not None:
+                                lengths = lengths.tolist()
+                            for i, (uttid, seq) in enumerate(zip(keys, v)):
+                                # Truncate zero-padding region
+                                if lengths is not None:
+                                    # seq: (Length, Dim, ...)
+                                    seq = seq[: lengths[i]]
+                                else:
+                                    # seq: (Dim, ...) -> (1, Dim, ...)
+                                    seq = seq[None]
                                 # Save array as npy file
                                 npy_scp_writers[(key, mode)][uttid] = seq
 
                 if iiter % log_interval == 0:
                     logging.info(f"Niter: {iiter}")
 
-        for key in sum_dict:
+        for key, (count, mean, m2) in moments_dict.items():
             np.savez(
                 output_dir / mode / f"{key}_stats.npz",
-                count=count_dict[key],
-                sum=sum_dict[key],
-                sum_square=sq_dict[key],
+                **moments_to_stats(
+                    count, mean.cpu().numpy(), m2.cpu().numpy(), dtype_dict[key]
+                ),
             )
 
         # batch_keys and stats_keys are used by aggregate_stats_dirs.py
@@ -120,4 +238,64 @@ def collect_stats(
                 "\n".join(filter(lambda x: not x.endswith("_lengths"), batch)) + "\n"
             )
         with (output_dir / mode / "stats_keys").open("w", encoding="utf-8") as f:
-            f.write("\n".join(sum_dict) + "\n")
+            f.write("\n".join(moments_dict) + "\n")
+
+
+@typechecked
+def merge_stats_dirs(
+    input_dirs: Sequence[Union[str, Path]],
+    output_dir: Union[str, Path],
+    skip_sum_stats: bool = False,
+) -> None:
+    """Aggregate the outputs of collect_stats for the split data.
+
+    Args:
+        input_dirs: The output directories of collect_stats
+        output_dir: The directory to write the aggregated outputs
+        skip_sum_stats: Skip merging the statistics
+    """
+    input_dirs = [Path(p) for p in input_dirs]
+    output_dir = Path(output_dir)
+
+    for mode in ["train", "valid"]:
+        with (input_dirs[0] / mode / "batch_keys").open("r", encoding="utf-8") as f:
+            batch_keys = [line.strip() for line in f if line.strip() != ""]
+        with (input_dirs[0] / mode / "stats_keys").open("r", encoding="utf-8") as f:
+            stats_keys = [line.strip() for line in f if line.strip() != ""]
+        (output_dir / mode).mkdir(parents=True, exist_ok=True)
+
+        for key in batch_keys:
+            with (output_dir / mode / f"{key}_shape").open(
+                "w", encoding="utf-8"
+            ) as fout:
+                for idir in input_dirs:
+                    with (idir / mode / f"{key}_shape").open(
+                        "r", encoding="utf-8"
+                    ) as fin:
+                        # Read to the last in order to sort keys
+                        # because the order can be changed if num_workers>=1
+                        lines = fin.readlines()
+                        lines = sorted(lines, key=lambda x: x.split()[0])
+                        fout.writelines(lines)
+
+        for key in stats_keys:
+            if not skip_sum_stats:
+                sum_stats = merge_stats(
+                    np.load(idir / mode / f"{key}_stats.npz") for idir in input_dirs
+                )
+                np.savez(output_dir / mode / f"{key}_stats.npz", **sum_stats)
+
+            # if --write_collected_feats=true
+            p = Path(mode) / "collect_feats" / f"{key}.scp"
+            scp = input_dirs[0] / p
+            if scp.exists():
+                (output_dir / p).parent.mkdir(parents=True, exist_ok=True)
+                with (output_dir / p).open("w", encoding="utf-8") as fout:
+                    for idir in input_dirs:
+                        with (idir / p).open("r", encoding="utf-8") as fin:
+                            for line in fin:
+                                fout.write(line)
+
+        for name, keys in [("batch_keys", batch_keys), ("stats_keys", stats_keys)]:
+            with (output_dir / mode / name).open("w", encoding="utf-8") as f:
+                f.write("\n".join(keys) + "\n")
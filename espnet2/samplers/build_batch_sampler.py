@@ -82,6 +82,7 @@ def build_batch_sampler(
     fold_lengths: Sequence[int] = (),
     padding: bool = True,
     utt2category_file: Optional[str] = None,
+    cache_dir: Optional[str] = None,
 ) -> AbsSampler:
     """Helper function to instantiate BatchSampler.
 
@@ -100,6 +101,8 @@ def build_batch_sampler(
         fold_lengths: Used for "folded" mode
         padding: Whether sequences are input as a padded tensor or not.
             used for "numel" mode
+        cache_dir: The directory to cache the mini-batches keyed by the hash
+            of the shape files. Used for "numel" or "length" mode
     """
     if len(shape_files) == 0:
         raise ValueError("No shape file are given")
@@ -145,6 +148,7 @@ def build_batch_sampler(
             drop_last=drop_last,
             padding=padding,
             min_batch_size=min_batch_size,
+            cache_dir=cache_dir,
         )
 
     elif type == "length":
@@ -156,6 +160,7 @@ def build_batch_sampler(
             drop_last=drop_last,
             padding=padding,
             min_batch_size=min_batch_size,
+            cache_dir=cache_dir,
         )
 
     else:
@@ -1,10 +1,18 @@
-from typing import Iterator, List, Tuple, Union
+from typing import Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 from typeguard import typechecked
 
-from espnet2.fileio.read_text import load_num_sequence_text
 from espnet2.samplers.abs_sampler import AbsSampler
+from espnet2.samplers.utils import (
+    finalize_batch_sizes,
+    find_batch_sizes,
+    load_aligned_shapes,
+    load_cached_batches,
+    make_batch_list,
+    save_cached_batches,
+    shape_files_hash,
+)
 
 
 class NumElementsBatchSampler(AbsSampler):
@@ -18,6 +26,7 @@ class NumElementsBatchSampler(AbsSampler):
         sort_batch: str = "ascending",
         drop_last: bool = False,
         padding: bool = True,
+        cache_dir: Optional[str] = None,
     ):
         assert batch_bins > 0
         if sort_batch != "ascending" and sort_batch != "descending":
@@ -35,111 +44,83 @@ class NumElementsBatchSampler(AbsSampler):
         self.sort_batch = sort_batch
         self.drop_last = drop_last
 
-        # utt2shape: (Length, ...)
-        #    uttA 100,...
-        #    uttB 201,...
-        utt2shapes = [
-            load_num_sequence_text(s, loader_type="csv_int") for s in shape_files
-        ]
-
-        first_utt2shape = utt2shapes[0]
-        for s, d in zip(shape_files, utt2shapes):
-            if set(d) != set(first_utt2shape):
-                raise RuntimeError(
-                    f"keys are mismatched between {s} != {shape_files[0]}"
-                )
-
-        # Sort samples in ascending order
-        # (shape order should be like (Length, Dim))
-        keys = sorted(first_utt2shape, key=lambda k: first_utt2shape[k][0])
-        if len(keys) == 0:
-            raise RuntimeError(f"0 lines found: {shape_files[0]}")
-        if padding:
-            # If padding case, the feat-dim must be same over whole corpus,
-            # therefore the first sample is referred
-            feat_dims = [np.prod(d[keys[0]][1:]) for d in utt2shapes]
+        # The sorted keys and the batch sizes can be cached
+        # keyed by the hash of the contents of the shape files
+        if cache_dir is not None:
+            digest = shape_files_hash(
+                shape_files,
+                self.__class__.__name__,
+                batch_bins,
+                min_batch_size,
+                drop_last,
+                padding,
+            )
+            cached = load_cached_batches(cache_dir, digest)
         else:
-            feat_dims = None
+            cached = None
 
-        # Decide batch-sizes
-        batch_sizes = []
-        current_batch_keys = []
-        for key in keys:
-            current_batch_keys.append(key)
-            # shape: (Length, dim1, dim2, ...)
-            if padding:
-                for d, s in zip(utt2shapes, shape_files):
-                    if tuple(d[key][1:]) != tuple(d[keys[0]][1:]):
-                        raise RuntimeError(
-                            "If padding=True, the "
-                            f"feature dimension must be unified: {s}",
-                        )
-                bins = sum(
-                    len(current_batch_keys) * sh[key][0] * d
-                    for sh, d in zip(utt2shapes, feat_dims)
-                )
-            else:
-                bins = sum(
-                    np.prod(d[k]) for k in current_batch_keys for d in utt2shapes
-                )
-
-            if bins > batch_bins and len(current_batch_keys) >= min_batch_size:
-                batch_sizes.append(len(current_batch_keys))
-                current_batch_keys = []
+        if cached is not None:
+            keys, batch_sizes = cached
         else:
-            if len(current_batch_keys) != 0 and (
-                not self.drop_last or len(batch_sizes) == 0
-            ):
-                batch_sizes.append(len(current_batch_keys))
-
-        if len(batch_sizes) == 0:
-            # Maybe we can't reach here
-            raise RuntimeError("0 batches")
-
-        # If the last batch-size is smaller than minimum batch_size,
-        # the samples are redistributed to the other mini-batches
-        if len(batch_sizes) > 1 and batch_sizes[-1] < min_batch_size:
-            for i in range(batch_sizes.pop(-1)):
-                batch_sizes[-(i % len(batch_sizes)) - 1] += 1
+            keys, batch_sizes = self._decide_batch_sizes(
+                shape_files, batch_bins, min_batch_size, drop_last, padding
+            )
+            if cache_dir is not None:
+                save_cached_batches(cache_dir, digest, keys, batch_sizes)
 
         if not self.drop_last:
             # Bug check
             assert sum(batch_sizes) == len(keys), f"{sum(batch_sizes)} != {len(keys)}"
 
         # Set mini-batch
-        self.batch_list = []
-        iter_bs = iter(batch_sizes)
-        bs = next(iter_bs)
-        minibatch_keys = []
-        for key in keys:
-            minibatch_keys.append(key)
-            if len(minibatch_keys) == bs:
-                if sort_in_batch == "descending":
-                    minibatch_keys.reverse()
-                elif sort_in_batch == "ascending":
-                    # Key are already sorted in ascending
-                    pass
-                else:
-                    raise ValueError(
-                        "sort_in_batch must be ascending"
-                        f" or descending: {sort_in_batch}"
+        self.batch_list = make_batch_list(keys, batch_sizes, sort_in_batch, sort_batch)
+
+    @staticmethod
+    def _decide_batch_sizes(
+        shape_files, batch_bins, min_batch_size, drop_last, padding
+    ) -> Tuple[List[str], List[int]]:
+        # utt2shape: (Length, ...)
+        #    uttA 100,...
+        #    uttB 201,...
+        keys, utt2shapes = load_aligned_shapes(shape_files)
+        if len(keys) == 0:
+            raise RuntimeError(f"0 lines found: {shape_files[0]}")
+
+        # Sort samples in ascending order
+        # (shape order should be like (Length, Dim))
+        first_flat, first_offsets = utt2shapes[0]
+        order = np.argsort(first_flat[first_offsets[:-1]], kind="stable")
+        keys = [keys[i] for i in order]
+
+        weights = np.zeros(len(keys), dtype=np.int64)
+        for (flat, offsets), s in zip(utt2shapes, shape_files):
+            ndims = np.diff(offsets)[order]
+            if padding:
+                # If padding case, the feat-dim must be same over whole corpus,
+                # therefore the first sample is referred
+                if np.any(ndims != ndims[0]):
+                    raise RuntimeError(
+                        f"If padding=True, the feature dimension must be unified: {s}",
                     )
+                shapes = flat.reshape(-1, ndims[0])[order]
+                if np.any(shapes[:, 1:] != shapes[0, 1:]):
+                    raise RuntimeError(
+                        f"If padding=True, the feature dimension must be unified: {s}",
+                    )
+                # bins = bs x (sum of length x feat_dim of the last sample)
+                weights += shapes[:, 0] * np.prod(shapes[0, 1:], dtype=np.int64)
+            else:
+                # bins = sum of the number of elements
+                weights += np.multiply.reduceat(flat, offsets[:-1])[order]
 
-                self.batch_list.append(tuple(minibatch_keys))
-                minibatch_keys = []
-                try:
-                    bs = next(iter_bs)
-                except StopIteration:
-                    break
-
-        if sort_batch == "ascending":
-            pass
-        elif sort_batch == "descending":
-            self.batch_list.reverse()
-        else:
-            raise ValueError(
-                f"sort_batch must be ascending or descending: {sort_batch}"
-            )
+        # Decide batch-sizes
+        batch_sizes, remainder = find_batch_sizes(
+            weights, batch_bins, min_batch_size, padding
+        )
+        batch_sizes = finalize_batch_sizes(
+            batch_sizes, remainder, min_batch_size, drop_last
+        )
+        return keys, batch_sizes
 
     def __repr__(self):
         return (
@@ -3,6 +3,7 @@ from typing import Iterator, Optional, Tuple
 
 from typeguard import typechecked
 
+from espnet2.fileio.manifest import ManifestReader, is_manifest
 from espnet2.fileio.read_text import read_2columns_text
 from espnet2.samplers.abs_sampler import AbsSampler
 
@@ -36,7 +37,10 @@ class UnsortedBatchSampler(AbsSampler):
         # utt2shape:
         #    uttA <anything is o.k>
         #    uttB <anything is o.k>
-        utt2any = read_2columns_text(key_file)
+        if is_manifest(key_file):
+            utt2any = ManifestReader(key_file)
+        else:
+            utt2any = read_2columns_text(key_file)
         if len(utt2any) == 0:
             logging.warning(f"{key_file} is empty")
         # In this case the, the first column in only used
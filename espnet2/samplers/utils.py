@@ -0,0 +1,273 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from espnet2.fileio.manifest import ManifestReader, is_manifest
+
+
+def load_shapes(path: Union[Path, str]) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """Load a shape file as arrays.
+
+    Equivalent to load_num_sequence_text(path, loader_type="csv_int"), but the
+    numbers are parsed at once by numpy instead of int() for each of them.
+
+    Examples:
+        shape file:
+            uttA 100,80
+            uttB 201
+
+        >>> keys, flat, offsets = load_shapes("shape")
+        >>> keys
+        ['uttA', 'uttB']
+        >>> flat
+        array([100,  80, 201])
+        >>> offsets
+        array([0, 2, 3])
+
+    A binary manifest made by convert_to_manifest() can be also given,
+    then the arrays are read from it without parsing.
+
+    Returns:
+        The keys, the flattened shapes and their offsets (N + 1,)
+    """
+    if is_manifest(path):
+        reader = ManifestReader(path)
+        flat, offsets = reader.arrays()
+        return list(reader), flat.astype(np.int64), offsets.astype(np.int64)
+
+    with Path(path).open("r", encoding="utf-8") as f:
+        text = f.read()
+    lines = text.splitlines()
+    tokens = text.split()
+    if len(tokens) == 2 * len(lines):
+        # Fast path: Every line is "key shape"
+        keys = tokens[0::2]
+        values = tokens[1::2]
+    else:
+        for linenum, line in enumerate(lines, 1):
+            if len(line.split()) != 2:
+                raise RuntimeError(f"Invalid line: {path}:{linenum}: {line}")
+    if len(keys) == 0:
+        return keys, np.zeros(0, dtype=np.int64), np.zeros(1, dtype=np.int64)
+
+    # Count the number of dims for each line by the commas
+    joined = "\n".join(values)
+    chars = np.frombuffer(joined.encode("utf-8"), dtype=np.uint8)
+    num_commas = np.cumsum(chars == ord(","))
+    newlines = np.flatnonzero(chars == ord("\n"))
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    offsets[1:] = np.append(num_commas[newlines], num_commas[-1]) + np.arange(
+        1, len(values) + 1
+    )
+    try:
+        flat = np.array(joined.replace("\n", ",").split(","), dtype=np.int64)
+    except ValueError:
+        logging.error(f'Error happened with path="{path}"')
+        raise
+    return keys, flat, offsets
+
+
+def load_aligned_shapes(
+    shape_files: Sequence[str],
+) -> Tuple[List[str], List[Tuple[np.ndarray, np.ndarray]]]:
+    """Load the shape files and reorder them in the order of the first one.
+
+    Returns:
+        The keys of the first shape file and
+        (flattened shapes, offsets) for each shape file
+    """
+    first_keys = None
+    shapes = []
+    for s in shape_files:
+        keys, flat, offsets = load_shapes(s)
+        if first_keys is None:
+            if len(set(keys)) != len(keys):
+                raise RuntimeError(f"keys are duplicated in {s}")
+            first_keys = keys
+        elif keys != first_keys:
+            if len(keys) != len(first_keys) or set(keys) != set(first_keys):
+                raise RuntimeError(
+                    f"keys are mismatched between {s} != {shape_files[0]}"
+                )
+            key2idx = {k: i for i, k in enumerate(keys)}
+            flat, offsets = _gather(
+                flat, offsets, np.array([key2idx[k] for k in first_keys])
+            )
+        shapes.append((flat, offsets))
+    return first_keys, shapes
+
+
+def _gather(
+    flat: np.ndarray, offsets: np.ndarray, rows: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Select the rows of the ragged array
+    ndims = np.diff(offsets)[rows]
+    new_offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum(ndims, out=new_offsets[1:])
+    index = np.repeat(offsets[rows] - new_offsets[:-1], ndims) + np.arange(
+        new_offsets[-1]
+    )
+    return flat[index], new_offsets
+
+
+def find_batch_sizes(
+    weights: np.ndarray,
+    batch_bins: int,
+    min_batch_size: int,
+    padding: bool,
+) -> Tuple[List[int], int]:
+    """Decide the batch sizes greedily from the head of the sorted samples.
+
+    A mini-batch is closed at the first sample which makes the bins exceed
+    batch_bins after it has min_batch_size samples at least. The bins are
+
+        - padding=True: (the number of samples) x (weight of the last sample)
+        - padding=False: The sum of the weights of the samples
+
+    Returns:
+        The sizes of the closed mini-batches and
+        the number of the remaining samples
+    """
+    n = len(weights)
+    batch_sizes = []
+    start = 0
+    if not padding:
+        # cumsum[i] - cumsum[start] = The bins of samples[start:i]
+        cumsum = np.zeros(n + 1, dtype=weights.dtype)
+        np.cumsum(weights, out=cumsum[1:])
+
+    while start < n:
+        end = None
+        if padding:
+            # The bins aren't monotonic, so search the first sample exceeding
+            # batch_bins in the windows growing exponentially
+            i = start + max(min_batch_size, 1) - 1
+            window = 64
+            while i < n:
+                seg = weights[i : i + window]
+                bins = np.arange(i - start + 1, i - start + 1 + len(seg)) * seg
+                exceeded = bins > batch_bins
+                if exceeded.any():
+                    end = i + int(np.argmax(exceeded)) + 1
+                    break
+                i += window
+                window *= 2
+        else:
+            # The first i satisfying cumsum[i] > cumsum[start] + batch_bins
+            i = int(np.searchsorted(cumsum, cumsum[start] + batch_bins, side="right"))
+            if max(i, start + min_batch_size) <= n:
+                end = max(i, start + min_batch_size)
+
+        if end is None:
+            break
+        batch_sizes.append(end - start)
+        start = end
+    return batch_sizes, n - start
+
+
+def finalize_batch_sizes(
+    batch_sizes: List[int], remainder: int, min_batch_size: int, drop_last: bool
+) -> List[int]:
+    """Append or drop the remaining samples given by find_batch_sizes()."""
+    batch_sizes = list(batch_sizes)
+    if remainder != 0 and (not drop_last or len(batch_sizes) == 0):
+        batch_sizes.append(remainder)
+
+    if len(batch_sizes) == 0:
+        # Maybe we can't reach here
+        raise RuntimeError("0 batches")
+
+    # If the last batch-size is smaller than minimum batch_size,
+    # the samples are redistributed to the other mini-batches
+    if len(batch_sizes) > 1 and batch_sizes[-1] < min_batch_size:
+        for i in range(batch_sizes.pop(-1)):
+            batch_sizes[-(i % len(batch_sizes)) - 1] += 1
+    return batch_sizes
+
+
+def make_batch_list(
+    keys: List[str],
+    batch_sizes: List[int],
+    sort_in_batch: str,
+    sort_batch: str,
+) -> List[Tuple[str, ...]]:
+    """Split the sorted keys into mini-batches."""
+    if sort_in_batch not in ("ascending", "descending"):
+        raise ValueError(
+            f"sort_in_batch must be ascending or descending: {sort_in_batch}"
+        )
+    if sort_batch not in ("ascending", "descending"):
+        raise ValueError(f"sort_batch must be ascending or descending: {sort_batch}")
+
+    batch_list = []
+    start = 0
+    for bs in batch_sizes:
+        minibatch_keys = keys[start : start + bs]
+        if sort_in_batch == "descending":
+            minibatch_keys.reverse()
+        batch_list.append(tuple(minibatch_keys))
+        start += bs
+    if sort_batch == "descending":
+        batch_list.reverse()
+    return batch_list
+
+
+def shape_files_hash(shape_files: Sequence[str], *args) -> str:
+    """Return the hash of the contents of the shape files and the arguments."""
+    h = hashlib.sha256()
+    for s in shape_files:
+        with Path(s).open("rb") as f:
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                h.update(chunk)
+        h.update(b"\0")
+    h.update(repr(args).encode())
+    return h.hexdigest()
+
+
+def load_cached_batches(
+    cache_dir: Optional[Union[Path, str]], digest: str
+) -> Optional[Tuple[List[str], List[int]]]:
+    """Load the sorted keys and the batch sizes saved by save_cached_batches()."""
+    if cache_dir is None:
+        return None
+    p = Path(cache_dir) / f"{digest}.npz"
+    if not p.exists():
+        return None
+    try:
+        with np.load(p) as cache:
+            keys = cache["keys"].tobytes().decode("utf-8").split("\n")
+            batch_sizes = cache["batch_sizes"].tolist()
+    except Exception as e:
+        logging.warning(f"Failed to load the cache of batches {p}: {e}")
+        return None
+    return keys, batch_sizes
+
+
+def save_cached_batches(
+    cache_dir: Optional[Union[Path, str]],
+    digest: str,
+    keys: List[str],
+    batch_sizes: List[int],
+):
+    """Save the sorted keys and the batch sizes to the cache directory."""
+    if cache_dir is None:
+        return
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    p = cache_dir / f"{digest}.npz"
+    # Write to a temporary file and rename it,
+    # since the other processes may read the same cache
+    tmp = cache_dir / f"{digest}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp,
+        keys=np.frombuffer("\n".join(keys).encode("utf-8"), dtype=np.uint8),
+        batch_sizes=np.array(batch_sizes, dtype=np.int64),
+    )
+    os.replace(tmp, p)
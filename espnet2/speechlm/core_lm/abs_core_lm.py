@@ -23,6 +23,7 @@ class SpeechLMInferenceOptions:
     start: int = 1
     masks: torch.Tensor = None
     nq: int = None
+    kv_cache_type: str = "static"
 
 
 class AbsCoreLM(torch.nn.Module, ABC):
@@ -92,3 +93,62 @@ class AbsCoreLM(torch.nn.Module, ABC):
                 usually the target sequence for teacher-forcing.
         """
         raise NotImplementedError
+
+    # The following methods are used by the continuous batching generation,
+    # see espnet2/speechlm/generation_engine.py
+
+    @property
+    def support_continuous_batching(self) -> bool:
+        return type(self).decode_step is not AbsCoreLM.decode_step
+
+    def cached_decoder(self) -> torch.nn.Module:
+        """Return the auto-regressive decoder whose keys and values are cached."""
+        raise NotImplementedError
+
+    def prefill(self, prefix: torch.Tensor, kv_cache) -> None:
+        """Forward the prefixes to fill the KV cache.
+
+        Args:
+            prefix (LongTensor): Prefixes of the same length (B, T_dec, nq).
+            kv_cache (PagedKVCache): KV cache prepared for the prefixes.
+        """
+        raise NotImplementedError
+
+    def decode_step(
+        self,
+        prev_tok: torch.Tensor,
+        kv_cache,
+        opts: SpeechLMInferenceOptions,
+        allow_eos: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Generate the next frames of the sequences in the batch.
+
+        Args:
+            prev_tok (LongTensor): Previous frames (B, 1, nq).
+            kv_cache (PagedKVCache): KV cache prepared for one step.
+            opts (SpeechLMInferenceOptions): inference options.
+            allow_eos (BoolTensor): Whether to allow <eos> for each sequence (B,).
+        Returns:
+            gen_tok (LongTensor): Generated frames (B, 1, nq_gen).
+            gen_score (Tensor): Scores of the generated frames (B, 1, nq_gen).
+        """
+        raise NotImplementedError
+
+    def finalize(
+        self,
+        prefix: torch.Tensor,
+        gen_tokens: torch.Tensor,
+        gen_scores: torch.Tensor,
+        opts: SpeechLMInferenceOptions,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Complete the auto-regressive generation of a sequence, if needed.
+
+        Args:
+            prefix (LongTensor): Prefix part of dec_seq (1, T_dec, nq).
+            gen_tokens (LongTensor): Generated frames including <eos> (1, T, nq_gen).
+            gen_scores (Tensor): Scores of the generated frames (1, T, nq_gen).
+        Returns:
+            gen_tokens (LongTensor): (1, T, nq)
+            gen_scores (Tensor): (1, T, nq)
+        """
+        return gen_tokens, gen_scores
@@ -12,7 +12,7 @@ import torch
 
 from espnet2.speechlm.core_lm.abs_core_lm import AbsCoreLM, SpeechLMInferenceOptions
 from espnet2.speechlm.module.transformer import TransformerDecoder
-from espnet2.speechlm.net_utils import ce_loss, install_kv_cache_hook, logits_to_tokens
+from espnet2.speechlm.net_utils import ce_loss, init_kv_cache, logits_to_tokens
 
 
 class MultiScaleLM(AbsCoreLM):
@@ -154,7 +154,14 @@ class MultiScaleLM(AbsCoreLM):
         """
 
         # (1) global initialization
-        g_cache, g_hooks = install_kv_cache_hook(self.g_decoders, {})
+        minlen = int(prefix.size(1) * opts.minlenratio) if opts.minlenratio > 0 else 0
+        maxlen = int(prefix.size(1) * opts.maxlenratio)
+        if opts.search_algo == "teacher_force":
+            minlen = suffix.size(1)
+            maxlen = suffix.size(1)
+        logging.info(f"maxlen={maxlen}, minlen={minlen}, reflen={suffix.size(1)}")
+
+        g_cache, g_hooks = init_kv_cache(self.g_decoders, opts, prefix.size(1) + maxlen)
 
         # (2) Prefix forward
         prefix = prefix.expand(opts.nbest, -1, -1)
@@ -164,13 +171,6 @@ class MultiScaleLM(AbsCoreLM):
 
         # (3) global loop
         # (3.1) global initialization
-        minlen = int(prefix.size(1) * opts.minlenratio) if opts.minlenratio > 0 else 0
-        maxlen = int(prefix.size(1) * opts.maxlenratio)
-        if opts.search_algo == "teacher_force":
-            minlen = suffix.size(1)
-            maxlen = suffix.size(1)
-        logging.info(f"maxlen={maxlen}, minlen={minlen}, reflen={suffix.size(1)}")
-
         finish_idx = torch.Tensor([-1]).expand(opts.nbest).long().to(opts.device)
 
         g_generated = {"token": [], "score": []}
@@ -185,7 +185,7 @@ class MultiScaleLM(AbsCoreLM):
             g_hidden = self.g_decoders(g_prev_emb, kv_cache=g_cache)  # [B, 1, D]
 
             # (3.2) local initialization
-            l_cache, l_hooks = install_kv_cache_hook(self.l_decoders, {})
+            l_cache, l_hooks = init_kv_cache(self.l_decoders, opts, opts.nq)
 
             # (3.3) local loop
             l_generated = {"token": [], "score": []}
@@ -265,3 +265,59 @@ class MultiScaleLM(AbsCoreLM):
             assert not torch.any(gen_tokens[-1].eq(opts.eos))
 
         return gen_tokens, gen_scores
+
+    def cached_decoder(self) -> torch.nn.Module:
+        return self.g_decoders
+
+    def prefill(self, prefix: torch.Tensor, kv_cache) -> None:
+        prefix_emb = self.emb(prefix).sum(2)
+        _ = self.g_decoders(prefix_emb, offset=kv_cache.offset)
+
+    def decode_step(
+        self,
+        prev_tok: torch.Tensor,
+        kv_cache,
+        opts: SpeechLMInferenceOptions,
+        allow_eos: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """One global step of all the sequences in the batch.
+
+        Args:
+            prev_tok (LongTensor): Previous frames (B, 1, nq).
+            kv_cache (PagedKVCache): KV cache of the global Transformer.
+            opts (SpeechLMInferenceOptions): inference options.
+            allow_eos (BoolTensor): Whether to allow <eos> for each sequence (B,).
+        """
+        g_prev_emb = self.emb(prev_tok).sum(2)  # [B, 1, D]
+        g_hidden = self.g_decoders(
+            g_prev_emb, mask=kv_cache.mask, offset=kv_cache.offset
+        )
+
+        # The local cache is only for this step, so it is shared by the batch
+        l_cache, l_hooks = init_kv_cache(self.l_decoders, opts, opts.nq)
+        l_generated = {"token": [], "score": []}
+        l_prev_emb = self.placeholder.tile(prev_tok.size(0), 1, 1)  # [B, 1, D]
+        for l_step in range(opts.nq):
+            l_hidden = l_prev_emb + g_hidden
+            l_hidden = self.l_decoders(l_hidden, kv_cache=l_cache)
+            logits = self.lm_head(l_hidden)
+
+            gen_tok, gen_score = logits_to_tokens(
+                logits.unsqueeze(2),
+                opts,
+                allow_eos=allow_eos if l_step == 0 else False,
+                nq_level=l_step,
+            )
+            # [B, 1, 1] -> [B, 1]
+            gen_tok, gen_score = gen_tok.squeeze(2), gen_score.squeeze(2)
+            l_prev_emb = self.emb(gen_tok)
+
+            l_generated["token"].append(gen_tok)
+            l_generated["score"].append(gen_score)
+
+        for hook in l_hooks:
+            hook.remove()
+
+        gen_tokens = torch.stack(l_generated["token"], dim=2)  # [B, 1, nq]
+        gen_scores = torch.stack(l_generated["score"], dim=2)
+        return gen_tokens, gen_scores
@@ -15,7 +15,7 @@ from espnet2.speechlm.module.transformer import TransformerDecoder
 from espnet2.speechlm.module.valle import ValleNARDecoder
 from espnet2.speechlm.net_utils import (
     ce_loss,
-    install_kv_cache_hook,
+    init_kv_cache,
     length_mask,
     logits_to_tokens,
 )
@@ -164,7 +164,15 @@ class ValleLM(AbsCoreLM):
         """
 
         # (1) initialization
-        cache, hooks = install_kv_cache_hook(self.ar_decoder, {})
+        minlen = int(prefix.size(1) * opts.minlenratio) if opts.minlenratio > 0 else 0
+        maxlen = int(prefix.size(1) * opts.maxlenratio)
+        if opts.search_algo == "teacher_force":
+            assert suffix is not None
+            minlen = suffix.size(1)
+            maxlen = suffix.size(1)
+        logging.info(f"maxlen={maxlen}, minlen={minlen}, reflen={suffix.size(1)}")
+
+        cache, hooks = init_kv_cache(self.ar_decoder, opts, prefix.size(1) + maxlen)
 
         # (2) auto-regressive prefix forward on first code layer
         prefix = prefix.expand(opts.nbest, -1, -1)
@@ -174,14 +182,6 @@ class ValleLM(AbsCoreLM):
 
         # (3) auto-regressive loop on first code layer
         # (3.1) AR initialization
-        minlen = int(prefix.size(1) * opts.minlenratio) if opts.minlenratio > 0 else 0
-        maxlen = int(prefix.size(1) * opts.maxlenratio)
-        if opts.search_algo == "teacher_force":
-            assert suffix is not None
-            minlen = suffix.size(1)
-            maxlen = suffix.size(1)
-        logging.info(f"maxlen={maxlen}, minlen={minlen}, reflen={suffix.size(1)}")
-
         generated = {"token": [], "score": []}
         finish_idx = torch.Tensor([-1]).expand(opts.nbest).long().to(opts.device)
         prev_tok = torch.Tensor([opts.start]).tile(opts.nbest, 1).long().to(opts.device)
@@ -197,7 +197,7 @@ class ValleLM(AbsCoreLM):
                 nq_level=0,
             )
             # [B, 1, 1] -> [B, 1]
-            gen_tok, gen_score = gen_tok.squeeze(2), gen_tok.squeeze(2)
+            gen_tok, gen_score = gen_tok.squeeze(2), gen_score.squeeze(2)
 
             generated["token"].append(gen_tok)
             generated["score"].append(gen_score)
@@ -219,13 +219,17 @@ class ValleLM(AbsCoreLM):
 
         logging.info(f"Terminate at steps: {finish_idx.cpu().tolist()}")
 
+        for hook in hooks:
+            hook.remove()
+        cache = {}
+
         # (3.4) finalize auto-regressive
         valid_idx = finish_idx.ne(-1).nonzero(as_tuple=True)[0]
-        if len(valid_idx) < prefix.size(0):
-            logging.info(f"Only {len(valid_idx)} of {prefix.size(0)} are valid")
-        elif len(valid_idx) == 0:
+        if len(valid_idx) == 0:
             logging.warning(f"No valid examples. Return None")
             return None, None
+        elif len(valid_idx) < prefix.size(0):
+            logging.info(f"Only {len(valid_idx)} of {prefix.size(0)} are valid")
 
         finish_idx = finish_idx[valid_idx]
         prefix_emb, suffix = prefix_emb[valid_idx], suffix[valid_idx]
@@ -236,24 +240,54 @@ class ValleLM(AbsCoreLM):
         gen_tokens_ar = gen_tokens_ar[:, : finish_idx.max() + 1]  # to include <sos>
         gen_scores_ar = gen_scores_ar[:, : finish_idx.max() + 1]
 
-        for hook in hooks:
-            hook.remove()
-        cache = {}
-
         # (4) non-auto-regressive loop on the remained code layers
-        # (4.1) NAR initialization
         if opts.search_algo == "teacher_force":
             prev_tok = suffix[:, :, 0]
         else:
             prev_tok = gen_tokens_ar[:, :, 0]
-        start_emb = self.emb.weight[opts.start].tile(opts.nbest, 1, 1)  # [B, 1, D]
+        gen_tokens_nar, gen_scores_nar = self._nar_inference(
+            prefix_emb, prev_tok, opts, suffix
+        )
+
+        # (5) combine AR and NAR results
+        gen_tokens = torch.cat([gen_tokens_ar, gen_tokens_nar], dim=2)  # [B, T, nq]
+        gen_scores = torch.cat([gen_scores_ar, gen_scores_nar], dim=2)
+
+        gen_tokens_list, gen_scores_list = [], []
+        for b in range(len(valid_idx)):
+            gen_tokens_list.append(gen_tokens[b][: finish_idx[b]])
+            gen_scores_list.append(gen_scores[b][: finish_idx[b]])
+
+        return gen_tokens_list, gen_scores_list
+
+    def _nar_inference(
+        self,
+        prefix_emb: torch.Tensor,
+        prev_tok: torch.Tensor,
+        opts: SpeechLMInferenceOptions,
+        suffix: torch.Tensor = None,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Non-auto-regressive inference on the remained code layers.
+
+        Args:
+            prefix_emb (Tensor): Embeddings of the prefix (B, T_prefix, D).
+            prev_tok (LongTensor): Tokens of the first code layer (B, T).
+            opts (SpeechLMInferenceOptions): inference options.
+            suffix (LongTensor): suffix part of dec_seq for teacher-forcing (B, T, nq).
+        Returns:
+            gen_tokens (LongTensor): (B, T, nq - 1)
+            gen_scores (Tensor): (B, T, nq - 1)
+        """
+        # (1) NAR initialization
+        batch_size, prefix_len = prefix_emb.size(0), prefix_emb.size(1)
+        start_emb = self.emb.weight[opts.start].tile(batch_size, 1, 1)  # [B, 1, D]
         prev_emb = torch.cat(
             [prefix_emb[:, 1:], start_emb, self.emb(prev_tok)], dim=1
         )  # [B, T, D]
 
-        ones = torch.ones_like(valid_idx)
+        ones = torch.ones(batch_size, dtype=torch.long, device=prev_tok.device)
         generated = {"token": [], "score": []}
-        # (4.2) NAR loop
+        # (2) NAR loop
         for step in range(1, opts.nq):
             h_nar = self.nar_decoder(prev_emb, ones * step - 1)  # [B, T, D]
             logits = self.lm_head(h_nar)  # [B, T, V]
@@ -265,26 +299,59 @@ class ValleLM(AbsCoreLM):
             )
             gen_tok, gen_score = gen_tok.squeeze(2), gen_score.squeeze(2)  # [B, T]
 
-            generated["token"].append(gen_tok[:, prefix.size(1) :])
-            generated["score"].append(gen_score[:, prefix.size(1) :])
+            generated["token"].append(gen_tok[:, prefix_len:])
+            generated["score"].append(gen_score[:, prefix_len:])
 
             if opts.search_algo == "teacher_force":
                 prev_tok = suffix[:, :, step]
             else:
-                prev_tok = gen_tok
-            prev_emb[:, prefix.size(1) :] += self.emb(prev_tok)  # [B, T, D]
-            prev_emb[:, prefix.size(1) - 1 : prefix.size(1)] += start_emb
+                prev_tok = gen_tok[:, prefix_len:]
+            prev_emb[:, prefix_len:] += self.emb(prev_tok)  # [B, T, D]
+            prev_emb[:, prefix_len - 1 : prefix_len] += start_emb
 
-        # (5) combine AR and NAR results
-        gen_tokens_nar = torch.stack(generated["token"], dim=2)  # [B, T, nq]
-        gen_scores_nar = torch.stack(generated["score"], dim=2)
+        gen_tokens = torch.stack(generated["token"], dim=2)  # [B, T, nq - 1]
+        gen_scores = torch.stack(generated["score"], dim=2)
+        return gen_tokens, gen_scores
 
-        gen_tokens = torch.cat([gen_tokens_ar, gen_tokens_nar], dim=2)  # [B, T, nq]
-        gen_scores = torch.cat([gen_scores_ar, gen_scores_nar], dim=2)
+    def cached_decoder(self) -> torch.nn.Module:
+        return self.ar_decoder
 
-        gen_tokens_list, gen_scores_list = [], []
-        for b in range(len(valid_idx)):
-            gen_tokens_list.append(gen_tokens[b][: finish_idx[b]])
-            gen_scores_list.append(gen_scores[b][: finish_idx[b]])
+    def prefill(self, prefix: torch.Tensor, kv_cache) -> None:
+        prefix_emb = self.emb(prefix).sum(dim=2)  # [B, T, D]
+        _ = self.ar_decoder(prefix_emb, offset=kv_cache.offset)
 
-        return gen_tokens_list, gen_scores_list
+    def decode_step(
+        self,
+        prev_tok: torch.Tensor,
+        kv_cache,
+        opts: SpeechLMInferenceOptions,
+        allow_eos: torch.Tensor,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """One auto-regressive step on the first code layer of the batch.
+
+        Args:
+            prev_tok (LongTensor): Previous frames (B, 1, nq).
+            kv_cache (PagedKVCache): KV cache of the AR Transformer.
+            opts (SpeechLMInferenceOptions): inference options.
+            allow_eos (BoolTensor): Whether to allow <eos> for each sequence (B,).
+        """
+        prev_emb = self.emb(prev_tok[:, :, 0])  # [B, 1, D]
+        h_ar = self.ar_decoder(prev_emb, mask=kv_cache.mask, offset=kv_cache.offset)
+        logits = self.lm_head(h_ar)  # [B, 1, V]
+        # [B, 1, 1]
+        return logits_to_tokens(logits.unsqueeze(2), opts, allow_eos, nq_level=0)
+
+    def finalize(
+        self,
+        prefix: torch.Tensor,
+        gen_tokens: torch.Tensor,
+        gen_scores: torch.Tensor,
+        opts: SpeechLMInferenceOptions,
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        prefix_emb = self.emb(prefix).sum(dim=2)
+        gen_tokens_nar, gen_scores_nar = self._nar_inference(
+            prefix_emb, gen_tokens[:, :, 0], opts
+        )
+        gen_tokens = torch.cat([gen_tokens, gen_tokens_nar], dim=2)  # [B, T, nq]
+        gen_scores = torch.cat([gen_scores, gen_scores_nar], dim=2)
+        return gen_tokens, gen_scores
@@ -0,0 +1,240 @@
+"""Continuous batching generation for SpeechLM."""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import torch
+from typeguard import typechecked
+
+from espnet2.speechlm.core_lm.abs_core_lm import AbsCoreLM, SpeechLMInferenceOptions
+from espnet2.speechlm.module.kv_cache import PagedKVCache
+
+
+@dataclass
+class _Sequence:
+    key: str
+    prefix: torch.Tensor  # (1, T_prefix, nq)
+    minlen: int
+    maxlen: int
+    prev_tok: torch.Tensor  # (1, 1, nq)
+    reserved_blocks: int
+    step: int = 0
+    tokens: List[torch.Tensor] = field(default_factory=list)
+    scores: List[torch.Tensor] = field(default_factory=list)
+
+
+class SpeechLMGenerationEngine:
+    """Generation engine to decode many prompts with continuous batching.
+
+    The auto-regressive steps of all the active sequences are computed
+    together as a batch. When a sequence emits <eos>, it leaves the batch
+    and a new prompt is admitted in its place, so the batch is kept full
+    until the prompts run out, instead of waiting for the longest sequence
+    of a static batch.
+
+    The keys and values of the sequences are stored in a PagedKVCache.
+    A prompt is admitted only when the cache can hold its maximum length,
+    so the running sequences never run out of the cache.
+
+    The core LM must support the continuous batching,
+    i.e. implement prefill() and decode_step() of AbsCoreLM.
+
+    Examples:
+        >>> engine = SpeechLMGenerationEngine(corelm, opts, max_batch_size=16)
+        >>> for key, tokens, scores in engine.generate(prompts):
+        ...     # prompts: Iterable of (key, prefix (T, nq))
+        ...     # tokens and scores: List of nbest (T_gen, nq)
+        ...     pass
+
+    Args:
+        corelm: The core LM
+        opts: The inference options. "teacher_force" is not supported.
+        max_batch_size: The maximum number of the sequences decoded at once,
+            including the nbest hypotheses of each prompt
+        block_size: The number of tokens in a block of the KV cache
+        num_blocks: The number of the blocks of the KV cache.
+            By default, enough for max_batch_size sequences of the maximum context.
+    """
+
+    @typechecked
+    def __init__(
+        self,
+        corelm: AbsCoreLM,
+        opts: SpeechLMInferenceOptions,
+        max_batch_size: int = 8,
+        block_size: int = 16,
+        num_blocks: Optional[int] = None,
+    ):
+        if not corelm.support_continuous_batching:
+            raise NotImplementedError(
+                f"{type(corelm).__name__} doesn't support continuous batching"
+            )
+        if opts.search_algo not in ("sampling", "greedy_search"):
+            raise NotImplementedError(
+                f"search_algo={opts.search_algo} is not supported in batch decoding"
+            )
+        if max_batch_size < opts.nbest:
+            raise ValueError(
+                f"max_batch_size must be >= nbest: {max_batch_size} < {opts.nbest}"
+            )
+
+        self.corelm = corelm
+        self.opts = opts
+        self.max_batch_size = max_batch_size
+
+        decoder = corelm.cached_decoder()
+        if num_blocks is None:
+            n_ctx = decoder.pos_emb.num_embeddings
+            num_blocks = max_batch_size * -(-n_ctx // block_size)
+        self.kv_cache = PagedKVCache(decoder, num_blocks, block_size)
+
+        self.active: List[_Sequence] = []
+        self.reserved_blocks = 0
+
+    @torch.no_grad()
+    def generate(
+        self, prompts: Iterable[Tuple[str, torch.Tensor]]
+    ) -> Iterator[Tuple[str, List[torch.Tensor], List[torch.Tensor]]]:
+        """Generate for the prompts.
+
+        Args:
+            prompts: Iterable of the key and prefix (T_prefix, nq).
+                It is consumed only when the batch has room for the next prompt.
+        Yields:
+            The key and the nbest tokens and scores (T_gen, nq),
+            in the order of completion. The hypotheses which do not emit <eos>
+            within the maximum length are discarded as in corelm.inference.
+        """
+        prompts = iter(prompts)
+        pending = None
+        exhausted = False
+        results: Dict[str, Tuple[int, List, List]] = {}
+
+        while True:
+            # 1. Admit the new prompts while the batch has room
+            while not exhausted:
+                if pending is None:
+                    pending = next(prompts, None)
+                    if pending is None:
+                        exhausted = True
+                        break
+                if not self._admit(*pending):
+                    break
+                key = pending[0]
+                if key in results:
+                    raise RuntimeError(f"{key} is duplicated")
+                results[key] = (self.opts.nbest, [], [])
+                pending = None
+
+            if len(self.active) == 0:
+                break
+
+            # 2. Step all the active sequences and yield the completed prompts
+            for seq, tokens, scores in self._step():
+                remained, nbest_tokens, nbest_scores = results[seq.key]
+                if tokens is not None:
+                    nbest_tokens.append(tokens)
+                    nbest_scores.append(scores)
+                results[seq.key] = (remained - 1, nbest_tokens, nbest_scores)
+                if remained == 1:
+                    results.pop(seq.key)
+                    yield seq.key, nbest_tokens, nbest_scores
+
+    def _admit(self, key: str, prefix: torch.Tensor) -> bool:
+        """Add the nbest sequences of the prompt if the batch has room."""
+        opts = self.opts
+        if prefix.dim() == 2:
+            prefix = prefix.unsqueeze(0)
+        prefix_len = prefix.size(1)
+        minlen = int(prefix_len * opts.minlenratio) if opts.minlenratio > 0 else 0
+        maxlen = int(prefix_len * opts.maxlenratio)
+
+        # prefix, <start>, and the generated tokens except the last one
+        blocks = self.kv_cache.blocks_needed(prefix_len + maxlen)
+        if blocks * opts.nbest > self.kv_cache.num_blocks:
+            raise RuntimeError(
+                f"{key} is too long for the KV cache: prefix_len={prefix_len}, "
+                f"maxlen={maxlen}"
+            )
+        if (
+            len(self.active) + opts.nbest > self.max_batch_size
+            or self.reserved_blocks + blocks * opts.nbest > self.kv_cache.num_blocks
+        ):
+            return False
+
+        seqs = []
+        for _ in range(opts.nbest):
+            seq = _Sequence(
+                key=key,
+                prefix=prefix,
+                minlen=minlen,
+                maxlen=maxlen,
+                prev_tok=torch.full_like(prefix[:, :1], opts.start),
+                reserved_blocks=blocks,
+            )
+            self.kv_cache.add(id(seq))
+            seqs.append(seq)
+        self.reserved_blocks += blocks * opts.nbest
+        logging.info(f"Start {key}: maxlen={maxlen}, minlen={minlen}")
+
+        # The nbest sequences share the same prefix
+        self.kv_cache.prepare([id(seq) for seq in seqs], prefix_len)
+        with self.kv_cache:
+            self.corelm.prefill(prefix.expand(opts.nbest, -1, -1), self.kv_cache)
+        self.active.extend(seqs)
+        return True
+
+    def _step(self) -> List[Tuple[_Sequence, torch.Tensor, torch.Tensor]]:
+        """Decode one step of the active sequences and return the finished ones."""
+        opts = self.opts
+        # NOTE: The frames generated by the core LM can be narrower than
+        #   the <start> frame, e.g. only the first code layer in Vall-E.
+        nq = min(seq.prev_tok.size(2) for seq in self.active)
+        prev_tok = torch.cat([seq.prev_tok[:, :, :nq] for seq in self.active])
+        allow_eos = torch.tensor(
+            [seq.step >= seq.minlen for seq in self.active], device=prev_tok.device
+        )
+
+        self.kv_cache.prepare([id(seq) for seq in self.active], 1)
+        with self.kv_cache:
+            gen_tok, gen_score = self.corelm.decode_step(
+                prev_tok, self.kv_cache, opts, allow_eos
+            )
+
+        is_eos = gen_tok[:, 0, 0].eq(opts.eos).tolist()
+        finished, active = [], []
+        for i, seq in enumerate(self.active):
+            seq.tokens.append(gen_tok[i : i + 1])
+            seq.scores.append(gen_score[i : i + 1])
+            seq.prev_tok = gen_tok[i : i + 1]
+            seq.step += 1
+
+            if is_eos[i] or seq.step >= seq.maxlen:
+                finished.append(self._finish(seq, is_eos[i]))
+            else:
+                active.append(seq)
+        self.active = active
+        return finished
+
+    def _finish(
+        self, seq: _Sequence, is_eos: bool
+    ) -> Tuple[_Sequence, Optional[torch.Tensor], Optional[torch.Tensor]]:
+        self.kv_cache.release(id(seq))
+        self.reserved_blocks -= seq.reserved_blocks
+        if not is_eos:
+            logging.warning(
+                f"{seq.key} cannot finish in {seq.maxlen} steps. "
+                "Consider increasing the maxlenratio"
+            )
+            return seq, None, None
+
+        logging.info(f"Finish {seq.key} at step {seq.step - 1}")
+        # (1, T + 1, nq), including <eos>
+        tokens, scores = self.corelm.finalize(
+            seq.prefix,
+            torch.cat(seq.tokens, dim=1),
+            torch.cat(seq.scores, dim=1),
+            self.opts,
+        )
+        return seq, tokens[0, :-1], scores[0, :-1]
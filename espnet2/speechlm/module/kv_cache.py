@@ -0,0 +1,140 @@
+from typing import Dict, Hashable, List, Sequence
+
+import torch
+
+from espnet2.speechlm.module.transformer import MultiHeadAttention
+
+
+class PagedKVCache:
+    """Paged key-value cache shared by the sequences of continuous batching.
+
+    The keys and values of all the attention layers are stored in a preallocated
+    buffer of fixed-size blocks. Each sequence owns a list of the blocks
+    (block table), which grows by one block when its last block is full.
+    The blocks go back to the pool when the sequence is released, so that
+    the sequences of different lengths can join and leave the batch
+    without reallocating the buffer.
+
+    Examples:
+        >>> cache = PagedKVCache(decoder, num_blocks=64, block_size=16)
+        >>> cache.add("utt_a")
+        >>> cache.prepare(["utt_a"], prefix.size(1))
+        >>> with cache:  # The hooks to read/write the cache are installed here
+        ...     decoder(prefix_emb, offset=cache.offset)
+        >>> cache.prepare(["utt_a"], 1)
+        >>> with cache:
+        ...     decoder(token_emb, mask=cache.mask, offset=cache.offset)
+        >>> cache.release("utt_a")
+
+    Args:
+        model: The module containing the self-attention layers to be cached
+        num_blocks: The number of the blocks in the buffer
+        block_size: The number of the tokens in a block
+    """
+
+    def __init__(self, model: torch.nn.Module, num_blocks: int, block_size: int = 16):
+        if num_blocks < 1 or block_size < 1:
+            raise ValueError(
+                f"num_blocks and block_size must be positive: {num_blocks}, "
+                f"{block_size}"
+            )
+        self.num_blocks = num_blocks
+        self.block_size = block_size
+
+        param = next(model.parameters())
+        self.device = param.device
+        self.buffers = {}
+        self.hooks = []
+        for layer in model.modules():
+            if isinstance(layer, MultiHeadAttention):
+                for linear in (layer.key, layer.value):
+                    self.buffers[linear] = param.new_zeros(
+                        num_blocks * block_size, linear.out_features
+                    )
+
+        # NOTE: Pop from the end, so the blocks are used from the head
+        self.free_blocks = list(range(num_blocks - 1, -1, -1))
+        self.block_tables: Dict[Hashable, List[int]] = {}
+        self.lengths: Dict[Hashable, int] = {}
+
+        # The indices of the current step, given by prepare()
+        self.offset = None
+        self.mask = None
+        self._write_index = None
+        self._read_index = None
+
+    @property
+    def num_free_blocks(self) -> int:
+        return len(self.free_blocks)
+
+    def blocks_needed(self, num_tokens: int) -> int:
+        """Return the number of the blocks to store num_tokens tokens."""
+        return -(-num_tokens // self.block_size)
+
+    def add(self, seq_id: Hashable):
+        if seq_id in self.block_tables:
+            raise RuntimeError(f"{seq_id} is already added")
+        self.block_tables[seq_id] = []
+        self.lengths[seq_id] = 0
+
+    def release(self, seq_id: Hashable):
+        """Return the blocks of the sequence to the pool."""
+        self.free_blocks.extend(reversed(self.block_tables.pop(seq_id)))
+        self.lengths.pop(seq_id)
+
+    def prepare(self, seq_ids: Sequence[Hashable], num_tokens: int):
+        """Prepare to forward num_tokens new tokens for each of the sequences.
+
+        The following forward writes the keys and values of the new tokens
+        to the blocks of the sequences and attends to all the cached tokens.
+        The positions of the new tokens (B,) and the mask of the cached
+        tokens (B, 1, 1, T_cache) are given as "offset" and "mask".
+        """
+        tables, lengths = [], []
+        for seq_id in seq_ids:
+            table = self.block_tables[seq_id]
+            length = self.lengths[seq_id] + num_tokens
+            while len(table) * self.block_size < length:
+                if len(self.free_blocks) == 0:
+                    raise RuntimeError("Out of the blocks of the KV cache")
+                table.append(self.free_blocks.pop())
+            self.lengths[seq_id] = length
+            tables.append(table)
+            lengths.append(length)
+
+        n_blocks = max(len(t) for t in tables)
+        tables = torch.tensor(
+            [t + [0] * (n_blocks - len(t)) for t in tables], device=self.device
+        )
+        max_length = max(lengths)
+        lengths = torch.tensor(lengths, device=self.device)
+        self.offset = lengths - num_tokens
+
+        # (B, T_cache): The slots of the buffer for each position
+        positions = torch.arange(max_length, device=self.device)
+        slots = tables[:, positions // self.block_size] * self.block_size
+        slots = slots + positions % self.block_size
+        mask = positions.unsqueeze(0) < lengths.unsqueeze(1)
+
+        new_positions = self.offset.unsqueeze(1) + torch.arange(
+            num_tokens, device=self.device
+        )
+        self._write_index = slots.gather(1, new_positions).flatten()
+        self._read_index = slots.masked_fill(~mask, 0)
+        self.mask = mask[:, None, None, :]
+
+    def _hook(self, module, _, output):
+        # output: (B, T_new, D) -> (B, T_cache, D)
+        buffer = self.buffers[module]
+        buffer[self._write_index] = output.detach().flatten(0, 1).to(buffer.dtype)
+        return buffer[self._read_index].to(output.dtype)
+
+    def __enter__(self):
+        for linear in self.buffers:
+            self.hooks.append(linear.register_forward_hook(self._hook))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for hook in self.hooks:
+            hook.remove()
+        self.hooks = []
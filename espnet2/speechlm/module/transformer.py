@@ -17,13 +17,61 @@
 # compatible Pytorch versions.
 
 
-from typing import Optional
+from typing import Dict, Optional, Union
 
 import torch
 import torch.nn.functional as F
 from torch import Tensor, nn
 
 
+class StaticKVCache:
+    """Preallocated cache of the keys and values for incremental decoding.
+
+    Unlike the cache of install_kv_cache_hook, which concatenates the new keys
+    and values to the cached ones at every step, the buffers are allocated
+    once for max_len positions and written in place. "offset" counts the
+    cached positions and is advanced by TransformerDecoder after each forward.
+
+    Examples:
+        >>> cache = StaticKVCache(max_len=prefix_emb.size(1) + maxlen)
+        >>> decoder(prefix_emb, kv_cache=cache)
+        >>> decoder(token_emb, kv_cache=cache)
+
+    Args:
+        max_len: The number of the positions to be cached
+    """
+
+    def __init__(self, max_len: int):
+        self.max_len = max_len
+        self.offset = 0
+        self.buffers: Dict[nn.Module, Tensor] = {}
+
+    def update(self, module: nn.Module, x: Tensor) -> Tensor:
+        """Write the output of the module (B, T, D) at the offset.
+
+        Returns:
+            Tensor: All the cached outputs (B, offset + T, D)
+        """
+        end = self.offset + x.size(1)
+        buffer = self.buffers.get(module)
+        if buffer is None or buffer.size(1) < end:
+            # NOTE: Grow by doubling if max_len is exceeded
+            size = (
+                max(self.max_len, end)
+                if buffer is None
+                else max(2 * buffer.size(1), end)
+            )
+            new_buffer = x.new_zeros(x.size(0), size, x.size(2))
+            if buffer is not None:
+                new_buffer[:, : self.offset] = buffer[:, : self.offset]
+            buffer = self.buffers[module] = new_buffer
+        buffer[:, self.offset : end] = x.detach()
+        return buffer[:, :end]
+
+    def reset(self):
+        self.offset = 0
+
+
 class LayerNorm(nn.LayerNorm):
     def forward(self, x: Tensor) -> Tensor:
         return super().forward(x.float()).type(x.dtype)
@@ -57,11 +105,15 @@ class MultiHeadAttention(nn.Module):
         x: Tensor,
         xa: Optional[Tensor] = None,
         mask: Optional[Tensor] = None,
-        kv_cache: Optional[dict] = None,
+        kv_cache: Optional[Union[dict, StaticKVCache]] = None,
     ):
         q = self.query(x)
 
-        if kv_cache is None or xa is None or self.key not in kv_cache:
+        if isinstance(kv_cache, StaticKVCache) and xa is None:
+            # write the new keys and values in place and attend to all the cached.
+            k = kv_cache.update(self.key, self.key(x))
+            v = kv_cache.update(self.value, self.value(x))
+        elif kv_cache is None or xa is None or self.key not in kv_cache:
             # hooks, if installed (i.e. kv_cache is not None)
             #   will prepend the cached kv tensors;
             # otherwise, perform key/value projections
@@ -81,10 +133,11 @@ class MultiHeadAttention(nn.Module):
     def qkv_attention(
         self, q: Tensor, k: Tensor, v: Tensor, mask: Optional[Tensor] = None
     ):
-        if self.causal and mask is not None:
-            raise ValueError("mask is not allowed when the attention is causal")
-
+        # NOTE: A mask is allowed for the incremental decoding with the cache,
+        #   e.g. to mask the paddings of the sequences of different lengths.
         if self.causal and q.size(1) == k.size(1):
+            if mask is not None:
+                raise ValueError("mask is not allowed when the attention is causal")
             causal = True
         else:
             causal = False
@@ -131,7 +184,7 @@ class ResidualAttentionBlock(nn.Module):
         x: Tensor,
         xa: Optional[Tensor] = None,
         mask: Optional[Tensor] = None,
-        kv_cache: Optional[dict] = None,
+        kv_cache: Optional[Union[dict, StaticKVCache]] = None,
     ):
         x = x + self.attn(self.attn_ln(x), mask=mask, kv_cache=kv_cache)
         if self.cross_attn:
@@ -162,16 +215,43 @@ class TransformerDecoder(nn.Module):
         self.causal = causal
 
     def forward(
-        self, x: Tensor, mask: torch.Tensor = None, kv_cache: Optional[dict] = None
+        self,
+        x: Tensor,
+        mask: torch.Tensor = None,
+        kv_cache: Optional[Union[dict, StaticKVCache]] = None,
+        offset: Optional[Tensor] = None,
     ):
-        if self.causal and mask is not None:
+        """Transformer decoder forward
+
+        Args:
+            x (Tensor): Input embeddings (B, T, D).
+            mask (Tensor): Attention mask, only allowed for the causal Transformer
+                to mask the cached keys when decoding one step (B, 1, 1, T_cache).
+            kv_cache (dict or StaticKVCache): Cache of the keys and values,
+                a dict given by install_kv_cache_hook or a StaticKVCache.
+            offset (LongTensor): Positions of the first frames of x (B,),
+                which differ among the sequences in continuous batching.
+                By default, inferred from the kv_cache.
+        """
+        if self.causal and mask is not None and x.size(1) > 1:
             raise ValueError("Causal Transformer dones't allow mask")
 
-        offset = next(iter(kv_cache.values())).shape[1] if kv_cache else 0
-        x = x + self.pos_emb.weight[offset : offset + x.shape[1]].unsqueeze(0)
+        length = x.size(1)
+        if offset is None:
+            if isinstance(kv_cache, StaticKVCache):
+                offset = kv_cache.offset
+            else:
+                offset = next(iter(kv_cache.values())).shape[1] if kv_cache else 0
+            x = x + self.pos_emb.weight[offset : offset + length].unsqueeze(0)
+        else:
+            positions = torch.arange(length, device=x.device)
+            x = x + self.pos_emb(offset.unsqueeze(1) + positions)
 
         for block in self.blocks:
             x = block(x, mask=mask, kv_cache=kv_cache)
 
+        if isinstance(kv_cache, StaticKVCache):
+            kv_cache.offset += length
+
         x = self.ln(x)
         return x
@@ -3,12 +3,12 @@
 # Copyright 2024 Jinchuan Tian
 #  Apache 2.0  (http://www.apache.org/licenses/LICENSE-2.0)
 
-from typing import Dict, Tuple
+from typing import Dict, Tuple, Union
 
 import torch
 
 from espnet2.speechlm.core_lm.abs_core_lm import SpeechLMInferenceOptions
-from espnet2.speechlm.module.transformer import MultiHeadAttention
+from espnet2.speechlm.module.transformer import MultiHeadAttention, StaticKVCache
 
 
 def length_mask(lengths: torch.Tensor, maxlen: int = None) -> torch.Tensor:
@@ -100,21 +100,47 @@ def install_kv_cache_hook(model, cache):
     return cache, hooks
 
 
+def init_kv_cache(model, opts: SpeechLMInferenceOptions, max_len: int):
+    """Return the KV cache for the incremental decoding and the installed hooks.
+
+    Args:
+        model: The Transformer decoder
+        opts: The inference options. The type of the cache is given by
+            opts.kv_cache_type: "static" for StaticKVCache and "concat" for
+            the cache of install_kv_cache_hook.
+        max_len: The maximum number of the positions to be cached
+    """
+    if opts.kv_cache_type == "static":
+        return StaticKVCache(max_len), []
+    elif opts.kv_cache_type == "concat":
+        return install_kv_cache_hook(model, {})
+    else:
+        raise ValueError(f"Unknown kv_cache_type: {opts.kv_cache_type}")
+
+
 def logits_to_tokens(
     logits: torch.Tensor,
     opts: SpeechLMInferenceOptions,
-    allow_eos: bool = True,
+    allow_eos: Union[bool, torch.Tensor] = True,
     nq_level: int = None,
 ):
     assert logits.dim() == 4
 
     # (1) Apply mask
     mask = opts.masks
-    if allow_eos:  # only predict eos in the first code
-        mask[..., 0, opts.eos] = False
-    if nq_level is not None:
-        mask = mask[nq_level : nq_level + 1]
-    mask = mask.unsqueeze(0).unsqueeze(0)
+    if isinstance(allow_eos, torch.Tensor):
+        # allow_eos for each example (B,), e.g. in continuous batching
+        mask = mask.unsqueeze(0).repeat(allow_eos.size(0), 1, 1)
+        mask[allow_eos, 0, opts.eos] = False
+        if nq_level is not None:
+            mask = mask[:, nq_level : nq_level + 1]
+        mask = mask.unsqueeze(1)
+    else:
+        if allow_eos:  # only predict eos in the first code
+            mask[..., 0, opts.eos] = False
+        if nq_level is not None:
+            mask = mask[nq_level : nq_level + 1]
+        mask = mask.unsqueeze(0).unsqueeze(0)
     logits = logits.masked_fill_(mask, -1e20)
 
     # (2) token selection
@@ -0,0 +1,85 @@
+"""Batched trial scoring for speaker verification."""
+
+from typing import Dict, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+from typeguard import typechecked
+
+
+@typechecked
+def build_trial_index(
+    trial_ids: Sequence[str], utt2idx: Dict[str, int], sep: str = "*"
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Map the trials to the indices of the embedding matrix.
+
+    Args:
+        trial_ids: The trials "<enroll_id><sep><test_id>"
+        utt2idx: The mapping from the utterance id to the row of the embeddings
+        sep: The separator of the enroll id and test id
+    Returns:
+        enroll_index: (n_trials,)
+        test_index: (n_trials,)
+    """
+    index = np.empty((len(trial_ids), 2), dtype=np.int64)
+    for i, trial in enumerate(trial_ids):
+        enroll, test = trial.split(sep)
+        index[i, 0] = utt2idx[enroll]
+        index[i, 1] = utt2idx[test]
+    return index[:, 0], index[:, 1]
+
+
+@torch.no_grad()
+@typechecked
+def score_trials(
+    embeddings: torch.Tensor,
+    enroll_index: Union[torch.Tensor, np.ndarray],
+    test_index: Union[torch.Tensor, np.ndarray],
+    metric: str = "euclidean",
+    batch_size: int = 65536,
+) -> torch.Tensor:
+    """Score the trials in batches from the embedding matrix.
+
+    Args:
+        embeddings: (n_utts, dim) or (n_utts, n_segments, dim)
+        enroll_index: The rows of the enrollment utterances (n_trials,)
+        test_index: The rows of the test utterances (n_trials,)
+        metric: "euclidean" or "cosine".
+            "euclidean" gives the negative euclidean distance and
+            "cosine" gives the cosine similarity,
+            averaged over all the pairs of the segments.
+        batch_size: The number of the trials scored at once
+    Returns:
+        scores: (n_trials,)
+    """
+    if metric not in ("euclidean", "cosine"):
+        raise ValueError(f"metric must be 'euclidean' or 'cosine': {metric}")
+    if batch_size < 1:
+        raise ValueError(f"batch_size must be positive: {batch_size}")
+
+    if embeddings.dim() == 2:
+        # (n_utts, dim) -> (n_utts, 1, dim)
+        embeddings = embeddings[:, None]
+    if metric == "cosine":
+        embeddings = F.normalize(embeddings, p=2, dim=-1)
+    enroll_index = torch.as_tensor(enroll_index, device=embeddings.device)
+    test_index = torch.as_tensor(test_index, device=embeddings.device)
+    if enroll_index.shape != test_index.shape:
+        raise ValueError(
+            f"Mismatched shape: {enroll_index.shape} != {test_index.shape}"
+        )
+
+    scores = []
+    for st in range(0, len(enroll_index), batch_size):
+        # (batch, n_segments, dim)
+        enroll = embeddings[enroll_index[st : st + batch_size]]
+        test = embeddings[test_index[st : st + batch_size]]
+        if metric == "euclidean":
+            score = -torch.cdist(enroll, test).mean(dim=(1, 2))
+        else:
+            score = torch.bmm(enroll, test.transpose(1, 2)).mean(dim=(1, 2))
+        scores.append(score)
+    if len(scores) == 0:
+        return embeddings.new_zeros(0)
+    return torch.cat(scores)
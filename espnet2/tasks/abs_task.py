@@ -29,8 +29,9 @@ from espnet2.iterators.category_iter_factory import CategoryIterFactory
 from espnet2.iterators.chunk_iter_factory import ChunkIterFactory
 from espnet2.iterators.multiple_iter_factory import MultipleIterFactory
 from espnet2.iterators.sequence_iter_factory import SequenceIterFactory
+from espnet2.iterators.shard_iter_factory import ShardIterFactory
 from espnet2.layers.create_adapter import create_adapter
-from espnet2.main_funcs.collect_stats import collect_stats
+from espnet2.main_funcs.collect_stats import collect_stats, merge_stats_dirs
 from espnet2.optimizers.optim_groups import configure_optimizer
 from espnet2.optimizers.sgd import SGD
 from espnet2.samplers.build_batch_sampler import BATCH_TYPES, build_batch_sampler
@@ -66,6 +67,7 @@ from espnet2.train.distributed_utils import (
 )
 from espnet2.train.iterable_dataset import (
     IterableESPnetDataset,
+    ShardIterableESPnetDataset,
     SplicedIterableESPnetDataset,
 )
 from espnet2.train.trainer import Trainer
@@ -337,14 +339,14 @@ class AbsTask(ABC):
         group.add_argument(
             "--iterator_type",
             type=str,
-            choices=["sequence", "category", "chunk", "task", "none"],
+            choices=["sequence", "category", "chunk", "task", "shard", "none"],
             default="sequence",
             help="Specify iterator type",
         )
         group.add_argument(
             "--valid_iterator_type",
             type=str,
-            choices=["sequence", "category", "chunk", "task", "none"],
+            choices=["sequence", "category", "chunk", "task", "shard", "none"],
             default=None,
             help="Specify iterator type",
         )
@@ -449,6 +451,15 @@ class AbsTask(ABC):
             type=str2bool,
             help="Enable sharded training provided by fairscale",
         )
+        group.add_argument(
+            "--dist_stop_check_interval",
+            type=int,
+            default=1,
+            help="Check whether the iterators of all processes are finished "
+            "every the number of iterations instead of every iteration. "
+            "The next batches are looked ahead to check it safely. "
+            "Not supported by the GAN and UASR trainers.",
+        )
         group.add_argument(
             "--use_deepspeed",
             default=False,
@@ -501,6 +512,15 @@ class AbsTask(ABC):
             default=False,
             help='Write the output features from the model when "collect stats" mode',
         )
+        group.add_argument(
+            "--collect_stats_num_procs",
+            type=int,
+            default=1,
+            help="The number of processes for collect stats mode. "
+            "The keys are split into the contiguous shards, "
+            "and the outputs of the shards are merged in the output_dir. "
+            "If ngpu > 0, the processes use the GPUs in turn.",
+        )
 
         group = parser.add_argument_group("Trainer related")
         group.add_argument(
@@ -594,6 +614,37 @@ class AbsTask(ABC):
             help="Just only iterating data loading without "
             "model forwarding and training",
         )
+        group.add_argument(
+            "--profile",
+            type=str2bool,
+            default=False,
+            help="Profile the stages of the training loop, e.g. data loading, "
+            "preprocessing, collation, host-to-device copy, forward and backward, "
+            "including the time spent in the DataLoader workers",
+        )
+        group.add_argument(
+            "--profile_trace_start",
+            type=int,
+            default=10,
+            help="The iteration to start recording the Chrome trace of the profile",
+        )
+        group.add_argument(
+            "--profile_trace_steps",
+            type=int,
+            default=0,
+            help="The number of iterations recorded as the Chrome trace, "
+            "which is written to <output_dir>/profile/trace_rank<rank>.json. "
+            "0 disables the trace.",
+        )
+        group.add_argument(
+            "--prefetch_batches",
+            type=int,
+            default=0,
+            help="The number of mini-batches transferred to the device in advance "
+            "by a background thread and a side cuda stream at the training phase. "
+            "0 disables the prefetching. "
+            "Not supported by the GAN and UASR trainers.",
+        )
         group.add_argument(
             "--resume",
             type=str2bool,
@@ -831,6 +882,14 @@ class AbsTask(ABC):
             choices=["descending", "ascending"],
             help="Sort mini-batches by the sample lengths",
         )
+        group.add_argument(
+            "--batch_sampler_cache_dir",
+            type=str_or_none,
+            default=None,
+            help="The directory to cache the mini-batches made by "
+            "batch_type='length' or 'numel', keyed by the hash of the shape files. "
+            "The cache is reused when restarting or resuming the training.",
+        )
         group.add_argument(
             "--multiple_iterator",
             type=str2bool,
@@ -897,6 +956,18 @@ class AbsTask(ABC):
             help="Discard samples shorter than the minimum chunk length",
         )
 
+        group = parser.add_argument_group("Shard iterator related")
+        group.add_argument(
+            "--shard_buffer_size",
+            type=int,
+            default=1000,
+            help="The number of samples in the shuffle buffer of each DataLoader "
+            "worker for --iterator_type shard. "
+            "The data files must be the index files made by espnet2.bin.write_shards"
+            ", e.g. '--train_data_path_and_name_and_type "
+            "dump/shards/train/speech.idx,speech,shard'",
+        )
+
         group = parser.add_argument_group("Dataset related")
         _data_path_and_name_and_type_help = (
             "Give three words splitted by comma. It's used for the training data. "
@@ -942,7 +1013,9 @@ class AbsTask(ABC):
             "--max_cache_size",
             type=humanfriendly.parse_size,
             default=0.0,
-            help="The maximum cache size for data loader. e.g. 10MB, 20GB.",
+            help="The maximum cache size for data loader. e.g. 10MB, 20GB. "
+            "The cache is shared by the DataLoader workers and "
+            "the least recently used samples are evicted when it's full.",
         )
         group.add_argument(
             "--max_cache_fd",
@@ -1423,39 +1496,14 @@ class AbsTask(ABC):
                 model = None
                 logging.info("Skipping collect_feats in collect_stats stage.")
 
-            collect_stats(
-                model=model,
-                train_iter=cls.build_streaming_iterator(
-                    data_path_and_name_and_type=args.train_data_path_and_name_and_type,
-                    key_file=train_key_file,
-                    batch_size=args.batch_size,
-                    dtype=args.train_dtype,
-                    num_workers=args.num_workers,
-                    allow_variable_data_keys=args.allow_variable_data_keys,
-                    ngpu=args.ngpu,
-                    preprocess_fn=cls.build_preprocess_fn(args, train=False),
-                    collate_fn=cls.build_collate_fn(args, train=False),
-                    mode="train",
-                    multi_task_dataset=args.multi_task_dataset,
-                ),
-                valid_iter=cls.build_streaming_iterator(
-                    data_path_and_name_and_type=args.valid_data_path_and_name_and_type,
-                    key_file=valid_key_file,
-                    batch_size=args.valid_batch_size,
-                    dtype=args.train_dtype,
-                    num_workers=args.num_workers,
-                    allow_variable_data_keys=args.allow_variable_data_keys,
-                    ngpu=args.ngpu,
-                    preprocess_fn=cls.build_preprocess_fn(args, train=False),
-                    collate_fn=cls.build_collate_fn(args, train=False),
-                    mode="valid",
-                    multi_task_dataset=args.multi_task_dataset,
-                ),
-                output_dir=output_dir,
-                ngpu=args.ngpu,
-                log_interval=args.log_interval,
-                write_collected_feats=args.write_collected_feats,
-            )
+            if args.collect_stats_num_procs > 1:
+                cls.collect_stats_parallel(
+                    args, model, output_dir, train_key_file, valid_key_file
+                )
+            else:
+                cls.collect_stats_worker(
+                    args, model, output_dir, train_key_file, valid_key_file
+                )
         else:
             # 6. Loads pre-trained model
             for p in args.init_param:
@@ -1738,6 +1786,12 @@ class AbsTask(ABC):
                 iter_options=iter_options,
                 mode=mode,
             )
+        elif iterator_type == "shard":
+            return cls.build_shard_iter_factory(
+                args=args,
+                iter_options=iter_options,
+                mode=mode,
+            )
         elif iterator_type == "task":
             return cls.build_task_iter_factory(
                 args=args,
@@ -1796,6 +1850,7 @@ class AbsTask(ABC):
                 torch.distributed.get_world_size() if iter_options.distributed else 1
             ),
             utt2category_file=utt2category_file,
+            cache_dir=args.batch_sampler_cache_dir,
         )
 
         batches = list(batch_sampler)
@@ -1995,6 +2050,57 @@ class AbsTask(ABC):
             discard_short_samples=args.chunk_discard_short_samples,
         )
 
+    @classmethod
+    @typechecked
+    def build_shard_iter_factory(
+        cls,
+        args: argparse.Namespace,
+        iter_options: IteratorOptions,
+        mode: str,
+    ) -> AbsIterFactory:
+        if iter_options.distributed:
+            world_size = torch.distributed.get_world_size()
+            rank = torch.distributed.get_rank()
+            if iter_options.batch_size < world_size:
+                raise RuntimeError("batch_size must be equal or more than world_size")
+            # NOTE: The shards are split across the ranks, so the numbers of
+            #   iterations can be different and the trainer stops all ranks
+            #   when the fewest iterations are finished.
+            if rank < iter_options.batch_size % world_size:
+                batch_size = iter_options.batch_size // world_size + 1
+            else:
+                batch_size = iter_options.batch_size // world_size
+        else:
+            world_size = 1
+            rank = 0
+            batch_size = iter_options.batch_size
+
+        dataset = ShardIterableESPnetDataset(
+            iter_options.data_path_and_name_and_type,
+            float_dtype=args.train_dtype,
+            preprocess=iter_options.preprocess_fn,
+            shuffle=iter_options.train,
+            buffer_size=args.shard_buffer_size,
+            seed=args.seed,
+            rank=rank,
+            world_size=world_size,
+        )
+        cls.check_task_requirements(
+            dataset, args.allow_variable_data_keys, train=iter_options.train
+        )
+        logging.info(f"[{mode}] dataset:\n{dataset}")
+        logging.info(f"[{mode}] Batch size: {batch_size}")
+
+        return ShardIterFactory(
+            dataset=dataset,
+            batch_size=batch_size,
+            num_iters_per_epoch=iter_options.num_iters_per_epoch,
+            seed=args.seed,
+            num_workers=args.num_workers,
+            collate_fn=iter_options.collate_fn,
+            pin_memory=args.ngpu > 0,
+        )
+
     @classmethod
     @typechecked
     def build_category_chunk_iter_factory(
@@ -2214,6 +2320,151 @@ class AbsTask(ABC):
             build_funcs=build_funcs, shuffle=iter_options.train, seed=args.seed
         )
 
+    @classmethod
+    @typechecked
+    def collect_stats_worker(
+        cls,
+        args: argparse.Namespace,
+        model: Optional[AbsESPnetModel],
+        output_dir: Path,
+        train_key_file: Optional[str],
+        valid_key_file: Optional[str],
+        rank: Optional[int] = None,
+    ):
+        """Run collect_stats for the keys.
+
+        If rank is given, this is invoked in a process of collect_stats_parallel.
+        """
+        ngpu = args.ngpu
+        if rank is not None:
+            logging.basicConfig(
+                level=args.log_level,
+                format=f"[{os.uname()[1].split('.')[0]}:shard{rank}]"
+                f" %(asctime)s (%(module)s:%(lineno)d) %(levelname)s: %(message)s",
+            )
+            torch.set_num_threads(
+                max(torch.get_num_threads() // args.collect_stats_num_procs, 1)
+            )
+            if ngpu > 0:
+                # NOTE: A process uses a single GPU
+                ngpu = 1
+                torch.cuda.set_device(rank % args.ngpu)
+                if model is not None:
+                    model.to(f"cuda:{rank % args.ngpu}")
+
+        collect_stats(
+            model=model,
+            train_iter=cls.build_streaming_iterator(
+                data_path_and_name_and_type=args.train_data_path_and_name_and_type,
+                key_file=train_key_file,
+                batch_size=args.batch_size,
+                dtype=args.train_dtype,
+                num_workers=args.num_workers,
+                allow_variable_data_keys=args.allow_variable_data_keys,
+                ngpu=ngpu,
+                preprocess_fn=cls.build_preprocess_fn(args, train=False),
+                collate_fn=cls.build_collate_fn(args, train=False),
+                mode="train",
+                multi_task_dataset=args.multi_task_dataset,
+            ),
+            valid_iter=cls.build_streaming_iterator(
+                data_path_and_name_and_type=args.valid_data_path_and_name_and_type,
+                key_file=valid_key_file,
+                batch_size=args.valid_batch_size,
+                dtype=args.train_dtype,
+                num_workers=args.num_workers,
+                allow_variable_data_keys=args.allow_variable_data_keys,
+                ngpu=ngpu,
+                preprocess_fn=cls.build_preprocess_fn(args, train=False),
+                collate_fn=cls.build_collate_fn(args, train=False),
+                mode="valid",
+                multi_task_dataset=args.multi_task_dataset,
+            ),
+            output_dir=output_dir,
+            ngpu=ngpu,
+            log_interval=args.log_interval,
+            write_collected_feats=args.write_collected_feats,
+        )
+
+    @classmethod
+    @typechecked
+    def collect_stats_parallel(
+        cls,
+        args: argparse.Namespace,
+        model: Optional[AbsESPnetModel],
+        output_dir: Path,
+        train_key_file: Optional[str],
+        valid_key_file: Optional[str],
+    ):
+        """Run collect_stats in the processes for the shards of the keys.
+
+        The outputs of the i-th shard are written in "output_dir/shards/i"
+        and merged into output_dir. The shard directories are kept
+        because the features of "--write_collected_feats" are stored there.
+        """
+        shard_keys = {}
+        for mode, key_file, data_path_and_name_and_type in [
+            ("train", train_key_file, args.train_data_path_and_name_and_type),
+            ("valid", valid_key_file, args.valid_data_path_and_name_and_type),
+        ]:
+            if key_file is None:
+                key_file = data_path_and_name_and_type[0][0]
+            with open(key_file, encoding="utf-8") as f:
+                shard_keys[mode] = [
+                    line.split(maxsplit=1)[0] for line in f if line.strip() != ""
+                ]
+        # NOTE: A shard must have at least one key for both train and valid
+        num_procs = min(
+            args.collect_stats_num_procs,
+            len(shard_keys["train"]),
+            len(shard_keys["valid"]),
+        )
+        shard_dirs = [output_dir / "shards" / str(i) for i in range(num_procs)]
+        shard_key_files = []
+        for shard_dir in shard_dirs:
+            shard_dir.mkdir(parents=True, exist_ok=True)
+            shard_key_files.append(
+                {mode: str(shard_dir / f"{mode}_keys") for mode in shard_keys}
+            )
+        for mode, keys in shard_keys.items():
+            # Contiguous shards keep the order of the keys in the data files,
+            # so that IterableESPnetDataset can read the files sequentially.
+            bounds = np.linspace(0, len(keys), num_procs + 1).astype(int)
+            for i, key_files in enumerate(shard_key_files):
+                with open(key_files[mode], "w", encoding="utf-8") as f:
+                    f.write("".join(k + "\n" for k in keys[bounds[i] : bounds[i + 1]]))
+
+        logging.info(f"Running collect_stats in {num_procs} processes")
+        error_files = []
+        processes = []
+        # NOTE: "fork" is not safe after CUDA is initialized
+        mp = torch.multiprocessing.get_context("spawn")
+        for i, (shard_dir, key_files) in enumerate(zip(shard_dirs, shard_key_files)):
+            tf = tempfile.NamedTemporaryFile(
+                prefix="pytorch-errorfile-", suffix=".pickle", delete=False
+            )
+            tf.close()
+            os.unlink(tf.name)
+            process = mp.Process(
+                target=cls.collect_stats_worker,
+                args=(
+                    args,
+                    model,
+                    shard_dir,
+                    key_files["train"],
+                    key_files["valid"],
+                    i,
+                ),
+                daemon=False,
+            )
+            process.start()
+            processes.append(process)
+            error_files.append(tf.name)
+        while not ProcessContext(processes, error_files).join():
+            pass
+
+        merge_stats_dirs(shard_dirs, output_dir)
+
     @classmethod
     @typechecked
     def build_streaming_iterator(
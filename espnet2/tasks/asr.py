@@ -8,70 +8,14 @@ from typeguard import typechecked
 
 from espnet2.asr.ctc import CTC
 from espnet2.asr.decoder.abs_decoder import AbsDecoder
-from espnet2.asr.decoder.hugging_face_transformers_decoder import (  # noqa: H301
-    HuggingFaceTransformersDecoder,
-)
-from espnet2.asr.decoder.mlm_decoder import MLMDecoder
-from espnet2.asr.decoder.rnn_decoder import RNNDecoder
-from espnet2.asr.decoder.s4_decoder import S4Decoder
-from espnet2.asr.decoder.transducer_decoder import TransducerDecoder
-from espnet2.asr.decoder.transformer_decoder import (
-    DynamicConvolution2DTransformerDecoder,
-    DynamicConvolutionTransformerDecoder,
-    LightweightConvolution2DTransformerDecoder,
-    LightweightConvolutionTransformerDecoder,
-    TransformerDecoder,
-)
-from espnet2.asr.decoder.whisper_decoder import OpenAIWhisperDecoder
 from espnet2.asr.encoder.abs_encoder import AbsEncoder
-from espnet2.asr.encoder.avhubert_encoder import FairseqAVHubertEncoder
-from espnet2.asr.encoder.branchformer_encoder import BranchformerEncoder
-from espnet2.asr.encoder.conformer_encoder import ConformerEncoder
-from espnet2.asr.encoder.contextual_block_conformer_encoder import (
-    ContextualBlockConformerEncoder,
-)
-from espnet2.asr.encoder.contextual_block_transformer_encoder import (
-    ContextualBlockTransformerEncoder,
-)
-from espnet2.asr.encoder.e_branchformer_encoder import EBranchformerEncoder
-from espnet2.asr.encoder.hubert_encoder import (
-    FairseqHubertEncoder,
-    FairseqHubertPretrainEncoder,
-    TorchAudioHuBERTPretrainEncoder,
-)
-from espnet2.asr.encoder.longformer_encoder import LongformerEncoder
-from espnet2.asr.encoder.multiconvformer_encoder import MultiConvConformerEncoder
-from espnet2.asr.encoder.rnn_encoder import RNNEncoder
-from espnet2.asr.encoder.transformer_encoder import TransformerEncoder
-from espnet2.asr.encoder.transformer_encoder_multispkr import (
-    TransformerEncoder as TransformerEncoderMultiSpkr,
-)
-from espnet2.asr.encoder.vgg_rnn_encoder import VGGRNNEncoder
-from espnet2.asr.encoder.wav2vec2_encoder import FairSeqWav2Vec2Encoder
-from espnet2.asr.encoder.whisper_encoder import OpenAIWhisperEncoder
 from espnet2.asr.espnet_model import ESPnetASRModel
 from espnet2.asr.frontend.abs_frontend import AbsFrontend
-from espnet2.asr.frontend.default import DefaultFrontend
-from espnet2.asr.frontend.fused import FusedFrontends
-from espnet2.asr.frontend.s3prl import S3prlFrontend
-from espnet2.asr.frontend.whisper import WhisperFrontend
-from espnet2.asr.frontend.windowing import SlidingWindow
-from espnet2.asr.maskctc_model import MaskCTCModel
-from espnet2.asr.pit_espnet_model import ESPnetASRModel as PITESPnetModel
 from espnet2.asr.postencoder.abs_postencoder import AbsPostEncoder
-from espnet2.asr.postencoder.hugging_face_transformers_postencoder import (
-    HuggingFaceTransformersPostEncoder,
-)
-from espnet2.asr.postencoder.length_adaptor_postencoder import LengthAdaptorPostEncoder
 from espnet2.asr.preencoder.abs_preencoder import AbsPreEncoder
-from espnet2.asr.preencoder.linear import LinearProjection
-from espnet2.asr.preencoder.sinc import LightweightSincConvs
 from espnet2.asr.specaug.abs_specaug import AbsSpecAug
-from espnet2.asr.specaug.specaug import SpecAug
 from espnet2.asr_transducer.joint_network import JointNetwork
 from espnet2.layers.abs_normalize import AbsNormalize
-from espnet2.layers.global_mvn import GlobalMVN
-from espnet2.layers.utterance_mvn import UtteranceMVN
 from espnet2.tasks.abs_task import AbsTask
 from espnet2.text.phoneme_tokenizer import g2p_choices
 from espnet2.torch_utils.initialize import initialize
@@ -91,11 +35,11 @@ from espnet2.utils.types import float_or_none, int_or_none, str2bool, str_or_non
 frontend_choices = ClassChoices(
     name="frontend",
     classes=dict(
-        default=DefaultFrontend,
-        sliding_window=SlidingWindow,
-        s3prl=S3prlFrontend,
-        fused=FusedFrontends,
-        whisper=WhisperFrontend,
+        default="espnet2.asr.frontend.default:DefaultFrontend",
+        sliding_window="espnet2.asr.frontend.windowing:SlidingWindow",
+        s3prl="espnet2.asr.frontend.s3prl:S3prlFrontend",
+        fused="espnet2.asr.frontend.fused:FusedFrontends",
+        whisper="espnet2.asr.frontend.whisper:WhisperFrontend",
     ),
     type_check=AbsFrontend,
     default="default",
@@ -103,7 +47,7 @@ frontend_choices = ClassChoices(
 specaug_choices = ClassChoices(
     name="specaug",
     classes=dict(
-        specaug=SpecAug,
+        specaug="espnet2.asr.specaug.specaug:SpecAug",
     ),
     type_check=AbsSpecAug,
     default=None,
@@ -112,8 +56,8 @@ specaug_choices = ClassChoices(
 normalize_choices = ClassChoices(
     "normalize",
     classes=dict(
-        global_mvn=GlobalMVN,
-        utterance_mvn=UtteranceMVN,
+        global_mvn="espnet2.layers.global_mvn:GlobalMVN",
+        utterance_mvn="espnet2.layers.utterance_mvn:UtteranceMVN",
     ),
     type_check=AbsNormalize,
     default="utterance_mvn",
@@ -122,9 +66,9 @@ normalize_choices = ClassChoices(
 model_choices = ClassChoices(
     "model",
     classes=dict(
-        espnet=ESPnetASRModel,
-        maskctc=MaskCTCModel,
-        pit_espnet=PITESPnetModel,
+        espnet="espnet2.asr.espnet_model:ESPnetASRModel",
+        maskctc="espnet2.asr.maskctc_model:MaskCTCModel",
+        pit_espnet="espnet2.asr.pit_espnet_model:ESPnetASRModel",
     ),
     type_check=AbsESPnetModel,
     default="espnet",
@@ -132,8 +76,8 @@ model_choices = ClassChoices(
 preencoder_choices = ClassChoices(
     name="preencoder",
     classes=dict(
-        sinc=LightweightSincConvs,
-        linear=LinearProjection,
+        sinc="espnet2.asr.preencoder.sinc:LightweightSincConvs",
+        linear="espnet2.asr.preencoder.linear:LinearProjection",
     ),
     type_check=AbsPreEncoder,
     default=None,
@@ -142,23 +86,39 @@ preencoder_choices = ClassChoices(
 encoder_choices = ClassChoices(
     "encoder",
     classes=dict(
-        conformer=ConformerEncoder,
-        transformer=TransformerEncoder,
-        transformer_multispkr=TransformerEncoderMultiSpkr,
-        contextual_block_transformer=ContextualBlockTransformerEncoder,
-        contextual_block_conformer=ContextualBlockConformerEncoder,
-        vgg_rnn=VGGRNNEncoder,
-        rnn=RNNEncoder,
-        wav2vec2=FairSeqWav2Vec2Encoder,
-        hubert=FairseqHubertEncoder,
-        hubert_pretrain=FairseqHubertPretrainEncoder,
-        torchaudiohubert=TorchAudioHuBERTPretrainEncoder,
-        longformer=LongformerEncoder,
-        branchformer=BranchformerEncoder,
-        whisper=OpenAIWhisperEncoder,
-        e_branchformer=EBranchformerEncoder,
-        avhubert=FairseqAVHubertEncoder,
-        multiconv_conformer=MultiConvConformerEncoder,
+        conformer="espnet2.asr.encoder.conformer_encoder:ConformerEncoder",
+        transformer="espnet2.asr.encoder.transformer_encoder:TransformerEncoder",
+        transformer_multispkr=(
+            "espnet2.asr.encoder.transformer_encoder_multispkr:TransformerEncoder"
+        ),
+        contextual_block_transformer=(
+            "espnet2.asr.encoder.contextual_block_transformer_encoder:"
+            "ContextualBlockTransformerEncoder"
+        ),
+        contextual_block_conformer=(
+            "espnet2.asr.encoder.contextual_block_conformer_encoder:"
+            "ContextualBlockConformerEncoder"
+        ),
+        vgg_rnn="espnet2.asr.encoder.vgg_rnn_encoder:VGGRNNEncoder",
+        rnn="espnet2.asr.encoder.rnn_encoder:RNNEncoder",
+        wav2vec2="espnet2.asr.encoder.wav2vec2_encoder:FairSeqWav2Vec2Encoder",
+        hubert="espnet2.asr.encoder.hubert_encoder:FairseqHubertEncoder",
+        hubert_pretrain=(
+            "espnet2.asr.encoder.hubert_encoder:FairseqHubertPretrainEncoder"
+        ),
+        torchaudiohubert=(
+            "espnet2.asr.encoder.hubert_encoder:TorchAudioHuBERTPretrainEncoder"
+        ),
+        longformer="espnet2.asr.encoder.longformer_encoder:LongformerEncoder",
+        branchformer="espnet2.asr.encoder.branchformer_encoder:BranchformerEncoder",
+        whisper="espnet2.asr.encoder.whisper_encoder:OpenAIWhisperEncoder",
+        e_branchformer=(
+            "espnet2.asr.encoder.e_branchformer_encoder:EBranchformerEncoder"
+        ),
+        avhubert="espnet2.asr.encoder.avhubert_encoder:FairseqAVHubertEncoder",
+        multiconv_conformer=(
+            "espnet2.asr.encoder.multiconvformer_encoder:MultiConvConformerEncoder"
+        ),
     ),
     type_check=AbsEncoder,
     default="rnn",
@@ -166,8 +126,14 @@ encoder_choices = ClassChoices(
 postencoder_choices = ClassChoices(
     name="postencoder",
     classes=dict(
-        hugging_face_transformers=HuggingFaceTransformersPostEncoder,
-        length_adaptor=LengthAdaptorPostEncoder,
+        hugging_face_transformers=(
+            "espnet2.asr.postencoder.hugging_face_transformers_postencoder:"
+            "HuggingFaceTransformersPostEncoder"
+        ),
+        length_adaptor=(
+            "espnet2.asr.postencoder.length_adaptor_postencoder:"
+            "LengthAdaptorPostEncoder"
+        ),
     ),
     type_check=AbsPostEncoder,
     default=None,
@@ -176,17 +142,32 @@ postencoder_choices = ClassChoices(
 decoder_choices = ClassChoices(
     "decoder",
     classes=dict(
-        transformer=TransformerDecoder,
-        lightweight_conv=LightweightConvolutionTransformerDecoder,
-        lightweight_conv2d=LightweightConvolution2DTransformerDecoder,
-        dynamic_conv=DynamicConvolutionTransformerDecoder,
-        dynamic_conv2d=DynamicConvolution2DTransformerDecoder,
-        rnn=RNNDecoder,
-        transducer=TransducerDecoder,
-        mlm=MLMDecoder,
-        whisper=OpenAIWhisperDecoder,
-        hugging_face_transformers=HuggingFaceTransformersDecoder,
-        s4=S4Decoder,
+        transformer="espnet2.asr.decoder.transformer_decoder:TransformerDecoder",
+        lightweight_conv=(
+            "espnet2.asr.decoder.transformer_decoder:"
+            "LightweightConvolutionTransformerDecoder"
+        ),
+        lightweight_conv2d=(
+            "espnet2.asr.decoder.transformer_decoder:"
+            "LightweightConvolution2DTransformerDecoder"
+        ),
+        dynamic_conv=(
+            "espnet2.asr.decoder.transformer_decoder:"
+            "DynamicConvolutionTransformerDecoder"
+        ),
+        dynamic_conv2d=(
+            "espnet2.asr.decoder.transformer_decoder:"
+            "DynamicConvolution2DTransformerDecoder"
+        ),
+        rnn="espnet2.asr.decoder.rnn_decoder:RNNDecoder",
+        transducer="espnet2.asr.decoder.transducer_decoder:TransducerDecoder",
+        mlm="espnet2.asr.decoder.mlm_decoder:MLMDecoder",
+        whisper="espnet2.asr.decoder.whisper_decoder:OpenAIWhisperDecoder",
+        hugging_face_transformers=(
+            "espnet2.asr.decoder.hugging_face_transformers_decoder:"
+            "HuggingFaceTransformersDecoder"
+        ),
+        s4="espnet2.asr.decoder.s4_decoder:S4Decoder",
     ),
     type_check=AbsDecoder,
     default=None,
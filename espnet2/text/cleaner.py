@@ -1,7 +1,6 @@
 from typing import Collection, Optional
 
 from espnet2.text import maltese_cleaner
-import tacotron_cleaner.cleaners
 from jaconv import jaconv
 from typeguard import typechecked
 
@@ -38,6 +37,13 @@ class TextCleaner:
         else:
             self.cleaner_types = list(cleaner_types)
 
+        self.tacotron_cleaner = None
+        if "tacotron" in self.cleaner_types:
+            # NOTE: Imported here since it takes time to import inflect
+            import tacotron_cleaner.cleaners
+
+            self.tacotron_cleaner = tacotron_cleaner.cleaners.custom_english_cleaners
+
         self.whisper_cleaner = None
         if BasicTextNormalizer is not None:
             for t in self.cleaner_types:
@@ -49,7 +55,7 @@ class TextCleaner:
     def __call__(self, text: str) -> str:
         for t in self.cleaner_types:
             if t == "tacotron":
-                text = tacotron_cleaner.cleaners.custom_english_cleaners(text)
+                text = self.tacotron_cleaner(text)
             elif t == "jaconv":
                 text = jaconv.normalize(text)
             elif t == "vietnamese":
@@ -4,8 +4,6 @@ import warnings
 from pathlib import Path
 from typing import Iterable, List, Optional, Union
 
-import g2p_en
-import jamo
 from packaging.version import parse as V
 from typeguard import typechecked
 
@@ -255,6 +253,8 @@ class G2p_en:
 
     def __call__(self, text) -> List[str]:
         if self.g2p is None:
+            import g2p_en
+
             self.g2p = g2p_en.G2p()
 
         phones = self.g2p(text)
@@ -329,6 +329,8 @@ class Jaso:
         self.no_space = no_space
 
     def _text_to_jaso(self, line: str) -> List[str]:
+        import jamo
+
         jasos = list(jamo.hangul_to_jamo(line))
         return jasos
 
@@ -0,0 +1,231 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Sequence, Tuple, Union
+
+import librosa
+import numpy as np
+import scipy.signal
+import soundfile
+from typeguard import typechecked
+
+
+def _load_audio(path: str, fs: Optional[int]) -> Tuple[np.ndarray, int]:
+    # -> (audio (Time, Nmic) as float32, sampling rate)
+    audio, org_fs = soundfile.read(path, dtype=np.float32, always_2d=True)
+    if fs is not None and org_fs != fs:
+        audio = librosa.resample(
+            audio.T, orig_sr=org_fs, target_sr=fs, res_type="kaiser_fast"
+        ).T
+        org_fs = fs
+    return np.ascontiguousarray(audio, dtype=np.float32), org_fs
+
+
+class AudioBank:
+    """Decoded RIRs or noises stored in a single float32 array.
+
+    The audio files listed in rir_scp or noise_scp are decoded and resampled
+    only once when the bank is built, instead of every time a sample is
+    augmented. The bank is built in the main process, so the array is shared
+    with the forked DataLoader workers without copying. If cache_dir is given,
+    the array is saved there and memory-mapped, so that it is shared by all
+    processes and reused by the later runs.
+
+    Examples:
+        >>> bank = AudioBank(["rir1.wav", "rir2.wav"], fs=16000)
+        >>> rir = bank[1]  # (Time, Nmic)
+        >>> noise = bank.segment(0, 16000)  # 1 second of the noise
+
+    Args:
+        paths: The audio file paths
+        fs: If given, all audios are resampled to this sampling rate
+        cache_dir: The directory to save the decoded audios
+        num_workers: The number of threads to decode the files
+    """
+
+    @typechecked
+    def __init__(
+        self,
+        paths: Sequence[str],
+        fs: Optional[int] = None,
+        cache_dir: Optional[Union[Path, str]] = None,
+        num_workers: int = 4,
+    ):
+        self.paths = list(paths)
+        self.fs = fs
+        digest = self._digest() if cache_dir is not None else None
+        if digest is None or not self._load_cache(Path(cache_dir), digest):
+            self._build(num_workers)
+            if digest is not None:
+                self._save_cache(Path(cache_dir), digest)
+                self._load_cache(Path(cache_dir), digest)
+
+    def _digest(self) -> str:
+        # The cache is invalidated if the files are modified
+        h = hashlib.sha256(repr(self.fs).encode())
+        for p in self.paths:
+            st = os.stat(p)
+            h.update(f"\0{p}\0{st.st_size}\0{st.st_mtime_ns}".encode())
+        return h.hexdigest()
+
+    def _build(self, num_workers: int):
+        with ThreadPoolExecutor(max(num_workers, 1)) as executor:
+            loaded = list(executor.map(lambda p: _load_audio(p, self.fs), self.paths))
+
+        self.num_frames = np.array([a.shape[0] for a, _ in loaded], dtype=np.int64)
+        self.num_channels = np.array([a.shape[1] for a, _ in loaded], dtype=np.int64)
+        self.sample_rates = np.array([sr for _, sr in loaded], dtype=np.int64)
+        self.offsets = np.zeros(len(loaded) + 1, dtype=np.int64)
+        np.cumsum(self.num_frames * self.num_channels, out=self.offsets[1:])
+        self.data = np.empty(self.offsets[-1], dtype=np.float32)
+        for i, (audio, _) in enumerate(loaded):
+            self.data[self.offsets[i] : self.offsets[i + 1]] = audio.reshape(-1)
+
+    def _save_cache(self, cache_dir: Path, digest: str):
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to temporary files and rename them,
+        # since the other processes may read the same cache
+        suffix = f"{os.getpid()}.tmp"
+        np.save(cache_dir / f"{digest}.data.{suffix}.npy", self.data)
+        np.savez(
+            cache_dir / f"{digest}.meta.{suffix}.npz",
+            num_frames=self.num_frames,
+            num_channels=self.num_channels,
+            sample_rates=self.sample_rates,
+            offsets=self.offsets,
+        )
+        os.replace(
+            cache_dir / f"{digest}.data.{suffix}.npy", cache_dir / f"{digest}.data.npy"
+        )
+        os.replace(
+            cache_dir / f"{digest}.meta.{suffix}.npz", cache_dir / f"{digest}.meta.npz"
+        )
+
+    def _load_cache(self, cache_dir: Path, digest: str) -> bool:
+        data_path = cache_dir / f"{digest}.data.npy"
+        meta_path = cache_dir / f"{digest}.meta.npz"
+        if not data_path.exists() or not meta_path.exists():
+            return False
+        try:
+            with np.load(meta_path) as meta:
+                self.num_frames = meta["num_frames"]
+                self.num_channels = meta["num_channels"]
+                self.sample_rates = meta["sample_rates"]
+                self.offsets = meta["offsets"]
+            self.data = np.load(data_path, mmap_mode="r")
+        except Exception as e:
+            logging.warning(f"Failed to load the cache of audios {data_path}: {e}")
+            return False
+        return len(self.data) == self.offsets[-1]
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        """Return the i-th audio (Time, Nmic) as a read-only view."""
+        audio = self.data[self.offsets[i] : self.offsets[i + 1]].reshape(
+            int(self.num_frames[i]), int(self.num_channels[i])
+        )
+        if audio.flags.writeable:
+            audio = audio.view()
+            audio.flags.writeable = False
+        return audio
+
+    def get(self, i: int, fs: Optional[int] = None) -> np.ndarray:
+        """Return the i-th audio (Time, Nmic) at the sampling rate fs.
+
+        A view is returned if the audio has the sampling rate already,
+        otherwise it is resampled.
+        """
+        audio = self[i]
+        org_fs = int(self.sample_rates[i])
+        if fs and org_fs != fs:
+            logging.warning(
+                f"Resampling {self.paths[i]} to match the sampling rate "
+                f"({org_fs} -> {fs} Hz). Give fs to AudioBank to avoid this."
+            )
+            audio = librosa.resample(
+                np.asarray(audio).T,
+                orig_sr=org_fs,
+                target_sr=fs,
+                res_type="kaiser_fast",
+            ).T
+        return audio
+
+    def segment(
+        self,
+        i: int,
+        nsamples: int,
+        fs: Optional[int] = None,
+        short_thres: float = 0.0,
+    ) -> np.ndarray:
+        """Return a random segment (nsamples, Nmic) of the i-th audio.
+
+        The segment is a view of the bank if the audio is longer than nsamples.
+        Otherwise, the audio is repeated from a random offset.
+        """
+        audio = self.get(i, fs)
+        frames = audio.shape[0]
+        if frames > nsamples:
+            offset = np.random.randint(0, frames - nsamples)
+            return audio[offset : offset + nsamples]
+        elif frames == nsamples:
+            return audio
+        if frames / nsamples < short_thres:
+            logging.warning(
+                f"Noise ({frames}) is much shorter than "
+                f"speech ({nsamples}) in dynamic mixing"
+            )
+        offset = np.random.randint(0, nsamples - frames)
+        return np.pad(
+            audio, [(offset, nsamples - frames - offset), (0, 0)], mode="wrap"
+        )
+
+
+@typechecked
+def load_audio_bank(
+    scp: Union[str, Sequence[str]],
+    fs: Optional[int] = None,
+    cache_dir: Optional[Union[Path, str]] = None,
+) -> AudioBank:
+    """Build AudioBank from the scp files.
+
+    Each line of the scp file is "<uttid> <path>" or "<path>".
+    """
+    scp = [scp] if isinstance(scp, str) else scp
+    paths = []
+    for s in scp:
+        with open(s, "r", encoding="utf-8") as f:
+            for line in f:
+                sps = line.strip().split(None, 1)
+                if len(sps) == 1:
+                    paths.append(sps[0])
+                elif len(sps) == 2:
+                    paths.append(sps[1])
+    return AudioBank(paths, fs=fs, cache_dir=cache_dir)
+
+
+def convolve_rir(speech: np.ndarray, rir: np.ndarray) -> np.ndarray:
+    """Convolve the speech with the RIR of each channel at once.
+
+    Args:
+        speech: (1, Time)
+        rir: (Nmic, Time2)
+    Returns:
+        The reverberant speech (Nmic, Time) truncated to the speech length
+    """
+    dtype = np.result_type(speech.dtype, rir.dtype)
+    if rir.shape[1] * 8 < speech.shape[1]:
+        # Overlap-add is faster for the RIRs much shorter than the speech
+        out = scipy.signal.oaconvolve(speech, rir, mode="full", axes=1)
+    else:
+        out = scipy.signal.fftconvolve(speech, rir, mode="full", axes=1)
+    return out[:, : speech.shape[1]].astype(dtype, copy=False)
+
+
+def pick_channel(audio: np.ndarray) -> np.ndarray:
+    """Pick a random channel of the audio (Time, Nmic) as a view."""
+    ch = np.random.randint(audio.shape[1])
+    return audio[:, ch : ch + 1]
@@ -1,9 +1,10 @@
-from typing import Mapping, Optional, Tuple, Type
+from typing import Mapping, Optional, Tuple, Type, Union
 
 from typeguard import typechecked
 
 from espnet2.utils.nested_dict_action import NestedDictAction
 from espnet2.utils.types import str_or_none
+from espnet.utils.dynamic_import import dynamic_import
 
 
 class ClassChoices:
@@ -27,13 +28,21 @@ class ClassChoices:
     >>> class_obj = choices.get_class(args.var)
     >>> a_object = class_obj(**args.var_conf)
 
+    A class can be also given as the import path "module_name:class_name",
+    which is imported only when the class is selected by get_class().
+    It avoids importing all the candidates, e.g. at the startup of the CLI.
+
+    >>> choices = ClassChoices(
+    ...     "var", dict(a=A, c="espnet2.layers.global_mvn:GlobalMVN"), default="a"
+    ... )
+
     """
 
     @typechecked
     def __init__(
         self,
         name: str,
-        classes: Mapping[str, Type],
+        classes: Mapping[str, Union[Type, str]],
         type_check: Optional[Type] = None,
         default: Optional[str] = None,
         optional: bool = False,
@@ -45,8 +54,9 @@ class ClassChoices:
             raise ValueError('"none", "nil", and "null" are reserved.')
         if type_check is not None:
             for v in self.classes.values():
-                if not issubclass(v, type_check):
-                    raise ValueError(f"must be {type_check.__name__}, but got {v}")
+                # NOTE: The lazy import paths are checked when imported
+                if not isinstance(v, str):
+                    self._check_type(v)
 
         self.optional = optional
         self.default = default
@@ -62,10 +72,14 @@ class ClassChoices:
 
     @typechecked
     def get_class(self, name: Optional[str]) -> Optional[type]:
-        if name is None or (self.optional and name.lower() == ("none", "null", "nil")):
+        if name is None or (self.optional and name.lower() in ("none", "null", "nil")):
             retval = None
         elif name.lower() in self.classes:
-            class_obj = self.classes[name]
+            class_obj = self.classes[name.lower()]
+            if isinstance(class_obj, str):
+                class_obj = dynamic_import(class_obj)
+                self._check_type(class_obj)
+                self.classes[name.lower()] = class_obj
             retval = class_obj
         else:
             raise ValueError(
@@ -75,6 +89,10 @@ class ClassChoices:
 
         return retval
 
+    def _check_type(self, class_obj: type):
+        if self.base_type is not None and not issubclass(class_obj, self.base_type):
+            raise ValueError(f"must be {self.base_type.__name__}, but got {class_obj}")
+
     def add_arguments(self, parser):
         parser.add_argument(
             f"--{self.name}",
@@ -5,6 +5,7 @@ import numpy as np
 import torch
 from typeguard import typechecked
 
+from espnet2.train.profiler import measure_stage
 from espnet.nets.pytorch_backend.nets_utils import pad_list
 
 
@@ -203,37 +204,38 @@ def common_collate_fn(
         that of the dataset as they are.
 
     """
-    uttids = [u for u, _ in data]
-    data = [d for _, d in data]
-
-    assert all(set(data[0]) == set(d) for d in data), "dict-keys mismatching"
-    assert all(
-        not k.endswith("_lengths") for k in data[0]
-    ), f"*_lengths is reserved: {list(data[0])}"
-
-    output = {}
-    for key in data[0]:
-        # NOTE(kamo):
-        # Each models, which accepts these values finally, are responsible
-        # to repaint the pad_value to the desired value for each tasks.
-        if data[0][key].dtype.kind == "i":
-            pad_value = int_pad_value
-        else:
-            pad_value = float_pad_value
-
-        array_list = [d[key] for d in data]
-
-        # Assume the first axis is length:
-        # tensor_list: Batch x (Length, ...)
-        tensor_list = [torch.from_numpy(a) for a in array_list]
-        # tensor: (Batch, Length, ...)
-        tensor = pad_list(tensor_list, pad_value)
-        output[key] = tensor
-
-        # lens: (Batch,)
-        if key not in not_sequence:
-            lens = torch.tensor([d[key].shape[0] for d in data], dtype=torch.long)
-            output[key + "_lengths"] = lens
-
-    output = (uttids, output)
-    return output
+    with measure_stage("collate_time"):
+        uttids = [u for u, _ in data]
+        data = [d for _, d in data]
+
+        assert all(set(data[0]) == set(d) for d in data), "dict-keys mismatching"
+        assert all(
+            not k.endswith("_lengths") for k in data[0]
+        ), f"*_lengths is reserved: {list(data[0])}"
+
+        output = {}
+        for key in data[0]:
+            # NOTE(kamo):
+            # Each models, which accepts these values finally, are responsible
+            # to repaint the pad_value to the desired value for each tasks.
+            if data[0][key].dtype.kind == "i":
+                pad_value = int_pad_value
+            else:
+                pad_value = float_pad_value
+
+            array_list = [d[key] for d in data]
+
+            # Assume the first axis is length:
+            # tensor_list: Batch x (Length, ...)
+            tensor_list = [torch.from_numpy(a) for a in array_list]
+            # tensor: (Batch, Length, ...)
+            tensor = pad_list(tensor_list, pad_value)
+            output[key] = tensor
+
+            # lens: (Batch,)
+            if key not in not_sequence:
+                lens = torch.tensor([d[key].shape[0] for d in data], dtype=torch.long)
+                output[key + "_lengths"] = lens
+
+        output = (uttids, output)
+        return output
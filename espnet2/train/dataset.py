@@ -28,6 +28,8 @@ import torch
 from torch.utils.data.dataset import Dataset
 from typeguard import typechecked
 
+from espnet2.fileio.key_index import KeyIndex
+from espnet2.fileio.manifest import ManifestReader
 from espnet2.fileio.multi_sound_scp import MultiSoundScpReader
 from espnet2.fileio.npy_scp import NpyScpReader
 from espnet2.fileio.rand_gen_dataset import (
@@ -37,12 +39,15 @@ from espnet2.fileio.rand_gen_dataset import (
 from espnet2.fileio.read_text import (
     RandomTextReader,
     load_num_sequence_text,
-    read_2columns_text,
+    read_2columns_text_compact,
     read_label,
 )
 from espnet2.fileio.rttm import RttmReader
 from espnet2.fileio.score_scp import SingingScoreReader
+from espnet2.fileio.shard import ShardReader
 from espnet2.fileio.sound_scp import SoundScpReader
+from espnet2.train.profiler import measure_stage
+from espnet2.train.sample_cache import SharedSampleCache
 from espnet2.utils.sized_dict import SizedDict
 
 
@@ -57,6 +62,7 @@ class AdapterForSoundScpReader(collections.abc.Mapping):
         self.dtype = dtype
         self.rate = None
         self.allow_multi_rates = allow_multi_rates
+        self.key_index = getattr(loader, "key_index", None)
 
     def keys(self):
         return self.loader.keys()
@@ -181,7 +187,13 @@ class AdapterForLabelScpReader(collections.abc.Mapping):
         return sample_time, sample_label
 
 
-def sound_loader(path, float_dtype=None, multi_columns=False, allow_multi_rates=False):
+def sound_loader(
+    path,
+    float_dtype=None,
+    multi_columns=False,
+    allow_multi_rates=False,
+    key_index=None,
+):
     # The file is as follows:
     #   utterance_id_A /some/where/a.wav
     #   utterance_id_B /some/where/a.flac
@@ -190,7 +202,13 @@ def sound_loader(path, float_dtype=None, multi_columns=False, allow_multi_rates=
     # like Kaldi e.g. "cat a.wav |".
     # NOTE(kamo): The audio signal is normalized to [-1,1] range.
     loader = SoundScpReader(
-        path, always_2d=False, dtype=float_dtype, multi_columns=multi_columns
+        path,
+        always_2d=False,
+        dtype=float_dtype,
+        multi_columns=multi_columns,
+        # The paths are stored as offset arrays to save memory
+        compact=not multi_columns,
+        key_index=key_index,
     )
 
     # SoundScpReader.__getitem__() returns Tuple[int, ndarray],
@@ -216,6 +234,32 @@ def variable_columns_sound_loader(path, float_dtype=None, allow_multi_rates=Fals
     return AdapterForSoundScpReader(loader, allow_multi_rates=allow_multi_rates)
 
 
+def npy_loader(path, key_index=None):
+    return NpyScpReader(path, compact=True, key_index=key_index)
+
+
+def manifest_loader(path, float_dtype=None, allow_multi_rates=False):
+    # The binary manifest made by espnet2.bin.convert_manifest
+    data_type = ManifestReader(path).data_type
+    if data_type == "sound":
+        return sound_loader(path, float_dtype, allow_multi_rates=allow_multi_rates)
+    elif data_type == "npy":
+        return npy_loader(path)
+    else:
+        # e.g. "text" -> str, "text_int" -> int32 ndarray
+        return ManifestReader(path)
+
+
+def shard_loader(path, float_dtype=None, allow_multi_rates=False):
+    # The index of the shards made by espnet2.bin.write_shards
+    reader = ShardReader(path, dtype=float_dtype)
+    if reader.is_audio:
+        return AdapterForSoundScpReader(reader, allow_multi_rates=allow_multi_rates)
+    else:
+        # "npy" -> ndarray, "txt" -> str
+        return reader
+
+
 def score_loader(path):
     loader = SingingScoreReader(fname=path)
     return AdapterForSingingScoreScpReader(loader)
@@ -247,7 +291,7 @@ def rand_int_loader(filepath, loader_type):
 DATA_TYPES = {
     "sound": dict(
         func=sound_loader,
-        kwargs=["float_dtype", "allow_multi_rates"],
+        kwargs=["float_dtype", "allow_multi_rates", "key_index"],
         help="Audio format types which supported by sndfile wav, flac, etc."
         "\n\n"
         "   utterance_id_a a.wav\n"
@@ -308,14 +352,37 @@ DATA_TYPES = {
         "   ...",
     ),
     "npy": dict(
-        func=NpyScpReader,
-        kwargs=[],
+        func=npy_loader,
+        kwargs=["key_index"],
         help="Npy file format."
         "\n\n"
         "   utterance_id_A /some/where/a.npy\n"
         "   utterance_id_B /some/where/b.npy\n"
         "   ...",
     ),
+    "manifest": dict(
+        func=manifest_loader,
+        kwargs=["float_dtype", "allow_multi_rates"],
+        help="A binary manifest converted from wav.scp, npy scp, text, "
+        "text_int, csv_int, text_float or csv_float file by "
+        "espnet2.bin.convert_manifest. "
+        "It's memory-mapped, so the loading is fast and "
+        "the memory is shared by all DataLoader workers."
+        "\n\n"
+        "   python -m espnet2.bin.convert_manifest --input wav.scp "
+        "--output wav.mf --data_type sound",
+    ),
+    "shard": dict(
+        func=shard_loader,
+        kwargs=["float_dtype", "allow_multi_rates"],
+        help="The index of a data in the packed shards made by "
+        "espnet2.bin.write_shards. The members are loaded by random access, "
+        "use ShardIterableESPnetDataset to read the shards sequentially."
+        "\n\n"
+        "   utterance_id_A dump/shards/train/shard-000000.tar:512:32044:flac\n"
+        "   utterance_id_B dump/shards/train/shard-000000.tar:33280:10240:flac\n"
+        "   ...",
+    ),
     "text_int": dict(
         func=functools.partial(load_num_sequence_text, loader_type="text_int"),
         kwargs=[],
@@ -357,8 +424,8 @@ DATA_TYPES = {
         "   ...",
     ),
     "text": dict(
-        func=read_2columns_text,
-        kwargs=[],
+        func=read_2columns_text_compact,
+        kwargs=["key_index"],
         help="Return text as is. The text must be converted to ndarray "
         "by 'preprocess'."
         "\n\n"
@@ -474,11 +541,16 @@ class ESPnetDataset(AbsDataset):
 
         self.loader_dict = {}
         self.debug_info = {}
+        # The compact index of the utterance ids, which is shared by the loaders
+        # having the same keys, e.g. "sound", "npy" and "text"
+        self.shared_key_index = None
         for path, name, _type in path_name_type_list:
             if name in self.loader_dict:
                 raise RuntimeError(f'"{name}" is duplicated for data-key')
 
             loader = self._build_loader(path, _type)
+            if self.shared_key_index is None:
+                self.shared_key_index = getattr(loader, "key_index", None)
             self.loader_dict[name] = loader
             self.debug_info[name] = path, _type
             if len(self.loader_dict[name]) == 0:
@@ -486,11 +558,21 @@ class ESPnetDataset(AbsDataset):
 
             # TODO(kamo): Should check consistency of each utt-keys?
 
+        # The index for the integer uids, which must be in the order of the first
+        # loader. If the first loader doesn't have it, it's built at the first
+        # access with an integer uid.
+        self.key_index = getattr(
+            next(iter(self.loader_dict.values())), "key_index", None
+        )
+
         if isinstance(max_cache_size, str):
             max_cache_size = humanfriendly.parse_size(max_cache_size)
         self.max_cache_size = max_cache_size
-        if max_cache_size > 0:
+        if max_cache_size == np.inf:
+            # e.g. For plot_att mode, which caches only a few samples
             self.cache = SizedDict(shared=True)
+        elif max_cache_size > 0:
+            self.cache = SharedSampleCache(int(max_cache_size))
         else:
             self.cache = None
 
@@ -519,6 +601,8 @@ class ESPnetDataset(AbsDataset):
                         kwargs["max_cache_fd"] = self.max_cache_fd
                     elif key2 == "allow_multi_rates":
                         kwargs["allow_multi_rates"] = self.allow_multi_rates
+                    elif key2 == "key_index":
+                        kwargs["key_index"] = self.shared_key_index
                     else:
                         raise RuntimeError(f"Not implemented keyword argument: {key2}")
 
@@ -557,42 +641,45 @@ class ESPnetDataset(AbsDataset):
 
         # Change integer-id to string-id
         if isinstance(uid, int):
-            d = next(iter(self.loader_dict.values()))
-            uid = list(d)[uid]
+            if self.key_index is None:
+                self.key_index = KeyIndex(next(iter(self.loader_dict.values())))
+            uid = self.key_index[uid]
 
-        if self.cache is not None and uid in self.cache:
-            data = self.cache[uid]
-            return uid, data
+        if self.cache is not None:
+            data = self.cache.get(uid)
+            if data is not None:
+                return uid, data
 
         data = {}
         # 1. Load data from each loaders
-        for name, loader in self.loader_dict.items():
-            try:
-                value = loader[uid]
-                if isinstance(value, (list)):
-                    value = np.array(value)
-                if not isinstance(
-                    value, (np.ndarray, torch.Tensor, str, numbers.Number, tuple)
-                ):
-                    raise TypeError(
-                        (
-                            "Must be ndarray, torch.Tensor, "
-                            "str,  Number or tuple: {}".format(type(value))
+        with measure_stage("load_time"):
+            for name, loader in self.loader_dict.items():
+                try:
+                    value = loader[uid]
+                    if isinstance(value, (list)):
+                        value = np.array(value)
+                    if not isinstance(
+                        value, (np.ndarray, torch.Tensor, str, numbers.Number, tuple)
+                    ):
+                        raise TypeError(
+                            (
+                                "Must be ndarray, torch.Tensor, "
+                                "str,  Number or tuple: {}".format(type(value))
+                            )
                         )
+                except Exception:
+                    path, _type = self.debug_info[name]
+                    logging.error(
+                        f"Error happened with path={path}, type={_type}, id={uid}"
                     )
-            except Exception:
-                path, _type = self.debug_info[name]
-                logging.error(
-                    f"Error happened with path={path}, type={_type}, id={uid}"
-                )
-                raise
+                    raise
 
-            # torch.Tensor is converted to ndarray
-            if isinstance(value, torch.Tensor):
-                value = value.numpy()
-            elif isinstance(value, numbers.Number):
-                value = np.array([value])
-            data[name] = value
+                # torch.Tensor is converted to ndarray
+                if isinstance(value, torch.Tensor):
+                    value = value.numpy()
+                elif isinstance(value, numbers.Number):
+                    value = np.array([value])
+                data[name] = value
 
         # 2. [Option] Apply preprocessing
         if getattr(self, "install_speaker_prompt", None) is not None:
@@ -600,7 +687,8 @@ class ESPnetDataset(AbsDataset):
         #   e.g. espnet2.train.preprocessor:CommonPreprocessor
         if self.preprocess is not None:
             key_prefix = self.task + " " if hasattr(self, "task") else ""
-            data = self.preprocess(key_prefix + uid, data)
+            with measure_stage("preprocess_time"):
+                data = self.preprocess(key_prefix + uid, data)
 
         # 3. Force data-precision
         for name in data:
@@ -620,7 +708,8 @@ class ESPnetDataset(AbsDataset):
                 raise NotImplementedError(f"Not supported dtype: {value.dtype}")
             data[name] = value
 
-        if self.cache is not None and self.cache.size < self.max_cache_size:
+        if self.cache is not None:
+            # NOTE: SharedSampleCache evicts old samples if it's full
             self.cache[uid] = data
 
         retval = uid, data
@@ -119,6 +119,15 @@ class GANTrainer(Trainer):
             raise NotImplementedError(
                 "grad_noise is not supported in GAN-based training."
             )
+        if options.prefetch_batches > 0:
+            raise NotImplementedError(
+                "prefetch_batches > 0 is not supported in GAN-based training."
+            )
+        if distributed and options.dist_stop_check_interval > 1:
+            raise NotImplementedError(
+                "dist_stop_check_interval > 1 is not supported "
+                "in GAN-based training."
+            )
 
         if log_interval is None:
             try:
@@ -13,7 +13,16 @@ import torch
 from torch.utils.data.dataset import IterableDataset
 from typeguard import typechecked
 
+from espnet2.fileio.shard import (
+    INDEX_SUFFIX,
+    SHARD_LIST,
+    decode_member,
+    iter_shard,
+    load_shard_member,
+    read_shard_list,
+)
 from espnet2.train.dataset import ESPnetDataset
+from espnet2.train.profiler import measure_stage
 
 
 def load_kaldi(input):
@@ -39,6 +48,14 @@ def load_kaldi(input):
     return array
 
 
+def load_shard(input):
+    retval = load_shard_member(input)
+    if isinstance(retval, tuple):
+        # Audio case: (rate, array)
+        retval = retval[1]
+    return retval
+
+
 DATA_TYPES = {
     "sound": lambda x: soundfile.read(x)[0],
     "multi_columns_sound": lambda x: np.concatenate(
@@ -62,6 +79,7 @@ DATA_TYPES = {
         StringIO(x), ndmin=1, dtype=np.float32, delimiter=","
     ),
     "text": lambda x: x,
+    "shard": load_shard,
 }
 
 
@@ -221,33 +239,188 @@ class IterableESPnetDataset(IterableDataset):
                 _, from_non_iterable = self.non_iterable_dataset[uid]
                 data.update(from_non_iterable)
 
-            # 3. [Option] Apply preprocessing
-            #   e.g. espnet2.train.preprocessor:CommonPreprocessor
-            if self.preprocess is not None:
+            yield uid, self._postprocess(uid, data)
+
+        if count == 0:
+            raise RuntimeError("No iteration")
+
+    def _postprocess(self, uid: str, data: Dict) -> Dict[str, np.ndarray]:
+        # 3. [Option] Apply preprocessing
+        #   e.g. espnet2.train.preprocessor:CommonPreprocessor
+        if self.preprocess is not None:
+            with measure_stage("preprocess_time"):
                 data = self.preprocess(self.preprocess_prefix + uid, data)
 
-            # 4. Force data-precision
-            for name in data:
-                value = data[name]
-                if not isinstance(value, np.ndarray):
-                    raise RuntimeError(
-                        f"All values must be converted to np.ndarray object "
-                        f'by preprocessing, but "{name}" is still {type(value)}.'
-                    )
+        # 4. Force data-precision
+        for name in data:
+            value = data[name]
+            if not isinstance(value, np.ndarray):
+                raise RuntimeError(
+                    f"All values must be converted to np.ndarray object "
+                    f'by preprocessing, but "{name}" is still {type(value)}.'
+                )
 
-                # Cast to desired type
-                if value.dtype.kind == "f":
-                    value = value.astype(self.float_dtype)
-                elif value.dtype.kind == "i":
-                    value = value.astype(self.int_dtype)
-                else:
-                    raise NotImplementedError(f"Not supported dtype: {value.dtype}")
-                data[name] = value
+            # Cast to desired type
+            if value.dtype.kind == "f":
+                value = value.astype(self.float_dtype)
+            elif value.dtype.kind == "i":
+                value = value.astype(self.int_dtype)
+            else:
+                raise NotImplementedError(f"Not supported dtype: {value.dtype}")
+            data[name] = value
+        return data
 
-            yield uid, data
 
-        if count == 0:
-            raise RuntimeError("No iteration")
+class ShardIterableESPnetDataset(IterableESPnetDataset):
+    """Iterable dataset reading the shards made by espnet2.bin.write_shards.
+
+    The shards are read sequentially instead of opening a file for each sample.
+    They are split across the ranks and the DataLoader workers,
+    and the samples are shuffled by the order of the shards and
+    a shuffle buffer if shuffle=True.
+
+    Examples:
+        >>> dataset = ShardIterableESPnetDataset(
+        ...     [('dump/shards/train/speech.idx', 'speech', 'shard'),
+        ...      ('dump/shards/train/text.idx', 'text', 'shard')],
+        ...     shuffle=True,
+        ... )
+        >>> dataset.set_epoch(1)
+        >>> for uid, data in dataset:
+        ...     data
+        {'speech': per_utt_array, 'text': per_utt_array}
+
+    Args:
+        path_name_type_list: The triplets of the index file of the shards,
+            the data name and "shard". All index files must be in the same
+            directory as "shards.list".
+        shuffle: If True, shuffle the shards and the samples
+        buffer_size: The size of the shuffle buffer
+        seed: The random seed for shuffling. "seed + epoch" is used.
+        rank: The rank of this process for distributed training
+        world_size: The number of processes for distributed training
+    """
+
+    @typechecked
+    def __init__(
+        self,
+        path_name_type_list: Collection[Tuple[str, str, str]],
+        preprocess: Optional[
+            Callable[[str, Dict[str, np.ndarray]], Dict[str, np.ndarray]]
+        ] = None,
+        float_dtype: str = "float32",
+        int_dtype: str = "long",
+        shuffle: bool = False,
+        buffer_size: int = 1000,
+        seed: int = 0,
+        rank: int = 0,
+        world_size: int = 1,
+        preprocess_prefix: Optional[str] = None,
+    ):
+        if len(path_name_type_list) == 0:
+            raise ValueError(
+                '1 or more elements are required for "path_name_type_list"'
+            )
+        self.preprocess = preprocess
+        self.float_dtype = float_dtype
+        self.int_dtype = int_dtype
+        self.key_file = None
+        self.preprocess_prefix = (
+            preprocess_prefix if preprocess_prefix is not None else ""
+        )
+        self.shuffle = shuffle
+        self.buffer_size = buffer_size
+        self.seed = seed
+        self.rank = rank
+        self.world_size = world_size
+        self.epoch = 0
+
+        self.debug_info = {}
+        # The name of the data in the shards -> the name of the data
+        self.member_names = {}
+        shard_dirs = set()
+        for path, name, _type in path_name_type_list:
+            if name in self.debug_info:
+                raise RuntimeError(f'"{name}" is duplicated for data-key')
+            if _type != "shard" or not path.endswith(INDEX_SUFFIX):
+                raise RuntimeError(
+                    f"The index file of the shards is required: {path},{name},{_type}"
+                )
+            self.debug_info[name] = path, _type
+            self.member_names[Path(path).name[: -len(INDEX_SUFFIX)]] = name
+            shard_dirs.add(Path(path).parent)
+        if len(shard_dirs) != 1:
+            raise RuntimeError("The index files must be in the same directory")
+
+        self.path_name_type_list = []
+        self.non_iterable_dataset = None
+        self.apply_utt2category = False
+        self.shards = read_shard_list(shard_dirs.pop() / SHARD_LIST)
+
+    def set_epoch(self, epoch: int):
+        """Set the epoch to change the order of shuffling."""
+        self.epoch = epoch
+
+    def _assigned_shards(self) -> Tuple[List[str], int, int]:
+        # -> (the shards to read, the number of consumers, the consumer id)
+        worker_info = torch.utils.data.get_worker_info()
+        num_workers = 1 if worker_info is None else worker_info.num_workers
+        worker_id = 0 if worker_info is None else worker_info.id
+        num_consumers = self.world_size * num_workers
+        consumer_id = self.rank * num_workers + worker_id
+
+        shards = [path for path, _ in self.shards]
+        if self.shuffle:
+            # NOTE: The same order for all ranks, so the split shards don't overlap
+            np.random.RandomState(self.seed + self.epoch).shuffle(shards)
+
+        if len(shards) >= num_consumers:
+            return shards[consumer_id::num_consumers], 1, 0
+        else:
+            # Too few shards: All of them are read and the samples are split
+            return shards, num_consumers, consumer_id
+
+    def _iter_samples(self) -> Iterator[Tuple[str, Dict[str, Tuple[str, bytes]]]]:
+        shards, num_consumers, consumer_id = self._assigned_shards()
+        count = 0
+        for shard in shards:
+            for uid, members in iter_shard(shard):
+                count += 1
+                if (count - 1) % num_consumers == consumer_id:
+                    yield uid, members
+
+    def _shuffle_buffer(self, samples: Iterator) -> Iterator:
+        worker_info = torch.utils.data.get_worker_info()
+        worker_id = 0 if worker_info is None else worker_info.id
+        state = np.random.RandomState([self.seed + self.epoch, self.rank, worker_id])
+        buffer = []
+        for sample in samples:
+            if len(buffer) < self.buffer_size:
+                buffer.append(sample)
+                continue
+            i = state.randint(len(buffer))
+            yield buffer[i]
+            buffer[i] = sample
+        state.shuffle(buffer)
+        yield from buffer
+
+    def __iter__(self) -> Iterator[Tuple[str, Dict[str, np.ndarray]]]:
+        samples = self._iter_samples()
+        if self.shuffle and self.buffer_size > 1:
+            # NOTE: The encoded bytes are buffered, and decoded when they are yielded
+            samples = self._shuffle_buffer(samples)
+
+        for uid, members in samples:
+            data = {}
+            for member_name, name in self.member_names.items():
+                if member_name not in members:
+                    raise RuntimeError(f'"{member_name}" of {uid} is not in the shard')
+                value = decode_member(*members[member_name])
+                if isinstance(value, tuple):
+                    # Audio case: (rate, array)
+                    value = value[1]
+                data[name] = value
+            yield uid, self._postprocess(uid, data)
 
 
 class SplicedIterableESPnetDataset(IterableDataset):
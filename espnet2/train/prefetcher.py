@@ -0,0 +1,200 @@
+import collections
+import threading
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import torch
+
+from espnet2.torch_utils.device_funcs import to_device
+from espnet2.train.profiler import measure_stage
+
+
+def pin_memory(data):
+    """Pin the tensors of the object recursively."""
+    if isinstance(data, dict):
+        return {k: pin_memory(v) for k, v in data.items()}
+    elif isinstance(data, tuple) and type(data) is not tuple:
+        return type(data)(*[pin_memory(v) for v in data])
+    elif isinstance(data, (list, tuple)):
+        return type(data)(pin_memory(v) for v in data)
+    elif isinstance(data, np.ndarray):
+        return pin_memory(torch.from_numpy(data))
+    elif isinstance(data, torch.Tensor):
+        if data.device.type == "cpu" and not data.is_pinned():
+            return data.pin_memory()
+        return data
+    else:
+        return data
+
+
+def record_stream(data, stream: "torch.cuda.Stream"):
+    """Mark the cuda tensors of the object as used by the stream recursively."""
+    if isinstance(data, dict):
+        for v in data.values():
+            record_stream(v, stream)
+    elif isinstance(data, (list, tuple)):
+        for v in data:
+            record_stream(v, stream)
+    elif isinstance(data, torch.Tensor) and data.is_cuda:
+        data.record_stream(stream)
+
+
+class BatchPrefetcher:
+    """Prefetch the mini-batches and transfer them to the device in advance.
+
+    A background thread takes the mini-batches from the iterator and pins them,
+    keeping at most "buffer_size" batches on the host. The host-to-device
+    copies of the next "num_prefetch" batches are issued on a side cuda stream,
+    so the copies are overlapped with the computation of the current batch.
+    On cpu, only the data loading is overlapped by the thread.
+
+    Examples:
+        >>> prefetcher = BatchPrefetcher(iterator, "cuda", num_prefetch=2)
+        >>> for utt_id, batch in prefetcher:
+        ...     # The tensors of the batch are already on the device
+        ...     retval = model(**batch)
+        >>> prefetcher.close()
+
+    Args:
+        iterator: Yields (utt_id, batch)
+        device: The device to transfer the batches
+        num_prefetch: The number of the batches transferred to the device ahead
+        buffer_size: The maximum number of the batches buffered on the host
+        pin_memory: Pin the host memory. If None, pin it for cuda device.
+    """
+
+    def __init__(
+        self,
+        iterator: Iterable,
+        device: Union[str, torch.device] = "cpu",
+        num_prefetch: int = 2,
+        buffer_size: Optional[int] = None,
+        pin_memory: Optional[bool] = None,
+    ):
+        if num_prefetch < 1:
+            raise ValueError(f"num_prefetch must be positive: {num_prefetch}")
+        self.iterator = iterator
+        self.device = torch.device(device)
+        if self.device.type == "cuda" and self.device.index is None:
+            self.device = torch.device("cuda", torch.cuda.current_device())
+        self.num_prefetch = num_prefetch
+        self.buffer_size = max(buffer_size or num_prefetch, 1)
+        if pin_memory is None:
+            pin_memory = self.device.type == "cuda"
+        self.pin_memory = pin_memory
+
+        if self.device.type == "cuda":
+            self.stream = torch.cuda.Stream(self.device)
+        else:
+            self.stream = None
+
+        # The batches on the host, which are filled by the thread
+        self._buffer = collections.deque()
+        # The batches being transferred to the device: (utt_id, batch, event)
+        self._ready = collections.deque()
+        self._cond = threading.Condition()
+        self._done = False
+        self._closed = False
+        self._error = None
+        self._thread = None
+
+    def __len__(self) -> int:
+        return len(self.iterator)
+
+    def __iter__(self) -> "BatchPrefetcher":
+        return self
+
+    def __next__(self):
+        self._start()
+        self._transfer()
+        if len(self._ready) == 0:
+            # Raise the error after taking the batches before it
+            self._raise_error()
+            raise StopIteration
+        utt_id, batch, event = self._ready.popleft()
+        if event is not None:
+            stream = torch.cuda.current_stream(self.device)
+            stream.wait_event(event)
+            # The memory was allocated on the side stream
+            record_stream(batch, stream)
+        # Start the copy of the next batch before the computation of this batch
+        self._transfer()
+        return utt_id, batch
+
+    def available(self, n: int) -> bool:
+        """Wait and return True if the next n batches can be taken.
+
+        The batches up to "num_prefetch + buffer_size" can be checked.
+        """
+        self._start()
+        with self._cond:
+            while (
+                len(self._ready) + len(self._buffer) < n
+                and not self._done
+                and len(self._buffer) < self.buffer_size
+            ):
+                self._cond.wait()
+            if len(self._ready) + len(self._buffer) >= n:
+                return True
+            self._raise_error()
+            return False
+
+    def close(self):
+        """Stop the thread. The rest of the batches are discarded."""
+        with self._cond:
+            self._closed = True
+            self._buffer.clear()
+            self._cond.notify_all()
+        self._ready.clear()
+
+    def _start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._worker, daemon=True)
+            self._thread.start()
+
+    def _worker(self):
+        try:
+            if self.device.type == "cuda":
+                torch.cuda.set_device(self.device)
+            for utt_id, batch in self.iterator:
+                if self.pin_memory:
+                    batch = pin_memory(batch)
+                with self._cond:
+                    while len(self._buffer) >= self.buffer_size and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return
+                    self._buffer.append((utt_id, batch))
+                    self._cond.notify_all()
+        except BaseException as e:
+            self._error = e
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _transfer(self):
+        while len(self._ready) < self.num_prefetch:
+            with self._cond:
+                while len(self._buffer) == 0 and not self._done:
+                    self._cond.wait()
+                if len(self._buffer) == 0:
+                    return
+                utt_id, batch = self._buffer.popleft()
+                self._cond.notify_all()
+
+            with measure_stage("h2d_time"):
+                if self.stream is not None:
+                    with torch.cuda.stream(self.stream):
+                        batch = to_device(batch, self.device, non_blocking=True)
+                        event = torch.cuda.Event()
+                        event.record(self.stream)
+                else:
+                    batch = to_device(batch, self.device)
+                    event = None
+            self._ready.append((utt_id, batch, event))
@@ -20,6 +20,7 @@ from espnet2.text.hugging_face_token_id_converter import HuggingFaceTokenIDConve
 from espnet2.text.token_id_converter import TokenIDConverter
 from espnet2.text.whisper_token_id_converter import OpenAIWhisperTokenIDConverter
 from espnet2.text.whisper_tokenizer import OpenAIWhisperTokenizer
+from espnet2.train.augmentation_bank import AudioBank, convolve_rir, pick_channel
 
 
 class AbsPreprocessor(ABC):
@@ -171,6 +172,9 @@ class CommonPreprocessor(AbsPreprocessor):
         # only use for whisper
         whisper_language: Optional[str] = None,
         whisper_task: Optional[str] = None,
+        # for caching RIRs and noises in memory
+        preload_rir_noise: bool = False,
+        rir_noise_cache_dir: Optional[str] = None,
     ):
         super().__init__(train)
         self.train = train
@@ -261,6 +265,20 @@ class CommonPreprocessor(AbsPreprocessor):
         else:
             self.noises = None
 
+        # NOTE: The RIRs and noises are decoded and resampled to fs only once
+        # instead of reading them from the disk for every sample
+        if preload_rir_noise or rir_noise_cache_dir is not None:
+            if self.rirs is not None:
+                self.rirs = AudioBank(
+                    self.rirs, fs=fs if fs > 0 else None, cache_dir=rir_noise_cache_dir
+                )
+            if self.noises is not None:
+                self.noises = AudioBank(
+                    self.noises,
+                    fs=fs if fs > 0 else None,
+                    cache_dir=rir_noise_cache_dir,
+                )
+
         # Check DataAugmentation docstring for more information of `data_aug_effects`
         self.fs = fs
         if data_aug_effects is not None:
@@ -275,8 +293,16 @@ class CommonPreprocessor(AbsPreprocessor):
         self.audio_pad_value = audio_pad_value
 
     def _convolve_rir(self, speech, power, rirs, tgt_fs=None, single_channel=False):
-        rir_path = np.random.choice(rirs)
-        rir = None
+        if isinstance(rirs, AudioBank):
+            rir = rirs.get(np.random.randint(len(rirs)), tgt_fs)
+            if single_channel:
+                rir = pick_channel(rir)
+            # rir: (Nmic, Time)
+            rir = rir.T
+            rir_path = None
+        else:
+            rir_path = np.random.choice(rirs)
+            rir = None
         if rir_path is not None:
             rir, fs = soundfile.read(rir_path, dtype=np.float64, always_2d=True)
 
@@ -294,12 +320,11 @@ class CommonPreprocessor(AbsPreprocessor):
                     rir, orig_sr=fs, target_sr=tgt_fs, res_type="kaiser_fast"
                 )
 
+        if rir is not None:
             # speech: (Nmic, Time)
             speech = speech[:1]
             # Note that this operation doesn't change the signal length
-            speech = scipy.signal.convolve(speech, rir, mode="full")[
-                :, : speech.shape[1]
-            ]
+            speech = convolve_rir(speech, rir)
             # Reverse mean power to the original power
             power2 = (speech[detect_non_silence(speech)] ** 2).mean()
             speech = np.sqrt(power / max(power2, 1e-10)) * speech
@@ -316,8 +341,23 @@ class CommonPreprocessor(AbsPreprocessor):
         single_channel=False,
     ):
         nsamples = speech.shape[1]
-        noise_path = np.random.choice(noises)
-        noise = None
+        if isinstance(noises, AudioBank):
+            noise_db = np.random.uniform(noise_db_low, noise_db_high)
+            # noise: (Time, Nmic)
+            noise = noises.segment(
+                np.random.randint(len(noises)),
+                nsamples,
+                fs=tgt_fs,
+                short_thres=self.short_noise_thres,
+            )
+            if single_channel:
+                noise = pick_channel(noise)
+            # noise: (Nmic, Time)
+            noise = noise.T
+            noise_path = None
+        else:
+            noise_path = np.random.choice(noises)
+            noise = None
         if noise_path is not None:
             noise_db = np.random.uniform(noise_db_low, noise_db_high)
             with soundfile.SoundFile(noise_path) as f:
@@ -370,6 +410,7 @@ class CommonPreprocessor(AbsPreprocessor):
                 else:
                     noise = noise[:, :nsamples]
 
+        if noise is not None:
             noise_power = (noise**2).mean()
             scale = (
                 10 ** (-noise_db / 20)
@@ -1082,6 +1123,8 @@ class EnhPreprocessor(CommonPreprocessor):
         speech_segment: Optional[int] = None,
         avoid_allzero_segment: bool = True,
         flexible_numspk: bool = False,
+        preload_rir_noise: bool = False,
+        rir_noise_cache_dir: Optional[str] = None,
     ):
         super().__init__(
             train=train,
@@ -1100,6 +1143,8 @@ class EnhPreprocessor(CommonPreprocessor):
             noise_apply_prob=noise_apply_prob,
             noise_db_range=noise_db_range,
             short_noise_thres=short_noise_thres,
+            preload_rir_noise=preload_rir_noise,
+            rir_noise_cache_dir=rir_noise_cache_dir,
             speech_volume_normalize=speech_volume_normalize,
             speech_name=speech_name,
             fs=sample_rate,
@@ -2033,37 +2078,27 @@ class SpkPreprocessor(CommonPreprocessor):
             if self.noise_apply_prob > 0 or self.rir_apply_prob > 0:
                 data["speech"] = self._apply_data_augmentation(data["speech"])
         else:
-            audio = data["speech"]
-            audio2 = data["speech2"]
+            # NOTE: "speech2" is absent when the utterances are given
+            #   one by one instead of the trials
+            for key in ("speech", "speech2"):
+                if key in data:
+                    data[key] = self._eval_segments(data[key])
 
-            # duplicate if utt is shorter than minimum required duration
-            if len(audio) < self.target_duration:
-                shortage = self.target_duration - len(audio) + 1
-                audio = np.pad(audio, (0, shortage), "wrap")
-            if len(audio2) < self.target_duration:
-                shortage = self.target_duration - len(audio2) + 1
-                audio2 = np.pad(audio2, (0, shortage), "wrap")
-
-            startframe = np.linspace(
-                0, len(audio) - self.target_duration, num=self.num_eval
-            )
-            audios = []
-            for frame in startframe:
-                audios.append(audio[int(frame) : int(frame) + self.target_duration])
-            audios = np.stack(audios, axis=0)
-
-            startframe2 = np.linspace(
-                0, len(audio2) - self.target_duration, num=self.num_eval
-            )
-            audios2 = []
-            for frame in startframe2:
-                audios2.append(audio2[int(frame) : int(frame) + self.target_duration])
-            audios2 = np.stack(audios2, axis=0)
+        return data
 
-            data["speech"] = audios
-            data["speech2"] = audios2
+    def _eval_segments(self, audio: np.ndarray) -> np.ndarray:
+        # duplicate if utt is shorter than minimum required duration
+        if len(audio) < self.target_duration:
+            shortage = self.target_duration - len(audio) + 1
+            audio = np.pad(audio, (0, shortage), "wrap")
 
-        return data
+        startframe = np.linspace(
+            0, len(audio) - self.target_duration, num=self.num_eval
+        )
+        audios = []
+        for frame in startframe:
+            audios.append(audio[int(frame) : int(frame) + self.target_duration])
+        return np.stack(audios, axis=0)
 
     def _convolve_rir(self, speech, rirs):
         rir_path = np.random.choice(rirs)
@@ -2164,7 +2199,7 @@ class SpkPreprocessor(CommonPreprocessor):
         if self.train:
             int_label = self.spk2label[data["spk_labels"]]
             data["spk_labels"] = np.asarray([int_label], dtype=np.int64)
-        else:
+        elif "spk_labels" in data:
             data["spk_labels"] = np.asarray([int(data["spk_labels"])])
 
         if "task_tokens" in data:
@@ -0,0 +1,373 @@
+"""Opt-in profiler of the stages of the training loop."""
+
+import json
+import logging
+import math
+import mmap
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+import torch
+
+# The stages measured in the main process by SubReporter.measure_time(),
+# and in the DataLoader workers by measure_stage()
+STAGES = (
+    "iter_time",
+    "load_time",
+    "preprocess_time",
+    "collate_time",
+    "h2d_time",
+    "forward_time",
+    "backward_time",
+    "optim_step_time",
+)
+# The stages which are not registered to the reporter by SubReporter
+REPORTED_STAGES = ("load_time", "preprocess_time", "collate_time", "h2d_time")
+
+# The histogram bins of the wall time: [0, 1us), 8 bins per decade up to 1000s,
+# and [1000s, inf)
+_BINS_PER_DECADE = 8
+_NUM_BINS = 2 + 9 * _BINS_PER_DECADE
+BUCKET_LIMITS = [1e-6 * 10 ** (b / _BINS_PER_DECADE) for b in range(_NUM_BINS - 1)]
+BUCKET_LIMITS.append(float(np.finfo(np.float64).max))
+
+# Indices of the flags in the shared memory
+_ACTIVE, _TRACING = range(2)
+_NUM_FLAGS = 2
+
+_profiler: Optional["StageProfiler"] = None
+
+
+def get_profiler() -> Optional["StageProfiler"]:
+    """Return the profiler of this process or None if profiling is disabled."""
+    return _profiler
+
+
+def set_profiler(profiler: Optional["StageProfiler"]):
+    """Set the profiler of this process.
+
+    It must be set before the DataLoader workers are forked to profile them.
+    """
+    global _profiler
+    _profiler = profiler
+
+
+def bin_index(seconds: float) -> int:
+    if seconds < 1e-6:
+        return 0
+    b = 1 + int(math.log10(seconds * 1e6) * _BINS_PER_DECADE)
+    return min(b, _NUM_BINS - 1)
+
+
+@contextmanager
+def measure_stage(name: str):
+    """Measure the wall time of the block if the profiler is active.
+
+    It can be also used as a decorator.
+
+    Examples:
+        >>> with measure_stage("preprocess_time"):
+        ...     data = preprocess(uid, data)
+    """
+    profiler = _profiler
+    if profiler is None or not profiler.active:
+        yield
+        return
+    start = time.perf_counter()
+    yield
+    profiler.record(name, start, time.perf_counter())
+
+
+class StageProfiler:
+    """Profiler of the stages of the training loop.
+
+    The wall time of each stage, e.g. data loading, preprocessing, collation,
+    host-to-device copy, forward, backward and optimizer step, is accumulated
+    as histograms with logarithmic bins for the main process and each
+    DataLoader worker. The histograms are allocated in anonymous shared memory
+    in the main process and inherited by the forked DataLoader workers, so the
+    time spent inside the workers is collected without any IPC.
+    The events can be also recorded for a window of steps and dumped
+    as a Chrome trace file, which can be opened by chrome://tracing or Perfetto.
+
+    Examples:
+        >>> profiler = StageProfiler()
+        >>> set_profiler(profiler)
+        >>> profiler.start()
+        >>> for batch in iterator:
+        ...     with reporter.measure_time("forward_time"):
+        ...         ...
+        ...     profiler.register(reporter)
+        >>> profiler.stop()
+        >>> profiler.log_summary()
+
+    Args:
+        stages: The names of the stages to be recorded
+        max_workers: The maximum number of the DataLoader workers
+        trace_capacity: The maximum number of the events per process for trace
+        cuda_sync: Synchronize cuda before measuring the time in the main process
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[str] = STAGES,
+        max_workers: int = 64,
+        trace_capacity: int = 65536,
+        cuda_sync: bool = True,
+    ):
+        self.stages = tuple(stages)
+        self.stage_index = {s: i for i, s in enumerate(self.stages)}
+        self.num_slots = max_workers + 1
+        self.trace_capacity = trace_capacity
+        self.cuda_sync = cuda_sync
+
+        n = len(self.stages)
+        hist_size = n * _NUM_BINS
+        # [histogram, sum of ns per stage, the number of trace events, trace events]
+        slot_size = hist_size + n + 1 + 3 * trace_capacity
+        # NOTE: The memory is not committed until it is written
+        self._mmap = mmap.mmap(-1, 8 * (_NUM_FLAGS + self.num_slots * slot_size))
+        buf = np.frombuffer(self._mmap, dtype=np.int64)
+        self._flags = buf[:_NUM_FLAGS]
+        slots = buf[_NUM_FLAGS:].reshape(self.num_slots, slot_size)
+        self._hist = slots[:, :hist_size].reshape(self.num_slots, n, _NUM_BINS)
+        self._sum = slots[:, hist_size : hist_size + n]
+        self._trace_count = slots[:, hist_size + n]
+        self._trace = slots[:, hist_size + n + 1 :].reshape(
+            self.num_slots, trace_capacity, 3
+        )
+        self._lock = threading.Lock()
+
+        # The snapshots for the differences, which are used in the main process
+        self._reported = self.counts(), self._sum.sum(0)
+        self._tensorboard_hist = self._hist.sum(0)
+        self._start_time = time.perf_counter()
+        self._elapsed = 0.0
+
+    @property
+    def active(self) -> bool:
+        return bool(self._flags[_ACTIVE])
+
+    @property
+    def tracing(self) -> bool:
+        return bool(self._flags[_TRACING])
+
+    def start(self):
+        """Reset the statistics and start recording."""
+        self._hist[:] = 0
+        self._sum[:] = 0
+        self._reported = self.counts(), self._sum.sum(0)
+        self._tensorboard_hist = self._hist.sum(0)
+        self._start_time = time.perf_counter()
+        self._flags[_ACTIVE] = 1
+
+    def stop(self):
+        """Stop recording."""
+        self._flags[_ACTIVE] = 0
+        self._elapsed = time.perf_counter() - self._start_time
+
+    def synchronize(self):
+        if self.cuda_sync and torch.cuda.is_available() and torch.cuda.is_initialized():
+            torch.cuda.synchronize()
+
+    def _slot(self) -> int:
+        worker_info = torch.utils.data.get_worker_info()
+        return 0 if worker_info is None else worker_info.id + 1
+
+    def record(self, name: str, start: float, end: float):
+        """Record the wall time of the stage given by time.perf_counter()."""
+        i = self.stage_index.get(name)
+        slot = self._slot()
+        if i is None or slot >= self.num_slots or not self.active:
+            return
+        duration = end - start
+        b = bin_index(duration)
+        with self._lock:
+            self._hist[slot, i, b] += 1
+            self._sum[slot, i] += int(duration * 1e9)
+            if self._flags[_TRACING]:
+                c = self._trace_count[slot]
+                if c < self.trace_capacity:
+                    self._trace[slot, c] = (i, int(start * 1e9), int(duration * 1e9))
+                    self._trace_count[slot] = c + 1
+
+    def counts(self, slot: Optional[int] = None) -> np.ndarray:
+        """Return the number of the records for each stage."""
+        if slot is None:
+            return self._hist.sum((0, 2))
+        return self._hist[slot].sum(1)
+
+    def queue_depth(self) -> int:
+        """The number of the mini-batches collated but not taken yet."""
+        collate = self.stage_index.get("collate_time")
+        it = self.stage_index.get("iter_time")
+        if collate is None or it is None:
+            return 0
+        return int(self.counts()[collate] - self.counts(0)[it])
+
+    def register(self, reporter):
+        """Register the mean time of the stages since the last call.
+
+        The stages measured by SubReporter.measure_time() are already registered.
+        """
+        counts, sums = self.counts(), self._sum.sum(0)
+        prev_counts, prev_sums = self._reported
+        self._reported = counts, sums
+        stats = {}
+        for name in REPORTED_STAGES:
+            i = self.stage_index.get(name)
+            if i is None:
+                continue
+            n = counts[i] - prev_counts[i]
+            stats[name] = (sums[i] - prev_sums[i]) / n / 1e9 if n > 0 else None
+        stats["queue_depth"] = self.queue_depth()
+        reporter.register(stats)
+
+    def percentiles(
+        self, hist: np.ndarray, q: Sequence[float] = (50, 90, 99)
+    ) -> np.ndarray:
+        """Estimate the percentiles as the upper limits of the bins."""
+        cumsum = np.cumsum(hist)
+        if cumsum[-1] == 0:
+            return np.full(len(q), np.nan)
+        idx = np.searchsorted(cumsum, np.asarray(q) / 100 * cumsum[-1])
+        return np.asarray(BUCKET_LIMITS)[np.minimum(idx, _NUM_BINS - 1)]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Return the statistics of each stage."""
+        hist = self._hist.sum(0)
+        sums = self._sum.sum(0)
+        retval = {}
+        for i, name in enumerate(self.stages):
+            n = int(hist[i].sum())
+            if n == 0:
+                continue
+            p50, p90, p99 = self.percentiles(hist[i])
+            retval[name] = dict(
+                count=n,
+                total=sums[i] / 1e9,
+                mean=sums[i] / n / 1e9,
+                p50=p50,
+                p90=p90,
+                p99=p99,
+            )
+        return retval
+
+    def worker_throughput(self) -> Dict[str, Dict[str, float]]:
+        """Return the samples/sec and batches/sec of each process."""
+        if self.active:
+            elapsed = time.perf_counter() - self._start_time
+        else:
+            elapsed = self._elapsed
+        load = self.stage_index.get("load_time")
+        collate = self.stage_index.get("collate_time")
+        retval = {}
+        for slot in range(self.num_slots):
+            counts = self.counts(slot)
+            if counts.sum() == 0:
+                continue
+            name = "main" if slot == 0 else f"worker{slot - 1}"
+            retval[name] = dict(
+                samples_per_sec=(
+                    counts[load] / elapsed if load is not None and elapsed > 0 else 0
+                ),
+                batches_per_sec=(
+                    counts[collate] / elapsed
+                    if collate is not None and elapsed > 0
+                    else 0
+                ),
+            )
+        return retval
+
+    def log_summary(self):
+        message = ["Profile of the stages [sec]:"]
+        for name, s in self.summary().items():
+            message.append(
+                f"  {name}: count={s['count']}, total={s['total']:.3f}, "
+                f"mean={s['mean']:.3e}, p50<{s['p50']:.3e}, p90<{s['p90']:.3e}, "
+                f"p99<{s['p99']:.3e}"
+            )
+        for name, s in self.worker_throughput().items():
+            message.append(
+                f"  {name}: {s['samples_per_sec']:.2f} samples/sec, "
+                f"{s['batches_per_sec']:.2f} batches/sec"
+            )
+        logging.info("\n".join(message))
+
+    def tensorboard_add_histogram(self, summary_writer, global_step: int):
+        """Add the histograms since the last call and the throughput."""
+        hist = self._hist.sum(0)
+        diff = hist - self._tensorboard_hist
+        self._tensorboard_hist = hist
+        limits = np.asarray(BUCKET_LIMITS)
+        lower = np.concatenate([[0.0], limits[:-1]])
+        # NOTE: The values are approximated by the upper limits of the bins,
+        # and the lower limit for the last bin, i.e. [1000s, inf)
+        values = np.concatenate([limits[:-1], limits[-2:-1]])
+        for i, name in enumerate(self.stages):
+            num = int(diff[i].sum())
+            if num == 0:
+                continue
+            nonzero = np.flatnonzero(diff[i])
+            summary_writer.add_histogram_raw(
+                f"profile/{name}",
+                min=float(lower[nonzero[0]]),
+                max=float(values[nonzero[-1]]),
+                num=num,
+                sum=float((diff[i] * values).sum()),
+                sum_squares=float((diff[i] * values**2).sum()),
+                bucket_limits=limits.tolist(),
+                bucket_counts=diff[i].tolist(),
+                global_step=global_step,
+            )
+        for name, s in self.worker_throughput().items():
+            summary_writer.add_scalar(
+                f"profile/{name}_samples_per_sec", s["samples_per_sec"], global_step
+            )
+        summary_writer.add_scalar(
+            "profile/queue_depth", self.queue_depth(), global_step
+        )
+
+    def start_trace(self):
+        """Start recording the events for the Chrome trace."""
+        self._trace_count[:] = 0
+        self._flags[_TRACING] = 1
+
+    def stop_trace(self, path: Union[Path, str]):
+        """Stop recording the events and write them as a Chrome trace file."""
+        self._flags[_TRACING] = 0
+        events = []
+        for slot in range(self.num_slots):
+            count = min(int(self._trace_count[slot]), self.trace_capacity)
+            if count == 0:
+                continue
+            events.append(
+                dict(
+                    name="process_name",
+                    ph="M",
+                    pid=slot,
+                    tid=0,
+                    args=dict(name="main" if slot == 0 else f"worker{slot - 1}"),
+                )
+            )
+            for i, start, duration in self._trace[slot, :count].tolist():
+                events.append(
+                    dict(
+                        name=self.stages[i],
+                        ph="X",
+                        pid=slot,
+                        tid=0,
+                        # In microseconds
+                        ts=start / 1e3,
+                        dur=duration / 1e3,
+                    )
+                )
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(dict(traceEvents=events, displayTimeUnit="ms"), f)
+        logging.info(f"Wrote {len(events)} events of the profile to {path}")
@@ -16,6 +16,8 @@ import torch
 from packaging.version import parse as V
 from typeguard import typechecked
 
+from espnet2.train.profiler import get_profiler
+
 Num = Union[float, int, complex, torch.Tensor, np.ndarray]
 
 
@@ -253,10 +255,19 @@ class SubReporter:
 
     @contextmanager
     def measure_time(self, name: str):
+        profiler = get_profiler()
+        if profiler is not None and profiler.active:
+            profiler.synchronize()
+        else:
+            profiler = None
         start = time.perf_counter()
         yield start
+        if profiler is not None:
+            profiler.synchronize()
         t = time.perf_counter() - start
         self.register({name: t})
+        if profiler is not None:
+            profiler.record(name, start, start + t)
 
     def measure_iter_time(self, iterable, name: str):
         iterator = iter(iterable)
@@ -266,6 +277,9 @@ class SubReporter:
                 retval = next(iterator)
                 t = time.perf_counter() - start
                 self.register({name: t})
+                profiler = get_profiler()
+                if profiler is not None and profiler.active:
+                    profiler.record(name, start, start + t)
                 yield retval
             except StopIteration:
                 break
@@ -0,0 +1,351 @@
+import hashlib
+import logging
+import mmap
+import multiprocessing
+import pickle
+import struct
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Indices of the counters in the metadata area
+(
+    _HITS,
+    _MISSES,
+    _EVICTIONS,
+    _CLOCK,
+    _NUM_SAMPLES,
+    _SIZE,
+    _NUM_FREE_ENTRIES,
+    _NUM_FREE_BLOCKS,
+    _FREE_BLOCK,
+) = range(9)
+_NUM_COUNTERS = 9
+
+
+def _padding(nbytes: int) -> bytes:
+    # Keep the arrays aligned to 8 bytes in the arena
+    return b"\0" * (-nbytes % 8)
+
+
+def _hash_key(key: str) -> int:
+    # NOTE: hash() of str is randomized per process, so it can't be used here
+    return int.from_bytes(
+        hashlib.blake2b(key.encode(), digest_size=8).digest(), "little", signed=True
+    )
+
+
+class SharedSampleCache:
+    """Byte-bounded LRU/LFU cache of samples shared by DataLoader workers.
+
+    A sample, i.e. a dict of ndarrays, is stored as a small pickled header
+    (names, dtypes and shapes) followed by the raw bytes of the arrays in an
+    arena of anonymous shared memory, which is split into fixed size blocks.
+    The arena and the index are allocated once in the parent process and
+    inherited by the forked DataLoader workers, so a cache hit is a plain
+    memory copy without any IPC nor pickling of the arrays. When the arena is
+    full, the least recently (or least frequently) used samples are evicted.
+
+    The keys are found with an open addressing hash table, the free blocks
+    are chained in a free list and the samples are kept in a binary heap
+    ordered by the eviction priority, all in the shared memory, so a lookup
+    and an allocation take O(1) and an eviction O(log N) for N samples.
+
+    The memory is not committed until it is written. If the cache is pickled
+    (e.g. DataLoader workers are started with "spawn"), each process gets its
+    own empty cache instead.
+
+    Examples:
+        >>> cache = SharedSampleCache(1024 * 1024)
+        >>> cache["utt1"] = {"speech": np.zeros(16000, dtype=np.float32)}
+        >>> cache.get("utt1")["speech"].shape
+        (16000,)
+        >>> cache.stats()
+        {'hits': 1, 'misses': 0, 'evictions': 0, 'num_samples': 1, ...}
+
+    Args:
+        max_size: The maximum number of bytes of the arena
+        block_size: The allocation unit in bytes
+        policy: The eviction policy, "lru" or "lfu"
+    """
+
+    def __init__(self, max_size: int, block_size: int = 32768, policy: str = "lru"):
+        if policy not in ("lru", "lfu"):
+            raise ValueError(f"policy must be 'lru' or 'lfu': {policy}")
+        if max_size <= 0:
+            raise ValueError(f"max_size must be positive: {max_size}")
+        self.max_size = int(max_size)
+        self.block_size = int(min(block_size, max_size))
+        self.policy = policy
+        self._allocate()
+
+    def _allocate(self):
+        self.num_blocks = self.max_size // self.block_size
+        # Each sample uses one block at least
+        self.num_entries = self.num_blocks
+        # Keep the load factor of the hash table <= 0.5
+        self.num_slots = 1 << (2 * self.num_entries - 1).bit_length()
+
+        self._arena_buf = mmap.mmap(-1, self.num_blocks * self.block_size)
+        self._arena = np.frombuffer(self._arena_buf, dtype=np.uint8)
+
+        n_int64 = (
+            _NUM_COUNTERS + 8 * self.num_entries + self.num_blocks + self.num_slots
+        )
+        self._meta_buf = mmap.mmap(-1, n_int64 * 8)
+        meta = np.frombuffer(self._meta_buf, dtype=np.int64)
+        self._counters, meta = np.split(meta, [_NUM_COUNTERS])
+        (
+            self._keys,
+            self._nbytes,
+            self._first_block,
+            self._last_used,
+            self._num_used,
+            self._heap,  # The entries ordered by the eviction priority
+            self._heap_pos,  # The position of each entry in the heap
+            self._free_entries,  # The stack of the unused entries
+            self._next_block,  # The next block of the sample or of the free list
+            self._slots,  # The entry of each slot of the hash table, -1 if empty
+        ) = np.split(
+            meta,
+            np.cumsum([self.num_entries] * 8 + [self.num_blocks]),
+        )
+        self._free_entries[:] = np.arange(self.num_entries)[::-1]
+        self._next_block[:] = np.arange(1, self.num_blocks + 1)
+        self._next_block[-1] = -1
+        self._slots[:] = -1
+        self._counters[_NUM_FREE_ENTRIES] = self.num_entries
+        self._counters[_NUM_FREE_BLOCKS] = self.num_blocks
+        self._counters[_FREE_BLOCK] = 0
+        self._lock = multiprocessing.Lock()
+
+    def __getstate__(self):
+        return dict(
+            max_size=self.max_size, block_size=self.block_size, policy=self.policy
+        )
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        logging.warning(
+            "SharedSampleCache can be shared only with forked processes: "
+            "create a process local cache instead"
+        )
+        self._allocate()
+
+    def _find(self, h: int) -> Tuple[int, int]:
+        """Return the entry of the key hash and its slot in the hash table.
+
+        If the key is not cached, -1 and the empty slot to insert it are
+        returned instead.
+        """
+        mask = self.num_slots - 1
+        slot = h & mask
+        while True:
+            entry = int(self._slots[slot])
+            if entry < 0 or self._keys[entry] == h:
+                return entry, slot
+            slot = (slot + 1) & mask
+
+    def _remove_slot(self, slot: int) -> None:
+        # Shift back the following entries of the probe sequence into the hole
+        # instead of leaving a tombstone, so that the probes stay short
+        mask = self.num_slots - 1
+        self._slots[slot] = -1
+        hole = slot
+        while True:
+            slot = (slot + 1) & mask
+            entry = int(self._slots[slot])
+            if entry < 0:
+                return
+            home = int(self._keys[entry]) & mask
+            if (slot - home) & mask >= (slot - hole) & mask:
+                self._slots[hole] = entry
+                self._slots[slot] = -1
+                hole = slot
+
+    def _blocks(self, entry: int):
+        blocks = []
+        b = int(self._first_block[entry])
+        while b >= 0:
+            blocks.append(b)
+            b = int(self._next_block[b])
+        return blocks
+
+    def _priority(self, entry: int) -> Tuple[int, ...]:
+        if self.policy == "lfu":
+            # Break ties by recency
+            return int(self._num_used[entry]), int(self._last_used[entry])
+        return (int(self._last_used[entry]),)
+
+    def _heap_swap(self, i: int, j: int) -> None:
+        ei, ej = int(self._heap[i]), int(self._heap[j])
+        self._heap[i], self._heap[j] = ej, ei
+        self._heap_pos[ej], self._heap_pos[ei] = i, j
+
+    def _sift_up(self, i: int) -> None:
+        while i > 0:
+            parent = (i - 1) // 2
+            if self._priority(int(self._heap[parent])) <= self._priority(
+                int(self._heap[i])
+            ):
+                return
+            self._heap_swap(i, parent)
+            i = parent
+
+    def _sift_down(self, i: int) -> None:
+        n = int(self._counters[_NUM_SAMPLES])
+        while True:
+            smallest = i
+            for child in (2 * i + 1, 2 * i + 2):
+                if child < n and self._priority(
+                    int(self._heap[child])
+                ) < self._priority(int(self._heap[smallest])):
+                    smallest = child
+            if smallest == i:
+                return
+            self._heap_swap(i, smallest)
+            i = smallest
+
+    def _evict(self) -> None:
+        # The root of the heap is the least recently (frequently) used sample
+        entry = int(self._heap[0])
+        n = int(self._counters[_NUM_SAMPLES]) - 1
+        self._counters[_NUM_SAMPLES] = n
+        if n > 0:
+            self._heap_swap(0, n)
+            self._sift_down(0)
+
+        _, slot = self._find(int(self._keys[entry]))
+        self._remove_slot(slot)
+
+        # Return the blocks and the entry to the free lists
+        blocks = self._blocks(entry)
+        self._next_block[blocks[-1]] = self._counters[_FREE_BLOCK]
+        self._counters[_FREE_BLOCK] = blocks[0]
+        self._counters[_NUM_FREE_BLOCKS] += len(blocks)
+        self._free_entries[self._counters[_NUM_FREE_ENTRIES]] = entry
+        self._counters[_NUM_FREE_ENTRIES] += 1
+
+        self._counters[_SIZE] -= self._nbytes[entry]
+        self._nbytes[entry] = 0
+        self._counters[_EVICTIONS] += 1
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return self._find(_hash_key(key))[0] >= 0
+
+    def __len__(self) -> int:
+        return int(self._counters[_NUM_SAMPLES])
+
+    @property
+    def size(self) -> int:
+        """The number of bytes of the cached samples."""
+        return int(self._counters[_SIZE])
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Return the cached sample or None if it is not cached."""
+        h = _hash_key(key)
+        with self._lock:
+            entry, _ = self._find(h)
+            if entry >= 0:
+                self._counters[_CLOCK] += 1
+                self._last_used[entry] = self._counters[_CLOCK]
+                self._num_used[entry] += 1
+                # The priority only increases
+                self._sift_down(int(self._heap_pos[entry]))
+                nbytes = int(self._nbytes[entry])
+                blocks = self._blocks(entry)
+                bs = self.block_size
+                buf = np.empty(len(blocks) * bs, dtype=np.uint8)
+                for i, b in enumerate(blocks):
+                    buf[i * bs : (i + 1) * bs] = self._arena[b * bs : (b + 1) * bs]
+                buf = buf[:nbytes]
+            else:
+                buf = None
+
+        if buf is not None:
+            (header_len,) = struct.unpack("<Q", buf[:8].tobytes())
+            cached_key, specs = pickle.loads(buf[8 : 8 + header_len].tobytes())
+            if cached_key == key:
+                with self._lock:
+                    self._counters[_HITS] += 1
+                data = {}
+                offset = 8 + header_len
+                for name, dtype, shape in specs:
+                    dtype = np.dtype(dtype)
+                    n = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+                    data[name] = buf[offset : offset + n].view(dtype).reshape(shape)
+                    offset += n + len(_padding(n))
+                return data
+
+        with self._lock:
+            self._counters[_MISSES] += 1
+        return None
+
+    def __getitem__(self, key: str) -> Dict[str, np.ndarray]:
+        data = self.get(key)
+        if data is None:
+            raise KeyError(key)
+        return data
+
+    def __setitem__(self, key: str, data: Dict[str, np.ndarray]):
+        arrays = [np.ascontiguousarray(v) for v in data.values()]
+        header = pickle.dumps(
+            (key, [(k, v.dtype.str, v.shape) for k, v in zip(data, arrays)])
+        )
+        header += _padding(len(header))
+        chunks = [struct.pack("<Q", len(header)), header]
+        for v in arrays:
+            chunks.append(memoryview(v.reshape(-1).view(np.uint8)))
+            chunks.append(_padding(v.nbytes))
+        payload = memoryview(b"".join(chunks))
+        need = -(-len(payload) // self.block_size)
+        if need > self.num_blocks:
+            logging.debug(f"{key} is too large to be cached: {len(payload)} bytes")
+            return
+
+        h = _hash_key(key)
+        bs = self.block_size
+        with self._lock:
+            if self._find(h)[0] >= 0:
+                # Already cached by another worker
+                return
+            while self._counters[_NUM_FREE_BLOCKS] < need:
+                self._evict()
+
+            self._counters[_NUM_FREE_ENTRIES] -= 1
+            entry = int(self._free_entries[self._counters[_NUM_FREE_ENTRIES]])
+            b = first = int(self._counters[_FREE_BLOCK])
+            for i in range(need):
+                chunk = payload[i * bs : (i + 1) * bs]
+                self._arena[b * bs : b * bs + len(chunk)] = chunk
+                last, b = b, int(self._next_block[b])
+            self._next_block[last] = -1
+            self._counters[_FREE_BLOCK] = b
+            self._counters[_NUM_FREE_BLOCKS] -= need
+
+            self._counters[_CLOCK] += 1
+            self._keys[entry] = h
+            self._first_block[entry] = first
+            self._last_used[entry] = self._counters[_CLOCK]
+            self._num_used[entry] = 0
+            self._nbytes[entry] = len(payload)
+            self._counters[_SIZE] += len(payload)
+            # The eviction may have moved the slot
+            self._slots[self._find(h)[1]] = entry
+
+            n = int(self._counters[_NUM_SAMPLES])
+            self._heap[n] = entry
+            self._heap_pos[entry] = n
+            self._counters[_NUM_SAMPLES] = n + 1
+            self._sift_up(n)
+
+    def stats(self) -> Dict[str, int]:
+        """Return the counters of the cache, which are shared by all processes."""
+        return dict(
+            hits=int(self._counters[_HITS]),
+            misses=int(self._counters[_MISSES]),
+            evictions=int(self._counters[_EVICTIONS]),
+            num_samples=len(self),
+            size=self.size,
+        )
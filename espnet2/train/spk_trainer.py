@@ -7,7 +7,7 @@ Thus, we measure open set equal error rate (EER) using unknown speakers by
 overriding validate_one_epoch.
 """
 
-from typing import Dict, Iterable
+from typing import Dict, Iterable, List, Tuple
 
 import numpy as np
 import torch
@@ -15,6 +15,8 @@ import torch.nn.functional as F
 import torch.optim
 from typeguard import typechecked
 
+from espnet2.fileio.embedding_store import EmbeddingStoreWriter
+from espnet2.spk.scoring import build_trial_index, score_trials
 from espnet2.torch_utils.device_funcs import to_device
 from espnet2.train.distributed_utils import DistributedOption
 from espnet2.train.reporter import SubReporter
@@ -53,7 +55,7 @@ class SpkTrainer(Trainer):
 
         scores = []
         labels = []
-        spk_embd_dic = {}
+        spk_embd_list = []
         bs = 0
 
         # [For distributed] Because iteration counts are not always equals between
@@ -61,6 +63,8 @@ class SpkTrainer(Trainer):
         iterator_stop = torch.tensor(0).to("cuda" if ngpu > 0 else "cpu")
 
         # fill dictionary with speech samples
+        # utt2idx: the mapping from utt_id to the row of the embedding matrix
+        utt2idx = {}
         utt_id_list = []
         speech_list = []
         task_token = None
@@ -74,12 +78,14 @@ class SpkTrainer(Trainer):
                 utt_id, batch["speech"], batch["speech2"]
             ):
                 _utt_id_1, _utt_id_2 = _utt_id.split("*")
-                if _utt_id_1 not in utt_id_list:
+                if _utt_id_1 not in utt2idx:
+                    utt2idx[_utt_id_1] = len(utt_id_list)
                     utt_id_list.append(_utt_id_1)
                     speech_list.append(
                         to_device(_speech, "cuda" if ngpu > 0 else "cpu")
                     )
-                if _utt_id_2 not in utt_id_list:
+                if _utt_id_2 not in utt2idx:
+                    utt2idx[_utt_id_2] = len(utt_id_list)
                     utt_id_list.append(_utt_id_2)
                     speech_list.append(
                         to_device(_speech2, "cuda" if ngpu > 0 else "cpu")
@@ -88,7 +94,6 @@ class SpkTrainer(Trainer):
         # extract speaker embeddings.
         n_utt = len(utt_id_list)
         for ii in range(0, n_utt, bs):
-            _utt_ids = utt_id_list[ii : ii + bs]
             _speechs = speech_list[ii : ii + bs]
             _speechs = torch.stack(_speechs, dim=0)
             org_shape = (_speechs.size(0), _speechs.size(1))
@@ -109,12 +114,13 @@ class SpkTrainer(Trainer):
             )
             spk_embds = F.normalize(spk_embds, p=2, dim=1)
             spk_embds = spk_embds.view(org_shape[0], org_shape[1], -1)
+            spk_embd_list.append(spk_embds)
 
-            for _utt_id, _spk_embd in zip(_utt_ids, spk_embds):
-                spk_embd_dic[_utt_id] = _spk_embd
-
+        # (n_utt, n_segments, dim)
+        spk_embds = torch.cat(spk_embd_list, dim=0)
         del utt_id_list
         del speech_list
+        del spk_embd_list
 
         # calculate similarity scores
         for utt_id, batch in iterator:
@@ -127,11 +133,11 @@ class SpkTrainer(Trainer):
                 if iterator_stop > 0:
                     break
 
-            for _utt_id in utt_id:
-                _utt_id_1, _utt_id_2 = _utt_id.split("*")
-                score = torch.cdist(spk_embd_dic[_utt_id_1], spk_embd_dic[_utt_id_2])
-                score = -1.0 * torch.mean(score)
-                scores.append(score.view(1))  # 0-dim to 1-dim tensor for cat
+            # Score the trials in the mini-batch at once
+            enroll_index, test_index = build_trial_index(utt_id, utt2idx)
+            scores.append(
+                score_trials(spk_embds, enroll_index, test_index, metric="euclidean")
+            )
             labels.append(batch["spk_labels"])
 
         else:
@@ -174,18 +180,15 @@ class SpkTrainer(Trainer):
 
         # calculate statistics in target and nontarget classes.
         n_trials = len(scores)
-        scores_trg = []
-        scores_nontrg = []
-        for _s, _l in zip(scores, labels):
-            if _l == 1:
-                scores_trg.append(_s)
-            elif _l == 0:
-                scores_nontrg.append(_s)
-            else:
-                raise ValueError(f"{_l}, {type(_l)}")
+        invalid = (labels != 0) & (labels != 1)
+        if invalid.any():
+            _l = labels[invalid][0]
+            raise ValueError(f"{_l}, {type(_l)}")
+        scores_trg = scores[labels == 1]
+        scores_nontrg = scores[labels == 0]
         trg_mean = float(np.mean(scores_trg))
         trg_std = float(np.std(scores_trg))
-        nontrg_mean = float(np.std(scores_nontrg))
+        nontrg_mean = float(np.mean(scores_nontrg))
         nontrg_std = float(np.std(scores_nontrg))
 
         # exception for collect_stats.
@@ -244,7 +247,7 @@ class SpkTrainer(Trainer):
 
         # fill dictionary with speech samples
         utt_id_list = []
-        utt_id_whole_list = []
+        utt_id_whole_set = set()
         speech_list = []
         task_token = None
         if distributed:
@@ -263,8 +266,8 @@ class SpkTrainer(Trainer):
                 utt_id, batch["speech"], batch["speech2"]
             ):
                 _utt_id_1, _utt_id_2 = _utt_id.split("*")
-                if _utt_id_1 not in utt_id_whole_list:
-                    utt_id_whole_list.append(_utt_id_1)
+                if _utt_id_1 not in utt_id_whole_set:
+                    utt_id_whole_set.add(_utt_id_1)
                     if idx % world_size == rank:
                         utt_id_list.append(_utt_id_1)
                         speech_list.append(_speech)
@@ -305,8 +308,8 @@ class SpkTrainer(Trainer):
                         speech_list = []
 
                     idx += 1
-                if _utt_id_2 not in utt_id_whole_list:
-                    utt_id_whole_list.append(_utt_id_2)
+                if _utt_id_2 not in utt_id_whole_set:
+                    utt_id_whole_set.add(_utt_id_2)
                     if idx % world_size == rank:
                         utt_id_list.append(_utt_id_2)
                         speech_list.append(_speech2)
@@ -376,3 +379,46 @@ class SpkTrainer(Trainer):
                     spk_embd_dic[uid] = _spk_embd.detach().cpu().numpy()
 
         np.savez(output_dir + f"/embeddings{rank}", **spk_embd_dic)
+
+    @classmethod
+    @torch.no_grad()
+    @typechecked
+    def extract_embed_to_store(
+        cls,
+        model: torch.nn.Module,
+        iterator: Iterable[Tuple[List[str], Dict[str, torch.Tensor]]],
+        options: TrainerOptions,
+        writer: EmbeddingStoreWriter,
+        average: bool = False,
+    ) -> None:
+        """Extract the embeddings of the unique utterances into the store.
+
+        Unlike extract_embed(), the iterator yields each utterance once
+        with "speech": (Batch, num_eval, Nsamples), instead of the trials.
+        """
+        ngpu = options.ngpu
+        model.eval()
+
+        for utt_id, batch in iterator:
+            assert isinstance(batch, dict), type(batch)
+            speech = to_device(batch["speech"], "cuda" if ngpu > 0 else "cpu")
+            org_shape = (speech.size(0), speech.size(1))
+            speech = speech.flatten(0, 1)
+            if "task_tokens" in batch:
+                task_tokens = to_device(
+                    batch["task_tokens"][0].repeat(speech.size(0)),
+                    "cuda" if ngpu > 0 else "cpu",
+                ).unsqueeze(1)
+            else:
+                task_tokens = None
+            spk_embds = model(
+                speech=speech,
+                spk_labels=None,
+                extract_embd=True,
+                task_tokens=task_tokens,
+            )
+            # NOTE: Not normalized to use the magnitude in qmf
+            spk_embds = spk_embds.view(org_shape[0], org_shape[1], -1)
+            if average:
+                spk_embds = spk_embds.mean(1)
+            writer.write_batch(utt_id, spk_embds.cpu().numpy())
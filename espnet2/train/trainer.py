@@ -32,7 +32,15 @@ from espnet2.torch_utils.recursive_op import recursive_average
 from espnet2.torch_utils.set_all_random_seed import set_all_random_seed
 from espnet2.train.abs_espnet_model import AbsESPnetModel
 from espnet2.train.distributed_utils import DistributedOption
+from espnet2.train.prefetcher import BatchPrefetcher
+from espnet2.train.profiler import (
+    StageProfiler,
+    get_profiler,
+    measure_stage,
+    set_profiler,
+)
 from espnet2.train.reporter import Reporter, SubReporter
+from espnet2.train.sample_cache import SharedSampleCache
 from espnet2.utils.build_dataclass import build_dataclass
 from espnet2.utils.kwargs2args import kwargs2args
 
@@ -104,6 +112,11 @@ class TrainerOptions:
     unused_parameters: bool
     wandb_model_log_interval: int
     create_graph_in_tensorboard: bool
+    prefetch_batches: int
+    dist_stop_check_interval: int
+    profile: bool
+    profile_trace_start: int
+    profile_trace_steps: int
 
 
 class Trainer:
@@ -293,6 +306,13 @@ class Trainer:
         else:
             train_summary_writer = None
 
+        if trainer_options.profile:
+            # NOTE: Set it before forking the DataLoader workers to profile them
+            profiler = StageProfiler()
+            set_profiler(profiler)
+        else:
+            profiler = None
+
         start_time = time.perf_counter()
         for iepoch in range(start_epoch, trainer_options.max_epoch + 1):
             if iepoch != start_epoch:
@@ -314,6 +334,8 @@ class Trainer:
             reporter.set_epoch(iepoch)
             # 1. Train and validation for one-epoch
             with reporter.observe("train") as sub_reporter:
+                if profiler is not None:
+                    profiler.start()
                 all_steps_are_invalid = cls.train_one_epoch(
                     model=dp_model,
                     optimizers=optimizers,
@@ -325,6 +347,9 @@ class Trainer:
                     options=trainer_options,
                     distributed_option=distributed_option,
                 )
+                if profiler is not None:
+                    profiler.stop()
+                    profiler.log_summary()
 
             with reporter.observe("valid") as sub_reporter:
                 cls.validate_one_epoch(
@@ -550,8 +575,41 @@ class Trainer:
         model.train()
         all_steps_are_invalid = True
         # [For distributed] Because iteration counts are not always equals between
-        # processes, send stop-flag to the other processes if iterator is finished
-        iterator_stop = torch.tensor(0).to("cuda" if ngpu > 0 else "cpu")
+        # processes, send stop-flag to the other processes if iterator is finished.
+        # iterator_stop = [finished, not having enough batches until the next check]
+        iterator_stop = torch.zeros(2, dtype=torch.long).to(
+            "cuda" if ngpu > 0 else "cpu"
+        )
+        stop_check_interval = options.dist_stop_check_interval if distributed else 1
+        num_unchecked = 0
+
+        # The counters of the sample cache are shared by the DataLoader workers
+        cache = getattr(getattr(iterator, "dataset", None), "cache", None)
+        if isinstance(cache, SharedSampleCache):
+            cache_stats = cache.stats()
+        else:
+            cache = None
+
+        if options.prefetch_batches > 0 or stop_check_interval > 1:
+            # NOTE: The prefetcher is also used to look ahead the batches
+            # for the distributed stop check
+            iterator = prefetcher = BatchPrefetcher(
+                iterator,
+                "cuda" if ngpu > 0 else "cpu",
+                num_prefetch=max(options.prefetch_batches, 1),
+                buffer_size=max(options.prefetch_batches, stop_check_interval),
+            )
+        else:
+            prefetcher = None
+
+        profiler = get_profiler()
+        if profiler is not None and not profiler.active:
+            profiler = None
+        trace_path = (
+            Path(options.output_dir)
+            / "profile"
+            / f"trace_rank{distributed_option.dist_rank or 0}.json"
+        )
 
         start_time = time.perf_counter()
         for iiter, (utt_id, batch) in enumerate(
@@ -560,13 +618,38 @@ class Trainer:
             assert isinstance(batch, dict), type(batch)
 
             if distributed:
-                torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
-                if iterator_stop > 0:
-                    break
+                if num_unchecked == 0:
+                    iterator_stop.zero_()
+                    if stop_check_interval > 1:
+                        # Skip the check for the next iterations if all processes have
+                        # the batches for them
+                        if not prefetcher.available(stop_check_interval - 1):
+                            iterator_stop[1] = 1
+                    torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
+                    if iterator_stop[0] > 0:
+                        break
+                    if iterator_stop[1] > 0:
+                        # Check at every iteration until the end of the epoch
+                        stop_check_interval = 1
+                    num_unchecked = stop_check_interval
+                num_unchecked -= 1
+
+            if profiler is not None and options.profile_trace_steps > 0:
+                # Record the events of the steps for the Chrome trace
+                step = reporter.get_total_count()
+                if step == options.profile_trace_start:
+                    profiler.start_trace()
+                elif (
+                    step == options.profile_trace_start + options.profile_trace_steps
+                    and profiler.tracing
+                ):
+                    profiler.stop_trace(trace_path)
 
             batch["utt_id"] = utt_id
 
-            batch = to_device(batch, "cuda" if ngpu > 0 else "cpu")
+            if prefetcher is None:
+                with measure_stage("h2d_time"):
+                    batch = to_device(batch, "cuda" if ngpu > 0 else "cpu")
             if no_forward_run:
                 all_steps_are_invalid = False
                 continue
@@ -773,12 +856,33 @@ class Trainer:
                 )
                 start_time = time.perf_counter()
 
+            if cache is not None:
+                prev_cache_stats, cache_stats = cache_stats, cache.stats()
+                hits = cache_stats["hits"] - prev_cache_stats["hits"]
+                misses = cache_stats["misses"] - prev_cache_stats["misses"]
+                reporter.register(
+                    dict(
+                        cache_hits=hits,
+                        cache_misses=misses,
+                        cache_hit_rate=(
+                            100 * hits / (hits + misses) if hits + misses > 0 else None
+                        ),
+                    )
+                )
+
+            if profiler is not None:
+                profiler.register(reporter)
+
             # NOTE(kamo): Call log_message() after next()
             reporter.next()
             if iiter % log_interval == 0:
                 logging.info(reporter.log_message(-log_interval))
                 if summary_writer is not None:
                     reporter.tensorboard_add_scalar(summary_writer, -log_interval)
+                    if profiler is not None:
+                        profiler.tensorboard_add_histogram(
+                            summary_writer, reporter.get_total_count()
+                        )
                 if use_wandb:
                     reporter.wandb_log()
 
@@ -786,6 +890,10 @@ class Trainer:
             if distributed:
                 iterator_stop.fill_(1)
                 torch.distributed.all_reduce(iterator_stop, ReduceOp.SUM)
+        if prefetcher is not None:
+            prefetcher.close()
+        if profiler is not None and profiler.tracing:
+            profiler.stop_trace(trace_path)
         return all_steps_are_invalid
 
     @classmethod
@@ -33,6 +33,26 @@ class AbsTTS(torch.nn.Module, ABC):
         """Return predicted output as a dict."""
         raise NotImplementedError
 
+    def batch_inference(
+        self,
+        text: torch.Tensor,
+        text_lengths: torch.Tensor,
+        **kwargs,
+    ) -> Dict[str, torch.Tensor]:
+        """Return predicted outputs of a mini-batch as a dict.
+
+        The outputs are padded along the time axis and the lengths of
+        the output "<name>" are given as "<name>_lengths".
+        """
+        raise NotImplementedError(
+            f"{self.__class__.__name__} does not support the batch inference"
+        )
+
+    @property
+    def support_batch_inference(self):
+        """Return whether or not batch_inference is implemented."""
+        return type(self).batch_inference is not AbsTTS.batch_inference
+
     @property
     def require_raw_speech(self):
         """Return whether or not raw_speech is required."""
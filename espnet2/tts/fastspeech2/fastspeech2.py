@@ -16,10 +16,15 @@ from espnet2.tts.abs_tts import AbsTTS
 from espnet2.tts.fastspeech2.loss import FastSpeech2Loss
 from espnet2.tts.fastspeech2.variance_predictor import VariancePredictor
 from espnet2.tts.gst.style_encoder import StyleEncoder
+from espnet2.tts.utils.padding import depends_on_padding
 from espnet.nets.pytorch_backend.conformer.encoder import Encoder as ConformerEncoder
 from espnet.nets.pytorch_backend.fastspeech.duration_predictor import DurationPredictor
 from espnet.nets.pytorch_backend.fastspeech.length_regulator import LengthRegulator
-from espnet.nets.pytorch_backend.nets_utils import make_non_pad_mask, make_pad_mask
+from espnet.nets.pytorch_backend.nets_utils import (
+    make_non_pad_mask,
+    make_pad_mask,
+    pad_list,
+)
 from espnet.nets.pytorch_backend.tacotron2.decoder import Postnet
 from espnet.nets.pytorch_backend.transformer.embedding import (
     PositionalEncoding,
@@ -644,13 +649,21 @@ class FastSpeech2(AbsTTS):
         d_masks = make_pad_mask(ilens).to(xs.device)
 
         if self.stop_gradient_from_pitch_predictor:
-            p_outs = self.pitch_predictor(hs.detach(), d_masks.unsqueeze(-1))
+            p_outs = self.pitch_predictor(
+                hs.detach(), d_masks.unsqueeze(-1), is_inference=is_inference
+            )
         else:
-            p_outs = self.pitch_predictor(hs, d_masks.unsqueeze(-1))
+            p_outs = self.pitch_predictor(
+                hs, d_masks.unsqueeze(-1), is_inference=is_inference
+            )
         if self.stop_gradient_from_energy_predictor:
-            e_outs = self.energy_predictor(hs.detach(), d_masks.unsqueeze(-1))
+            e_outs = self.energy_predictor(
+                hs.detach(), d_masks.unsqueeze(-1), is_inference=is_inference
+            )
         else:
-            e_outs = self.energy_predictor(hs, d_masks.unsqueeze(-1))
+            e_outs = self.energy_predictor(
+                hs, d_masks.unsqueeze(-1), is_inference=is_inference
+            )
 
         if is_inference:
             d_outs = self.duration_predictor.inference(hs, d_masks)  # (B, T_text)
@@ -679,6 +692,10 @@ class FastSpeech2(AbsTTS):
             else:
                 olens_in = olens
             h_masks = self._source_mask(olens_in)
+        elif is_inference and xs.size(0) > 1:
+            # mask the padded frames in the batch inference
+            olens_in = self._regulated_lengths(d_outs, alpha)
+            h_masks = self._source_mask(olens_in)
         else:
             h_masks = None
         zs, _ = self.decoder(hs, h_masks)  # (B, T_feats, adim)
@@ -686,14 +703,26 @@ class FastSpeech2(AbsTTS):
             zs.size(0), -1, self.odim
         )  # (B, T_feats, odim)
 
+        if is_inference and xs.size(0) > 1:
+            o_masks = make_pad_mask(
+                olens_in * self.reduction_factor, maxlen=before_outs.size(1)
+            ).to(xs.device)
+        else:
+            o_masks = None
+
         # postnet -> (B, T_feats//r * r, odim)
         if self.postnet is None:
             after_outs = before_outs
         else:
             after_outs = before_outs + self.postnet(
-                before_outs.transpose(1, 2)
+                before_outs.transpose(1, 2), o_masks
             ).transpose(1, 2)
 
+        if o_masks is not None:
+            # NOTE: Zero the padded frames, which are given to the vocoder
+            before_outs = before_outs.masked_fill(o_masks.unsqueeze(-1), 0.0)
+            after_outs = after_outs.masked_fill(o_masks.unsqueeze(-1), 0.0)
+
         return before_outs, after_outs, d_outs, p_outs, e_outs
 
     def inference(
@@ -779,6 +808,130 @@ class FastSpeech2(AbsTTS):
             energy=e_outs[0],
         )
 
+    def batch_inference(
+        self,
+        text: torch.Tensor,
+        text_lengths: torch.Tensor,
+        spembs: Optional[torch.Tensor] = None,
+        sids: Optional[torch.Tensor] = None,
+        lids: Optional[torch.Tensor] = None,
+        alpha: float = 1.0,
+    ) -> Dict[str, torch.Tensor]:
+        """Generate the sequences of a mini-batch of texts.
+
+        Args:
+            text (LongTensor): Batch of padded token ids (B, T_text).
+            text_lengths (LongTensor): Batch of lengths of each input (B,).
+            spembs (Optional[Tensor]): Batch of speaker embeddings (B, spk_embed_dim).
+            sids (Optional[Tensor]): Batch of speaker IDs (B, 1).
+            lids (Optional[Tensor]): Batch of language IDs (B, 1).
+            alpha (float): Alpha to control the speed.
+
+        Returns:
+            Dict[str, Tensor]: Output dict including the following items:
+                * feat_gen (Tensor): Output sequences (B, T_feats, odim).
+                * feat_gen_lengths (LongTensor): Output lengths (B,).
+                * duration (Tensor): Durations (B, T_text + 1).
+                * pitch (Tensor): Pitch sequences (B, T_text + 1, 1).
+                * energy (Tensor): Energy sequences (B, T_text + 1, 1).
+                * {duration,pitch,energy}_lengths (LongTensor): Input lengths (B,).
+
+        """
+        if depends_on_padding(self.encoder) or depends_on_padding(self.decoder):
+            # NOTE: The convolutions of the conformer (or conv1d feed-forward)
+            #   blocks are not masked, so decode one by one to get the same
+            #   outputs as the single sequence inference
+            return self._batch_inference_one_by_one(
+                text, text_lengths, spembs=spembs, sids=sids, lids=lids, alpha=alpha
+            )
+
+        # add eos at the last of each sequence
+        xs = F.pad(text, [0, 1], "constant", self.padding_idx)
+        for i, l in enumerate(text_lengths):
+            xs[i, l] = self.eos
+        ilens = text_lengths + 1
+
+        _, outs, d_outs, p_outs, e_outs = self._forward(
+            xs,
+            ilens,
+            spembs=spembs,
+            sids=sids,
+            lids=lids,
+            is_inference=True,
+            alpha=alpha,
+        )  # (B, T_feats, odim)
+        olens = self._regulated_lengths(d_outs, alpha) * self.reduction_factor
+
+        return dict(
+            feat_gen=outs,
+            feat_gen_lengths=olens,
+            duration=d_outs,
+            duration_lengths=ilens,
+            pitch=p_outs,
+            pitch_lengths=ilens,
+            energy=e_outs,
+            energy_lengths=ilens,
+        )
+
+    def _batch_inference_one_by_one(
+        self,
+        text: torch.Tensor,
+        text_lengths: torch.Tensor,
+        spembs: Optional[torch.Tensor] = None,
+        sids: Optional[torch.Tensor] = None,
+        lids: Optional[torch.Tensor] = None,
+        alpha: float = 1.0,
+    ) -> Dict[str, torch.Tensor]:
+        """Generate the sequences of a mini-batch with inference() for each text.
+
+        The arguments and the outputs are the same as batch_inference().
+
+        """
+        outs = []
+        for i, text_length in enumerate(text_lengths):
+            outs.append(
+                self.inference(
+                    text[i, :text_length],
+                    spembs=None if spembs is None else spembs[i],
+                    sids=None if sids is None else sids[i],
+                    lids=None if lids is None else lids[i],
+                    alpha=alpha,
+                )
+            )
+        ilens = text_lengths + 1
+
+        return dict(
+            feat_gen=pad_list([o["feat_gen"] for o in outs], 0.0),
+            feat_gen_lengths=torch.tensor(
+                [len(o["feat_gen"]) for o in outs], device=text.device
+            ),
+            duration=pad_list([o["duration"] for o in outs], 0),
+            duration_lengths=ilens,
+            pitch=pad_list([o["pitch"] for o in outs], 0.0),
+            pitch_lengths=ilens,
+            energy=pad_list([o["energy"] for o in outs], 0.0),
+            energy_lengths=ilens,
+        )
+
+    def _regulated_lengths(self, ds: torch.Tensor, alpha: float) -> torch.Tensor:
+        """Calculate the lengths of the outputs of the length regulator.
+
+        Args:
+            ds (LongTensor): Batch of durations (B, T_text).
+            alpha (float): Alpha to control the speed.
+
+        Returns:
+            LongTensor: Batch of lengths (B,).
+
+        """
+        if alpha != 1.0:
+            ds = torch.round(ds.float() * alpha).long()
+        olens = ds.sum(dim=1)
+        if olens.sum() == 0:
+            # NOTE: The length regulator fills all the durations with 1 in this case
+            olens = olens.new_full(olens.shape, ds.size(1))
+        return olens
+
     def _integrate_with_spk_embed(
         self, hs: torch.Tensor, spembs: torch.Tensor
     ) -> torch.Tensor:
@@ -0,0 +1,32 @@
+"""Check of the layers whose outputs depend on the padding of the batch."""
+
+import torch
+
+from espnet.nets.pytorch_backend.conformer.convolution import ConvolutionModule
+from espnet.nets.pytorch_backend.transformer.multi_layer_conv import (
+    Conv1dLinear,
+    MultiLayeredConv1d,
+)
+
+
+def depends_on_padding(module: torch.nn.Module) -> bool:
+    """Return whether the valid frames of the outputs depend on the padded frames.
+
+    The convolution modules of the conformer blocks and the conv1d feed-forward
+    blocks with kernel_size > 1 read the padded frames without masking them,
+    so the last frames of a sequence change with the padding of the batch.
+
+    Args:
+        module (torch.nn.Module): Module to check, e.g. an encoder.
+
+    Returns:
+        bool: True if the module contains such a layer.
+
+    """
+    for m in module.modules():
+        if isinstance(m, ConvolutionModule):
+            return True
+        if isinstance(m, (MultiLayeredConv1d, Conv1dLinear)):
+            if m.w_1.kernel_size[0] > 1:
+                return True
+    return False
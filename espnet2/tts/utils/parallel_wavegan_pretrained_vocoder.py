@@ -3,14 +3,17 @@
 
 """Wrapper class for the vocoder model trained with parallel_wavegan repo."""
 
+import inspect
 import logging
 import os
 from pathlib import Path
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 
 import torch
 import yaml
 
+from espnet.nets.pytorch_backend.nets_utils import make_pad_mask, pad_list
+
 
 class ParallelWaveGANPretrainedVocoder(torch.nn.Module):
     """Wrapper class to load the vocoder trained with parallel_wavegan repo."""
@@ -58,3 +61,36 @@ class ParallelWaveGANPretrainedVocoder(torch.nn.Module):
             feats,
             normalize_before=self.normalize_before,
         ).view(-1)
+
+    @torch.no_grad()
+    def batch_forward(
+        self, feats: torch.Tensor, feats_lengths: torch.Tensor
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Generate waveforms of a mini-batch with pretrained vocoder.
+
+        Args:
+            feats (Tensor): Padded feature tensor (B, T_feats, #mels).
+            feats_lengths (Tensor): Feature length tensor (B,).
+
+        Returns:
+            Tensor: Padded waveform tensor (B, T_wav).
+            Tensor: Waveform length tensor (B,).
+
+        """
+        if list(inspect.signature(self.vocoder.forward).parameters) != ["c"]:
+            # The vocoders taking the noise input, e.g. ParallelWaveGAN,
+            # are applied one by one
+            wavs = [self(f[:l]) for f, l in zip(feats, feats_lengths)]
+            wav_lengths = torch.tensor([len(w) for w in wavs], device=feats.device)
+            return pad_list(wavs, 0.0), wav_lengths
+
+        if self.normalize_before:
+            feats = (feats - self.vocoder.mean) / self.vocoder.scale
+        # NOTE: Zero the padded frames, which are seen by the convolutions.
+        #   The inner layers of the vocoder are not masked, so the last samples
+        #   of the shorter utterances can still slightly differ from the
+        #   single sequence inference.
+        feats = feats.masked_fill(make_pad_mask(feats_lengths, feats, 1), 0.0)
+        wav = self.vocoder(feats.transpose(1, 2)).squeeze(1)  # (B, T_wav)
+        upsample_factor = wav.size(1) // feats.size(1)
+        return wav, feats_lengths * upsample_factor
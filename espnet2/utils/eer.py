@@ -3,8 +3,6 @@ Source code from:
 https://github.com/clovaai/voxceleb_trainer/blob/master/tuneThreshold.py
 """
 
-from operator import itemgetter
-
 import numpy
 from sklearn import metrics
 
@@ -37,54 +35,44 @@ def ComputeErrorRates(scores, labels):
     # Sort the scores from smallest to largest, and also get the corresponding
     # indexes of the sorted scores.  We will treat the sorted scores as the
     # thresholds at which the the error-rates are evaluated.
-    sorted_indexes, thresholds = zip(
-        *sorted(
-            [(index, threshold) for index, threshold in enumerate(scores)],
-            key=itemgetter(1),
-        )
-    )
-
-    labels = [labels[i] for i in sorted_indexes]
-    fnrs = []
-    fprs = []
-
-    # At the end of this loop, fnrs[i] is the number of errors made by
-    # incorrectly rejecting scores less than thresholds[i]. And, fprs[i]
-    # is the total number of times that we have correctly accepted scores
-    # greater than thresholds[i].
-    for i in range(0, len(labels)):
-        if i == 0:
-            fnrs.append(labels[i])
-            fprs.append(1 - labels[i])
-        else:
-            fnrs.append(fnrs[i - 1] + labels[i])
-            fprs.append(fprs[i - 1] + 1 - labels[i])
-    fnrs_norm = sum(labels)
+    # NOTE: A stable sort keeps the order of the tied scores.
+    scores = numpy.asarray(scores)
+    sorted_indexes = numpy.argsort(scores, kind="stable")
+    thresholds = scores[sorted_indexes]
+    labels = numpy.asarray(labels, dtype=numpy.int64)[sorted_indexes]
+
+    # fnrs[i] is the number of errors made by incorrectly rejecting scores
+    # less than or equal to thresholds[i]. And, fprs[i] is the total number
+    # of times that we have correctly rejected scores less than or equal to
+    # thresholds[i].
+    fnrs = numpy.cumsum(labels)
+    fprs = numpy.cumsum(1 - labels)
+    fnrs_norm = labels.sum()
     fprs_norm = len(labels) - fnrs_norm
 
     # Now divide by the total number of false negative errors to
     # obtain the false positive rates across all thresholds
-    fnrs = [x / float(fnrs_norm) for x in fnrs]
+    fnrs = fnrs / float(fnrs_norm)
 
     # Divide by the total number of corret positives to get the
     # true positive rate.  Subtract these quantities from 1 to
     # get the false positive rates.
-    fprs = [1 - x / float(fprs_norm) for x in fprs]
+    fprs = 1 - fprs / float(fprs_norm)
     return fnrs, fprs, thresholds
 
 
 # Computes the minimum of the detection cost function.  The comments refer to
 # equations in Section 3 of the NIST 2016 Speaker Recognition Evaluation Plan.
 def ComputeMinDcf(fnrs, fprs, thresholds, p_target, c_miss, c_fa):
-    min_c_det = float("inf")
-    min_c_det_threshold = thresholds[0]
-    for i in range(0, len(fnrs)):
-        # See Equation (2).  it is a weighted sum of false negative
-        # and false positive errors.
-        c_det = c_miss * fnrs[i] * p_target + c_fa * fprs[i] * (1 - p_target)
-        if c_det < min_c_det:
-            min_c_det = c_det
-            min_c_det_threshold = thresholds[i]
+    # See Equation (2).  it is a weighted sum of false negative
+    # and false positive errors.
+    fnrs = numpy.asarray(fnrs)
+    fprs = numpy.asarray(fprs)
+    c_det = c_miss * fnrs * p_target + c_fa * fprs * (1 - p_target)
+    # NOTE: argmin takes the first one among the minimums
+    idx = int(numpy.argmin(c_det))
+    min_c_det = float(c_det[idx])
+    min_c_det_threshold = thresholds[idx]
     # See Equations (3) and (4).  Now we normalize the cost.
     c_def = min(c_miss * p_target, c_fa * (1 - p_target))
     min_dcf = min_c_det / c_def
@@ -0,0 +1,182 @@
+"""Multi-process decoding in a single inference job."""
+
+import heapq
+import logging
+import queue
+import traceback
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import torch
+
+from espnet2.fileio.datadir_writer import DatadirWriter
+
+
+class DatadirRecorder:
+    """Record the writes to DatadirWriter to replay them in another process.
+
+    Examples:
+        >>> recorder = DatadirRecorder()
+        >>> recorder["1best_recog"]["text"]["uttidA"] = "hello"
+        >>> with DatadirWriter("output") as writer:
+        ...     recorder.replay(writer)
+
+    """
+
+    def __init__(self, records: Optional[List] = None, path: Tuple[str, ...] = ()):
+        self.records = [] if records is None else records
+        self.path = path
+
+    def __getitem__(self, key: str) -> "DatadirRecorder":
+        return DatadirRecorder(self.records, self.path + (key,))
+
+    def __setitem__(self, key: str, value: str):
+        self.records.append((self.path, key, value))
+
+    def replay(self, writer: DatadirWriter):
+        for path, key, value in self.records:
+            w = writer
+            for p in path:
+                w = w[p]
+            w[key] = value
+
+
+def _batch_size(batch: Dict[str, Any]) -> int:
+    return max(
+        (v.numel() for v in batch.values() if isinstance(v, torch.Tensor)), default=0
+    )
+
+
+def _decode_worker(
+    decode_fn: Callable,
+    task_queue,
+    result_queue,
+    num_threads: int,
+):
+    torch.set_num_threads(num_threads)
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        index, keys, batch = task
+        recorder = DatadirRecorder()
+        try:
+            decode_fn(recorder, keys, batch)
+        except Exception:
+            result_queue.put((index, None, traceback.format_exc()))
+            break
+        result_queue.put((index, recorder.records, None))
+
+
+def parallel_decode(
+    decode_fn: Callable[[Any, List[str], Dict[str, Any]], None],
+    loader: Iterable[Tuple[List[str], Dict[str, Any]]],
+    writer: DatadirWriter,
+    num_workers: int,
+    num_threads: Optional[int] = None,
+    lookahead: Optional[int] = None,
+):
+    """Decode the batches of the loader in the worker processes.
+
+    The model is loaded only once by the main process. decode_fn is pickled
+    to the workers with the model, whose tensors are moved to the shared memory
+    by torch.multiprocessing instead of being copied.
+    The main process reads the data and sends the batches to the workers.
+    The largest batch of the next "lookahead" batches is sent first,
+    and each worker takes the next batch as soon as it finishes one,
+    so that a long utterance doesn't become a straggler at the end.
+    The writes of the workers are recorded and replayed to the writer
+    in the order of the loader.
+
+    Examples:
+        >>> def decode(speech2text, writer, keys, batch):
+        ...     writer["text"][keys[0]] = speech2text(**batch)[0][0]
+        >>> with DatadirWriter(output_dir) as writer:
+        ...     parallel_decode(
+        ...         functools.partial(decode, speech2text), loader, writer, 4
+        ...     )
+
+    Args:
+        decode_fn: Function to decode a batch, called as decode_fn(writer, keys,
+            batch). It must be picklable, e.g. a partial of a module-level function.
+        loader: Iterable of the keys and batch
+        writer: The writer of the results
+        num_workers: The number of the worker processes
+        num_threads: The number of the threads of torch in each worker.
+            By default, the threads of the main process are divided.
+        lookahead: The number of the batches read ahead for the scheduling
+    """
+    if num_threads is None:
+        num_threads = max(torch.get_num_threads() // num_workers, 1)
+    if lookahead is None:
+        lookahead = 4 * num_workers
+
+    # NOTE: "spawn" is used, since "fork" is not safe with the thread pools
+    #   of torch and CUDA.
+    mp = torch.multiprocessing.get_context("spawn")
+    task_queue = mp.Queue()
+    result_queue = mp.Queue()
+    processes = []
+    for _ in range(num_workers):
+        process = mp.Process(
+            target=_decode_worker,
+            args=(decode_fn, task_queue, result_queue, num_threads),
+            daemon=True,
+        )
+        process.start()
+        processes.append(process)
+
+    iterator = iter(loader)
+    exhausted = False
+    heap = []
+    num_read = 0
+    num_sent = 0
+    num_done = 0
+    num_written = 0
+    # The results waiting for the preceding batches
+    results = {}
+    try:
+        while not (exhausted and num_done == num_read):
+            # 1. Read ahead the batches
+            while not exhausted and len(heap) < lookahead:
+                try:
+                    keys, batch = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                heapq.heappush(heap, (-_batch_size(batch), num_read, keys, batch))
+                num_read += 1
+
+            # 2. Send the largest batches, keeping two batches per worker in queue
+            while len(heap) > 0 and num_sent - num_done < 2 * num_workers:
+                _, index, keys, batch = heapq.heappop(heap)
+                task_queue.put((index, keys, batch))
+                num_sent += 1
+
+            if num_sent == num_done:
+                continue
+
+            # 3. Receive a result and write the results in order
+            try:
+                index, records, error = result_queue.get(timeout=1.0)
+            except queue.Empty:
+                for process in processes:
+                    if not process.is_alive():
+                        raise RuntimeError(
+                            f"A decoding worker died with exitcode={process.exitcode}"
+                        )
+                continue
+            if error is not None:
+                raise RuntimeError(f"Decoding failed in a worker:\n{error}")
+            results[index] = records
+            num_done += 1
+            while num_written in results:
+                DatadirRecorder(results.pop(num_written)).replay(writer)
+                num_written += 1
+    finally:
+        for _ in processes:
+            task_queue.put(None)
+        for process in processes:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+    logging.info(f"Decoded {num_read} batches in {num_workers} processes")
@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+import torch
+
+from espnet2.asr.transducer.rnnt_multi_blank import rnnt_multi_blank
+from espnet2.asr.transducer.rnnt_multi_blank.rnnt import (
+    get_cpu_workspace,
+    rnnt_loss_cpu,
+)
+from espnet2.asr.transducer.rnnt_multi_blank.utils import rnnt_helper
+from espnet2.asr.transducer.rnnt_multi_blank.utils.cpu_utils import cpu_rnnt
+
+
+def _inputs(B, T, U, V):
+    torch.manual_seed(0)
+    acts = torch.randn(B, T, U, V).log_softmax(-1)
+    input_lengths = torch.randint(1, T + 1, (B,), dtype=torch.int32)
+    input_lengths[0] = T
+    label_lengths = torch.randint(0, U, (B,), dtype=torch.int32)
+    label_lengths[-1] = U - 1
+    labels = torch.randint(1, V, (B, U - 1), dtype=torch.int32)
+    for b in range(B):
+        labels[b, label_lengths[b] :] = 0
+    return acts, labels, input_lengths, label_lengths
+
+
+def _loop_cost_and_grad(acts, labels, input_lengths, label_lengths, fastemit):
+    B, T, U, V = acts.shape
+    costs = torch.zeros(B)
+    grads = torch.zeros_like(acts)
+    size, _ = rnnt_helper.get_workspace_size(T, U, B, gpu=False)
+    wrapper = cpu_rnnt.CPURNNT(
+        B, T, U, V, torch.zeros(size), 0, fastemit, 0.0, 1, batch_first=True
+    )
+    wrapper.cost_and_grad(
+        acts.view(-1),
+        grads.view(-1),
+        costs,
+        labels.view(-1),
+        label_lengths,
+        input_lengths,
+    )
+    return costs, grads
+
+
+@pytest.mark.execution_timeout(20)
+@pytest.mark.parametrize("B, T, U, V", [(3, 7, 5, 6), (2, 3, 6, 4), (1, 1, 1, 3)])
+@pytest.mark.parametrize("fastemit", [0.0, 0.1])
+def test_rnnt_loss_cpu(B, T, U, V, fastemit):
+    acts, labels, input_lengths, label_lengths = _inputs(B, T, U, V)
+    expected_costs, expected_grads = _loop_cost_and_grad(
+        acts, labels, input_lengths, label_lengths, fastemit
+    )
+
+    costs = torch.zeros(B)
+    grads = torch.zeros_like(acts)
+    rnnt_loss_cpu(
+        acts, labels, input_lengths, label_lengths, costs, grads, 0, fastemit, 0.0, 0
+    )
+    torch.testing.assert_close(costs, expected_costs, rtol=1e-5, atol=1e-4)
+    torch.testing.assert_close(grads, expected_grads, rtol=1e-5, atol=1e-5)
+
+    scores = torch.zeros(B)
+    rnnt_loss_cpu(
+        acts, labels, input_lengths, label_lengths, scores, None, 0, fastemit, 0.0, 0
+    )
+    torch.testing.assert_close(
+        scores * (1 + fastemit), expected_costs, rtol=1e-5, atol=1e-4
+    )
+
+
+def test_rnnt_loss_backward():
+    acts, labels, input_lengths, label_lengths = _inputs(4, 6, 4, 5)
+    logits = torch.randn(acts.shape, requires_grad=True)
+    loss = rnnt_multi_blank.rnnt_loss(
+        logits, labels, input_lengths, label_lengths, reduction="sum"
+    )
+    loss.backward()
+
+    expected_costs, _ = _loop_cost_and_grad(
+        logits.detach().log_softmax(-1), labels, input_lengths, label_lengths, 0.0
+    )
+    torch.testing.assert_close(loss, expected_costs.sum().unsqueeze(0))
+    assert torch.isfinite(logits.grad).all()
+    # The gradients of the log softmax sum to zero over the vocabulary
+    torch.testing.assert_close(
+        logits.grad.sum(-1), torch.zeros(logits.shape[:3]), atol=1e-5, rtol=0
+    )
+
+
+def test_CpuRNNT_workspace():
+    workspace = cpu_rnnt.CpuRNNT_workspace()
+    a, b = workspace.get(torch.float32, (2, 3), (4,))
+    assert a.shape == (2, 3) and b.shape == (4,)
+    buffer = workspace.buffers[torch.float32]
+    # Smaller requests reuse the buffer
+    (c,) = workspace.get(torch.float32, (5,))
+    assert c.data_ptr() == buffer.data_ptr()
+    workspace.get(torch.float32, (20,))
+    assert workspace.buffers[torch.float32].numel() == 20
+
+
+def test_rnnt_loss_cpu_workspace_per_thread():
+    workspaces = []
+
+    def run():
+        acts, labels, input_lengths, label_lengths = _inputs(2, 4, 3, 5)
+        costs = torch.zeros(2)
+        rnnt_loss_cpu(
+            acts, labels, input_lengths, label_lengths, costs, None, 0, 0.0, 0.0, 0
+        )
+        workspaces.append(get_cpu_workspace())
+
+    threads = [threading.Thread(target=run) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert workspaces[0] is not workspaces[1]
+    assert len(workspaces[0].buffers) > 0
+    assert get_cpu_workspace() not in workspaces
+
+
+def test_RNNTLossNumba_workspace():
+    acts, labels, input_lengths, label_lengths = _inputs(3, 5, 4, 6)
+    criterion = rnnt_multi_blank.RNNTLossNumba(reduction="sum")
+    loss = criterion(acts, labels, input_lengths, label_lengths)
+    assert len(criterion.cpu_workspace.buffers) > 0
+    assert criterion.cpu_workspace is not get_cpu_workspace()
+
+    criterion.release_workspace()
+    assert len(criterion.cpu_workspace.buffers) == 0
+    torch.testing.assert_close(
+        criterion(acts, labels, input_lengths, label_lengths), loss
+    )
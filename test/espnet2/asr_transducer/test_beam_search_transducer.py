@@ -118,6 +118,47 @@ def test_transducer_beam_search(decoder_class, decoder_opts, search_opts):
         _ = beam(enc_out)
 
 
+@pytest.mark.execution_timeout(10)
+@pytest.mark.parametrize(
+    "decoder_class, decoder_opts",
+    [
+        (RNNDecoder, {"embed_size": 4, "hidden_size": 4}),
+        (StatelessDecoder, {"embed_size": 4}),
+        (MEGADecoder, {"block_size": 4}),
+    ],
+)
+@pytest.mark.parametrize("beam_size", [1, 2])
+def test_transducer_batch_decode(decoder_class, decoder_opts, beam_size):
+    vocab_size = 4
+    encoder_size = 4
+
+    decoder = decoder_class(vocab_size, **decoder_opts)
+    joint_net = JointNetwork(vocab_size, encoder_size, 4, joint_space_size=2)
+
+    beam = BeamSearchTransducer(
+        decoder, joint_net, beam_size=beam_size, nbest=beam_size
+    )
+
+    enc_out = torch.randn(3, 20, encoder_size)
+    enc_out_lens = torch.tensor([20, 7, 13])
+
+    with torch.no_grad():
+        batch_hyps = beam.batch_decode(enc_out, enc_out_lens)
+
+        for i, length in enumerate(enc_out_lens):
+            nbest_hyps = beam.batch_decode(
+                enc_out[i : i + 1, :length], enc_out_lens[i : i + 1]
+            )[0]
+
+            assert len(batch_hyps[i]) <= beam_size
+            assert [h.yseq for h in batch_hyps[i]] == [h.yseq for h in nbest_hyps]
+            assert [h.score for h in batch_hyps[i]] == pytest.approx(
+                [h.score for h in nbest_hyps], abs=1e-4
+            )
+            # At most one label per frame
+            assert len(batch_hyps[i][0].yseq) <= length + 1
+
+
 @pytest.mark.parametrize(
     "search_opts",
     [
@@ -219,6 +219,41 @@ def test_encoder(input_conf, body_conf, main_conf):
         _ = ebranchformer_encoder(sequence, sequence_len)
 
 
+@pytest.mark.parametrize(
+    "input_conf",
+    [
+        {"subsampling_factor": 2},
+        {"subsampling_factor": 4},
+        {"subsampling_factor": 6},
+        {"vgg_like": True},
+        {"vgg_like": True, "subsampling_factor": 6},
+    ],
+)
+def test_encoder_output_lengths(input_conf):
+    input_size = 20
+    body_conf = [
+        {
+            "block_type": "conformer",
+            "hidden_size": 4,
+            "linear_size": 2,
+            "conv_mod_kernel_size": 3,
+        }
+    ]
+
+    encoder = Encoder(input_size, body_conf, input_conf=input_conf).eval()
+
+    sequence = torch.randn(3, 50, input_size)
+    sequence_len = torch.tensor([50, 31, 17], dtype=torch.long)
+
+    with torch.no_grad():
+        _, out_len = encoder(sequence, sequence_len)
+
+        for i, length in enumerate(sequence_len):
+            out, _ = encoder(sequence[i : i + 1, :length], sequence_len[i : i + 1])
+
+            assert out_len[i] == out.size(1)
+
+
 @pytest.mark.parametrize(
     "input_conf, body_conf",
     [
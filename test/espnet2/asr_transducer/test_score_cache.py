@@ -0,0 +1,100 @@
+import pytest
+import torch
+
+from espnet2.asr_transducer.beam_search_transducer import (
+    BeamSearchTransducer,
+    Hypothesis,
+)
+from espnet2.asr_transducer.decoder.rnn_decoder import RNNDecoder
+from espnet2.asr_transducer.decoder.score_cache import ScoreCache
+from espnet2.asr_transducer.joint_network import JointNetwork
+
+
+def test_score_cache():
+    cache = ScoreCache(max_size=2)
+
+    cache.set([0, 1], "a")
+    cache.set([0, 1, 2], "b")
+    assert cache.get([0, 1]) == "a"
+    assert cache.get([0]) is None
+    assert cache.get([0, 2]) is None
+
+    # [0, 1, 2] is the least recently used entry
+    cache.set([0, 3], "c")
+    assert cache.batch_get([[0, 1], [0, 1, 2], [0, 3]]) == ["a", None, "c"]
+    assert 2 not in cache.root.children[0].children[1].children
+
+    assert cache.stats() == {"size": 2, "hits": 3, "misses": 3, "evictions": 1}
+
+    cache.reset()
+    assert len(cache) == 0
+    assert cache.get([0, 1]) is None
+
+
+def test_score_cache_prune():
+    cache = ScoreCache(max_size=1)
+
+    cache.set([0, 1, 2, 3], "a")
+    cache.set([4], "b")
+
+    assert list(cache.root.children) == [4]
+
+
+def test_score_cache_unbounded():
+    cache = ScoreCache(max_size=0)
+
+    for i in range(100):
+        cache.set([0, i], i)
+
+    assert len(cache) == 100
+
+
+def test_rnn_decoder_batch_score_cache():
+    decoder = RNNDecoder(4, embed_size=4, hidden_size=4)
+    hyps = [
+        Hypothesis(score=0.0, yseq=[0, i], dec_state=decoder.init_state(1))
+        for i in range(1, 4)
+    ]
+
+    with torch.no_grad():
+        out, states = decoder.batch_score(hyps)
+        assert len(decoder.score_cache) == 3
+
+        # Mixed hits and misses give the same result as the full computation
+        decoder.score_cache.reset()
+        decoder.batch_score(hyps[1:2])
+        cached_out, cached_states = decoder.batch_score(hyps)
+
+    assert decoder.score_cache.hits == 1
+    torch.testing.assert_close(cached_out, out)
+    torch.testing.assert_close(cached_states[0], states[0])
+    torch.testing.assert_close(cached_states[1], states[1])
+
+
+@pytest.mark.execution_timeout(10)
+@pytest.mark.parametrize("search_type", ["default", "alsd", "tsd", "maes"])
+def test_beam_search_score_cache_size(search_type):
+    torch.manual_seed(0)
+    decoder = RNNDecoder(4, embed_size=4, hidden_size=4)
+    joint_net = JointNetwork(4, 4, 4, joint_space_size=2)
+    enc_out = torch.randn(20, 4)
+
+    results = []
+    for score_cache_size in [0, 1]:
+        beam = BeamSearchTransducer(
+            decoder,
+            joint_net,
+            beam_size=2,
+            search_type=search_type,
+            nbest=2,
+            score_cache_size=score_cache_size,
+        )
+        assert beam.decoder.score_cache.max_size == score_cache_size
+
+        with torch.no_grad():
+            results.append([(h.yseq, h.score) for h in beam(enc_out)])
+
+    assert [yseq for yseq, _ in results[0]] == [yseq for yseq, _ in results[1]]
+    assert [score for _, score in results[0]] == pytest.approx(
+        [score for _, score in results[1]]
+    )
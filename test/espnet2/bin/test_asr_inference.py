@@ -87,6 +87,38 @@ def test_Speech2Text(asr_config_file, lm_config_file):
         assert isinstance(hyp, Hypothesis)
 
 
+@pytest.mark.execution_timeout(10)
+@pytest.mark.parametrize("decoder", ["rnn", "transformer"])
+def test_Speech2Text_decode_batch(tmp_path, token_list, decoder):
+    ASRTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "asr_batch"),
+            "--token_list",
+            str(token_list),
+            "--token_type",
+            "char",
+            "--decoder",
+            decoder,
+        ]
+    )
+    speech2text = Speech2Text(
+        asr_train_config=tmp_path / "asr_batch" / "config.yaml",
+        beam_size=2,
+        batch_size=2,
+    )
+    speech = np.random.randn(2, 1000)
+    speech_lengths = np.array([1000, 800])
+    batch_results = speech2text.decode_batch(speech, speech_lengths)
+    assert len(batch_results) == 2
+    for results in batch_results:
+        for text, token, token_int, hyp in results:
+            assert isinstance(text, str)
+            assert isinstance(hyp, Hypothesis)
+
+
 @pytest.mark.execution_timeout(10)
 def test_Speech2Text_quantized(asr_config_file, lm_config_file):
     speech2text = Speech2Text(
@@ -0,0 +1,171 @@
+import asyncio
+import json
+import string
+from argparse import ArgumentParser
+from pathlib import Path
+
+import numpy as np
+import pytest
+import yaml
+
+from espnet2.bin.asr_inference_streaming import Speech2TextStreaming
+from espnet2.bin.asr_streaming_server import (
+    CHUNK_HEADER,
+    StreamingASREngine,
+    StreamingASRServer,
+    get_parser,
+    main,
+)
+from espnet2.tasks.asr import ASRTask
+
+
+def test_get_parser():
+    assert isinstance(get_parser(), ArgumentParser)
+
+
+def test_main():
+    with pytest.raises(SystemExit):
+        main()
+
+
+@pytest.fixture()
+def token_list(tmp_path: Path):
+    with (tmp_path / "tokens.txt").open("w") as f:
+        f.write("<blank>\n")
+        for c in string.ascii_letters:
+            f.write(f"{c}\n")
+        f.write("<unk>\n")
+        f.write("<sos/eos>\n")
+    return tmp_path / "tokens.txt"
+
+
+@pytest.fixture()
+def asr_config_file_streaming(tmp_path: Path, token_list):
+    # Write default configuration file
+    ASRTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "asr_streaming"),
+            "--token_list",
+            str(token_list),
+            "--token_type",
+            "char",
+            "--decoder",
+            "transformer",
+            "--encoder",
+            "contextual_block_transformer",
+            "--encoder_conf",
+            "output_size=16",
+            "--encoder_conf",
+            "linear_units=16",
+            "--encoder_conf",
+            "num_blocks=2",
+            "--encoder_conf",
+            "look_ahead=4",
+            "--encoder_conf",
+            "hop_size=4",
+            "--encoder_conf",
+            "block_size=10",
+            "--decoder_conf",
+            "linear_units=16",
+            "--decoder_conf",
+            "num_blocks=1",
+        ]
+    )
+    return tmp_path / "asr_streaming" / "config.yaml"
+
+
+@pytest.fixture()
+def speech2text(asr_config_file_streaming):
+    with open(asr_config_file_streaming, "r", encoding="utf-8") as f:
+        asr_train_config = yaml.full_load(f)
+    asr_train_config["frontend_conf"] = {"n_fft": 128, "hop_length": 64}
+    with open(asr_config_file_streaming, "w", encoding="utf-8") as f:
+        yaml.dump(asr_train_config, f)
+    return Speech2TextStreaming(
+        asr_train_config=asr_config_file_streaming, beam_size=2, maxlenratio=0.3
+    )
+
+
+def _chunks(speech, chunk_length):
+    n = max(len(speech) // chunk_length, 1)
+    for i in range(n - 1):
+        yield speech[i * chunk_length : (i + 1) * chunk_length], False
+    yield speech[(n - 1) * chunk_length :], True
+
+
+def _decode(speech2text, speech, chunk_length):
+    for chunk, is_final in _chunks(speech, chunk_length):
+        results = speech2text(chunk, is_final=is_final)
+    return [(text, token) for text, token, _, _ in results]
+
+
+@pytest.mark.execution_timeout(30)
+@pytest.mark.parametrize("max_batch_size", [1, 2, 64])
+def test_StreamingASREngine(speech2text, max_batch_size):
+    rng = np.random.RandomState(0)
+    # The streams have various lengths and chunk sizes,
+    # so the sessions are at different blocks at each step.
+    streams = {
+        f"session{i}": (rng.randn(2000 + 1000 * i), chunk_length)
+        for i, chunk_length in enumerate([256, 500, 1024, 3000, 700])
+    }
+    expected = {
+        k: _decode(speech2text, speech, chunk_length)
+        for k, (speech, chunk_length) in streams.items()
+    }
+    assert all(len(v) > 0 for v in expected.values())
+
+    engine = StreamingASREngine(speech2text, max_batch_size=max_batch_size)
+    iterators = {}
+    for k, (speech, chunk_length) in streams.items():
+        engine.open(k)
+        iterators[k] = _chunks(speech, chunk_length)
+    results = {}
+    while len(iterators) > 0:
+        chunks = {k: next(v) for k, v in iterators.items()}
+        for k, ret in engine.step(chunks).items():
+            if chunks[k][1]:
+                results[k] = [(text, token) for text, token, _, _ in ret]
+                iterators.pop(k)
+                engine.close(k)
+    assert results == expected
+    assert len(engine.sessions) == 0
+
+
+@pytest.mark.execution_timeout(30)
+def test_StreamingASRServer(speech2text):
+    rng = np.random.RandomState(0)
+    streams = [rng.randn(3000 + 500 * i).astype(np.float32) for i in range(4)]
+    expected = [_decode(speech2text, speech, 512)[0][0] for speech in streams]
+    engine = StreamingASREngine(speech2text)
+
+    async def client(port, speech):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        for chunk, is_final in _chunks(speech, 512):
+            writer.write(CHUNK_HEADER.pack(is_final, len(chunk)) + chunk.tobytes())
+            await writer.drain()
+            message = json.loads(await reader.readline())
+            assert message["is_final"] == is_final
+        writer.close()
+        return message["text"]
+
+    async def run():
+        async with StreamingASRServer(engine) as server:
+            tcp_server = await asyncio.start_server(
+                server.handle_client, "127.0.0.1", 0
+            )
+            port = tcp_server.sockets[0].getsockname()[1]
+            async with tcp_server:
+                texts = await asyncio.gather(
+                    *[client(port, speech) for speech in streams]
+                )
+            # In-process client
+            results = await server.recognize("local", streams[0], is_final=True)
+        return texts, results[0][0]
+
+    texts, text = asyncio.run(run())
+    assert texts == expected
+    assert text == _decode(speech2text, streams[0], len(streams[0]))[0][0]
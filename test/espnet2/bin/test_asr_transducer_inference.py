@@ -173,6 +173,26 @@ def test_Speech2Text(use_lm, token_type, asr_config_file, lm_config_file):
         assert isinstance(hyp, Hypothesis)
 
 
+@pytest.mark.execution_timeout(10)
+@pytest.mark.parametrize("beam_size", [1, 2])
+def test_Speech2Text_batch_decode(asr_config_file, beam_size):
+    speech2text = Speech2Text(
+        asr_train_config=asr_config_file, beam_size=beam_size, token_type="char"
+    )
+    speech = torch.randn(2, 10000)
+    speech_lengths = torch.tensor([10000, 6000])
+
+    batch_hyps = speech2text.batch_decode(speech, speech_lengths)
+    assert len(batch_hyps) == 2
+
+    for hyps in batch_hyps:
+        for text, token, token_int, hyp in speech2text.hypotheses_to_results(hyps):
+            assert isinstance(text, str)
+            assert isinstance(token, List)
+            assert isinstance(token_int, List)
+            assert isinstance(hyp, Hypothesis)
+
+
 @pytest.mark.execution_timeout(10)
 @pytest.mark.parametrize(
     "use_lm, token_type, beam_search_config, decoding_window, left_context",
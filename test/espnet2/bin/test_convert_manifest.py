@@ -0,0 +1,35 @@
+from argparse import ArgumentParser
+
+import numpy as np
+import pytest
+
+from espnet2.bin.convert_manifest import get_parser, main
+from espnet2.fileio.manifest import ManifestReader
+
+
+def test_get_parser():
+    assert isinstance(get_parser(), ArgumentParser)
+
+
+def test_main():
+    with pytest.raises(SystemExit):
+        main()
+
+
+def test_main_convert(tmp_path):
+    p = tmp_path / "token_int"
+    with p.open("w") as f:
+        f.write("a 1 2 3\n")
+        f.write("b 4\n")
+    main(
+        [
+            "--input",
+            str(p),
+            "--output",
+            str(tmp_path / "out" / "token_int.mf"),
+            "--data_type",
+            "text_int",
+        ]
+    )
+    reader = ManifestReader(tmp_path / "out" / "token_int.mf")
+    np.testing.assert_array_equal(reader["a"], [1, 2, 3])
@@ -2,6 +2,7 @@ import string
 from argparse import ArgumentParser
 from pathlib import Path
 
+import numpy as np
 import pytest
 import torch
 import yaml
@@ -66,6 +67,35 @@ def test_SeparateSpeech(
     separate_speech(wav, fs=8000)
 
 
+@pytest.mark.execution_timeout(10)
+@pytest.mark.parametrize("num_spk", [1, 2])
+@pytest.mark.parametrize("normalize_segment_scale", [False, True])
+def test_SeparateSpeech_segment_batch_size(
+    tmp_path, config_file, num_spk, normalize_segment_scale
+):
+    with open(config_file, "r") as f:
+        args = yaml.safe_load(f)
+    args["separator_conf"] = {"num_spk": num_spk}
+    with open(tmp_path / "config.yaml", "w") as f:
+        yaml_no_alias_safe_dump(args, f, indent=4, sort_keys=False)
+
+    separate_speech = SeparateSpeech(
+        train_config=tmp_path / "config.yaml",
+        segment_size=1.6,
+        hop_size=0.8,
+        normalize_segment_scale=normalize_segment_scale,
+    )
+    wav = torch.rand(2, 35000)
+    waves = []
+    for segment_batch_size in [1, 3]:
+        separate_speech.segment_batch_size = segment_batch_size
+        waves.append(separate_speech(wav, fs=8000))
+    assert len(waves[1]) == num_spk
+    for w1, w2 in zip(*waves):
+        assert w2.shape == wav.shape
+        np.testing.assert_allclose(w1, w2, rtol=1e-4, atol=1e-5)
+
+
 @pytest.fixture()
 def enh_inference_config(tmp_path: Path):
     # Write default configuration file
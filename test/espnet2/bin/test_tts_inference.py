@@ -2,6 +2,7 @@ import string
 from argparse import ArgumentParser
 from pathlib import Path
 
+import numpy as np
 import pytest
 
 from espnet2.bin.tts_inference import Text2Speech, get_parser, main
@@ -57,3 +58,80 @@ def test_Text2Speech(config_file):
     text2speech = Text2Speech(train_config=config_file)
     text = "aiueo"
     text2speech(text)
+
+
+@pytest.fixture()
+def fastspeech2_config_file(tmp_path: Path, token_list):
+    # Write default configuration file
+    TTSTask.main(
+        cmd=[
+            "--dry_run",
+            "true",
+            "--output_dir",
+            str(tmp_path / "fastspeech2"),
+            "--token_list",
+            str(token_list),
+            "--token_type",
+            "char",
+            "--cleaner",
+            "none",
+            "--g2p",
+            "none",
+            "--normalize",
+            "none",
+            "--tts",
+            "fastspeech2",
+            "--tts_conf",
+            "{adim: 4, aheads: 2, elayers: 1, eunits: 4, dlayers: 1, dunits: 4}",
+        ]
+    )
+    return tmp_path / "fastspeech2" / "config.yaml"
+
+
+@pytest.mark.execution_timeout(20)
+def test_Text2Speech_synthesize_batch(fastspeech2_config_file):
+    text2speech = Text2Speech(train_config=fastspeech2_config_file)
+    texts = [
+        text2speech.preprocess_fn("<dummy>", dict(text=t))["text"]
+        for t in ["aiueo", "ka"]
+    ]
+    text = np.zeros((2, 5), dtype=np.int64)
+    for i, t in enumerate(texts):
+        text[i, : len(t)] = t
+    results = text2speech.synthesize_batch(text, np.array([5, 2]))
+    assert len(results) == 2
+    for t, result in zip(texts, results):
+        assert len(result["duration"]) == len(t) + 1
+        assert len(result["feat_gen"]) == result["duration"].sum()
+        if text2speech.vocoder is not None:
+            assert len(result["wav"]) > 0
+
+
+def test_Text2Speech_synthesize_batch_not_supported(config_file):
+    text2speech = Text2Speech(train_config=config_file)
+    with pytest.raises(NotImplementedError):
+        text2speech.synthesize_batch(np.ones((1, 3), dtype=np.int64), np.array([3]))
+
+
+@pytest.mark.execution_timeout(30)
+def test_main_batch_size(tmp_path: Path, fastspeech2_config_file):
+    with (tmp_path / "text").open("w") as f:
+        for i, t in enumerate(["aiueo", "ka", "sasisuseso", "ta"]):
+            f.write(f"utt{i} {t}\n")
+    main(
+        cmd=[
+            "--output_dir",
+            str(tmp_path / "out"),
+            "--batch_size",
+            "3",
+            "--num_workers",
+            "0",
+            "--train_config",
+            str(fastspeech2_config_file),
+            "--data_path_and_name_and_type",
+            f"{tmp_path / 'text'},text,text",
+        ]
+    )
+    with (tmp_path / "out" / "durations" / "durations").open() as f:
+        keys = sorted(line.split()[0] for line in f)
+    assert keys == ["utt0", "utt1", "utt2", "utt3"]
@@ -0,0 +1,55 @@
+from argparse import ArgumentParser
+
+import numpy as np
+import pytest
+
+from espnet2.bin.write_shards import get_parser, main
+from espnet2.fileio.shard import ShardReader, read_shard_list
+from espnet2.fileio.sound_scp import SoundScpWriter
+
+
+def test_get_parser():
+    assert isinstance(get_parser(), ArgumentParser)
+
+
+def test_main():
+    with pytest.raises(SystemExit):
+        main()
+
+
+@pytest.mark.parametrize("shuffle", ["true", "false"])
+def test_main_write(tmp_path, shuffle):
+    writer = SoundScpWriter(tmp_path / "wav", tmp_path / "wav.scp")
+    audios = {}
+    for i in range(3):
+        audios[f"u{i}"] = np.random.randint(-100, 100, (100 * (i + 1),), np.int16)
+        writer[f"u{i}"] = 16000, audios[f"u{i}"]
+    writer.close()
+    with (tmp_path / "token_int").open("w") as f:
+        for i in range(3):
+            f.write(f"u{i} {' '.join(map(str, range(i + 1)))}\n")
+
+    main(
+        [
+            "--data_path_and_name_and_type",
+            f"{tmp_path / 'wav.scp'},speech,sound",
+            "--data_path_and_name_and_type",
+            f"{tmp_path / 'token_int'},text,text_int",
+            "--output_dir",
+            str(tmp_path / "shards"),
+            "--max_samples_per_shard",
+            "2",
+            "--shuffle",
+            shuffle,
+        ]
+    )
+    assert len(read_shard_list(tmp_path / "shards" / "shards.list")) == 2
+    speech = ShardReader(tmp_path / "shards" / "speech.idx", dtype="int16")
+    for uid, audio in audios.items():
+        np.testing.assert_array_equal(speech[uid][1], audio)
+    text = ShardReader(tmp_path / "shards" / "text.idx")
+    np.testing.assert_array_equal(text["u2"], [0, 1, 2])
+
+    with (tmp_path / "shards" / "speech_shape").open() as f:
+        shapes = dict(line.split() for line in f)
+    assert shapes == {"u0": "100", "u1": "200", "u2": "300"}
@@ -28,3 +28,17 @@ def test_DatadirWriter(tmp_path: Path):
         f["aa2"]["ccccc"] = "aaa"
         # Duplicated warning
         f["aa2"]["ccccc"] = "def"
+
+
+def test_DatadirWriter_write_lines(tmp_path: Path):
+    with DatadirWriter(tmp_path) as f:
+        f["aa"].write_lines(["a", "b"], ["1", "2,3"])
+        f["aa"]["c"] = "4"
+        with pytest.raises(ValueError):
+            f["aa"].write_lines(["d"], [])
+        with pytest.warns(UserWarning, match="Duplicated"):
+            f["aa"].write_lines(["a"], ["5"])
+        with pytest.raises(RuntimeError):
+            # Is a directory
+            f.write_lines(["a"], ["1"])
+    assert (tmp_path / "aa").read_text() == "a 1\nb 2,3\nc 4\na 5\n"
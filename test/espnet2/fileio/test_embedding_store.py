@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from espnet2.fileio.embedding_store import EmbeddingStore, EmbeddingStoreWriter
+
+
+def test_EmbeddingStore(tmp_path: Path):
+    embeddings = {
+        f"utt{i}": np.random.randn(3, 4).astype(np.float32) for i in range(10)
+    }
+    keys = list(embeddings)
+    with EmbeddingStoreWriter(tmp_path, chunk_size=4, prefix="rank0") as writer:
+        writer.write_batch(keys[:6], np.stack([embeddings[k] for k in keys[:6]]))
+        writer[keys[6]] = embeddings[keys[6]]
+        with pytest.raises(RuntimeError):
+            writer[keys[0]] = embeddings[keys[0]]
+    # Another process appends to the same store
+    with EmbeddingStoreWriter(tmp_path, prefix="rank1") as writer:
+        writer.write_batch(keys[7:], np.stack([embeddings[k] for k in keys[7:]]))
+
+    store = EmbeddingStore(tmp_path)
+    assert len(store) == 10
+    assert set(store) == set(keys)
+    assert "utt3" in store and "utt10" not in store
+    np.testing.assert_array_equal(store["utt9"], embeddings["utt9"])
+    with pytest.raises(KeyError):
+        store["utt10"]
+
+    query = ["utt9", "utt0", "utt5", "utt7", "utt0"]
+    np.testing.assert_array_equal(
+        store.get_matrix(query), np.stack([embeddings[k] for k in query])
+    )
+    assert store.missing_keys(["utt1", "utt10", "utt11"]) == ["utt10", "utt11"]
+
+
+def test_EmbeddingStore_float16(tmp_path: Path):
+    value = np.random.randn(2, 8).astype(np.float32)
+    with EmbeddingStoreWriter(tmp_path, dtype="float16") as writer:
+        writer.write_batch(["a", "b"], value)
+    store = EmbeddingStore(tmp_path)
+    assert store["a"].dtype == np.float16
+    matrix = store.get_matrix(["b", "a"], dtype=np.float32)
+    assert matrix.dtype == np.float32
+    np.testing.assert_allclose(matrix, value[::-1], rtol=1e-3, atol=1e-3)
+
+
+def test_EmbeddingStore_empty(tmp_path: Path):
+    store = EmbeddingStore(tmp_path / "none")
+    assert len(store) == 0
+    assert store.missing_keys(["a"]) == ["a"]
+    with pytest.raises(KeyError):
+        store.get_matrix(["a"])
+    with EmbeddingStoreWriter(tmp_path / "none"):
+        pass
+    assert list((tmp_path / "none").iterdir()) == []
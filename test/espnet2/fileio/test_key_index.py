@@ -0,0 +1,52 @@
+import pickle
+
+import pytest
+
+from espnet2.fileio.key_index import CompactTextDict, KeyIndex
+
+
+def test_KeyIndex():
+    keys = [f"utt{i}" for i in range(100)] + ["", "日本語"]
+    index = KeyIndex(keys)
+    assert len(index) == len(keys)
+    assert list(index) == keys
+    assert index[-1] == "日本語"
+    for i, k in enumerate(keys):
+        assert index[i] == k
+        assert index.index(k) == i
+        assert k in index
+    assert "utt100" not in index
+    assert index.find("utt100") == -1
+    with pytest.raises(KeyError):
+        index.index("utt100")
+    with pytest.raises(IndexError):
+        index[len(keys)]
+
+
+def test_KeyIndex_empty():
+    index = KeyIndex([])
+    assert len(index) == 0
+    assert "a" not in index
+
+
+def test_KeyIndex_duplicated():
+    with pytest.raises(RuntimeError):
+        KeyIndex(["a", "b", "a"])
+
+
+def test_KeyIndex_pickle():
+    index = pickle.loads(pickle.dumps(KeyIndex(["a", "b"])))
+    assert index.index("b") == 1
+
+
+def test_CompactTextDict():
+    d = CompactTextDict(KeyIndex(["a", "b", "c"]), ["x y", "", "z"])
+    assert dict(d) == {"a": "x y", "b": "", "c": "z"}
+    assert "c" in d
+    with pytest.raises(KeyError):
+        d["d"]
+
+
+def test_CompactTextDict_mismatch():
+    with pytest.raises(ValueError):
+        CompactTextDict(KeyIndex(["a", "b"]), ["x"])
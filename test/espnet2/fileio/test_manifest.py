@@ -0,0 +1,73 @@
+import pickle
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from espnet2.fileio.manifest import (
+    ManifestReader,
+    convert_to_manifest,
+    is_manifest,
+    write_manifest,
+)
+from espnet2.fileio.read_text import load_num_sequence_text, read_2columns_text
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100000])
+@pytest.mark.parametrize(
+    "data_type, lines",
+    [
+        ("text", ["a hello world", "b", "c 日本語"]),
+        ("csv_int", ["a 100,80", "b 3", "c 1,2,3"]),
+        ("text_int", ["a 1 2 3", "b 4", "c 5 6"]),
+        ("text_float", ["a 1.5 2.", "b 0.25", "c 3."]),
+    ],
+)
+def test_convert_to_manifest(tmp_path: Path, data_type, lines, chunk_size):
+    p = tmp_path / "input"
+    with p.open("w", encoding="utf-8") as f:
+        for line in lines:
+            f.write(line + "\n")
+    convert_to_manifest(p, tmp_path / "out.mf", data_type, chunk_size=chunk_size)
+    assert is_manifest(tmp_path / "out.mf")
+    assert not is_manifest(p)
+
+    reader = ManifestReader(tmp_path / "out.mf")
+    assert reader.data_type == data_type
+    assert list(reader) == ["a", "b", "c"]
+    if data_type == "text":
+        assert dict(reader) == read_2columns_text(p)
+    else:
+        desired = load_num_sequence_text(p, loader_type=data_type)
+        for k, v in desired.items():
+            np.testing.assert_allclose(reader[k], v)
+        assert reader.lengths.tolist() == [len(v) for v in desired.values()]
+
+    # The memory-mapped file is opened again
+    reader2 = pickle.loads(pickle.dumps(reader))
+    assert list(reader2.keys()) == list(reader.keys())
+
+
+def test_write_manifest_sound(tmp_path: Path):
+    write_manifest(tmp_path / "wav.mf", "sound", ["a", "b"], ["a.wav", "b.wav"])
+    reader = ManifestReader(tmp_path / "wav.mf")
+    assert reader["b"] == "b.wav"
+    assert "c" not in reader
+    with pytest.raises(KeyError):
+        reader["c"]
+
+
+def test_write_manifest_invalid(tmp_path: Path):
+    with pytest.raises(ValueError):
+        write_manifest(tmp_path / "a.mf", "foo", ["a"], ["a"])
+    with pytest.raises(ValueError):
+        write_manifest(tmp_path / "a.mf", "text", ["a", "b"], ["a"])
+    with pytest.raises(RuntimeError):
+        write_manifest(tmp_path / "a.mf", "text", ["a", "a"], ["a", "b"])
+
+
+def test_ManifestReader_not_manifest(tmp_path: Path):
+    p = tmp_path / "wav.scp"
+    p.write_text("a a.wav\n")
+    with pytest.raises(RuntimeError):
+        ManifestReader(p)
@@ -3,9 +3,11 @@ from pathlib import Path
 import numpy as np
 import pytest
 
+from espnet2.fileio.manifest import convert_to_manifest
 from espnet2.fileio.read_text import (
     load_num_sequence_text,
     read_2columns_text,
+    read_2columns_text_compact,
     read_label,
     read_multi_columns_text,
 )
@@ -21,6 +23,45 @@ def test_read_2columns_text(tmp_path: Path):
     assert d == {"abc": "/some/path/a.wav", "def": "/some/path/b.wav", "ghi": ""}
 
 
+def test_read_2columns_text_compact(tmp_path: Path):
+    p = tmp_path / "dummy.scp"
+    with p.open("w") as f:
+        f.write("abc /some/path/a.wav\n")
+        f.write("def /some/path/b.wav\n")
+        f.write("ghi\n")
+    d = read_2columns_text_compact(p)
+    assert dict(d) == read_2columns_text(p)
+
+    # The same keys in a different order share the index
+    p2 = tmp_path / "text"
+    with p2.open("w") as f:
+        f.write("ghi c\n")
+        f.write("abc a\n")
+        f.write("def b\n")
+    d2 = read_2columns_text_compact(p2, key_index=d.key_index)
+    assert d2.key_index is d.key_index
+    assert dict(d2) == {"abc": "a", "def": "b", "ghi": "c"}
+
+    # The different keys don't
+    p3 = tmp_path / "text2"
+    with p3.open("w") as f:
+        f.write("abc a\n")
+        f.write("jkl b\n")
+        f.write("ghi c\n")
+    d3 = read_2columns_text_compact(p3, key_index=d.key_index)
+    assert d3.key_index is not d.key_index
+    assert dict(d3) == {"abc": "a", "jkl": "b", "ghi": "c"}
+
+
+def test_read_2columns_text_compact_duplicated(tmp_path: Path):
+    p = tmp_path / "dummy.scp"
+    with p.open("w") as f:
+        f.write("abc a\n")
+        f.write("abc b\n")
+    with pytest.raises(RuntimeError):
+        read_2columns_text_compact(p)
+
+
 @pytest.mark.parametrize("return_unsplit", [True, False])
 def test_multi_columns_text(tmp_path: Path, return_unsplit):
     p = tmp_path / "dummy.scp"
@@ -76,6 +117,21 @@ def test_load_num_sequence_text(loader_type: str, tmp_path: Path):
         np.testing.assert_array_equal(target[k], desired[k])
 
 
+@pytest.mark.parametrize("loader_type", ["text_int", "csv_int", "csv_float"])
+def test_load_num_sequence_text_manifest(loader_type: str, tmp_path: Path):
+    p = tmp_path / "dummy.txt"
+    delimiter = "," if "csv" in loader_type else " "
+    with p.open("w") as f:
+        f.write("abc " + delimiter.join(["0", "1", "2"]) + "\n")
+        f.write("def 3\n")
+    convert_to_manifest(p, tmp_path / "dummy.mf", loader_type)
+
+    target = load_num_sequence_text(tmp_path / "dummy.mf", loader_type=loader_type)
+    assert target == load_num_sequence_text(p, loader_type=loader_type)
+    assert list(target) == ["abc", "def"]
+    assert type(target["def"][0]) is (float if "float" in loader_type else int)
+
+
 def test_load_num_sequence_text_invalid(tmp_path: Path):
     p = tmp_path / "dummy.txt"
     with p.open("w") as f:
@@ -0,0 +1,109 @@
+import io
+
+import numpy as np
+import pytest
+import soundfile
+
+from espnet2.fileio.shard import (
+    SHARD_LIST,
+    ShardReader,
+    ShardWriter,
+    decode_member,
+    encode_array,
+    encode_audio,
+    iter_shard,
+    load_shard_member,
+    read_shard_list,
+    split_member_name,
+)
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.RandomState(0)
+    return {
+        f"utt.{i}": {
+            "speech": rng.randint(-100, 100, (160 * (i + 1),), dtype=np.int16),
+            "text": f"hello {i}",
+            "token": np.arange(i + 1),
+        }
+        for i in range(5)
+    }
+
+
+@pytest.fixture
+def shard_dir(tmp_path, samples):
+    with ShardWriter(tmp_path / "shards", max_samples=2) as writer:
+        for uid, sample in samples.items():
+            writer.write(
+                uid,
+                {
+                    "speech": ("wav", encode_audio(sample["speech"], 16000)),
+                    "text": ("txt", sample["text"].encode()),
+                    "token": ("npy", encode_array(sample["token"])),
+                },
+            )
+    return tmp_path / "shards"
+
+
+def test_split_member_name():
+    assert split_member_name("a.b.speech.wav") == ("a.b", "speech", "wav")
+    with pytest.raises(RuntimeError):
+        split_member_name("speech.wav")
+
+
+def test_decode_member():
+    rate, array = decode_member("wav", encode_audio(np.zeros(10, np.int16), 8000))
+    assert rate == 8000 and array.shape == (10,)
+    np.testing.assert_array_equal(decode_member("npy", encode_array(np.ones(3))), 1)
+    assert decode_member("txt", b"abc") == "abc"
+    with pytest.raises(RuntimeError):
+        decode_member("foo", b"")
+
+
+def test_ShardWriter(shard_dir):
+    shards = read_shard_list(shard_dir / SHARD_LIST)
+    assert [n for _, n in shards] == [2, 2, 1]
+    for name in ("speech", "text", "token"):
+        assert (shard_dir / f"{name}.idx").exists()
+
+
+def test_ShardWriter_invalid_name(tmp_path):
+    with ShardWriter(tmp_path) as writer:
+        with pytest.raises(RuntimeError):
+            writer.write("a", {"x.y": ("txt", b"")})
+
+
+def test_iter_shard(shard_dir, samples):
+    uids = []
+    for path, _ in read_shard_list(shard_dir / SHARD_LIST):
+        for uid, members in iter_shard(path):
+            uids.append(uid)
+            assert members["text"] == ("txt", samples[uid]["text"].encode())
+            array, _ = soundfile.read(io.BytesIO(members["speech"][1]), dtype="int16")
+            np.testing.assert_array_equal(array, samples[uid]["speech"])
+    assert uids == list(samples)
+
+
+def test_load_shard_member(shard_dir, samples):
+    with (shard_dir / "token.idx").open() as f:
+        for line in f:
+            uid, value = line.split()
+            np.testing.assert_array_equal(
+                load_shard_member(value), samples[uid]["token"]
+            )
+
+
+def test_ShardReader(shard_dir, samples):
+    reader = ShardReader(shard_dir / "speech.idx", dtype="int16")
+    assert reader.is_audio
+    assert len(reader) == len(samples)
+    assert list(reader) == list(samples)
+    assert "utt.0" in reader
+    rate, array = reader["utt.3"]
+    assert rate == 16000
+    np.testing.assert_array_equal(array, samples["utt.3"]["speech"])
+
+    reader = ShardReader(shard_dir / "text.idx")
+    assert not reader.is_audio
+    assert reader["utt.1"] == "hello 1"
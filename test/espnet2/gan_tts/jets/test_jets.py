@@ -944,3 +944,57 @@ def test_multi_speaker_jets_is_trainable_and_decodable_on_gpu(
         inputs = {k: v.to(device) for k, v in inputs.items()}
         output_dict = model.inference(**inputs, use_teacher_forcing=True)
         assert output_dict["wav"].size(0) == inputs["feats"].size(0) * upsample_factor
+
+
+@pytest.mark.execution_timeout(10)
+@pytest.mark.parametrize("spks, spk_embed_dim, langs", [(-1, -1, -1), (4, 5, 3)])
+@pytest.mark.parametrize("encoder_type", ["transformer", "conformer"])
+def test_jets_batch_inference(spks, spk_embed_dim, langs, encoder_type):
+    idim = 10
+    odim = 5
+    gen_args = make_jets_generator_args()
+    gen_args["generator_params"]["encoder_type"] = encoder_type
+    gen_args["generator_params"]["decoder_type"] = encoder_type
+    gen_args["generator_params"]["spks"] = spks
+    gen_args["generator_params"]["langs"] = langs
+    gen_args["generator_params"]["spk_embed_dim"] = spk_embed_dim
+    model = JETS(
+        idim=idim,
+        odim=odim,
+        **gen_args,
+        **make_jets_discriminator_args(),
+        **make_jets_loss_args(),
+    )
+    model.eval()
+    # NOTE: Avoid the durations of all 0
+    duration_predictor = model.generator.duration_predictor
+    torch.nn.init.constant_(duration_predictor.linear.bias, 1.5)
+    torch.nn.init.normal_(duration_predictor.linear.weight, std=0.1)
+    upsample_factor = model.generator.upsample_factor
+    inputs = dict(text=torch.randint(0, idim, (3, 5)))
+    if spks > 0:
+        inputs["sids"] = torch.randint(0, spks, (3, 1))
+    if langs > 0:
+        inputs["lids"] = torch.randint(0, langs, (3, 1))
+    if spk_embed_dim > 0:
+        inputs["spembs"] = torch.randn(3, spk_embed_dim)
+
+    with torch.no_grad():
+        text_lengths = torch.tensor([5, 2, 3])
+        outs = model.batch_inference(**inputs, text_lengths=text_lengths)
+        assert outs["wav"].size(1) == outs["wav_lengths"].max()
+        for i, text_length in enumerate(text_lengths):
+            assert (outs["duration"][i, text_length:] == 0).all()
+            feats_length = outs["duration"][i].sum()
+            assert outs["wav_lengths"][i] == feats_length * upsample_factor
+
+            # Each utterance gives the same outputs as the single inference
+            single_inputs = {k: v[i] for k, v in inputs.items()}
+            single_inputs["text"] = single_inputs["text"][:text_length]
+            out = model.inference(**single_inputs)
+            wav_length = outs["wav_lengths"][i]
+            assert wav_length == len(out["wav"])
+            torch.testing.assert_close(outs["wav"][i, :wav_length], out["wav"])
+            torch.testing.assert_close(
+                outs["duration"][i, :text_length], out["duration"]
+            )
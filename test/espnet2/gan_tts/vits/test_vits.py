@@ -662,3 +662,54 @@ def test_multi_speaker_vits_is_trainable_and_decodable_on_gpu(
         inputs = {k: v.to(device) for k, v in inputs.items()}
         output_dict = model.inference(**inputs, use_teacher_forcing=True)
         assert output_dict["wav"].size(0) == inputs["feats"].size(0) * upsample_factor
+
+
+@pytest.mark.execution_timeout(10)
+@pytest.mark.parametrize("spks, spk_embed_dim, langs", [(-1, -1, -1), (4, 5, 3)])
+def test_vits_batch_inference(spks, spk_embed_dim, langs):
+    idim = 10
+    odim = 5
+    gen_args = make_vits_generator_args()
+    gen_args["generator_params"]["spks"] = spks
+    gen_args["generator_params"]["langs"] = langs
+    gen_args["generator_params"]["spk_embed_dim"] = spk_embed_dim
+    gen_args["generator_params"]["global_channels"] = 8
+    model = VITS(
+        idim=idim,
+        odim=odim,
+        **gen_args,
+        **make_vits_discriminator_args(),
+        **make_vits_loss_args(),
+    )
+    model.eval()
+    upsample_factor = model.generator.upsample_factor
+    inputs = dict(text=torch.randint(0, idim, (3, 5)))
+    if spks > 0:
+        inputs["sids"] = torch.randint(0, spks, (3, 1))
+    if langs > 0:
+        inputs["lids"] = torch.randint(0, langs, (3, 1))
+    if spk_embed_dim > 0:
+        inputs["spembs"] = torch.randn(3, spk_embed_dim)
+    # NOTE: No noise to compare the outputs
+    decode_conf = dict(noise_scale=0.0, noise_scale_dur=0.0)
+
+    with torch.no_grad():
+        # The batch without padding gives the same outputs as the single inference
+        batch = {k: torch.cat([v[:1], v[:1]]) for k, v in inputs.items()}
+        outs = model.batch_inference(
+            **batch, text_lengths=torch.tensor([5, 5]), **decode_conf
+        )
+        out = model.inference(**{k: v[0] for k, v in inputs.items()}, **decode_conf)
+        for i in range(2):
+            assert outs["wav_lengths"][i] == len(out["wav"])
+            torch.testing.assert_close(outs["wav"][i], out["wav"])
+            torch.testing.assert_close(outs["duration"][i], out["duration"])
+
+        text_lengths = torch.tensor([5, 2, 3])
+        outs = model.batch_inference(**inputs, text_lengths=text_lengths, **decode_conf)
+        assert outs["wav"].size(1) == outs["wav_lengths"].max()
+        for i, text_length in enumerate(text_lengths):
+            assert (outs["duration"][i, text_length:] == 0).all()
+            feats_length = outs["duration"][i].sum().clamp(min=1)
+            assert outs["att_w_lengths"][i] == feats_length
+            assert outs["wav_lengths"][i] == feats_length * upsample_factor
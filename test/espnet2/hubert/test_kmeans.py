@@ -0,0 +1,104 @@
+import pickle
+
+import numpy as np
+import pytest
+
+from espnet2.hubert.kmeans import (
+    StreamingKMeans,
+    assign_labels,
+    iterate_minibatches,
+    read_feature_shards,
+)
+
+
+def _blobs(n_clusters=8, n_per_cluster=500, dim=16, seed=0):
+    rng = np.random.RandomState(seed)
+    centers = rng.randn(n_clusters, dim).astype(np.float32) * 10
+    labels = np.repeat(np.arange(n_clusters), n_per_cluster)
+    feats = centers[labels] + rng.randn(len(labels), dim).astype(np.float32)
+    perm = rng.permutation(len(labels))
+    return feats[perm], labels[perm], centers
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 100000])
+def test_assign_labels(block_size):
+    rng = np.random.RandomState(0)
+    feats = rng.randn(50, 4)
+    centers = rng.randn(6, 4)
+    dist = ((feats[:, None] - centers[None]) ** 2).sum(-1)
+
+    labels, distances = assign_labels(feats, centers, block_size=block_size)
+    np.testing.assert_array_equal(labels, dist.argmin(1))
+    np.testing.assert_allclose(distances, dist.min(1), rtol=1e-6, atol=1e-6)
+
+
+@pytest.mark.parametrize("batch_size", [64, 4000])
+def test_StreamingKMeans(batch_size):
+    feats, labels, _ = _blobs()
+    km = StreamingKMeans(n_clusters=8, init_size=256, seed=0)
+    for start in range(0, len(feats), batch_size):
+        km.partial_fit(feats[start : start + batch_size])
+    km.finalize()
+
+    assert km.cluster_centers_.shape == (8, 16)
+    assert km.counts_.sum() == len(feats)
+    # Each blob is recovered as one cluster
+    pred = km.predict(feats)
+    for k in range(8):
+        assert len(np.unique(pred[labels == k])) == 1
+    assert len(np.unique(pred)) == 8
+    # The inertia is the one of the noise
+    assert -km.score(feats) / len(feats) < 20
+
+
+def test_StreamingKMeans_finalize():
+    feats, _, _ = _blobs(n_clusters=2, n_per_cluster=10, dim=3)
+    km = StreamingKMeans(n_clusters=2, init_size=100)
+    km.partial_fit(feats)
+    assert km.cluster_centers_ is None
+
+    km.finalize()
+    assert km.counts_.sum() == len(feats)
+    assert km.predict(feats).shape == (len(feats),)
+
+
+def test_StreamingKMeans_pickle():
+    feats, _, _ = _blobs(n_clusters=2, n_per_cluster=10, dim=3)
+    km = StreamingKMeans(n_clusters=2).partial_fit(feats).finalize()
+    km2 = pickle.loads(pickle.dumps(km))
+    np.testing.assert_array_equal(km.predict(feats), km2.predict(feats))
+
+
+@pytest.mark.parametrize("buffer_size", [0, 50])
+def test_iterate_minibatches(buffer_size):
+    rng = np.random.RandomState(0)
+    feats = [rng.randn(n, 3) for n in [5, 17, 1, 30]]
+
+    batches = list(iterate_minibatches(feats, 8, buffer_size))
+    assert [len(b) for b in batches[:-1]] == [8] * 6
+    assert len(batches[-1]) == 5
+
+    expected = np.concatenate(feats)
+    actual = np.concatenate(batches)
+    if buffer_size == 0:
+        np.testing.assert_array_equal(actual, expected)
+    else:
+        np.testing.assert_array_equal(
+            np.sort(actual, axis=0), np.sort(expected, axis=0)
+        )
+
+
+def test_read_feature_shards_npy(tmp_path):
+    rng = np.random.RandomState(0)
+    shards = [rng.randn(n, 4).astype(np.float32) for n in [10, 25]]
+    paths = []
+    for i, shard in enumerate(shards):
+        paths.append(str(tmp_path / f"shard{i}.npy"))
+        np.save(paths[-1], shard)
+
+    chunks = list(read_feature_shards(paths, "npy", chunk_size=8))
+    assert [len(c) for c in chunks] == [8, 2, 8, 8, 8, 1]
+    np.testing.assert_array_equal(np.concatenate(chunks), np.concatenate(shards))
+
+    chunks = list(read_feature_shards(paths, "npy", percent=0.5, chunk_size=8))
+    assert 0 < sum(len(c) for c in chunks) < 35
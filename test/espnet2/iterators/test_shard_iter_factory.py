@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from espnet2.fileio.shard import ShardWriter, encode_array
+from espnet2.iterators.shard_iter_factory import ShardIterFactory
+from espnet2.train.collate_fn import CommonCollateFn
+from espnet2.train.iterable_dataset import ShardIterableESPnetDataset
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    with ShardWriter(tmp_path / "shards", max_samples=4) as writer:
+        for i in range(10):
+            writer.write(f"utt{i}", {"dummy": ("npy", encode_array(np.full(3, i)))})
+    return ShardIterableESPnetDataset(
+        [(str(tmp_path / "shards" / "dummy.idx"), "dummy", "shard")],
+        shuffle=True,
+        buffer_size=3,
+    )
+
+
+def test_ShardIterFactory(dataset):
+    iter_factory = ShardIterFactory(dataset, batch_size=4, collate_fn=CommonCollateFn())
+    keys = []
+    for ids, batch in iter_factory.build_iter(1):
+        assert batch["dummy"].shape == (len(ids), 3)
+        keys += ids
+    assert sorted(keys) == sorted(f"utt{i}" for i in range(10))
+    assert keys == sum((ids for ids, _ in iter_factory.build_iter(1)), [])
+
+
+def test_ShardIterFactory_num_iters_per_epoch(dataset):
+    iter_factory = ShardIterFactory(
+        dataset, batch_size=2, num_iters_per_epoch=2, collate_fn=CommonCollateFn()
+    )
+    assert len(list(iter_factory.build_iter(1))) == 2
@@ -1,3 +1,5 @@
+import os
+
 import pytest
 import torch
 
@@ -65,3 +67,50 @@ def test_average_nbest_models_0epoch_reporter(output_dir, nbest):
             best_model_criterion=[("valid", "acc", "max")],
             nbest=nbest,
         )
+
+
+@pytest.mark.parametrize("dtype", [torch.float32, torch.float16])
+def test_average_nbest_models_values(reporter, tmp_path, dtype):
+    states = [
+        {
+            "w": torch.randn(3, 4).to(dtype),
+            "n": torch.tensor(i, dtype=torch.long),
+        }
+        for i in range(3)
+    ]
+    for e, state in enumerate(states, 1):
+        torch.save(state, tmp_path / f"{e}epoch.pth")
+    average_nbest_models(
+        reporter=reporter,
+        output_dir=tmp_path,
+        best_model_criterion=[("valid", "acc", "max")],
+        nbest=[2, 3],
+    )
+
+    for n in [2, 3]:
+        avg = torch.load(tmp_path / f"valid.acc.ave_{n}best.pth")
+        # The best models are the later epochs
+        expected = sum(s["w"].float() for s in states[-n:]) / n
+        assert avg["w"].dtype == dtype
+        torch.testing.assert_close(avg["w"], expected.to(dtype))
+        assert avg["n"].item() == sum(s["n"].item() for s in states[-n:])
+    assert (tmp_path / "valid.acc.ave.pth").resolve().name == "valid.acc.ave_3best.pth"
+
+
+@pytest.mark.parametrize(
+    "nbest, expected",
+    [(1, "ave_1best"), (5, "ave_1best"), ([4, 5], "ave_1best"), ([2, 5], "ave_2best")],
+)
+def test_average_nbest_models_symlink(reporter, output_dir, nbest, expected):
+    average_nbest_models(
+        reporter=reporter,
+        output_dir=output_dir,
+        best_model_criterion=[("valid", "acc", "max")],
+        nbest=nbest,
+    )
+    sym_op = output_dir / "valid.acc.ave.pth"
+    assert sym_op.is_symlink()
+    assert os.readlink(sym_op) == f"valid.acc.{expected}.pth"
+    if expected == "ave_1best":
+        # The best model is the last epoch
+        assert os.readlink(output_dir / "valid.acc.ave_1best.pth") == "3epoch.pth"
@@ -0,0 +1,128 @@
+import numpy as np
+import pytest
+import torch
+
+from espnet2.main_funcs.collect_stats import (
+    batch_moments,
+    collect_stats,
+    merge_moments,
+    merge_stats,
+    merge_stats_dirs,
+    moments_to_stats,
+)
+from espnet2.train.abs_espnet_model import AbsESPnetModel
+
+
+class DummyModel(AbsESPnetModel):
+    def forward(self, x, x_lengths):
+        return x.sum(), {}, x.new_tensor(1.0)
+
+    def collect_feats(self, x, x_lengths):
+        return {"feats": x * 2 + 100, "feats_lengths": x_lengths}
+
+
+def make_data(seed, num):
+    rng = np.random.RandomState(seed)
+    keys = [f"utt{seed}_{i}" for i in range(num)]
+    seqs = [rng.randn(rng.randint(1, 10), 3).astype(np.float32) for _ in keys]
+    return keys, seqs
+
+
+def make_iter(keys, seqs, batch_size=3):
+    for i in range(0, len(keys), batch_size):
+        b_keys = keys[i : i + batch_size]
+        b_seqs = seqs[i : i + batch_size]
+        lengths = torch.tensor([len(s) for s in b_seqs])
+        x = torch.zeros(len(b_seqs), int(lengths.max()), 3)
+        for j, s in enumerate(b_seqs):
+            x[j, : len(s)] = torch.from_numpy(s)
+        yield b_keys, {"x": x, "x_lengths": lengths}
+
+
+def run_collect_stats(output_dir, keys, seqs):
+    collect_stats(
+        model=DummyModel(),
+        train_iter=make_iter(keys, seqs),
+        valid_iter=make_iter(keys, seqs),
+        output_dir=output_dir,
+        ngpu=0,
+        log_interval=None,
+        write_collected_feats=False,
+    )
+
+
+@pytest.mark.parametrize("with_lengths", [True, False])
+def test_batch_moments(with_lengths):
+    x = torch.randn(4, 5, 3, generator=torch.Generator().manual_seed(0))
+    if with_lengths:
+        lengths = torch.tensor([5, 2, 1, 3])
+        rows = torch.cat([x[i, :lg] for i, lg in enumerate(lengths)]).numpy()
+    else:
+        lengths = None
+        rows = x.numpy()
+    count, mean, m2 = batch_moments(x, lengths)
+    assert count == len(rows)
+    # NOTE: The float32 means are close to 0, so compare them with atol too
+    np.testing.assert_allclose(mean.numpy(), rows.mean(0), rtol=1e-6, atol=1e-6)
+    np.testing.assert_allclose(
+        m2.numpy(), ((rows - rows.mean(0)) ** 2).sum(0), rtol=1e-5, atol=1e-6
+    )
+
+
+def test_merge_moments():
+    x = np.random.randn(100, 2) + 1e4
+    a = (30, x[:30].mean(0), ((x[:30] - x[:30].mean(0)) ** 2).sum(0))
+    b = (70, x[30:].mean(0), ((x[30:] - x[30:].mean(0)) ** 2).sum(0))
+    count, mean, m2 = merge_moments(a, b)
+    assert count == 100
+    np.testing.assert_allclose(mean, x.mean(0))
+    np.testing.assert_allclose(m2, ((x - x.mean(0)) ** 2).sum(0), rtol=1e-8)
+    assert merge_moments((0, 0.0, 0.0), b) is b
+
+
+def test_merge_stats_old_format():
+    x = np.random.randn(10, 2)
+    old = dict(count=10, sum=x.sum(0), sum_square=(x**2).sum(0))
+    new = moments_to_stats(10, x.mean(0), ((x - x.mean(0)) ** 2).sum(0))
+    merged = merge_stats([old, new])
+    assert merged["count"] == 20
+    np.testing.assert_allclose(merged["sum"], 2 * x.sum(0), rtol=1e-5)
+    np.testing.assert_allclose(merged["sum_square"], 2 * (x**2).sum(0), rtol=1e-5)
+
+
+def test_collect_stats(tmp_path):
+    keys, seqs = make_data(0, 10)
+    run_collect_stats(tmp_path, keys, seqs)
+
+    rows = np.concatenate(seqs) * 2 + 100
+    stats = np.load(tmp_path / "train" / "feats_stats.npz")
+    assert stats["count"] == len(rows)
+    assert stats["sum"].dtype == np.float32
+    np.testing.assert_allclose(stats["sum"], rows.sum(0), rtol=1e-5)
+    np.testing.assert_allclose(stats["sum_square"], (rows**2).sum(0), rtol=1e-5)
+
+    with (tmp_path / "train" / "x_shape").open() as f:
+        lines = f.read().splitlines()
+    assert lines == [f"{k} {len(s)},3" for k, s in zip(keys, seqs)]
+
+
+def test_merge_stats_dirs(tmp_path):
+    keys, seqs = make_data(0, 10)
+    run_collect_stats(tmp_path / "all", keys, seqs)
+    run_collect_stats(tmp_path / "0", keys[:4], seqs[:4])
+    run_collect_stats(tmp_path / "1", keys[4:], seqs[4:])
+    merge_stats_dirs([tmp_path / "0", tmp_path / "1"], tmp_path / "merged")
+
+    for mode in ["train", "valid"]:
+        for name in ["x_shape", "batch_keys", "stats_keys"]:
+            with (tmp_path / "all" / mode / name).open() as f:
+                expected = sorted(f.read().splitlines())
+            with (tmp_path / "merged" / mode / name).open() as f:
+                assert sorted(f.read().splitlines()) == expected
+
+        for key in ["feats", "feats_lengths"]:
+            expected = np.load(tmp_path / "all" / mode / f"{key}_stats.npz")
+            merged = np.load(tmp_path / "merged" / mode / f"{key}_stats.npz")
+            assert set(merged) == set(expected)
+            for k in expected:
+                np.testing.assert_allclose(merged[k], expected[k], rtol=1e-6)
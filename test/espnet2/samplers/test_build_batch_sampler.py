@@ -1,5 +1,6 @@
 import pytest
 
+from espnet2.fileio.manifest import convert_to_manifest
 from espnet2.samplers.build_batch_sampler import build_batch_sampler
 
 
@@ -50,6 +51,19 @@ def test_build_batch_sampler(shape_files, type):
         list(sampler)
 
 
+@pytest.mark.parametrize("type", ["unsorted", "sorted", "folded", "length", "numel"])
+def test_build_batch_sampler_manifest(shape_files, type, tmp_path):
+    manifests = []
+    for i, s in enumerate(shape_files):
+        manifests.append(str(tmp_path / f"shape{i}.mf"))
+        convert_to_manifest(s, manifests[-1], "csv_int")
+
+    kwargs = dict(batch_bins=60000, batch_size=2, fold_lengths=[800, 40], type=type)
+    sampler = build_batch_sampler(shape_files=manifests, **kwargs)
+    desired = build_batch_sampler(shape_files=shape_files, **kwargs)
+    assert list(sampler) == list(desired)
+
+
 def test_build_batch_sampler_invalid_fold_lengths(shape_files):
     with pytest.raises(ValueError):
         build_batch_sampler(
@@ -82,3 +82,11 @@ def test_LengthBatchSampler_len(
         padding=padding,
     )
     len(sampler)
+
+
+def test_LengthBatchSampler_cache(shape_files, tmp_path):
+    kwargs = dict(batch_bins=3000, shape_files=shape_files)
+    sampler = LengthBatchSampler(**kwargs, cache_dir=str(tmp_path / "cache"))
+    assert len(list((tmp_path / "cache").glob("*.npz"))) == 1
+    cached = LengthBatchSampler(**kwargs, cache_dir=str(tmp_path / "cache"))
+    assert list(cached) == list(sampler) == list(LengthBatchSampler(**kwargs))
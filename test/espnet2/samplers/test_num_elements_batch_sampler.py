@@ -82,3 +82,52 @@ def test_NumElementsBatchSampler_len(
         padding=padding,
     )
     len(sampler)
+
+
+@pytest.mark.parametrize("padding", [True, False])
+def test_NumElementsBatchSampler_batches(shape_files, padding):
+    sampler = NumElementsBatchSampler(
+        200000,
+        shape_files=shape_files,
+        sort_in_batch="ascending",
+        sort_batch="ascending",
+        padding=padding,
+    )
+    assert list(sampler) == [("b", "d", "c", "f"), ("a", "e")]
+
+
+def test_NumElementsBatchSampler_min_batch_size(shape_files):
+    sampler = NumElementsBatchSampler(
+        60000,
+        shape_files=shape_files,
+        min_batch_size=4,
+        sort_in_batch="ascending",
+        sort_batch="ascending",
+    )
+    assert list(sampler) == [("b", "d", "c", "f", "a", "e")]
+
+
+def test_NumElementsBatchSampler_cache(shape_files, tmp_path):
+    kwargs = dict(batch_bins=100000, shape_files=shape_files, padding=False)
+    sampler = NumElementsBatchSampler(**kwargs, cache_dir=str(tmp_path / "cache"))
+    assert len(list((tmp_path / "cache").glob("*.npz"))) == 1
+    cached = NumElementsBatchSampler(**kwargs, cache_dir=str(tmp_path / "cache"))
+    assert list(cached) == list(sampler) == list(NumElementsBatchSampler(**kwargs))
+
+
+def test_NumElementsBatchSampler_unified_dims(tmp_path):
+    p = tmp_path / "shape.txt"
+    with p.open("w") as f:
+        f.write("a 100,80\n")
+        f.write("b 200,40\n")
+    with pytest.raises(RuntimeError):
+        NumElementsBatchSampler(1000, shape_files=[str(p)], padding=True)
+    NumElementsBatchSampler(1000, shape_files=[str(p)], padding=False)
+
+
+def test_NumElementsBatchSampler_mismatched_keys(shape_files, tmp_path):
+    p = tmp_path / "shape3.txt"
+    with p.open("w") as f:
+        f.write("a 100,80\n")
+    with pytest.raises(RuntimeError):
+        NumElementsBatchSampler(1000, shape_files=[shape_files[0], str(p)])
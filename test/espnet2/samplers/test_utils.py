@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from espnet2.fileio.read_text import load_num_sequence_text
+from espnet2.samplers.utils import find_batch_sizes, load_shapes
+
+
+def test_load_shapes(tmp_path):
+    p = tmp_path / "shape"
+    with p.open("w") as f:
+        f.write("a 100,80\n")
+        f.write("b 3\n")
+        f.write("c 1,2,3\n")
+    keys, flat, offsets = load_shapes(p)
+    desired = load_num_sequence_text(p, loader_type="csv_int")
+    assert keys == list(desired)
+    for i, k in enumerate(keys):
+        assert flat[offsets[i] : offsets[i + 1]].tolist() == desired[k]
+
+
+def test_load_shapes_invalid(tmp_path):
+    p = tmp_path / "shape"
+    with p.open("w") as f:
+        f.write("a 100,80\n")
+        f.write("b\n")
+    with pytest.raises(RuntimeError):
+        load_shapes(p)
+
+
+@pytest.mark.parametrize("padding", [True, False])
+@pytest.mark.parametrize("min_batch_size", [1, 3])
+def test_find_batch_sizes(padding, min_batch_size):
+    weights = np.random.RandomState(0).randint(1, 100, 1000)
+    batch_bins = 500
+
+    # Reference: Add the samples one by one
+    desired = []
+    current = []
+    for w in weights:
+        current.append(w)
+        bins = len(current) * w if padding else sum(current)
+        if bins > batch_bins and len(current) >= min_batch_size:
+            desired.append(len(current))
+            current = []
+
+    batch_sizes, remainder = find_batch_sizes(
+        weights, batch_bins, min_batch_size, padding
+    )
+    assert batch_sizes == desired
+    assert remainder == len(current)
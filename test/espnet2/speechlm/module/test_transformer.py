@@ -0,0 +1,41 @@
+import pytest
+import torch
+
+from espnet2.speechlm.module.transformer import StaticKVCache, TransformerDecoder
+from espnet2.speechlm.net_utils import install_kv_cache_hook
+
+
+@pytest.mark.parametrize("max_len", [8, 2])
+def test_static_kv_cache(max_len):
+    torch.manual_seed(0)
+    decoder = TransformerDecoder(n_ctx=20, n_state=8, n_head=2, n_layer=2).eval()
+    x = torch.randn(2, 8, 8)
+    expected = decoder(x)
+
+    # If max_len is exceeded, the buffers grow
+    cache = StaticKVCache(max_len)
+    ys = [decoder(x[:, :5], kv_cache=cache)]
+    for t in range(5, 8):
+        ys.append(decoder(x[:, t : t + 1], kv_cache=cache))
+    assert cache.offset == 8
+    torch.testing.assert_close(torch.cat(ys, dim=1), expected)
+
+
+def test_static_kv_cache_same_as_concat():
+    torch.manual_seed(0)
+    decoder = TransformerDecoder(n_ctx=20, n_state=8, n_head=2, n_layer=2).eval()
+    x = torch.randn(2, 6, 8)
+
+    outputs = []
+    for cache_type in ["static", "concat"]:
+        if cache_type == "static":
+            cache, hooks = StaticKVCache(6), []
+        else:
+            cache, hooks = install_kv_cache_hook(decoder, {})
+        ys = [decoder(x[:, :3], kv_cache=cache)]
+        for t in range(3, 6):
+            ys.append(decoder(x[:, t : t + 1], kv_cache=cache))
+        for hook in hooks:
+            hook.remove()
+        outputs.append(torch.cat(ys, dim=1))
+    torch.testing.assert_close(outputs[0], outputs[1])
@@ -0,0 +1,105 @@
+import pytest
+import torch
+
+from espnet2.speechlm.core_lm.abs_core_lm import SpeechLMInferenceOptions
+from espnet2.speechlm.core_lm.ar_multiscale import MultiScaleLM
+from espnet2.speechlm.core_lm.valle import ValleLM
+from espnet2.speechlm.generation_engine import SpeechLMGenerationEngine
+from espnet2.speechlm.module.kv_cache import PagedKVCache
+from espnet2.speechlm.module.transformer import TransformerDecoder
+
+VOCAB_SIZE = 40
+NQ = 3
+
+
+def make_corelm(corelm_type):
+    torch.manual_seed(0)
+    if corelm_type == "valle":
+        corelm = ValleLM(
+            VOCAB_SIZE, NQ, att_unit=16, head=2, ar_layer=2, nar_layer=2, n_ctx=200
+        )
+    else:
+        corelm = MultiScaleLM(
+            VOCAB_SIZE,
+            NQ,
+            g_att_unit=16,
+            g_head=2,
+            g_layer=2,
+            l_att_unit=16,
+            l_head=2,
+            l_layer=1,
+            n_ctx=200,
+        )
+    # Make <eos> likely to be emitted
+    with torch.no_grad():
+        corelm.lm_head.weight[1] += 5.0 * torch.randn(16)
+    return corelm.eval()
+
+
+def make_opts(search_algo="greedy_search"):
+    masks = torch.ones(NQ, VOCAB_SIZE).bool()
+    masks[:, 5:] = False
+    return SpeechLMInferenceOptions(
+        search_algo=search_algo,
+        top_k=5,
+        maxlenratio=10.0,
+        minlenratio=1.0,
+        eos=1,
+        start=2,
+        masks=masks,
+        nq=NQ,
+    )
+
+
+@pytest.mark.execution_timeout(20)
+@pytest.mark.parametrize("corelm_type", ["valle", "multiscale"])
+def test_generate(corelm_type):
+    corelm = make_corelm(corelm_type)
+    torch.manual_seed(1)
+    prompts = [
+        (f"utt{i}", torch.randint(5, VOCAB_SIZE, (1, 3 + i % 3, NQ))) for i in range(5)
+    ]
+
+    engine = SpeechLMGenerationEngine(
+        corelm, make_opts(), max_batch_size=2, block_size=4, num_blocks=30
+    )
+    results = {key: tokens for key, tokens, _ in engine.generate(prompts)}
+    assert set(results) == {key for key, _ in prompts}
+    assert engine.kv_cache.num_free_blocks == 30
+
+    # Same as decoding one by one
+    for key, prefix in prompts:
+        tokens, _ = corelm.inference(prefix, make_opts(), suffix=prefix)
+        tokens = [] if tokens is None else tokens
+        assert len(tokens) == len(results[key])
+        for t1, t2 in zip(tokens, results[key]):
+            assert torch.equal(t1, t2)
+
+
+def test_generate_not_supported():
+    with pytest.raises(NotImplementedError):
+        SpeechLMGenerationEngine(make_corelm("valle"), make_opts("teacher_force"))
+
+
+def test_paged_kv_cache():
+    torch.manual_seed(0)
+    decoder = TransformerDecoder(n_ctx=20, n_state=8, n_head=2, n_layer=1).eval()
+    cache = PagedKVCache(decoder, num_blocks=4, block_size=2)
+    x = torch.randn(2, 5, 8)
+
+    cache.add("a")
+    cache.add("b")
+    cache.prepare(["a", "b"], 3)
+    with cache:
+        decoder(x[:, :3], offset=cache.offset)
+    assert cache.num_free_blocks == 0
+    with pytest.raises(RuntimeError):
+        cache.prepare(["a", "b"], 2)
+
+    cache.release("b")
+    assert cache.num_free_blocks == 2
+    cache.prepare(["a"], 1)
+    with cache:
+        y = decoder(x[:1, 3:4], mask=cache.mask, offset=cache.offset)
+    assert len(cache.hooks) == 0
+    torch.testing.assert_close(y, decoder(x[:1, :4])[:, 3:])
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+import torch
+
+from espnet2.spk.scoring import build_trial_index, score_trials
+
+
+def test_build_trial_index():
+    utt2idx = {"a": 0, "b": 1, "c": 2}
+    enroll_index, test_index = build_trial_index(["a*b", "c*a", "b*b"], utt2idx)
+    np.testing.assert_array_equal(enroll_index, [0, 2, 1])
+    np.testing.assert_array_equal(test_index, [1, 0, 1])
+    with pytest.raises(KeyError):
+        build_trial_index(["a*d"], utt2idx)
+
+
+@pytest.mark.parametrize("n_segments", [None, 3])
+@pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+@pytest.mark.parametrize("batch_size", [1, 4, 100])
+def test_score_trials(n_segments, metric, batch_size):
+    if n_segments is None:
+        embeddings = torch.randn(5, 8)
+    else:
+        embeddings = torch.randn(5, n_segments, 8)
+    enroll_index = np.array([0, 1, 2, 3, 4, 0, 4])
+    test_index = np.array([1, 2, 3, 4, 0, 0, 2])
+    scores = score_trials(
+        embeddings, enroll_index, test_index, metric=metric, batch_size=batch_size
+    )
+    assert scores.shape == (7,)
+
+    for score, e, t in zip(scores, enroll_index, test_index):
+        enroll = embeddings[e].view(-1, 8)
+        test = embeddings[t].view(-1, 8)
+        if metric == "euclidean":
+            expected = -torch.cdist(enroll, test).mean()
+        else:
+            expected = torch.nn.functional.cosine_similarity(
+                enroll[:, None], test[None], dim=-1
+            ).mean()
+        torch.testing.assert_close(score, expected, rtol=1e-5, atol=1e-5)
+
+
+def test_score_trials_invalid():
+    embeddings = torch.randn(2, 4)
+    with pytest.raises(ValueError):
+        score_trials(embeddings, np.array([0]), np.array([1]), metric="plda")
+    with pytest.raises(ValueError):
+        score_trials(embeddings, np.array([0, 1]), np.array([1]))
+    empty = np.array([], dtype=np.int64)
+    assert score_trials(embeddings, empty, empty).shape == (0,)
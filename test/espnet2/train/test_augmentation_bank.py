@@ -0,0 +1,109 @@
+import numpy as np
+import pytest
+import scipy.signal
+import soundfile
+
+from espnet2.train.augmentation_bank import (
+    AudioBank,
+    convolve_rir,
+    load_audio_bank,
+    pick_channel,
+)
+from espnet2.train.preprocessor import CommonPreprocessor
+
+
+@pytest.fixture
+def audio_files(tmp_path):
+    rng = np.random.RandomState(0)
+    paths = []
+    for i, (frames, channels) in enumerate([(100, 1), (300, 2), (50, 1)]):
+        p = tmp_path / f"audio{i}.wav"
+        audio = rng.uniform(-0.5, 0.5, (frames, channels)).astype(np.float32)
+        soundfile.write(p, audio, 16000, subtype="FLOAT")
+        paths.append(str(p))
+    return paths
+
+
+def test_AudioBank(audio_files):
+    bank = AudioBank(audio_files)
+    assert len(bank) == 3
+    for i, p in enumerate(audio_files):
+        expected, _ = soundfile.read(p, dtype=np.float32, always_2d=True)
+        np.testing.assert_array_equal(bank[i], expected)
+        assert bank[i].dtype == np.float32
+        assert not bank[i].flags.writeable
+
+
+@pytest.mark.timeout(50)
+def test_AudioBank_resample(audio_files):
+    pytest.importorskip("resampy")
+    bank = AudioBank(audio_files, fs=8000)
+    assert bank[1].shape == (150, 2)
+    assert bank.get(1, 8000).shape == (150, 2)
+    assert bank.get(1, 16000).shape == (300, 2)
+
+
+def test_AudioBank_cache(audio_files, tmp_path):
+    bank = AudioBank(audio_files, cache_dir=tmp_path / "cache")
+    assert isinstance(bank.data, np.memmap)
+    bank2 = AudioBank(audio_files, cache_dir=tmp_path / "cache")
+    for i in range(len(bank)):
+        np.testing.assert_array_equal(bank[i], bank2[i])
+    assert len(list((tmp_path / "cache").iterdir())) == 2
+
+
+def test_AudioBank_segment(audio_files):
+    bank = AudioBank(audio_files)
+    seg = bank.segment(1, 120)
+    assert seg.shape == (120, 2)
+    # A view of the bank for the longer audio
+    assert np.shares_memory(seg, bank.data)
+
+    seg = bank.segment(0, 100)
+    np.testing.assert_array_equal(seg, bank[0])
+
+    seg = bank.segment(2, 120)
+    assert seg.shape == (120, 1)
+
+
+def test_load_audio_bank(audio_files, tmp_path):
+    scp = tmp_path / "noise.scp"
+    with scp.open("w") as f:
+        f.write(f"a {audio_files[0]}\n")
+        f.write(f"{audio_files[1]}\n")
+    bank = load_audio_bank(str(scp))
+    assert bank.paths == audio_files[:2]
+
+
+def test_convolve_rir():
+    rng = np.random.RandomState(0)
+    speech = rng.randn(1, 1000)
+    for rir_len in (16, 800):
+        rir = rng.randn(2, rir_len)
+        expected = scipy.signal.convolve(speech, rir, mode="full")[:, :1000]
+        np.testing.assert_allclose(convolve_rir(speech, rir), expected, atol=1e-8)
+
+
+def test_pick_channel():
+    audio = np.zeros((10, 3))
+    assert pick_channel(audio).shape == (10, 1)
+
+
+@pytest.mark.parametrize("preload", [False, True])
+def test_CommonPreprocessor_rir_noise(audio_files, tmp_path, preload):
+    rir_scp = tmp_path / "rir.scp"
+    rir_scp.write_text(f"rir1 {audio_files[2]}\n")
+    noise_scp = tmp_path / "noise.scp"
+    noise_scp.write_text(f"n1 {audio_files[0]}\nn2 {audio_files[1]}\n")
+    preprocessor = CommonPreprocessor(
+        train=True,
+        rir_scp=str(rir_scp),
+        noise_scp=str(noise_scp),
+        preload_rir_noise=preload,
+    )
+    assert isinstance(preprocessor.rirs, AudioBank) == preload
+    assert isinstance(preprocessor.noises, AudioBank) == preload
+
+    speech = np.random.randn(200).astype(np.float32) * 0.1
+    out = preprocessor("utt", dict(speech=speech.copy()))
+    assert out["speech"].shape in ((200,), (200, 1), (200, 2))
@@ -0,0 +1,84 @@
+import subprocess
+import sys
+
+import pytest
+import torch
+
+from espnet2.layers.abs_normalize import AbsNormalize
+from espnet2.layers.global_mvn import GlobalMVN
+from espnet2.train.class_choices import ClassChoices
+
+
+def test_get_class():
+    choices = ClassChoices(
+        "normalize", dict(global_mvn=GlobalMVN), type_check=AbsNormalize
+    )
+    assert choices.get_class("global_mvn") is GlobalMVN
+    assert choices.get_class("GLOBAL_MVN") is GlobalMVN
+
+
+def test_get_class_none():
+    choices = ClassChoices("normalize", dict(global_mvn=GlobalMVN), optional=True)
+    assert choices.get_class(None) is None
+    assert choices.get_class("none") is None
+    assert choices.get_class("Null") is None
+    assert choices.choices() == ("global_mvn", None)
+
+
+def test_get_class_unknown():
+    choices = ClassChoices("normalize", dict(global_mvn=GlobalMVN), default="a")
+    with pytest.raises(ValueError):
+        choices.get_class("foo")
+
+
+def test_reserved_name():
+    with pytest.raises(ValueError):
+        ClassChoices("normalize", dict(none=GlobalMVN))
+
+
+def test_type_check():
+    with pytest.raises(ValueError):
+        ClassChoices("normalize", dict(linear=torch.nn.Linear), AbsNormalize)
+
+
+def test_get_class_lazy():
+    choices = ClassChoices(
+        "normalize",
+        dict(global_mvn="espnet2.layers.global_mvn:GlobalMVN"),
+        type_check=AbsNormalize,
+    )
+    assert choices.choices() == ("global_mvn", None)
+    assert choices.get_class("global_mvn") is GlobalMVN
+    # The imported class is cached
+    assert choices.classes["global_mvn"] is GlobalMVN
+
+
+def test_get_class_lazy_type_check():
+    # The lazy import paths are checked when the class is selected
+    choices = ClassChoices(
+        "normalize", dict(linear="torch.nn:Linear"), type_check=AbsNormalize
+    )
+    with pytest.raises(ValueError):
+        choices.get_class("linear")
+
+
+@pytest.mark.execution_timeout(60)
+def test_import_asr_task_is_lazy():
+    # The model classes of the unselected choices must not be imported
+    # at the startup of the CLI.
+    modules = [
+        "espnet2.asr.encoder.conformer_encoder",
+        "espnet2.asr.decoder.transformer_decoder",
+        "espnet2.asr.frontend.default",
+        "espnet2.gan_tts.jets.alignments",
+        "g2p_en",
+        "inflect",
+    ]
+    code = (
+        "import sys; import espnet2.tasks.asr; "
+        f"print(*[m for m in {modules} if m in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip() == ""
@@ -1,5 +1,6 @@
 import numpy as np
 import pytest
+from typeguard import TypeCheckError
 
 from espnet2.train.collate_fn import CommonCollateFn, HuBERTCollateFn, common_collate_fn
 
@@ -56,6 +57,12 @@ def test_common_collate_fn(float_pad_value, int_pad_value, not_sequence):
         np.testing.assert_array_equal(t[1]["b_lengths"], desired["b_lengths"])
 
 
+def test_common_collate_fn_typecheck():
+    data = [("id", dict(a=np.random.randn(3, 5)))]
+    with pytest.raises(TypeCheckError):
+        common_collate_fn(data, float_pad_value="0")
+
+
 @pytest.mark.parametrize(
     "float_pad_value, int_pad_value, not_sequence",
     [(0.0, -1, ()), (3.0, 2, ("a",)), (np.inf, 100, ("a", "b"))],
@@ -3,6 +3,8 @@ import kaldiio
 import numpy as np
 import pytest
 
+from espnet2.bin.write_shards import write_shards
+from espnet2.fileio.manifest import convert_to_manifest
 from espnet2.fileio.npy_scp import NpyScpWriter
 from espnet2.fileio.sound_scp import SoundScpWriter
 from espnet2.train.dataset import ESPnetDataset
@@ -47,6 +49,71 @@ def test_ESPnetDataset_sound_scp(sound_scp):
     assert data["data1"].shape == (80000,)
 
 
+def test_ESPnetDataset_int_uid(sound_scp, text):
+    dataset = ESPnetDataset(
+        path_name_type_list=[(sound_scp, "data1", "sound"), (text, "data7", "text")],
+        preprocess=preprocess,
+    )
+    # The loaders having the same keys share the index
+    assert dataset.loader_dict["data7"].key_index is dataset.key_index
+    assert [dataset[i][0] for i in range(2)] == list(dataset)
+    uid, data = dataset[1]
+    assert uid == "b"
+    assert data["data1"].shape == (80000,)
+    assert tuple(data["data7"]) == (1,)
+
+
+def test_ESPnetDataset_manifest(tmp_path, sound_scp, npy_scp, text_int):
+    convert_to_manifest(sound_scp, tmp_path / "wav.mf", "sound")
+    convert_to_manifest(npy_scp, tmp_path / "npy.mf", "npy")
+    convert_to_manifest(text_int, tmp_path / "text_int.mf", "text_int")
+    dataset = ESPnetDataset(
+        path_name_type_list=[
+            (str(tmp_path / "wav.mf"), "data1", "manifest"),
+            (str(tmp_path / "npy.mf"), "data2", "manifest"),
+            (str(tmp_path / "text_int.mf"), "data3", "manifest"),
+        ],
+    )
+    _, data = dataset["a"]
+    assert data["data1"].shape == (160000,)
+    assert data["data2"].shape == (100, 80)
+    assert tuple(data["data3"]) == (0, 1, 2)
+    assert data["data3"].dtype == np.int64
+    assert dataset[1][0] == "b"
+
+
+def test_ESPnetDataset_shard(tmp_path, sound_scp, text, text_int):
+    write_shards(
+        [
+            (sound_scp, "speech", "sound"),
+            (text, "text", "text"),
+            (text_int, "token", "text_int"),
+        ],
+        output_dir=str(tmp_path / "shards"),
+        key_file=None,
+        max_samples_per_shard=1,
+        max_shard_size="1GB",
+        shuffle=False,
+        seed=0,
+        log_level="INFO",
+    )
+    dataset = ESPnetDataset(
+        path_name_type_list=[
+            (str(tmp_path / "shards" / "speech.idx"), "data1", "shard"),
+            (str(tmp_path / "shards" / "text.idx"), "data2", "shard"),
+            (str(tmp_path / "shards" / "token.idx"), "data3", "shard"),
+        ],
+        preprocess=preprocess,
+    )
+    _, data = dataset["a"]
+    assert data["data1"].shape == (160000,)
+    assert tuple(data["data2"]) == (0,)
+    assert tuple(data["data3"]) == (0, 1, 2)
+    _, data = dataset["b"]
+    assert data["data1"].shape == (80000,)
+    assert tuple(data["data2"]) == (1,)
+
+
 @pytest.fixture
 def feats_scp(tmp_path):
     p = tmp_path / "feats.scp"
@@ -2,10 +2,15 @@ import h5py
 import kaldiio
 import numpy as np
 import pytest
+import torch
 
 from espnet2.fileio.npy_scp import NpyScpWriter
+from espnet2.fileio.shard import ShardWriter, encode_array, encode_audio
 from espnet2.fileio.sound_scp import SoundScpWriter
-from espnet2.train.iterable_dataset import IterableESPnetDataset
+from espnet2.train.iterable_dataset import (
+    IterableESPnetDataset,
+    ShardIterableESPnetDataset,
+)
 
 
 def preprocess(id: str, data):
@@ -290,3 +295,101 @@ def test_ESPnetDataset_csv_int(csv_int):
             assert tuple(data["data8"]) == (0, 1, 2)
         if key == "b":
             assert tuple(data["data8"]) == (2, 3, 4)
+
+
+@pytest.fixture
+def shard_dir(tmp_path):
+    with ShardWriter(tmp_path / "shards", max_samples=3) as writer:
+        for i in range(10):
+            writer.write(
+                f"utt{i}",
+                {
+                    "speech": (
+                        "wav",
+                        encode_audio(np.full(100 + i, i, dtype=np.int16), 16000),
+                    ),
+                    "token": ("npy", encode_array(np.full(i + 1, i))),
+                },
+            )
+    return tmp_path / "shards"
+
+
+def test_IterableESPnetDataset_shard(shard_dir):
+    dataset = IterableESPnetDataset(
+        path_name_type_list=[
+            (str(shard_dir / "speech.idx"), "speech", "shard"),
+            (str(shard_dir / "token.idx"), "text", "shard"),
+        ],
+    )
+    for i, (key, data) in enumerate(dataset):
+        assert key == f"utt{i}"
+        assert data["speech"].shape == (100 + i,)
+        np.testing.assert_array_equal(data["text"], np.full(i + 1, i))
+
+
+def _shard_dataset(shard_dir, **kwargs):
+    return ShardIterableESPnetDataset(
+        path_name_type_list=[
+            (str(shard_dir / "speech.idx"), "speech", "shard"),
+            (str(shard_dir / "token.idx"), "text", "shard"),
+        ],
+        **kwargs,
+    )
+
+
+def test_ShardIterableESPnetDataset(shard_dir):
+    dataset = _shard_dataset(shard_dir)
+    assert dataset.has_name("speech")
+    assert dataset.names() == ("speech", "text")
+    print(dataset)
+    keys = []
+    for key, data in dataset:
+        i = int(key[3:])
+        assert data["speech"].shape == (100 + i,)
+        assert data["speech"].dtype == np.float32
+        np.testing.assert_array_equal(data["text"], np.full(i + 1, i))
+        keys.append(key)
+    assert keys == [f"utt{i}" for i in range(10)]
+
+
+def test_ShardIterableESPnetDataset_shuffle(shard_dir):
+    dataset = _shard_dataset(shard_dir, shuffle=True, buffer_size=4)
+    dataset.set_epoch(1)
+    keys1 = [k for k, _ in dataset]
+    assert sorted(keys1) == sorted(f"utt{i}" for i in range(10))
+    assert keys1 == [k for k, _ in dataset]
+    dataset.set_epoch(2)
+    assert keys1 != [k for k, _ in dataset]
+
+
+@pytest.mark.parametrize("world_size", [2, 3, 5])
+def test_ShardIterableESPnetDataset_split_ranks(shard_dir, world_size):
+    keys = []
+    for rank in range(world_size):
+        dataset = _shard_dataset(
+            shard_dir, shuffle=True, rank=rank, world_size=world_size
+        )
+        dataset.set_epoch(1)
+        keys += [k for k, _ in dataset]
+    assert sorted(keys) == sorted(f"utt{i}" for i in range(10))
+
+
+def test_ShardIterableESPnetDataset_workers(shard_dir):
+    dataset = _shard_dataset(shard_dir)
+    loader = torch.utils.data.DataLoader(
+        dataset, batch_size=None, num_workers=2, collate_fn=lambda x: x
+    )
+    keys = [k for k, _ in loader]
+    assert sorted(keys) == sorted(f"utt{i}" for i in range(10))
+
+
+def test_ShardIterableESPnetDataset_invalid(shard_dir, tmp_path):
+    with pytest.raises(RuntimeError):
+        ShardIterableESPnetDataset([(str(shard_dir / "speech.idx"), "a", "sound")])
+    with pytest.raises(RuntimeError):
+        ShardIterableESPnetDataset(
+            [
+                (str(shard_dir / "speech.idx"), "a", "shard"),
+                (str(tmp_path / "token.idx"), "b", "shard"),
+            ]
+        )
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+import torch
+
+from espnet2.train.prefetcher import BatchPrefetcher, pin_memory
+
+
+def _batches(n):
+    for i in range(n):
+        yield [f"utt{i}"], {"x": torch.full((2, 3), i), "x_lengths": np.array([3, 3])}
+
+
+@pytest.mark.parametrize("num_prefetch", [1, 3])
+def test_BatchPrefetcher(num_prefetch):
+    prefetcher = BatchPrefetcher(list(_batches(5)), num_prefetch=num_prefetch)
+    assert len(prefetcher) == 5
+    outputs = list(prefetcher)
+    assert [utt_id for utt_id, _ in outputs] == [[f"utt{i}"] for i in range(5)]
+    for i, (_, batch) in enumerate(outputs):
+        assert isinstance(batch["x"], torch.Tensor)
+        assert (batch["x"] == i).all()
+        assert isinstance(batch["x_lengths"], torch.Tensor)
+
+
+def test_BatchPrefetcher_available():
+    prefetcher = BatchPrefetcher(_batches(5), num_prefetch=1, buffer_size=4)
+    assert prefetcher.available(4)
+    next(prefetcher)
+    assert prefetcher.available(4)
+    next(prefetcher)
+    assert prefetcher.available(3)
+    assert not prefetcher.available(4)
+    assert len(list(prefetcher)) == 3
+    assert not prefetcher.available(1)
+
+
+def test_BatchPrefetcher_error():
+    def iterator():
+        yield from _batches(2)
+        raise RuntimeError("error in the iterator")
+
+    prefetcher = BatchPrefetcher(iterator(), num_prefetch=1)
+    next(prefetcher)
+    with pytest.raises(RuntimeError, match="error in the iterator"):
+        list(prefetcher)
+
+
+def test_BatchPrefetcher_close():
+    prefetcher = BatchPrefetcher(_batches(100), num_prefetch=2)
+    next(prefetcher)
+    prefetcher.close()
+    prefetcher._thread.join(timeout=1)
+    assert not prefetcher._thread.is_alive()
+
+
+def test_BatchPrefetcher_invalid_num_prefetch():
+    with pytest.raises(ValueError):
+        BatchPrefetcher([], num_prefetch=0)
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="Require cuda")
+def test_BatchPrefetcher_cuda():
+    prefetcher = BatchPrefetcher(_batches(3), "cuda", num_prefetch=2)
+    for i, (_, batch) in enumerate(prefetcher):
+        assert batch["x"].is_cuda
+        assert (batch["x"] == i).all()
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="Require cuda")
+def test_pin_memory():
+    data = pin_memory({"a": [torch.zeros(2)], "b": np.zeros(2), "c": "str"})
+    assert data["a"][0].is_pinned()
+    assert data["b"].is_pinned()
+    assert data["c"] == "str"
@@ -0,0 +1,136 @@
+import json
+import time
+
+import numpy as np
+import pytest
+import torch
+
+from espnet2.train.collate_fn import CommonCollateFn
+from espnet2.train.profiler import (
+    BUCKET_LIMITS,
+    StageProfiler,
+    bin_index,
+    get_profiler,
+    measure_stage,
+    set_profiler,
+)
+from espnet2.train.reporter import SubReporter
+
+
+@pytest.fixture
+def profiler():
+    profiler = StageProfiler(max_workers=4, trace_capacity=128)
+    set_profiler(profiler)
+    yield profiler
+    set_profiler(None)
+
+
+class Dataset(torch.utils.data.Dataset):
+    def __len__(self):
+        return 8
+
+    def __getitem__(self, i):
+        with measure_stage("load_time"):
+            data = {"x": np.zeros(4, dtype=np.float32)}
+        return str(i), data
+
+
+def test_bin_index():
+    assert bin_index(0.0) == 0
+    for seconds in (1e-5, 3e-3, 0.5, 20.0):
+        b = bin_index(seconds)
+        assert BUCKET_LIMITS[b - 1] <= seconds < BUCKET_LIMITS[b]
+    assert bin_index(1e9) == len(BUCKET_LIMITS) - 1
+
+
+def test_measure_stage_without_profiler():
+    assert get_profiler() is None
+    with measure_stage("load_time"):
+        pass
+
+
+def test_StageProfiler_inactive(profiler):
+    with measure_stage("load_time"):
+        pass
+    assert profiler.counts().sum() == 0
+
+
+def test_StageProfiler_record(profiler):
+    profiler.start()
+    with measure_stage("preprocess_time"):
+        time.sleep(0.01)
+    profiler.record("unknown_stage", 0.0, 1.0)
+    profiler.stop()
+    summary = profiler.summary()
+    assert list(summary) == ["preprocess_time"]
+    assert summary["preprocess_time"]["count"] == 1
+    assert summary["preprocess_time"]["mean"] >= 0.01
+    assert summary["preprocess_time"]["p50"] >= summary["preprocess_time"]["mean"]
+    profiler.log_summary()
+
+
+def test_StageProfiler_register(profiler):
+    profiler.start()
+    reporter = SubReporter("train", 1, 0)
+    for _ in range(2):
+        with reporter.measure_time("forward_time"):
+            pass
+        with measure_stage("load_time"):
+            pass
+        profiler.register(reporter)
+        reporter.next()
+    assert profiler.counts()[profiler.stage_index["forward_time"]] == 2
+    assert "load_time" in reporter.stats
+    assert "queue_depth" in reporter.stats
+    assert "forward_time" in reporter.log_message()
+
+
+@pytest.mark.timeout(30)
+def test_StageProfiler_dataloader_workers(profiler):
+    profiler.start()
+    loader = torch.utils.data.DataLoader(
+        Dataset(),
+        batch_size=2,
+        num_workers=2,
+        collate_fn=CommonCollateFn(),
+        multiprocessing_context="fork",
+    )
+    assert len(list(loader)) == 4
+    profiler.stop()
+    load = profiler.stage_index["load_time"]
+    collate = profiler.stage_index["collate_time"]
+    assert profiler.counts()[load] == 8
+    assert profiler.counts()[collate] == 4
+    assert profiler.counts(0)[load] == 0
+    throughput = profiler.worker_throughput()
+    assert set(throughput) == {"worker0", "worker1"}
+    assert throughput["worker0"]["samples_per_sec"] > 0
+
+
+def test_StageProfiler_trace(profiler, tmp_path):
+    profiler.start()
+    with measure_stage("load_time"):
+        pass
+    profiler.start_trace()
+    assert profiler.tracing
+    for _ in range(3):
+        with measure_stage("collate_time"):
+            pass
+    profiler.stop_trace(tmp_path / "profile" / "trace.json")
+    assert not profiler.tracing
+    with (tmp_path / "profile" / "trace.json").open() as f:
+        trace = json.load(f)
+    events = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in events] == ["collate_time"] * 3
+
+
+def test_StageProfiler_tensorboard(profiler, tmp_path):
+    from torch.utils.tensorboard import SummaryWriter
+
+    profiler.start()
+    for seconds in (1e-4, 1e-3, 1e-2):
+        profiler.record("forward_time", 0.0, seconds)
+    writer = SummaryWriter(str(tmp_path))
+    profiler.tensorboard_add_histogram(writer, 1)
+    writer.close()
+    assert len(list(tmp_path.iterdir())) == 1
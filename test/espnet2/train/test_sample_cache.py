@@ -0,0 +1,135 @@
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from espnet2.train.sample_cache import SharedSampleCache
+
+
+def _sample(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return {
+        "speech": rng.standard_normal(n).astype(np.float32),
+        "text": np.arange(7, dtype=np.int64),
+        "scalar": np.array(3.0),
+    }
+
+
+def test_SharedSampleCache_get():
+    cache = SharedSampleCache(1024 * 1024, block_size=1024)
+    data = _sample(1000)
+    cache["a"] = data
+    assert "a" in cache
+    assert len(cache) == 1
+    cached = cache.get("a")
+    assert set(cached) == set(data)
+    for k in data:
+        np.testing.assert_array_equal(cached[k], data[k])
+        assert cached[k].dtype == data[k].dtype
+    assert cache.get("b") is None
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_SharedSampleCache_getitem_raises():
+    cache = SharedSampleCache(1024 * 1024)
+    with pytest.raises(KeyError):
+        cache["a"]
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu"])
+def test_SharedSampleCache_eviction(policy):
+    # Each sample takes 5 blocks, so 3 samples are kept at most
+    cache = SharedSampleCache(16 * 1024, block_size=1024, policy=policy)
+    cache["a"] = _sample(1000, 0)
+    cache["b"] = _sample(1000, 1)
+    cache["c"] = _sample(1000, 2)
+    assert cache.get("a") is not None
+    cache["d"] = _sample(1000, 3)
+    assert cache.stats()["evictions"] == 1
+    assert "b" not in cache
+    assert "a" in cache
+    assert "d" in cache
+    assert cache.size <= cache.max_size
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu"])
+def test_SharedSampleCache_eviction_order(policy):
+    # Each sample takes 1 block, so the cache keeps 64 samples and
+    # the evicted ones must follow the policy exactly
+    cache = SharedSampleCache(64 * 1024, block_size=1024, policy=policy)
+    rng = np.random.default_rng(0)
+    clock = 0
+    # key -> (num_used, last_used)
+    expected = {}
+    for _ in range(3000):
+        key = f"utt{rng.integers(150)}"
+        if rng.random() < 0.5:
+            hit = cache.get(key) is not None
+            assert hit == (key in expected)
+            if hit:
+                clock += 1
+                expected[key] = (expected[key][0] + 1, clock)
+        elif key not in expected:
+            if len(expected) == 64:
+                if policy == "lru":
+                    victim = min(expected, key=lambda k: expected[k][1])
+                else:
+                    victim = min(expected, key=lambda k: expected[k])
+                del expected[victim]
+            cache[key] = {"x": np.full(4, int(key[3:]))}
+            clock += 1
+            expected[key] = (0, clock)
+    assert len(cache) == len(expected)
+    for key in expected:
+        np.testing.assert_array_equal(cache[key]["x"], int(key[3:]))
+
+
+@pytest.mark.parametrize("policy", ["lru", "lfu"])
+def test_SharedSampleCache_random_sizes(policy):
+    cache = SharedSampleCache(64 * 1024, block_size=1024, policy=policy)
+    rng = np.random.default_rng(0)
+    sizes = {f"utt{i}": int(rng.integers(1, 3000)) for i in range(200)}
+    for _ in range(2000):
+        key = f"utt{rng.integers(200)}"
+        data = cache.get(key)
+        if data is None:
+            cache[key] = _sample(sizes[key], int(key[3:]))
+        else:
+            np.testing.assert_array_equal(
+                data["speech"], _sample(sizes[key], int(key[3:]))["speech"]
+            )
+        assert cache.size <= cache.max_size
+    cached = [k for k in sizes if k in cache]
+    assert len(cached) == len(cache)
+    for k in cached:
+        np.testing.assert_array_equal(
+            cache[k]["speech"], _sample(sizes[k], int(k[3:]))["speech"]
+        )
+    assert cache.stats()["evictions"] > 0
+
+
+def test_SharedSampleCache_too_large():
+    cache = SharedSampleCache(1024, block_size=1024)
+    cache["a"] = _sample(1000)
+    assert "a" not in cache
+
+
+def _put(cache):
+    cache["child"] = _sample(100)
+
+
+@pytest.mark.execution_timeout(5)
+def test_SharedSampleCache_shared_with_fork():
+    cache = SharedSampleCache(1024 * 1024)
+    mp = multiprocessing.get_context("fork")
+    p = mp.Process(target=_put, args=(cache,))
+    p.start()
+    p.join()
+    np.testing.assert_array_equal(cache["child"]["speech"], _sample(100)["speech"])
+
+
+def test_SharedSampleCache_invalid_policy():
+    with pytest.raises(ValueError):
+        SharedSampleCache(1024, policy="fifo")
@@ -115,3 +115,87 @@ def test_fastspeech2(
         inputs.update(pitch=torch.tensor([2, 2, 0], dtype=torch.float).unsqueeze(-1))
         inputs.update(energy=torch.tensor([2, 2, 0], dtype=torch.float).unsqueeze(-1))
         model.inference(**inputs, use_teacher_forcing=True)
+
+
+@pytest.mark.parametrize("reduction_factor", [1, 3])
+@pytest.mark.parametrize("spk_embed_dim, spks, langs", [(None, -1, -1), (2, 5, 2)])
+@pytest.mark.parametrize("alpha", [1.0, 1.5])
+@pytest.mark.parametrize(
+    "encoder_type, positionwise_conv_kernel_size",
+    [("transformer", 1), ("transformer", 3), ("conformer", 1)],
+)
+def test_fastspeech2_batch_inference(
+    reduction_factor,
+    spk_embed_dim,
+    spks,
+    langs,
+    alpha,
+    encoder_type,
+    positionwise_conv_kernel_size,
+):
+    model = FastSpeech2(
+        idim=10,
+        odim=5,
+        adim=4,
+        aheads=2,
+        elayers=1,
+        eunits=4,
+        dlayers=1,
+        dunits=4,
+        postnet_layers=2,
+        postnet_chans=4,
+        postnet_filts=3,
+        reduction_factor=reduction_factor,
+        encoder_type=encoder_type,
+        decoder_type=encoder_type,
+        positionwise_conv_kernel_size=positionwise_conv_kernel_size,
+        conformer_enc_kernel_size=3,
+        conformer_dec_kernel_size=3,
+        duration_predictor_layers=2,
+        duration_predictor_chans=4,
+        duration_predictor_kernel_size=3,
+        energy_predictor_layers=2,
+        energy_predictor_chans=4,
+        energy_predictor_kernel_size=3,
+        pitch_predictor_layers=2,
+        pitch_predictor_chans=4,
+        pitch_predictor_kernel_size=3,
+        spks=spks,
+        langs=langs,
+        spk_embed_dim=spk_embed_dim,
+    )
+    model.eval()
+    # NOTE: Avoid the durations of all 0
+    torch.nn.init.constant_(model.duration_predictor.linear.bias, 1.5)
+    torch.nn.init.normal_(model.duration_predictor.linear.weight, std=0.1)
+
+    inputs = dict(text=torch.randint(1, 9, (3, 6)))
+    if spk_embed_dim is not None:
+        inputs.update(spembs=torch.randn(3, spk_embed_dim))
+    if spks > 0:
+        inputs.update(sids=torch.randint(0, spks, (3, 1)))
+    if langs > 0:
+        inputs.update(lids=torch.randint(0, langs, (3, 1)))
+    text_lengths = torch.tensor([6, 2, 3])
+
+    with torch.no_grad():
+        outs = model.batch_inference(**inputs, text_lengths=text_lengths, alpha=alpha)
+        assert outs["feat_gen"].size(1) == outs["feat_gen_lengths"].max()
+        torch.testing.assert_close(outs["duration_lengths"], text_lengths + 1)
+
+        # Each utterance gives the same outputs as the single sequence inference
+        for i, text_length in enumerate(text_lengths):
+            single_inputs = {k: v[i] for k, v in inputs.items()}
+            single_inputs["text"] = single_inputs["text"][:text_length]
+            out = model.inference(**single_inputs, alpha=alpha)
+
+            length = outs["feat_gen_lengths"][i]
+            assert length == len(out["feat_gen"])
+            torch.testing.assert_close(outs["feat_gen"][i, :length], out["feat_gen"])
+            # The padded frames are zero
+            assert (outs["feat_gen"][i, length:] == 0).all()
+            for k in ["duration", "pitch", "energy"]:
+                v = outs[k][i, : outs[f"{k}_lengths"][i]]
+                torch.testing.assert_close(v, out[k])
+                # The padded part is zero
+                assert (outs[k][i, text_length + 1 :] == 0).all()
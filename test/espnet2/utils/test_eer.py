@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from espnet2.utils.eer import ComputeErrorRates, ComputeMinDcf, tuneThresholdfromScore
@@ -16,3 +17,26 @@ def test_eer_computation(scores, labels, eer):
     p_trg, c_miss, c_fa = 0.05, 1, 1
     mindcf, _ = ComputeMinDcf(fnrs, fprs, thresholds, p_trg, c_miss, c_fa)
     assert eer_est == eer, (eer_est, eer)
+
+
+def test_error_rates_and_mindcf():
+    rng = np.random.RandomState(0)
+    # Include the tied scores
+    scores = np.round(rng.randn(200), 1)
+    labels = rng.randint(0, 2, size=200)
+
+    fnrs, fprs, thresholds = ComputeErrorRates(scores, labels)
+    order = sorted(range(len(scores)), key=lambda i: scores[i])
+    np.testing.assert_array_equal(thresholds, scores[order])
+    for i in [0, 50, 199]:
+        rejected = labels[order[: i + 1]]
+        assert fnrs[i] == rejected.sum() / labels.sum()
+        assert fprs[i] == 1 - (1 - rejected).sum() / (1 - labels).sum()
+
+    p_trg, c_miss, c_fa = 0.05, 1, 1
+    mindcf, threshold = ComputeMinDcf(fnrs, fprs, thresholds, p_trg, c_miss, c_fa)
+    c_det = [
+        c_miss * fnr * p_trg + c_fa * fpr * (1 - p_trg) for fnr, fpr in zip(fnrs, fprs)
+    ]
+    assert mindcf == min(c_det) / min(c_miss * p_trg, c_fa * (1 - p_trg))
+    assert threshold == thresholds[int(np.argmin(c_det))]
@@ -0,0 +1,59 @@
+from functools import partial
+
+import pytest
+import torch
+
+from espnet2.fileio.datadir_writer import DatadirWriter
+from espnet2.utils.parallel_decode import DatadirRecorder, parallel_decode
+
+
+def _decode(model, writer, keys, batch):
+    for key, x in zip(keys, batch["speech"]):
+        writer["1best_recog"]["score"][key] = str(model(x.unsqueeze(-1)).sum().item())
+
+
+def _fail(writer, keys, batch):
+    raise ValueError(keys)
+
+
+def _loader(n):
+    for i in range(n):
+        # Variable batch sizes to shuffle the order of the completion
+        yield [f"utt{i}_{j}" for j in range(1 + i % 3)], {
+            "speech": torch.full((1 + i % 3, 1 + i % 5), float(i))
+        }
+
+
+def test_DatadirRecorder(tmp_path):
+    recorder = DatadirRecorder()
+    recorder["1best_recog"]["text"]["a"] = "foo"
+    recorder["score"]["a"] = "1.0"
+    with DatadirWriter(tmp_path) as writer:
+        recorder.replay(writer)
+    assert (tmp_path / "1best_recog" / "text").read_text() == "a foo\n"
+    assert (tmp_path / "score").read_text() == "a 1.0\n"
+
+
+@pytest.mark.execution_timeout(60)
+def test_parallel_decode(tmp_path):
+    model = torch.nn.Linear(1, 3)
+    with DatadirWriter(tmp_path / "serial") as writer:
+        for keys, batch in _loader(10):
+            _decode(model, writer, keys, batch)
+
+    with DatadirWriter(tmp_path / "parallel") as writer:
+        parallel_decode(
+            partial(_decode, model), _loader(10), writer, num_workers=2, lookahead=4
+        )
+
+    # The results are written in the order of the loader
+    assert (tmp_path / "parallel" / "1best_recog" / "score").read_text() == (
+        tmp_path / "serial" / "1best_recog" / "score"
+    ).read_text()
+
+
+@pytest.mark.execution_timeout(60)
+def test_parallel_decode_error(tmp_path):
+    with DatadirWriter(tmp_path) as writer:
+        with pytest.raises(RuntimeError, match="ValueError"):
+            parallel_decode(_fail, _loader(4), writer, num_workers=2)
@@ -0,0 +1,84 @@
+import numpy
+import pytest
+import torch
+
+from espnet2.asr.ctc import CTC
+from espnet2.asr.decoder.transformer_decoder import TransformerDecoder
+from espnet.nets.batch_beam_search import BatchBeamSearch
+from espnet.nets.batch_beam_search_multi_utt import BatchBeamSearchMultiUtt
+from espnet.nets.scorers.ctc import CTCPrefixScorer
+from espnet.nets.scorers.length_bonus import LengthBonus
+
+
+def build_beam_search(beam_class, ctc_weight, vocab_size, encoder_output_size):
+    decoder = TransformerDecoder(
+        vocab_size,
+        encoder_output_size,
+        attention_heads=2,
+        linear_units=4,
+        num_blocks=1,
+    )
+    ctc = CTC(vocab_size, encoder_output_size)
+    decoder.eval()
+    ctc.eval()
+    scorers = dict(
+        decoder=decoder,
+        ctc=CTCPrefixScorer(ctc=ctc, eos=vocab_size - 1),
+        length_bonus=LengthBonus(vocab_size),
+    )
+    weights = dict(decoder=1.0 - ctc_weight, ctc=ctc_weight, length_bonus=0.1)
+    beam = beam_class(
+        beam_size=3,
+        vocab_size=vocab_size,
+        weights=weights,
+        scorers=scorers,
+        sos=vocab_size - 1,
+        eos=vocab_size - 1,
+        pre_beam_score_key=None if ctc_weight == 1.0 else "full",
+    )
+    beam.eval()
+    return beam
+
+
+@pytest.mark.parametrize("ctc_weight", [0.0, 0.3, 1.0])
+@pytest.mark.parametrize("maxlenratio", [0.0, 0.5])
+def test_batch_beam_search_multi_utt_equal(ctc_weight, maxlenratio):
+    torch.manual_seed(123)
+    vocab_size, encoder_output_size = 7, 4
+    beam = build_beam_search(
+        BatchBeamSearch, ctc_weight, vocab_size, encoder_output_size
+    )
+    multi_beam = BatchBeamSearchMultiUtt(
+        beam_size=beam.beam_size,
+        vocab_size=vocab_size,
+        weights=beam.weights,
+        scorers=beam.scorers,
+        sos=beam.sos,
+        eos=beam.eos,
+        pre_beam_score_key=beam.pre_beam_score_key,
+    )
+    multi_beam.eval()
+
+    enc = torch.randn(3, 12, encoder_output_size)
+    enc_lens = torch.tensor([12, 9, 5])
+    with torch.no_grad():
+        batch_nbest = multi_beam(x=enc, x_lens=enc_lens, maxlenratio=maxlenratio)
+        assert len(batch_nbest) == len(enc_lens)
+        for i, nbest in enumerate(batch_nbest):
+            expected = beam(x=enc[i, : enc_lens[i]], maxlenratio=maxlenratio)
+            assert expected[0].yseq.tolist() == nbest[0].yseq.tolist()
+            numpy.testing.assert_allclose(
+                expected[0].score, nbest[0].score, rtol=1e-5, atol=1e-5
+            )
+
+
+def test_batch_beam_search_multi_utt_single_input():
+    torch.manual_seed(123)
+    vocab_size, encoder_output_size = 7, 4
+    beam = build_beam_search(
+        BatchBeamSearchMultiUtt, 0.3, vocab_size, encoder_output_size
+    )
+    with torch.no_grad():
+        nbest = beam(x=torch.randn(10, encoder_output_size))
+    assert len(nbest) > 0
+    assert nbest[0].yseq[0] == beam.sos
@@ -2,6 +2,7 @@ import os
 from math import isclose
 
 import pytest
+import torch
 
 kenlm = pytest.importorskip("kenlm")
 
@@ -15,3 +16,132 @@ def test_ngram_build(test_sens):
     lm = kenlm.LanguageModel(os.path.join(root, "test.arpa"))
     assert isclose(lm.score(test_sens[0]), -1.04, rel_tol=0.01)
     assert isclose(lm.score(test_sens[1]), -1.18, rel_tol=0.01)
+
+
+token_list = ["<blank>", "<unk>", "a", "e", "i", "o", "u", "<eos>"]
+
+
+def _prefixes():
+    # sos/eos = 7
+    return [torch.tensor(y) for y in ([7], [7, 2], [7, 2, 3], [7, 6, 5])]
+
+
+def test_ngram_scorer_consistent_with_kenlm():
+    from espnet.nets.scorers.ngram import NgramFullScorer
+
+    arpa = os.path.join(root, "beam_search_test.arpa")
+    lm = kenlm.LanguageModel(arpa)
+    scorer = NgramFullScorer(arpa, token_list)
+    x = torch.zeros(1, 1)
+    state = scorer.init_state(x)
+    y = torch.tensor([7])
+    for token in [2, 3, 4]:
+        scores, state = scorer.score(y, state, x)
+        y = torch.cat([y, torch.tensor([token])])
+        assert scores.shape == (len(token_list),)
+    scores, state = scorer.score(y, state, x)
+    sentence = "a e i"
+    expected = lm.score(sentence, bos=True, eos=False) + scores[7].item()
+    assert isclose(lm.score(sentence, bos=True, eos=True), expected, rel_tol=1e-5)
+
+
+def test_ngram_full_scorer_batch_score():
+    from espnet.nets.scorers.ngram import NgramFullScorer
+
+    scorer = NgramFullScorer(os.path.join(root, "beam_search_test.arpa"), token_list)
+    x = torch.zeros(1, 1)
+    ys = _prefixes()
+    states = [scorer.init_state(x) for _ in ys]
+    # Feed the prefixes except for the last tokens
+    for i, y in enumerate(ys):
+        for t in range(1, len(y)):
+            _, states[i] = scorer.score(y[:t], states[i], x)
+
+    expected = [scorer.score(y, s, x) for y, s in zip(ys, states)]
+    scorer.score_cache.clear()
+    # NOTE: The last token is used, so align the prefixes to the right
+    ys_pad = torch.stack([torch.cat([y.new_full((4 - len(y),), 7), y]) for y in ys])
+    scores, out_states = scorer.batch_score(ys_pad[1:], states[1:], x.expand(3, 1))
+    for i in range(3):
+        torch.testing.assert_close(scores[i], expected[i + 1][0])
+        assert out_states[i] == expected[i + 1][1]
+
+
+def test_ngram_part_scorer_batch_score_partial():
+    from espnet.nets.scorers.ngram import NgramPartScorer
+
+    scorer = NgramPartScorer(os.path.join(root, "beam_search_test.arpa"), token_list)
+    x = torch.zeros(2, 1)
+    state = scorer.init_state(x)
+    ys = torch.tensor([[7, 2], [7, 6]])
+    states = [state, state]
+    next_tokens = torch.tensor([[3, 7], [5, 2]])
+    scores, out_states = scorer.batch_score_partial(ys, next_tokens, states, x)
+    assert scores.shape == (2, len(token_list))
+    for i in range(2):
+        expected, expected_state = scorer.score_partial(
+            ys[i], next_tokens[i], states[i], x[i]
+        )
+        torch.testing.assert_close(scores[i, next_tokens[i]], expected)
+        mask = torch.ones(len(token_list), dtype=torch.bool)
+        mask[next_tokens[i]] = False
+        assert (scores[i, mask] == scorer.logzero).all()
+        assert out_states[i] == expected_state
+        assert scorer.select_state(out_states, i, 0) == out_states[i]
+    assert scorer.select_state(state, 0) == state
+
+    full_scores, _ = scorer.batch_score_partial(ys, None, states, x)
+    torch.testing.assert_close(
+        full_scores.gather(1, next_tokens), scores.gather(1, next_tokens)
+    )
+
+
+def test_ngram_scorer_cache_size():
+    from espnet.nets.scorers.ngram import NgramFullScorer
+
+    scorer = NgramFullScorer(
+        os.path.join(root, "beam_search_test.arpa"), token_list, cache_size=2
+    )
+    x = torch.zeros(1, 1)
+    state = scorer.init_state(x)
+    for y in _prefixes():
+        scorer.score(y, state, x)
+    assert len(scorer.score_cache) == 2
+
+
+@pytest.mark.parametrize("pre_beam", [True, False])
+def test_ngram_batch_beam_search_equal(pre_beam):
+    from espnet.nets.batch_beam_search import BatchBeamSearch
+    from espnet.nets.beam_search import BeamSearch
+    from espnet.nets.scorers.length_bonus import LengthBonus
+    from espnet.nets.scorers.ngram import NgramFullScorer, NgramPartScorer
+
+    arpa = os.path.join(root, "beam_search_test.arpa")
+    scorers = dict(
+        ngram_part=NgramPartScorer(arpa, token_list),
+        length_bonus=LengthBonus(len(token_list)),
+    )
+    weights = dict(ngram_part=1.0, length_bonus=0.5)
+    if pre_beam:
+        scorers["ngram"] = NgramFullScorer(arpa, token_list)
+        weights["ngram"] = 0.5
+    kwargs = dict(
+        beam_size=3,
+        vocab_size=len(token_list),
+        weights=weights,
+        scorers=scorers,
+        token_list=token_list,
+        sos=7,
+        eos=7,
+        pre_beam_score_key="full" if pre_beam else None,
+        pre_beam_ratio=1.0,
+    )
+    x = torch.zeros(5, 1)
+    with torch.no_grad():
+        expected = BeamSearch(**kwargs)(x=x, maxlenratio=1.0)
+        actual = BatchBeamSearch(**kwargs)(x=x, maxlenratio=1.0)
+    # NOTE: The lm is symmetric, e.g. "a e i" and "u o i",
+    # so the tied hypotheses can be different
+    assert len(expected) == len(actual)
+    for e, a in zip(expected, actual):
+        assert isclose(e.score.item(), a.score.item(), rel_tol=1e-5)